@@ -3,11 +3,14 @@
 #include "color.hpp"
 #include <vector>
 #include <string>
+#include <cstdint>
 #include <cmath>
 #include <chrono>
 #include <random>
 #include <map>
 #include <memory>
+#include <functional>
+#include <algorithm>
 
 namespace forgeworklights {
 
@@ -44,11 +47,42 @@ inline RGB rgb_from_hex(const std::string& hex) {
   }
 }
 
+// Looks up a tunable parameter of the current animation: (name, fallback) -> value
+using ParamSource = std::function<double(const std::string&, double)>;
+
+// Animations render a frame for a time value (seconds since the animation
+// started). Stateful ones (wave, runner, sparkle, drift) also advance one
+// 30 FPS step per call. All randomness comes from the animation's own
+// mt19937 through random_index()/random_unit(), which are defined here rather
+// than via <random> distributions so that a seeded animation produces the
+// same frames on every platform - and the same frames as the Python reference
+// renderer in scripts/tui/animations/render.py.
 class BaseAnimation {
 protected:
   int led_count_;
   std::vector<RGB> theme_colors_;
   std::chrono::steady_clock::time_point start_time_;
+  std::mt19937 rng_;
+  
+  // Uniform integer in [0, n) (multiply-shift of one 32-bit draw)
+  int random_index(int n) {
+    return static_cast<int>((static_cast<uint64_t>(rng_()) * static_cast<uint64_t>(n)) >> 32);
+  }
+  
+  // Uniform double in [0, 1) from two 32-bit draws (53 bits, genrand_res53)
+  double random_unit() {
+    uint32_t a = rng_() >> 5;
+    uint32_t b = rng_() >> 6;
+    return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0);
+  }
+  
+  double random_real(double lo, double hi) {
+    return lo + (hi - lo) * random_unit();
+  }
+  
+  // Re-create per-instance state that depends on the RNG (runner colors,
+  // drift speeds, ...). Called after seed(); constructors call their own.
+  virtual void restart() {}
   
   // Get elapsed time in seconds
   double get_elapsed_time() const {
@@ -78,10 +112,19 @@ protected:
     double position = led_index / std::max(1.0, static_cast<double>(led_count_ - 1));
     return get_color_at_position(position);
   }
+  
+  // Scale elapsed time by `factor` so a time-based phase stays continuous
+  // when its rate changes (e.g. new_period / old_period)
+  void rescale_elapsed(double factor) {
+    if (!(factor > 0.0) || !std::isfinite(factor)) return;
+    auto elapsed = std::chrono::duration<double>(get_elapsed_time() * factor);
+    start_time_ = std::chrono::steady_clock::now() -
+                  std::chrono::duration_cast<std::chrono::steady_clock::duration>(elapsed);
+  }
 
 public:
   BaseAnimation(int led_count, const std::vector<std::string>& theme_colors)
-    : led_count_(led_count) {
+    : led_count_(led_count), rng_(std::random_device{}()) {
     start_time_ = std::chrono::steady_clock::now();
     
     for (const auto& hex : theme_colors) {
@@ -91,11 +134,28 @@ public:
   
   virtual ~BaseAnimation() = default;
   
-  virtual std::vector<RGB> render_frame() = 0;
+  // Frame for `t` seconds into the animation
+  virtual std::vector<RGB> render_at(double t) = 0;
+  
+  // Frame for the current time
+  std::vector<RGB> render_frame() {
+    return render_at(get_elapsed_time());
+  }
+  
+  // Apply new parameter values in place, without restarting the animation.
+  // Animations without tunable parameters ignore this.
+  virtual void apply_params(const ParamSource& param) { (void)param; }
   
   void reset() {
     start_time_ = std::chrono::steady_clock::now();
   }
+  
+  // Restart from a fixed seed: the frames that follow are reproducible
+  void seed(uint32_t value) {
+    rng_.seed(value);
+    reset();
+    restart();
+  }
 };
 
 // Static - just shows the gradient
@@ -103,7 +163,8 @@ class StaticAnimation : public BaseAnimation {
 public:
   using BaseAnimation::BaseAnimation;
   
-  std::vector<RGB> render_frame() override {
+  std::vector<RGB> render_at(double t) override {
+    (void)t;
     std::vector<RGB> frame;
     for (int i = 0; i < led_count_; i++) {
       frame.push_back(get_led_base_color(i));
@@ -120,8 +181,13 @@ public:
   BreatheAnimation(int led_count, const std::vector<std::string>& theme_colors, double period = 3.0)
     : BaseAnimation(led_count, theme_colors), period_(period) {}
   
-  std::vector<RGB> render_frame() override {
-    double t = get_elapsed_time();
+  void apply_params(const ParamSource& param) override {
+    double period = param("period", period_);
+    rescale_elapsed(period / period_);
+    period_ = period;
+  }
+  
+  std::vector<RGB> render_at(double t) override {
     double phase = (t / period_) * 2 * M_PI;
     double brightness = 0.2 + 0.8 * (std::sin(phase) * 0.5 + 0.5);
     
@@ -142,14 +208,24 @@ class WaveAnimation : public BaseAnimation {
 public:
   WaveAnimation(int led_count, const std::vector<std::string>& theme_colors, double speed = 0.2)
     : BaseAnimation(led_count, theme_colors), speed_(speed), blend_factor_(0.05) {
+    WaveAnimation::restart();
+  }
+  
+  void restart() override {
     // Initialize last_frame with starting colors
+    last_frame_.clear();
     for (int i = 0; i < led_count_; i++) {
       last_frame_.push_back(get_led_base_color(i));
     }
   }
   
-  std::vector<RGB> render_frame() override {
-    double t = get_elapsed_time();
+  void apply_params(const ParamSource& param) override {
+    double speed = param("speed", speed_);
+    if (speed > 0.0 && speed_ > 0.0) rescale_elapsed(speed_ / speed);
+    speed_ = speed;
+  }
+  
+  std::vector<RGB> render_at(double t) override {
     double offset = std::fmod(t * speed_, 1.0);
     
     std::vector<RGB> frame;
@@ -179,8 +255,14 @@ public:
                   double period = 2.0, double ripple_width = 0.3)
     : BaseAnimation(led_count, theme_colors), period_(period), ripple_width_(ripple_width) {}
   
-  std::vector<RGB> render_frame() override {
-    double t = get_elapsed_time();
+  void apply_params(const ParamSource& param) override {
+    double period = param("period", period_);
+    rescale_elapsed(period / period_);
+    period_ = period;
+    ripple_width_ = param("ripple_width", ripple_width_);
+  }
+  
+  std::vector<RGB> render_at(double t) override {
     double phase = std::fmod(t / period_, 1.5);
     double center = led_count_ / 2.0;
     
@@ -238,34 +320,50 @@ class RunnerAnimation : public BaseAnimation {
     int color_index;
   };
   std::vector<Runner> runners_;
-  std::mt19937 rng_;
   
 public:
   RunnerAnimation(int led_count, const std::vector<std::string>& theme_colors,
                   double speed = 20.0, int trail_length = 8, int num_runners = 2)
     : BaseAnimation(led_count, theme_colors), speed_(speed), 
-      trail_length_(trail_length), num_runners_(num_runners),
-      rng_(std::random_device{}()) {
-    
-    std::uniform_int_distribution<int> color_dist(0, theme_colors_.size() - 1);
-    
+      trail_length_(trail_length), num_runners_(num_runners) {
+    RunnerAnimation::restart();
+  }
+  
+  void restart() override {
     // Space runners equally apart
-    for (int i = 0; i < num_runners; i++) {
-      double spacing = static_cast<double>(led_count) / num_runners;
+    runners_.clear();
+    for (int i = 0; i < num_runners_; i++) {
+      double spacing = static_cast<double>(led_count_) / num_runners_;
       double start_pos = i * spacing;
-      runners_.push_back({start_pos, color_dist(rng_)});
+      runners_.push_back({start_pos, random_index(static_cast<int>(theme_colors_.size()))});
     }
   }
   
-  std::vector<RGB> render_frame() override {
+  void apply_params(const ParamSource& param) override {
+    speed_ = param("speed", speed_);
+    trail_length_ = std::max(1, static_cast<int>(param("trail_length", trail_length_)));
+    int num_runners = std::max(1, static_cast<int>(param("num_runners", num_runners_)));
+    if (num_runners != num_runners_) {
+      // Re-space runners behind the lead runner, keeping it where it is
+      double lead = runners_.empty() ? 0.0 : runners_.front().position;
+      runners_.resize(num_runners, Runner{0.0, 0});
+      double spacing = static_cast<double>(led_count_) / num_runners;
+      for (int i = 0; i < num_runners; i++) {
+        runners_[i].position = std::fmod(lead + i * spacing, static_cast<double>(led_count_));
+        if (i >= num_runners_) runners_[i].color_index = random_index(static_cast<int>(theme_colors_.size()));
+      }
+      num_runners_ = num_runners;
+    }
+  }
+  
+  std::vector<RGB> render_at(double t) override {
+    (void)t;  // advances one 30 FPS step per call
     // Start with dim base gradient
     std::vector<RGB> frame;
     for (int i = 0; i < led_count_; i++) {
       frame.push_back(rgb_scale(get_led_base_color(i), 0.1));
     }
     
-    std::uniform_int_distribution<int> color_dist(0, theme_colors_.size() - 1);
-    
     for (auto& runner : runners_) {
       double prev_position = runner.position;
       runner.position += speed_ / 30.0; // Assume 30 FPS
@@ -273,7 +371,7 @@ public:
       // Simple continuous loop - just wrap at led_count
       if (runner.position >= static_cast<double>(led_count_)) {
         runner.position = std::fmod(runner.position, static_cast<double>(led_count_));
-        runner.color_index = color_dist(rng_); // Change color on wrap
+        runner.color_index = random_index(static_cast<int>(theme_colors_.size())); // Change color on wrap
       }
       
       RGB runner_color = theme_colors_[runner.color_index];
@@ -315,8 +413,14 @@ public:
                   double period = 2.0, int segment_size = 5)
     : BaseAnimation(led_count, theme_colors), period_(period), segment_size_(segment_size) {}
   
-  std::vector<RGB> render_frame() override {
-    double t = get_elapsed_time();
+  void apply_params(const ParamSource& param) override {
+    double period = param("period", period_);
+    rescale_elapsed(period / period_);
+    period_ = period;
+    segment_size_ = std::max(1, static_cast<int>(param("segment_size", segment_size_)));
+  }
+  
+  std::vector<RGB> render_at(double t) override {
     double phase = (t / period_) * 2 * M_PI;
     double max_pos = std::max(0, led_count_ - segment_size_);
     double position = (std::sin(phase) * 0.5 + 0.5) * max_pos;
@@ -350,25 +454,32 @@ class SparkleAnimation : public BaseAnimation {
   double sparkle_rate_;
   int sparkle_duration_;
   std::map<int, int> sparkles_; // led_index -> frames_remaining
-  std::mt19937 rng_;
   
 public:
   SparkleAnimation(int led_count, const std::vector<std::string>& theme_colors,
                    double sparkle_rate = 0.1, int sparkle_duration = 15)
     : BaseAnimation(led_count, theme_colors), sparkle_rate_(sparkle_rate),
-      sparkle_duration_(sparkle_duration), rng_(std::random_device{}()) {}
+      sparkle_duration_(sparkle_duration) {}
+  
+  void restart() override {
+    sparkles_.clear();
+  }
   
-  std::vector<RGB> render_frame() override {
+  void apply_params(const ParamSource& param) override {
+    sparkle_rate_ = param("sparkle_rate", sparkle_rate_);
+    sparkle_duration_ = std::max(1, static_cast<int>(param("sparkle_duration", sparkle_duration_)));
+  }
+  
+  std::vector<RGB> render_at(double t) override {
+    (void)t;  // advances one 30 FPS step per call
     std::vector<RGB> frame;
     for (int i = 0; i < led_count_; i++) {
       frame.push_back(rgb_scale(get_led_base_color(i), 0.4));
     }
     
-    std::uniform_real_distribution<double> dist(0.0, 1.0);
-    
     // Add new sparkles
     for (int i = 0; i < led_count_; i++) {
-      if (sparkles_.find(i) == sparkles_.end() && dist(rng_) < sparkle_rate_ / 30.0) {
+      if (sparkles_.find(i) == sparkles_.end() && random_unit() < sparkle_rate_ / 30.0) {
         sparkles_[i] = sparkle_duration_;
       }
     }
@@ -406,8 +517,14 @@ public:
                          double period = 10.0, double shift_amount = 1.0)
     : BaseAnimation(led_count, theme_colors), period_(period), shift_amount_(shift_amount) {}
   
-std::vector<RGB> render_frame() override {
-    double t = get_elapsed_time();
+  void apply_params(const ParamSource& param) override {
+    double period = param("period", period_);
+    rescale_elapsed(period / period_);
+    period_ = period;
+    shift_amount_ = param("shift_amount", shift_amount_);
+  }
+  
+  std::vector<RGB> render_at(double t) override {
     // Create continuous cycling shift (0.0 to shift_amount_)
     double shift = std::fmod(t / period_, 1.0) * shift_amount_;
     
@@ -470,31 +587,44 @@ class DriftAnimation : public BaseAnimation {
   };
   
   std::vector<LEDState> led_states_;
+  double min_speed_;
+  double max_speed_;
   double twinkle_intensity_;
-  std::mt19937 rng_;
   
 public:
   DriftAnimation(int led_count, const std::vector<std::string>& theme_colors, 
                  double min_speed = 0.3, double max_speed = 10.0, double twinkle = 0.0)
-    : BaseAnimation(led_count, theme_colors), twinkle_intensity_(twinkle), rng_(std::random_device{}()) {
-    
-    std::uniform_real_distribution<double> position_dist(0.0, 1.0);
-    // Convert seconds to positions per second (inverse)
-    std::uniform_real_distribution<double> speed_dist(1.0 / max_speed, 1.0 / min_speed);
-    std::uniform_real_distribution<double> phase_dist(0.0, 2.0 * M_PI);
-    
+    : BaseAnimation(led_count, theme_colors), min_speed_(min_speed), max_speed_(max_speed),
+      twinkle_intensity_(twinkle) {
+    DriftAnimation::restart();
+  }
+  
+  void restart() override {
     // Initialize each LED with random starting position, speed, and twinkle phase
+    // (speeds: seconds per cycle converted to positions per second)
+    led_states_.clear();
     for (int i = 0; i < led_count_; i++) {
-      led_states_.push_back({
-        position_dist(rng_),
-        speed_dist(rng_),
-        phase_dist(rng_)
-      });
+      LEDState state;
+      state.gradient_position = random_unit();
+      state.speed = random_real(1.0 / max_speed_, 1.0 / min_speed_);
+      state.twinkle_phase = random_real(0.0, 2.0 * M_PI);
+      led_states_.push_back(state);
+    }
+  }
+  
+  void apply_params(const ParamSource& param) override {
+    twinkle_intensity_ = param("twinkle", twinkle_intensity_);
+    double min_speed = param("min_speed", min_speed_);
+    double max_speed = param("max_speed", max_speed_);
+    if (min_speed != min_speed_ || max_speed != max_speed_) {
+      // Only speeds are redrawn; positions carry on from where they are
+      for (auto& state : led_states_) state.speed = random_real(1.0 / max_speed, 1.0 / min_speed);
+      min_speed_ = min_speed;
+      max_speed_ = max_speed;
     }
   }
   
-  std::vector<RGB> render_frame() override {
-    double t = get_elapsed_time();
+  std::vector<RGB> render_at(double t) override {
     std::vector<RGB> frame;
     
     for (int i = 0; i < led_count_; i++) {
@@ -521,4 +651,51 @@ public:
   }
 };
 
+// Theme colors used when no theme gradient is available
+inline const std::vector<std::string>& fallback_theme_colors() {
+  static const std::vector<std::string> colors = {
+    "#8a8a8d", "#948c81", "#9e8d76", "#a88f6b", "#b29160", "#bc9356",
+    "#c6954b", "#d09740", "#da9936", "#e49b2b", "#ee9d20", "#f29918",
+    "#ed9214", "#e88a11", "#e4820d", "#df7a0f", "#da7211", "#d66a13",
+    "#d16214", "#cd5a16", "#c85218", "#c3491a", "#bf411c", "#ba391e"};
+  return colors;
+}
+
+// Create an animation by name (unknown names give static); `param` supplies
+// its tunable parameters, falling back to the defaults listed here
+inline std::unique_ptr<BaseAnimation> make_animation(const std::string& name, int led_count,
+                                                     const std::vector<std::string>& theme_colors,
+                                                     const ParamSource& param) {
+  if (name == "breathe") {
+    return std::make_unique<BreatheAnimation>(led_count, theme_colors, param("period", 3.0));
+  } else if (name == "wave") {
+    return std::make_unique<WaveAnimation>(led_count, theme_colors, param("speed", 0.5));
+  } else if (name == "ripple") {
+    return std::make_unique<RippleAnimation>(led_count, theme_colors,
+                                             param("period", 2.0), param("ripple_width", 0.3));
+  } else if (name == "runner") {
+    double speed = param("speed", 20.0);
+    int trail_length = static_cast<int>(param("trail_length", 8.0));
+    int num_runners = static_cast<int>(param("num_runners", 2.0));
+    return std::make_unique<RunnerAnimation>(led_count, theme_colors, speed, trail_length, num_runners);
+  } else if (name == "bounce") {
+    double period = param("period", 2.0);
+    int segment_size = static_cast<int>(param("segment_size", 5.0));
+    return std::make_unique<BounceAnimation>(led_count, theme_colors, period, segment_size);
+  } else if (name == "sparkle") {
+    double sparkle_rate = param("sparkle_rate", 0.1);
+    int sparkle_duration = static_cast<int>(param("sparkle_duration", 15.0));
+    return std::make_unique<SparkleAnimation>(led_count, theme_colors, sparkle_rate, sparkle_duration);
+  } else if (name == "gradient-shift") {
+    return std::make_unique<GradientShiftAnimation>(led_count, theme_colors,
+                                                    param("period", 10.0), param("shift_amount", 1.0));
+  } else if (name == "drift") {
+    double min_speed = param("min_speed", 0.3);
+    double max_speed = param("max_speed", 10.0);
+    double twinkle = param("twinkle", 0.0);
+    return std::make_unique<DriftAnimation>(led_count, theme_colors, min_speed, max_speed, twinkle);
+  }
+  return std::make_unique<StaticAnimation>(led_count, theme_colors);
+}
+
 } // namespace forgeworklights
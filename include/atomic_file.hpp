@@ -0,0 +1,28 @@
+#pragma once
+#include <string>
+
+namespace forgeworklights {
+
+// Crash-safe replacement of a shared config/state file: writes to a temp
+// file in the same directory (".fwl-XXXXXX.tmp"), fsyncs it and renames it
+// over `path`. Readers see either the old or the new contents, never a
+// truncated file. Existing permissions are kept (0644 for new files).
+// Returns false (and leaves the target untouched) on any error.
+bool atomic_write_file(const std::string& path, const std::string& contents);
+
+// Advisory fcntl/flock lock shared with the Python tools
+// (tui.utils.atomic_file): locks ~/.cache/forgeworklights/locks/<name>.lock,
+// where <name> is the file name of `path`. Hold one around read-modify-write
+// cycles. Released on destruction.
+class FileLock {
+public:
+  explicit FileLock(const std::string& path);
+  ~FileLock();
+  FileLock(const FileLock&) = delete;
+  FileLock& operator=(const FileLock&) = delete;
+  bool locked() const { return fd_ >= 0; }
+private:
+  int fd_ = -1;
+};
+
+}
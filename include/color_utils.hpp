@@ -1,4 +1,5 @@
 #pragma once
+#include <string>
 #include <vector>
 #include "color.hpp"
 
@@ -16,4 +17,21 @@ struct Gamma {
 void apply_gamma_brightness_safety(std::vector<RGB>& leds, const Gamma& g, 
                                    double brightness, bool safety_enabled);
 
+// Color temperature (white point) in kelvin: NEUTRAL_TEMPERATURE leaves
+// colors as they are, lower values warm them (less blue, then less green)
+constexpr double NEUTRAL_TEMPERATURE = 6500.0;
+constexpr double MIN_TEMPERATURE = 1000.0;
+
+// Per-channel gains (0-1) for a white point, relative to NEUTRAL_TEMPERATURE
+void white_point_gains(double kelvin, double gains[3]);
+
+// Scale colors by the white point's gains (before gamma and brightness)
+void apply_white_point(std::vector<RGB>& leds, double kelvin);
+
+// Expand gradient control points to `length` evenly spaced colors.
+// mode: "srgb" (interpolate 0-255 values), "linear" (linear light) or
+// "oklab" (perceptual); unknown modes fall back to "srgb".
+std::vector<RGB> resample_gradient(const std::vector<RGB>& stops, int length,
+                                   const std::string& mode = "srgb");
+
 }
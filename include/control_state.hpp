@@ -0,0 +1,61 @@
+#pragma once
+#include "color.hpp"
+#include <cstdint>
+#include <functional>
+#include <map>
+#include <optional>
+#include <string>
+#include <vector>
+
+namespace forgeworklights {
+
+// Consolidated LED control document (~/.config/forgeworklights/state.json).
+//
+// Optional replacement for the separate led-theme, brightness, animation and
+// animation-params.json files: when state.json exists it is authoritative and
+// every change is a single atomic write (one inotify wakeup) that bumps
+// `version`. When it does not exist, the legacy files are used as before.
+// `forgeworklights state migrate` creates it from the legacy files and
+// `forgeworklights state off` writes them back and removes it.
+struct ControlState {
+  using AnimationParams = std::map<std::string, std::map<std::string, double>>;
+
+  uint64_t version = 0;
+  std::string led_theme = "match";
+  double brightness = 1.0;
+  // White point in kelvin (see apply_white_point); 6500 leaves colors as they are
+  double temperature = 6500.0;
+  std::string animation = "static";
+  AnimationParams animation_params;
+  // Temporary colors shown while led_theme == "__preview__" (theme creator)
+  std::vector<RGB> preview_colors;
+
+  std::optional<double> param(const std::string& anim, const std::string& name) const;
+
+  std::string to_json() const;
+  static std::optional<ControlState> from_json(const std::string& text);
+
+  // Load from `path`; nullopt if missing or invalid
+  static std::optional<ControlState> load(const std::string& path);
+
+  // Parse the legacy animation-params.json in `config_dir` (empty if missing)
+  static AnimationParams legacy_params(const std::string& config_dir);
+
+  // Assemble from the legacy per-setting files in `config_dir`
+  static ControlState from_legacy(const std::string& config_dir, double default_brightness);
+
+  // Write the settings back out as legacy files in `config_dir`
+  bool write_legacy(const std::string& config_dir) const;
+};
+
+// Path of the control document for a config dir
+std::string control_state_path(const std::string& config_dir);
+
+// Locked read-modify-write of the control document: `mutate` edits the
+// current state, version is bumped and the result written atomically.
+// Returns the new state, or nullopt if the document does not exist or the
+// write failed.
+std::optional<ControlState> update_control_state(const std::string& config_dir,
+                                                 const std::function<void(ControlState&)>& mutate);
+
+}
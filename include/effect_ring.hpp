@@ -0,0 +1,87 @@
+#pragma once
+#include "animations.hpp"
+#include "color.hpp"
+#include <chrono>
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <optional>
+#include <string>
+#include <sys/types.h>
+#include <vector>
+
+namespace forgeworklights {
+
+// Shared-memory frame ring that external effects (the Python tui.effects
+// SDK) fill and the daemon drains: single producer, single consumer, no
+// locks. The producer creates the file and replaces it on every start (new
+// inode); the daemon maps it read-write to advance its read index.
+//
+// Layout (little-endian, 64-byte header followed by the slots):
+//   char[4]  magic "FWLR"
+//   u16      version (1)
+//   u16      header size
+//   u32      led_count
+//   u32      slot count
+//   u64      head - frames published (producer)
+//   u64      tail - frames consumed (consumer)
+//   u64      dropped - frames overwritten before they were read (producer)
+//   u32      producer pid
+//   u32      reserved
+//   u64[2]   reserved
+//   slots: u64 stamp + led_count * 3 bytes (R, G, B), padded to 8 bytes
+//
+// Frame n goes to slot n % slots. The producer zeroes the slot's stamp,
+// writes the pixels, stores stamp n + 1 and then head n + 1. It waits for
+// room while the ring is full (backpressure) but gives up after one frame
+// period and overwrites the oldest unread frame (drop-oldest), so a
+// consumer that stalls or is not running never blocks it. The consumer
+// takes frames in order, skips ahead when head - tail exceeds the slot
+// count, and only accepts a slot whose stamp reads n + 1 before and after
+// copying it.
+class EffectRing {
+public:
+  // Map `path` if it is a ring for `led_count` LEDs; nullptr otherwise
+  static std::unique_ptr<EffectRing> open(const std::string& path, int led_count);
+  ~EffectRing();
+  EffectRing(const EffectRing&) = delete;
+  EffectRing& operator=(const EffectRing&) = delete;
+
+  // Oldest unread frame, if any
+  std::optional<std::vector<RGB>> pop();
+  // Whether the process that created the ring is still running
+  bool producer_alive() const;
+  ino_t inode() const { return inode_; }
+
+private:
+  EffectRing(uint8_t* data, size_t length, int led_count, uint32_t slots, ino_t inode);
+
+  uint8_t* data_;
+  size_t length_;
+  int led_count_;
+  uint32_t slots_;
+  size_t slot_size_;
+  ino_t inode_;
+};
+
+// $XDG_RUNTIME_DIR/forgeworklights/effect.ring, else ~/.cache/forgeworklights/effect.ring
+std::string effect_ring_path();
+
+// The "external" animation: shows the frames an effect pushes into the
+// ring, and the theme gradient while no producer is running or it has
+// not sent a frame for a second
+class ExternalAnimation : public BaseAnimation {
+public:
+  ExternalAnimation(int led_count, const std::vector<std::string>& theme_colors);
+  std::vector<RGB> render_at(double t) override;
+
+private:
+  void reopen_if_replaced();
+
+  std::unique_ptr<EffectRing> ring_;
+  std::vector<RGB> last_frame_;
+  std::chrono::steady_clock::time_point last_frame_time_;
+  int polls_ = 0;
+};
+
+}
@@ -0,0 +1,52 @@
+#pragma once
+#include "color.hpp"
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <vector>
+
+namespace forgeworklights {
+
+// Fixed-size shared frame file the daemon publishes every LED frame to
+// (after gamma, brightness and current limiting - exactly what was sent to
+// the strip). The TUI maps it read-only (tui.frames) to mirror the strip live.
+//
+// Layout (little-endian, 32-byte header followed by the frame):
+//   char[4]  magic "FWLF"
+//   u16      version (1)
+//   u16      header size
+//   u32      led_count
+//   u32      sequence - seqlock: odd while a frame is being written,
+//            bumped to the next even value once it is complete
+//   u64      publish time (CLOCK_MONOTONIC, ns)
+//   u64      reserved
+//   led_count * 3 bytes (R, G, B)
+//
+// Readers copy the frame between two reads of an even, unchanged sequence
+// number; an unchanged sequence also means there is nothing new to draw.
+// Each daemon start replaces the file (new inode), so readers holding an
+// old mapping never see it shrink underneath them.
+class FrameFile {
+public:
+  // Create `path` for `led_count` LEDs and map it; nullptr on error
+  static std::unique_ptr<FrameFile> create(const std::string& path, int led_count);
+  ~FrameFile();
+  FrameFile(const FrameFile&) = delete;
+  FrameFile& operator=(const FrameFile&) = delete;
+
+  void publish(const std::vector<RGB>& leds);
+
+private:
+  FrameFile(uint8_t* data, size_t length, int led_count);
+
+  uint8_t* data_;
+  size_t length_;
+  int led_count_;
+  uint32_t sequence_ = 0;
+};
+
+// $XDG_RUNTIME_DIR/forgeworklights/frame.bin, else ~/.cache/forgeworklights/frame.bin
+std::string frame_file_path();
+
+}
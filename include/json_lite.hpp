@@ -0,0 +1,63 @@
+#pragma once
+#include <map>
+#include <memory>
+#include <optional>
+#include <string>
+#include <vector>
+
+namespace forgeworklights { namespace json {
+
+// Minimal JSON document model for the small control files the daemon and
+// CLI read and write (not a general-purpose library: no \u surrogate pairs
+// beyond the BMP, numbers are doubles).
+class Value {
+public:
+  enum class Type { Null, Bool, Number, String, Array, Object };
+  using Array = std::vector<Value>;
+  using Object = std::map<std::string, Value>;
+
+  Value() = default;
+  Value(bool b) : type_(Type::Bool), bool_(b) {}
+  Value(double n) : type_(Type::Number), number_(n) {}
+  Value(int n) : type_(Type::Number), number_(n) {}
+  Value(const char* s) : type_(Type::String), string_(s) {}
+  Value(std::string s) : type_(Type::String), string_(std::move(s)) {}
+  Value(Array a) : type_(Type::Array), array_(std::make_shared<Array>(std::move(a))) {}
+  Value(Object o) : type_(Type::Object), object_(std::make_shared<Object>(std::move(o))) {}
+
+  Type type() const { return type_; }
+  bool is_null() const { return type_ == Type::Null; }
+  bool is_number() const { return type_ == Type::Number; }
+  bool is_string() const { return type_ == Type::String; }
+  bool is_array() const { return type_ == Type::Array; }
+  bool is_object() const { return type_ == Type::Object; }
+
+  double as_number(double fallback = 0.0) const { return is_number() ? number_ : fallback; }
+  bool as_bool(bool fallback = false) const { return type_ == Type::Bool ? bool_ : fallback; }
+  const std::string& as_string() const;
+  const Array& as_array() const;
+  const Object& as_object() const;
+
+  // Object member lookup; returns nullptr if missing or not an object
+  const Value* find(const std::string& key) const;
+
+  std::string dump(int indent = 2) const;
+
+private:
+  void dump_to(std::string& out, int indent, int depth) const;
+
+  Type type_ = Type::Null;
+  bool bool_ = false;
+  double number_ = 0.0;
+  std::string string_;
+  std::shared_ptr<Array> array_;
+  std::shared_ptr<Object> object_;
+};
+
+// Parse a complete JSON text; nullopt on any syntax error
+std::optional<Value> parse(const std::string& text);
+
+// Read and parse a file; nullopt if missing or invalid
+std::optional<Value> parse_file(const std::string& path);
+
+} }
@@ -0,0 +1,63 @@
+#pragma once
+#include "color.hpp"
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <vector>
+
+namespace forgeworklights {
+
+// Read-only mmap view of led_themes.bin, the packed copy of the LED themes
+// database that the Python tools (tui.themes_db) write next to
+// led_themes.json whenever they write the JSON.
+//
+// Layout (little-endian):
+//   header (48 bytes)
+//     char[4]  magic "FWLB"
+//     u16      version (1)
+//     u16      header size
+//     u32      led_count the gradients were expanded for
+//     u32      theme count
+//     u64      inode, mtime (ns), size of the JSON it was built from
+//     u32      index offset
+//     u32      records offset
+//   index: one 12-byte entry per theme, sorted by key bytes
+//     u32 key offset, u16 key length, u16 reserved, u32 record offset
+//   keys: UTF-8 theme keys, back to back
+//   records: led_count * 3 bytes (R, G, B) per theme
+//
+// Lookups are a binary search over the index - nothing is parsed.
+class PackedThemes {
+public:
+  // Map `path` if it was built from the current version of `source_json`
+  // for `led_count` LEDs; nullptr if missing, stale or malformed.
+  static std::unique_ptr<PackedThemes> open(const std::string& path, const std::string& source_json,
+                                            int led_count);
+  ~PackedThemes();
+  PackedThemes(const PackedThemes&) = delete;
+  PackedThemes& operator=(const PackedThemes&) = delete;
+
+  int led_count() const { return led_count_; }
+  size_t size() const { return count_; }
+
+  // Start of a theme's led_count * 3 RGB bytes, or nullptr
+  const uint8_t* find(const std::string& key) const;
+  bool gradient(const std::string& key, std::vector<RGB>& out) const;
+  std::vector<std::string> keys() const;
+
+private:
+  PackedThemes(const uint8_t* data, size_t length, int led_count, uint32_t count, uint32_t index_offset);
+  std::string key_at(uint32_t i) const;
+
+  const uint8_t* data_;
+  size_t length_;
+  int led_count_;
+  uint32_t count_;
+  uint32_t index_offset_;
+};
+
+// led_themes.json -> led_themes.bin
+std::string packed_themes_path(const std::string& json_path);
+
+}
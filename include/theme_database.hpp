@@ -1,6 +1,10 @@
 #pragma once
 #include "color.hpp"
+#include "packed_themes.hpp"
+#include <map>
+#include <memory>
 #include <string>
+#include <tuple>
 #include <vector>
 #include <optional>
 #include <unordered_map>
@@ -9,17 +13,27 @@ namespace forgeworklights {
 
 struct ThemeColors {
   std::string name;
-  std::vector<RGB> colors; // 5 colors defining the gradient
+  std::vector<RGB> colors; // Gradient control points ("stops", or legacy expanded "colors")
+  std::string mode = "srgb"; // Interpolation space: srgb, linear or oklab
 };
 
 class ThemeDatabase {
 public:
-  // Load database from JSON file
-  bool load(const std::string& path);
+  // Load database from JSON file. With led_count > 0, a current packed
+  // sidecar (led_themes.bin) built for that length is mapped instead and the
+  // JSON is not parsed at all.
+  bool load(const std::string& path, int led_count = 0);
+  
+  // True when themes are served from the packed sidecar
+  bool packed() const { return packed_ != nullptr; }
   
   // Get colors for a theme (returns nullopt if not found)
   std::optional<ThemeColors> get(const std::string& theme_name) const;
   
+  // Theme gradient expanded to `length` colors, memoized per
+  // (theme, length, mode) until the next load (nullopt if not found)
+  std::optional<std::vector<RGB>> gradient(const std::string& theme_name, int length) const;
+  
   // Save custom colors for a theme
   bool save_custom(const std::string& theme_name, const std::vector<RGB>& colors);
   
@@ -28,7 +42,9 @@ public:
 
 private:
   std::unordered_map<std::string, ThemeColors> themes_;
+  std::unique_ptr<PackedThemes> packed_;
   std::string db_path_;
+  mutable std::map<std::tuple<std::string, int, std::string>, std::vector<RGB>> gradients_;
 };
 
 } // namespace forgeworklights
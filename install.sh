@@ -229,7 +229,7 @@ check_dependencies() {
     
     # Optional but recommended
     if ! command -v jq &> /dev/null; then
-        echo -e "${YELLOW}!${NC} jq not found (optional, for waybar integration)"
+        echo -e "${YELLOW}!${NC} jq not found (optional)"
         echo "  Install with: sudo pacman -S jq"
     else
         echo -e "${GREEN}✓${NC} jq found"
@@ -351,6 +351,10 @@ install_binaries() {
     sudo chmod 4755 /usr/local/libexec/fw_root_helper
     echo -e "${GREEN}✓${NC} Installed root helper to /usr/local/libexec/fw_root_helper (root:root 4755 setuid-root)"
     
+    # Install clip recording helper (unprivileged stand-in for the root helper)
+    sudo install -Dm755 build/fw_clip_helper /usr/local/libexec/fw_clip_helper
+    echo -e "${GREEN}✓${NC} Installed clip recording helper to /usr/local/libexec/fw_clip_helper"
+    
     # Install TUI control panel
     if [ -f scripts/options-tui.py ]; then
         sudo install -Dm755 scripts/options-tui.py /usr/local/bin/forgeworklights-menu
@@ -372,6 +376,48 @@ install_binaries() {
         echo -e "${GREEN}✓${NC} Installed theme sync script to /usr/local/bin"
     fi
     
+    # Install launcher quick switcher
+    if [ -f scripts/quick-switch.py ]; then
+        sudo install -Dm755 scripts/quick-switch.py /usr/local/bin/forgeworklights-quick
+        echo -e "${GREEN}✓${NC} Installed launcher quick switcher to /usr/local/bin"
+    fi
+    
+    # Install external effect host
+    if [ -f scripts/effect-host.py ]; then
+        sudo install -Dm755 scripts/effect-host.py /usr/local/bin/forgeworklights-effect
+        echo -e "${GREEN}✓${NC} Installed effect host to /usr/local/bin"
+    fi
+    
+    # Install Hyprland automation listener
+    if [ -f scripts/hyprland-automation.py ]; then
+        sudo install -Dm755 scripts/hyprland-automation.py /usr/local/bin/forgeworklights-hyprland
+        echo -e "${GREEN}✓${NC} Installed Hyprland automation to /usr/local/bin"
+    fi
+    
+    # Install time-of-day scheduler
+    if [ -f scripts/led-schedule.py ]; then
+        sudo install -Dm755 scripts/led-schedule.py /usr/local/bin/forgeworklights-schedule
+        echo -e "${GREEN}✓${NC} Installed scheduler to /usr/local/bin"
+    fi
+    
+    # Install spatial layout tool
+    if [ -f scripts/led-layout.py ]; then
+        sudo install -Dm755 scripts/led-layout.py /usr/local/bin/forgeworklights-layout
+        echo -e "${GREEN}✓${NC} Installed layout tool to /usr/local/bin"
+    fi
+    
+    # Install clip recorder and player
+    if [ -f scripts/led-clip.py ]; then
+        sudo install -Dm755 scripts/led-clip.py /usr/local/bin/forgeworklights-clip
+        echo -e "${GREEN}✓${NC} Installed clip tool to /usr/local/bin"
+    fi
+    
+    # Install Waybar status emitter
+    if [ -f scripts/waybar-status.py ]; then
+        sudo install -Dm755 scripts/waybar-status.py /usr/local/bin/forgeworklights-waybar
+        echo -e "${GREEN}✓${NC} Installed Waybar status emitter to /usr/local/bin"
+    fi
+    
     # Install floating TUI launcher
     if [ -f scripts/launch-tui-floating.sh ]; then
         sudo install -Dm755 scripts/launch-tui-floating.sh /usr/local/bin/forgeworklights-menu-floating
@@ -387,6 +433,18 @@ install_binaries() {
         echo -e "${GREEN}✓${NC} Installed config to ~/.config/forgeworklights/config.toml"
     fi
 
+    # Sample Hyprland automation rules (copy to automation.toml to use them)
+    cp config/automation.toml.sample ~/.config/forgeworklights/automation.toml.sample
+    # Sample time-of-day schedule (copy to schedule.toml to use it)
+    cp config/schedule.toml.sample ~/.config/forgeworklights/schedule.toml.sample
+    # Sample layer stack of the Layered animation (copy to layers.json to change it)
+    cp config/layers.json.sample ~/.config/forgeworklights/layers.json.sample
+    # LED layout of the Top_Plate_LED_Mount print (regenerate with forgeworklights-layout for others)
+    if [ ! -f ~/.config/forgeworklights/layout.json ]; then
+        cp config/layout.json ~/.config/forgeworklights/layout.json
+        echo -e "${GREEN}✓${NC} Installed LED layout to ~/.config/forgeworklights/layout.json"
+    fi
+
     # Install LED theme database (always update user copy)
     cp config/led_themes.json ~/.config/forgeworklights/led_themes.json
     echo -e "${GREEN}✓${NC} Installed LED theme database to ~/.config/forgeworklights/led_themes.json"
@@ -490,9 +548,8 @@ try:
     
     config["custom/forgework-lights"] = {
         "format": " 󰛨 ",
-        "tooltip-format": "Lights: {}",
-        "exec": 'jq -r '"'"'.theme // "Off"'"'"' ~/.cache/forgeworklights/state.json 2>/dev/null || echo "Off"',
-        "interval": 2,
+        "exec": "/usr/local/bin/forgeworklights-waybar",
+        "return-type": "json",
         "on-click": "/usr/local/bin/forgeworklights-menu-floating"
     }
     
@@ -673,6 +730,8 @@ main() {
         echo "  0  Turn LEDs off"
         echo "  →  Next animation"
         echo "  ←  Previous animation"
+        echo "  T  Pick a theme from your launcher"
+        echo "  A  Pick an animation from your launcher"
         echo "Edit: ~/.config/forgeworklights/hyprland-bindings.conf"
     fi
 }
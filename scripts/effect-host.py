@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights external effect host.
+
+This script is installed as forgeworklights-effect and delegates to the
+shared tui.effects.host module, e.g.
+
+    forgeworklights-effect run ~/.config/forgeworklights/effects/rainbow.py
+"""
+
+import sys
+
+from tui.effects.host import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
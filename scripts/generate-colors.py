@@ -1,29 +1,47 @@
 #!/usr/bin/env python3
 """
-Generate 22-color gradients for each theme in themes.json
-Interpolates smoothly across the original 3-5 colors to create LED-specific colors
+Gradient tool for the LED themes database
+
+With three colors: print the gradient for the configured strip length
+(led_count in config.toml, 22 by default), one color per line.
+
+Without colors: convert every theme in led_themes.json to control-point form
+("stops" + "mode", see tui.themes_db), dropping the pre-expanded "colors"
+arrays older versions stored. --mode= also sets every theme's mode.
 """
 
-import json
 import sys
 from pathlib import Path
 
 # Import shared utilities and constants
 sys.path.insert(0, str(Path(__file__).parent))
-from tui.utils.colors import generate_gradient
+from tui.utils.colors import GRADIENT_MODES, generate_gradient
+from tui import themes_db
 from tui.constants import THEMES_DB_PATH
+from tui.utils.atomic_file import atomic_write_json, file_lock, read_json
 
 def main():
     
+    # Optional interpolation space: --mode=srgb (default), linear or oklab
+    args = sys.argv[1:]
+    mode = None
+    for arg in list(args):
+        if arg.startswith("--mode="):
+            mode = arg.split("=", 1)[1]
+            args.remove(arg)
+    if mode is not None and mode not in GRADIENT_MODES:
+        print(f"Error: unknown mode '{mode}' (choose from {', '.join(GRADIENT_MODES)})", file=sys.stderr)
+        return 1
+    
     # Check if called with command-line colors (for custom theme creation)
-    if len(sys.argv) > 1:
-        # Mode: Generate 22 colors from 3 input colors and output to stdout
-        if len(sys.argv) != 4:
-            print("Usage: generate-colors.py <color1> <color2> <color3>", file=sys.stderr)
+    if args:
+        # Mode: Expand 3 input colors for the strip and output to stdout
+        if len(args) != 3:
+            print("Usage: generate-colors.py [--mode=srgb|linear|oklab] [<color1> <color2> <color3>]", file=sys.stderr)
             return 1
         
-        input_colors = sys.argv[1:4]
-        gradient = generate_gradient(input_colors, 22)
+        input_colors = args
+        gradient = generate_gradient(input_colors, themes_db.led_count(), mode or themes_db.DEFAULT_MODE)
         
         # Output each color on its own line for easy parsing
         for color in gradient:
@@ -38,33 +56,32 @@ def main():
         print(f"Error: {themes_path} not found")
         return 1
     
-    # Load existing themes
-    with open(themes_path, 'r') as f:
-        data = json.load(f)
+    # Hold the database lock so the TUI and sync CLI can't interleave writes
+    with file_lock(themes_path):
+        # Load existing themes
+        data, _gen = read_json(themes_path)
     
-    if "themes" not in data:
-        print("Error: Invalid themes.json format")
-        return 1
+        if not isinstance(data, dict) or "themes" not in data:
+            print("Error: Invalid themes.json format")
+            return 1
     
-    # Generate 22 colors for each theme
-    updated_count = 0
-    for theme_key, theme_data in data["themes"].items():
-        if "colors" in theme_data and theme_data["colors"]:
-            original_colors = theme_data["colors"]
-            original_count = len(original_colors)
-            
-            # Generate 22-color gradient
-            new_colors = generate_gradient(original_colors, 22)
-            theme_data["colors"] = new_colors
-            
-            print(f"✓ {theme_key}: {original_count} → 22 colors")
+        # Store control points only; gradients are expanded on demand
+        updated_count = 0
+        for theme_key, theme_data in data["themes"].items():
+            stops = themes_db.stops(theme_data)
+            if not stops:
+                continue
+            theme_mode = mode or themes_db.mode(theme_data)
+            theme_data.pop("colors", None)
+            theme_data.update(themes_db.make_entry(theme_data.get("name", theme_key), stops, theme_mode))
+            print(f"✓ {theme_key}: {len(stops)} stops ({theme_mode})")
             updated_count += 1
     
-    # Save updated LED themes database
-    with open(themes_path, 'w') as f:
-        json.dump(data, f, indent=2)
+        # Save updated LED themes database and its packed copy
+        gen = atomic_write_json(themes_path, data)
+        themes_db.write_packed(data, gen, themes_path)
     
-    print(f"\n✓ Updated {updated_count} themes with 22-color gradients")
+    print(f"\n✓ Updated {updated_count} themes")
     print(f"✓ Saved to: {themes_path}")
     return 0
 
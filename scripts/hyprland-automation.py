@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights Hyprland automation.
+
+This script is installed as forgeworklights-hyprland and delegates to the
+shared tui.hyprland module; start it from Hyprland with
+`exec-once = forgeworklights-hyprland` and put rules in
+~/.config/forgeworklights/automation.toml.
+"""
+
+import sys
+
+from tui.hyprland import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights animation clip tool.
+
+This script is installed as forgeworklights-clip and delegates to the
+shared tui.clip module: record what the daemon sends, bake effects into
+clips offline, and play clips back.
+"""
+
+import sys
+
+from tui.clip import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
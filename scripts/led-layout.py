@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights spatial layout tool.
+
+This script is installed as forgeworklights-layout and delegates to the
+shared tui.layout module; it writes ~/.config/forgeworklights/layout.json
+from a mount model under "3D Models" or from a list of points.
+"""
+
+import sys
+
+from tui.layout import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
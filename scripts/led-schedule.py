@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights time-of-day scheduler.
+
+This script is installed as forgeworklights-schedule and delegates to the
+shared tui.scheduler module; start it with the session (e.g.
+`exec-once = forgeworklights-schedule`) and put rules in
+~/.config/forgeworklights/schedule.toml.
+"""
+
+import sys
+
+from tui.scheduler import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
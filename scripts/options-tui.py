@@ -2,15 +2,47 @@
 """
 ForgeworkLights TUI Control Panel
 BTOP-style interface for controlling the ARGB daemon
+
+    forgeworklights-menu            attach to the resident panel if one is
+                                    running, otherwise start the TUI
+    forgeworklights-menu --server   keep a resident panel warm in the
+                                    background (see tui.resident)
+    forgeworklights-menu --clip=FILE
+                                    start a TUI whose LED mirror loops an
+                                    animation clip (see tui.clip)
 """
 
-from tui import ForgeworkLightsTUI
+import sys
+
+from tui import resident
 
 
 def main():
-    app = ForgeworkLightsTUI()
+    if "--server" in sys.argv[1:]:
+        return resident.serve()
+
+    clip = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--clip="):
+            from tui.clip import Clip
+            try:
+                clip = Clip(arg.split("=", 1)[1])
+            except (OSError, ValueError) as e:
+                print(f"[clip] {e}", file=sys.stderr)
+                return 1
+
+    # Attaching needs nothing beyond the standard library; Textual is only
+    # imported for a cold start. The resident panel mirrors the daemon, so
+    # a clip gets a TUI of its own
+    attached = resident.attach() if clip is None else None
+    if attached is not None:
+        return attached
+
+    from tui import ForgeworkLightsTUI
+    app = ForgeworkLightsTUI(clip=clip)
     app.run()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
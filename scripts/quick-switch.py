@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights launcher quick switcher.
+
+This script is installed as forgeworklights-quick and delegates to the
+shared tui.quick module, e.g. from a keybinding:
+
+    forgeworklights-quick menu themes --launcher=rofi
+"""
+
+import sys
+
+from tui.quick import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
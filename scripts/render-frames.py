@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Print seeded animation frames from the Python reference renderer
+
+Same arguments and output as `forgeworklights render`, so the two can be
+diffed (tests/test_render_golden.sh):
+
+    render-frames.py <animation> [--seed=N] [--frames=N] [--fps=N] [--leds=N]
+                     [param=value ...] [#rrggbb ...]
+
+One line per frame, the LEDs as concatenated rrggbb. Requires NumPy.
+"""
+
+import sys
+from pathlib import Path
+
+# Import shared utilities and constants
+sys.path.insert(0, str(Path(__file__).parent))
+from tui.animations import ANIMATIONS
+from tui.animations.render import FALLBACK_COLORS, frame_times, make_animation
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ANIMATIONS:
+        print(f"Usage: render-frames.py <{'|'.join(ANIMATIONS)}> [--seed=N] [--frames=N] [--fps=N] "
+              "[--leds=N] [param=value ...] [colors ...]", file=sys.stderr)
+        return 1
+
+    name = args[0]
+    seed, frames, fps, leds = 0, 30, 30.0, 22
+    params = {}
+    colors = []
+    try:
+        for arg in args[1:]:
+            if arg.startswith("--seed="):
+                seed = int(arg.split("=", 1)[1])
+            elif arg.startswith("--frames="):
+                frames = int(arg.split("=", 1)[1])
+            elif arg.startswith("--fps="):
+                fps = float(arg.split("=", 1)[1])
+            elif arg.startswith("--leds="):
+                leds = int(arg.split("=", 1)[1])
+            elif "=" in arg:
+                key, value = arg.split("=", 1)
+                params[key] = float(value)
+            else:
+                colors.append(arg)
+    except ValueError:
+        print("Invalid render argument", file=sys.stderr)
+        return 1
+    if frames < 0 or leds < 1 or not fps > 0:
+        print("Invalid render argument", file=sys.stderr)
+        return 1
+
+    animation = make_animation(name, colors or FALLBACK_COLORS, leds, params, seed)
+    rendered = animation.render(frame_times(frames, fps))
+    sys.stdout.write("".join(frame.tobytes().hex() + "\n" for frame in rendered))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
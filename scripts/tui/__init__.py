@@ -1,7 +1,16 @@
 """
 ForgeworkLights TUI Package
+
+The app is imported on first use so the command-line tools that share this
+package (sync-themes, forgeworklights-waybar, ...) don't load Textual.
 """
-from .app import ForgeworkLightsTUI
 
 __all__ = ["ForgeworkLightsTUI"]
 __version__ = "1.0.0"
+
+
+def __getattr__(name):
+    if name == "ForgeworkLightsTUI":
+        from .app import ForgeworkLightsTUI
+        return ForgeworkLightsTUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,11 @@
 """
 LED Animations Module
 
-Animation execution is now handled by the C++ daemon.
+Animation execution is handled by the C++ daemon.
 This module provides the list of available animations and their configurable parameters.
+The render submodule is a NumPy reference renderer that reproduces the daemon's
+frames exactly (for previews and golden-frame tests); it is not imported here
+because NumPy is optional.
 """
 
 # Animation definitions with parameters
@@ -77,6 +80,24 @@ ANIMATIONS = {
             ("max_speed", "Max Speed", 1.0, 20.0, 10.0, 1.0, "seconds"),
             ("twinkle", "Twinkle", 0.0, 1.0, 0.0, 0.1, "intensity")
         ]
+    },
+    # Other animations stacked with blend modes by forgeworklights-effect layered
+    # (see tui.effects.layered and layers.json); the sliders scale each layer's opacity
+    "layered": {
+        "name": "Layered",
+        "description": "Stacked animations",
+        "params": [
+            ("opacity_1", "Layer 1", 0.0, 1.0, 1.0, 0.05, "opacity"),
+            ("opacity_2", "Layer 2", 0.0, 1.0, 1.0, 0.05, "opacity"),
+            ("opacity_3", "Layer 3", 0.0, 1.0, 1.0, 0.05, "opacity")
+        ]
+    },
+    # Frames from an external effect process (see tui.effects); the daemon
+    # shows the plain gradient while none is running
+    "external": {
+        "name": "External",
+        "description": "Effect plugin frames",
+        "params": []
     }
 }
 
@@ -0,0 +1,344 @@
+"""
+Reference renderer for the daemon's animations
+
+A NumPy port of include/animations.hpp that produces the same frames as the
+daemon, byte for byte, given the same theme colors, parameters, seed and
+frame times. It drives previews in the TUI (no hardware or daemon needed)
+and, together with `forgeworklights render`, the golden-frame comparison in
+tests/test_render_golden.sh.
+
+Conventions shared with the C++ side:
+
+- render(times) returns one frame per time value (seconds since start).
+  Stateless animations are evaluated for all times at once; stateful ones
+  (wave, runner, sparkle, drift) advance one 30 FPS step per frame, exactly
+  like one render_at() call in the daemon.
+- Each animation owns an MT19937 generator seeded like std::mt19937::seed(),
+  and draws from it in the same order as the daemon (see random_index /
+  random_unit in animations.hpp).
+- Colors are truncated to integers wherever the daemon casts to uint8, so
+  intermediate values match too.
+
+Requires NumPy (an optional dependency of the TUI).
+"""
+import math
+import random
+
+import numpy as np
+
+from . import ANIMATIONS
+from ..constants import DEFAULT_LED_COUNT
+from ..utils.colors import hex_to_rgb
+
+# The daemon's frame rate; stateful animations assume one step per frame
+FRAME_RATE = 30.0
+
+# Theme colors the daemon uses when no theme gradient is available
+FALLBACK_COLORS = (
+    "#8a8a8d", "#948c81", "#9e8d76", "#a88f6b", "#b29160", "#bc9356",
+    "#c6954b", "#d09740", "#da9936", "#e49b2b", "#ee9d20", "#f29918",
+    "#ed9214", "#e88a11", "#e4820d", "#df7a0f", "#da7211", "#d66a13",
+    "#d16214", "#cd5a16", "#c85218", "#c3491a", "#bf411c", "#ba391e",
+)
+
+
+def frame_times(count: int, fps: float = FRAME_RATE) -> np.ndarray:
+    """Times of the first count frames at fps (frame k at k / fps)."""
+    return np.arange(count) / fps
+
+
+def _mt19937(seed: int) -> random.Random:
+    """random.Random (also MT19937) in the state std::mt19937(seed) starts in."""
+    state = [seed & 0xFFFFFFFF]
+    for i in range(1, 624):
+        prev = state[-1]
+        state.append((1812433253 * (prev ^ (prev >> 30)) + i) & 0xFFFFFFFF)
+    rng = random.Random()
+    rng.setstate((3, tuple(state) + (624,), None))
+    return rng
+
+
+class Animation:
+    """Base class: theme colors, gradient lookup and the seeded generator."""
+
+    def __init__(self, led_count: int, colors, params: dict, seed: int):
+        self.led_count = led_count
+        self.colors = np.array([hex_to_rgb(c) for c in colors], dtype=np.float64)
+        self.params = params
+        self._rng = _mt19937(seed)
+        self.base_position = np.arange(led_count) / max(1.0, float(led_count - 1))
+        self.base = self.color_at(self.base_position)
+
+    # --- Random draws (animations.hpp: random_index / random_unit / random_real) ---
+
+    def random_index(self, n: int) -> int:
+        return (self._rng.getrandbits(32) * n) >> 32
+
+    def random_unit(self) -> float:
+        # random.random() is genrand_res53, the same formula as the daemon
+        return self._rng.random()
+
+    def random_real(self, lo: float, hi: float) -> float:
+        return lo + (hi - lo) * self.random_unit()
+
+    # --- Color helpers (all return integer-valued float arrays) ---
+
+    def color_at(self, position) -> np.ndarray:
+        """Gradient color at position(s) 0.0-1.0 -> (..., 3)"""
+        position = np.clip(np.asarray(position, dtype=np.float64), 0.0, 1.0)
+        num_colors = len(self.colors)
+        color_pos = position * (num_colors - 1)
+        idx = color_pos.astype(np.intp)
+        frac = color_pos - idx
+        if num_colors < 2:
+            return np.broadcast_to(self.colors[-1], position.shape + (3,)).copy()
+        last = idx >= num_colors - 1
+        idx = np.minimum(idx, num_colors - 2)
+        color = interpolate(self.colors[idx], self.colors[idx + 1], frac)
+        color[last] = self.colors[-1]
+        return color
+
+    def render(self, times) -> np.ndarray:
+        """Frames for the given times -> (frames, led_count, 3) uint8"""
+        times = np.asarray(times, dtype=np.float64).reshape(-1)
+        return self._render(times).astype(np.uint8)
+
+    def render_at(self, t: float) -> np.ndarray:
+        """One frame -> (led_count, 3) uint8"""
+        return self.render([t])[0]
+
+    def _render(self, times: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+def interpolate(c1, c2, t) -> np.ndarray:
+    """rgb_interpolate: blend colors by t (clamped to 0-1), truncated"""
+    t = np.clip(np.asarray(t, dtype=np.float64), 0.0, 1.0)[..., None]
+    return np.trunc(c1 + (c2 - c1) * t)
+
+
+def scale(color, factor) -> np.ndarray:
+    """rgb_scale: color * factor, truncated"""
+    return np.trunc(color * np.asarray(factor, dtype=np.float64)[..., None])
+
+
+class Static(Animation):
+    def _render(self, times):
+        return np.broadcast_to(self.base, (len(times),) + self.base.shape)
+
+
+class Breathe(Animation):
+    def _render(self, times):
+        phase = (times / self.params["period"]) * 2 * np.pi
+        brightness = 0.2 + 0.8 * (np.sin(phase) * 0.5 + 0.5)
+        return scale(self.base[None], brightness[:, None])
+
+
+class Wave(Animation):
+    blend_factor = 0.05
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._last = self.base.copy()
+
+    def _render(self, times):
+        offset = np.fmod(times * self.params["speed"], 1.0)
+        targets = self.color_at(np.fmod(self.base_position[None] + offset[:, None], 1.0))
+        frames = np.empty_like(targets)
+        last = self._last
+        for k, target in enumerate(targets):
+            last = np.trunc(last + (target - last) * self.blend_factor)
+            frames[k] = last
+        self._last = last
+        return frames
+
+
+class Ripple(Animation):
+    def _render(self, times):
+        period, width = self.params["period"], self.params["ripple_width"]
+        phase = np.fmod(times / period, 1.5)[:, None]
+        center = self.led_count / 2.0
+        distance = np.abs(np.arange(self.led_count) - center) / center
+        ripple_position = (distance[None] - phase) / width
+
+        base_intensity = (np.cos(ripple_position * np.pi) + 1.0) / 2.0
+        # Overall cycle ramp-up (quadratic) over the first 20% of the cycle
+        cycle_ramp = phase / 0.2
+        cycle_ramp = np.where(phase < 0.2, cycle_ramp * cycle_ramp, 1.0)
+        # Gradual increase at the leading edge of the wave
+        start_factor = (ripple_position + 1.0) / 0.5
+        start_factor = np.where(
+            (ripple_position >= -1.0) & (ripple_position <= -0.5),
+            start_factor * start_factor,
+            np.where(ripple_position > -0.5, 1.0, 0.0),
+        )
+        intensity = base_intensity * start_factor * cycle_ramp
+        # Fade at the end of the cycle
+        intensity = intensity * (1.0 - np.maximum(0.0, np.minimum(1.0, (phase - 1.0) / 0.5)))
+        inside = (ripple_position >= -1.0) & (ripple_position <= 1.0)
+        intensity = np.where(inside, intensity, 0.0)
+        return scale(self.base[None], 0.3 + 0.7 * intensity)
+
+
+class Runner(Animation):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.speed = self.params["speed"]
+        self.trail_length = int(self.params["trail_length"])
+        num_runners = int(self.params["num_runners"])
+        # Space runners equally apart: [position, color index]
+        self._runners = [
+            [i * (self.led_count / num_runners), self.random_index(len(self.colors))]
+            for i in range(num_runners)
+        ]
+        offsets = np.arange(self.trail_length)
+        self._offsets = offsets
+        falloff = (self.trail_length - offsets) / self.trail_length
+        self._falloff = falloff * falloff
+
+    def _render(self, times):
+        frames = np.empty((len(times), self.led_count, 3))
+        dim = scale(self.base, 0.1)
+        for k in range(len(times)):
+            frame = dim.copy()
+            for runner in self._runners:
+                runner[0] += self.speed / 30.0
+                if runner[0] >= self.led_count:
+                    runner[0] = math.fmod(runner[0], self.led_count)
+                    runner[1] = self.random_index(len(self.colors))  # Change color on wrap
+                trail_pos = runner[0] - self._offsets
+                while (negative := trail_pos < 0).any():
+                    trail_pos[negative] += self.led_count
+                leds = trail_pos.astype(np.intp) % self.led_count
+                # Additive blending (clamped once at the end - all terms are positive)
+                np.add.at(frame, leds, scale(self.colors[runner[1]], self._falloff))
+            frames[k] = np.minimum(frame, 255)
+        return frames
+
+
+class Bounce(Animation):
+    def _render(self, times):
+        segment_size = int(self.params["segment_size"])
+        phase = (times / self.params["period"]) * 2 * np.pi
+        max_pos = float(max(0, self.led_count - segment_size))
+        position = (np.sin(phase) * 0.5 + 0.5) * max_pos
+
+        frames = np.repeat(scale(self.base, 0.2)[None], len(times), axis=0)
+        bounce_color = self.color_at(position / max(1.0, float(self.led_count - 1)))
+
+        # std::round: halves away from zero (position is never negative)
+        center = np.floor(position)
+        center = (center + (position - center >= 0.5)).astype(np.intp)
+        offsets = np.arange(segment_size)
+        segment_center = segment_size / 2.0
+        brightness = 1.0 - (np.abs(offsets - segment_center) / segment_center) * 0.5
+        colors = scale(bounce_color[:, None], brightness[None])
+
+        leds = center[:, None] + offsets[None]
+        valid = (leds >= 0) & (leds < self.led_count)
+        rows = np.broadcast_to(np.arange(len(times))[:, None], leds.shape)
+        frames[rows[valid], leds[valid]] = colors[valid]
+        return frames
+
+
+class Sparkle(Animation):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._sparkles = {}  # led_index -> frames_remaining
+
+    def _render(self, times):
+        rate = self.params["sparkle_rate"] / 30.0
+        duration = int(self.params["sparkle_duration"])
+        dim = scale(self.base, 0.4)
+        frames = np.empty((len(times), self.led_count, 3))
+        sparkles = self._sparkles
+        for k in range(len(times)):
+            frame = dim.copy()
+            # Add new sparkles (a draw only for LEDs that are not sparkling)
+            for i in range(self.led_count):
+                if i not in sparkles and self.random_unit() < rate:
+                    sparkles[i] = duration
+            for i in sorted(sparkles):
+                remaining = sparkles[i]
+                if remaining <= 0:
+                    del sparkles[i]
+                    continue
+                progress = 1.0 - remaining / duration
+                brightness = progress * 2.0 if progress < 0.5 else (1.0 - progress) * 2.0
+                frame[i] = np.trunc(self.base[i] * brightness)
+                sparkles[i] = remaining - 1
+            frames[k] = frame
+        return frames
+
+
+class GradientShift(Animation):
+    def _render(self, times):
+        shift = np.fmod(times / self.params["period"], 1.0) * self.params["shift_amount"]
+        raw = self.base_position[None] + shift[:, None]
+
+        # Past the end: wrap, blending in from the last color over 25% of the strip
+        wrapped = raw - np.floor(raw)
+        wrapped_color = self.color_at(wrapped)
+        blend = wrapped / 0.25
+        blend_in = interpolate(self.color_at(0.98), wrapped_color, blend * blend)
+        after_wrap = np.where((wrapped < 0.25)[..., None], blend_in, wrapped_color)
+
+        # Just before the end: subtle anticipation of the first color
+        color = self.color_at(raw)
+        distance_to_end = 1.0 - raw
+        blend = 1.0 - (distance_to_end / 0.1)
+        anticipate = interpolate(color, self.colors[0], blend * blend * 0.3)
+        if len(self.colors) >= 2:
+            color = np.where((distance_to_end < 0.1)[..., None], anticipate, color)
+
+        return np.where((raw >= 1.0)[..., None], after_wrap, color)
+
+
+class Drift(Animation):
+    def __init__(self, *args):
+        super().__init__(*args)
+        min_speed, max_speed = self.params["min_speed"], self.params["max_speed"]
+        states = []
+        for _ in range(self.led_count):
+            position = self.random_unit()
+            speed = self.random_real(1.0 / max_speed, 1.0 / min_speed)
+            phase = self.random_real(0.0, 2.0 * math.pi)
+            states.append((position, speed, phase))
+        self._position, self._speed, self._phase = (np.array(v) for v in zip(*states))
+
+    def _render(self, times):
+        twinkle = self.params["twinkle"]
+        frames = np.empty((len(times), self.led_count, 3))
+        step = self._speed / 30.0
+        for k, t in enumerate(times):
+            self._position = np.fmod(self._position + step, 1.0)
+            color = self.color_at(self._position)
+            if twinkle > 0.0:
+                variation = twinkle * np.sin(t * 3.0 + self._phase)
+                color = scale(color, 1.0 - twinkle * 0.5 + variation * 0.5)
+            frames[k] = color
+        return frames
+
+
+_CLASSES = {
+    "static": Static,
+    "breathe": Breathe,
+    "wave": Wave,
+    "ripple": Ripple,
+    "runner": Runner,
+    "bounce": Bounce,
+    "sparkle": Sparkle,
+    "gradient-shift": GradientShift,
+    "drift": Drift,
+}
+
+
+def make_animation(name: str, colors=FALLBACK_COLORS, led_count: int = DEFAULT_LED_COUNT,
+                   params: dict | None = None, seed: int = 0) -> Animation:
+    """Animation by name (unknown names give static), like make_animation() in
+    the daemon. Missing params take the defaults from ANIMATIONS."""
+    if name not in _CLASSES:
+        name = "static"
+    values = {param[0]: float(param[4]) for param in ANIMATIONS[name]["params"]}
+    values.update({key: float(value) for key, value in (params or {}).items()})
+    return _CLASSES[name](led_count, list(colors) or list(FALLBACK_COLORS), values, seed)
@@ -1,20 +1,18 @@
 """
 Main ForgeworkLights TUI Application
 """
-import json
-import subprocess
+import asyncio
 import sys
 import time
 from pathlib import Path
 
 from textual.app import App, ComposeResult
 from textual.containers import Container
+from textual.message import Message
 from textual.widgets import Static
+from textual.css.query import NoMatches
 from textual.timer import Timer
 from textual.worker import Worker, WorkerState
-import os
-import select
-import struct
 import traceback
 
 from .constants import (
@@ -23,13 +21,20 @@ from .constants import (
     THEMES_DB_PATH,
     THEME_SYMLINK,
     LED_THEME_FILE,
-    ANIMATION_FILE,
-    DAEMON_BINARY,
+    CONTROL_FILE,
     AUTO_REFRESH_INTERVAL,
     AETHER_THEME_DIR,
 )
 from .styles import CSS
+from .diagnostics import DiagnosticsDumper, register_cache, timed
+from .io_executor import IO
+from .effects import LAYERED_ANIMATION, start_layered
+from . import control
+from . import themes_db
+from . import swatches
 from .theme import THEME
+from .waybar import daemon_running
+from .watcher import Watcher
 from . import theme as theme_module
 from . import styles as styles_module
 from .widgets import (
@@ -39,6 +44,7 @@ from .widgets import (
     Filler,
     Spacer,
     StatusPanel,
+    LedMirror,
     ThemeSelectionPanel,
     BrightnessPanel,
     ThemeCreator,
@@ -55,19 +61,36 @@ class ForgeworkLightsTUI(App):
         ("ctrl+q", "quit", "Quit"),
     ]
     
-    def __init__(self):
+    class ClientAttached(Message):
+        """A terminal attached to the resident app (see tui.resident)"""
+    
+    class ClientDetached(Message):
+        """The attached terminal went away; the resident app keeps running"""
+    
+    def __init__(self, resident=None, clip=None):
         super().__init__()
+        # tui.resident.ResidentServer when running as forgeworklights-menu --server
+        self.resident = resident
+        # tui.clip.Clip to loop in the LED mirror (forgeworklights-menu --clip=FILE)
+        self.clip = clip
         self.state_file = STATE_FILE
         self.brightness_file = BRIGHTNESS_FILE
         self.update_timer: Timer | None = None
-        
-        self.update_timer = None
-        self.inotify_fd = None
+        self.status_timer: Timer | None = None
+        self.watcher: Watcher | None = None
         self.inotify_worker = None
         self.last_omarchy_theme = None
+        self.daemon_pid = None  # last daemon PID found, checked first next time
         self.omarchy_wd = None  # Watch descriptor for Omarchy theme directory
         self.config_wd = None   # Watch descriptor for config directory
         self.aether_wd = None   # Watch descriptor for Aether theme directory
+        
+        # SIGUSR1 diagnostics snapshots (see tui.diagnostics)
+        self._started_monotonic = time.monotonic()
+        self.diagnostics = DiagnosticsDumper(self)
+        # Caches that live in this process (the Waybar module keeps its own)
+        register_cache("gradients", themes_db.cache_stats)
+        register_cache("swatches", swatches.cache_stats)
     
     def compose(self) -> ComposeResult:
         with Container(id="main-panel"):
@@ -75,6 +98,7 @@ class ForgeworkLightsTUI(App):
             with Container(id="content-area"):
                 yield BorderTop("ForgeWorkLights")
                 yield StatusPanel(id="status-panel") 
+                yield LedMirror(clip=self.clip, paused=self.resident is not None, id="led-mirror")
                 yield BrightnessPanel(id="brightness-panel")
                 yield Spacer()
                 yield BorderMiddle("Theme Selection")
@@ -102,17 +126,25 @@ class ForgeworkLightsTUI(App):
         self._start_theme_watcher()
         
         # Start periodic status panel refresh (every 1 second when focused)
-        self.set_interval(1.0, self._periodic_status_refresh)
+        self.status_timer = self.set_interval(1.0, self._periodic_status_refresh)
+        
+        # Dump runtime diagnostics on SIGUSR1
+        self.diagnostics.install()
         
         # Focus the theme selection panel for keyboard navigation
         gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
         gradient_panel.focus()
 
     def _reload_tui_theme(self) -> None:
+        """Schedule a TUI theme reload (palette is read on the I/O executor)."""
+        self.run_worker(self._reload_tui_theme_async(), name="reload_tui_theme", group="tui-theme", exclusive=True)
+
+    @timed
+    async def _reload_tui_theme_async(self) -> None:
         """Reload theme colors and CSS so TUI updates without restart."""
         try:
             # Reload color palette from disk and update THEME in-place so existing imports see changes.
-            new_theme = theme_module.load_theme()
+            new_theme = dict(await IO.run(theme_module.load_theme))
             theme_module.THEME.clear()
             theme_module.THEME.update(new_theme)
 
@@ -138,67 +170,83 @@ class ForgeworkLightsTUI(App):
     
     def _periodic_status_refresh(self) -> None:
         """Refresh status panel periodically"""
-        status_panel = self.query_one("#status-panel", StatusPanel)
+        try:
+            status_panel = self.query_one("#status-panel", StatusPanel)
+        except NoMatches:
+            return  # shutting down
         status_panel.refresh()
+
+    def _stop_timers(self) -> None:
+        """Stop the periodic refreshes so none starts while the app shuts down"""
+        for timer in (self.update_timer, self.status_timer):
+            if timer is not None:
+                timer.stop()
+        self.update_timer = self.status_timer = None
     
-    def _refresh_daemon_status(self) -> None:
-        """Refresh only daemon status (polling - can't use inotify for process check)"""
+    def _query_daemon_status(self) -> str:
+        """Check whether the daemon process is running (runs in a worker thread)"""
         try:
-            result = subprocess.run(["pgrep", "-x", "forgeworklights"], capture_output=True)
-            daemon_status = "Running " if result.returncode == 0 else "Stopped "
-        except:
-            daemon_status = "Unknown"
-        
-        status_panel = self.query_one("#status-panel", StatusPanel)
-        status_panel.daemon_status = daemon_status
+            self.daemon_pid = daemon_running(self.daemon_pid)
+        except OSError:
+            return "Unknown"
+        return "Running " if self.daemon_pid is not None else "Stopped "
     
-    def refresh_status(self) -> None:
-        """Refresh all status info (called manually, not on timer)"""
-        print(f"[TUI] refresh_status() called", file=sys.stderr)
-        
-        # Get daemon status
+    @timed
+    async def _refresh_daemon_status(self) -> None:
+        """Refresh only daemon status (polling - can't use inotify for process check)
+
+        The /proc scan runs on its own thread, not on IO, so queued control
+        writes never wait behind it.
+        """
+        daemon_status = await asyncio.to_thread(self._query_daemon_status)
+        if not self.is_running:
+            return  # the app exited while the check was in flight
         try:
-            result = subprocess.run(["pgrep", "-x", "forgeworklights"], capture_output=True)
-            daemon_status = "Running " if result.returncode == 0 else "Stopped "
-        except:
-            daemon_status = "Unknown"
-        
-        # Get LED theme name from config file
+            status_panel = self.query_one("#status-panel", StatusPanel)
+        except NoMatches:
+            return
+        status_panel.daemon_status = daemon_status
+    
+    @staticmethod
+    def _describe_led_theme(led_theme: str | None) -> str:
+        """Status text for an led-theme value (runs on the I/O executor)"""
         theme = "None"
         try:
-            if LED_THEME_FILE.exists():
-                led_theme = LED_THEME_FILE.read_text().strip()
-                if led_theme == "match":
-                    # Show that we're matching Omarchy, with the current Omarchy theme name
-                    if THEME_SYMLINK.exists() and THEME_SYMLINK.is_symlink():
-                        omarchy_theme_dir = THEME_SYMLINK.resolve()
-                        omarchy_theme_name = omarchy_theme_dir.name.capitalize()
-                        theme = f"Match ({omarchy_theme_name})"
-                        print(f"[TUI] Status bar theme resolved: {theme}", file=sys.stderr)
-                    else:
-                        theme = "Match Omarchy"
-                else:
-                    # Show the specific LED theme
-                    theme = led_theme.capitalize()
+            if led_theme is not None and led_theme != "match":
+                # Show the specific LED theme
+                theme = led_theme.capitalize()
+            elif THEME_SYMLINK.exists() and THEME_SYMLINK.is_symlink():
+                # Matching Omarchy (explicitly or by default), with the current Omarchy theme name
+                omarchy_theme_name = THEME_SYMLINK.resolve().name.capitalize()
+                theme = f"Match ({omarchy_theme_name})"
+                print(f"[TUI] Status bar theme resolved: {theme}", file=sys.stderr)
             else:
-                # Default to matching Omarchy if no preference set
-                if THEME_SYMLINK.exists() and THEME_SYMLINK.is_symlink():
-                    omarchy_theme_dir = THEME_SYMLINK.resolve()
-                    omarchy_theme_name = omarchy_theme_dir.name.capitalize()
-                    theme = f"Match ({omarchy_theme_name})"
-                else:
-                    theme = "Match Omarchy"
+                theme = "Match Omarchy"
         except Exception as e:
             print(f"Error resolving LED theme: {e}", file=sys.stderr)
+        return theme
+    
+    def refresh_status(self) -> None:
+        """Schedule a refresh of all status info (called manually, not on timer)"""
+        self.run_worker(self._refresh_status(), name="refresh_status", group="status", exclusive=True)
+    
+    @timed
+    async def _refresh_status(self) -> None:
+        """Refresh all status info from disk without blocking the UI loop"""
+        print(f"[TUI] refresh_status() called", file=sys.stderr)
+        
+        # Get daemon status
+        daemon_status = await asyncio.to_thread(self._query_daemon_status)
+        
+        # Get LED theme name from config file (symlink is resolved off-loop too)
+        state = await IO.run(control.read_state)
+        led_theme = state["led_theme"]
+        theme = await IO.run(self._describe_led_theme, led_theme)
+        if not self.is_running:
+            return  # the app exited while the reads were in flight
         
         # Get brightness - only update display, don't override user changes
-        try:
-            if self.brightness_file.exists():
-                brightness_pct = int(float(self.brightness_file.read_text().strip()) * 100)
-            else:
-                brightness_pct = 100
-        except:
-            brightness_pct = 100
+        brightness_pct = int(state["brightness"] * 100)
         
         # Update panels - reactive watchers will trigger refresh automatically
         print(f"[TUI] ===== UPDATING STATUS PANEL =====", file=sys.stderr)
@@ -206,16 +254,20 @@ class ForgeworkLightsTUI(App):
         print(f"[TUI] Theme: {theme}", file=sys.stderr)
         print(f"[TUI] Brightness: {brightness_pct}%", file=sys.stderr)
         
-        status_panel = self.query_one("#status-panel", StatusPanel)
+        try:
+            status_panel = self.query_one("#status-panel", StatusPanel)
+            gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
+            panel = self.query_one("#brightness-panel", BrightnessPanel)
+        except NoMatches:
+            return  # the DOM is being torn down
         status_panel.daemon_status = daemon_status
         status_panel.current_theme = theme  # Changed to match theme selection panel
         status_panel.brightness_value = brightness_pct
         
-        gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
+        gradient_panel.led_theme = led_theme or "match"
         gradient_panel.current_theme = theme
         
         # Only update brightness display if not currently being adjusted by user
-        panel = self.query_one("#brightness-panel", BrightnessPanel)
         if not hasattr(self, '_brightness_adjusting') or not self._brightness_adjusting:
             panel.brightness = brightness_pct
     
@@ -223,9 +275,32 @@ class ForgeworkLightsTUI(App):
     def on_control_footer_border_control_clicked(self, message: ControlFooterBorder.ControlClicked) -> None:
         """Handle footer control clicks"""
         if message.action_id == "quit":
+            self.action_quit()
+    
+    def exit(self, *args, **kwargs) -> None:
+        """Stop the refresh timers before Textual starts tearing the DOM down"""
+        self._stop_timers()
+        super().exit(*args, **kwargs)
+    
+    def action_quit(self) -> None:
+        """Quit, or just detach the terminal when running resident"""
+        if self.resident is not None:
+            self.resident.detach()
+        else:
             self.exit()
     
+    def on_forgework_lights_tui_client_attached(self, message: ClientAttached) -> None:
+        """Repaint the whole screen for the newly attached terminal"""
+        self.refresh(layout=True)
+        self.query_one("#led-mirror", LedMirror).set_paused(False)
+        self.refresh_status()
+    
+    def on_forgework_lights_tui_client_detached(self, message: ClientDetached) -> None:
+        """Stop per-frame work nobody can see"""
+        self.query_one("#led-mirror", LedMirror).set_paused(True)
+    
     
+    @timed
     def on_brightness_panel_brightness_changed(self, message: BrightnessPanel.BrightnessChanged) -> None:
         """Handle brightness slider clicks"""
         try:
@@ -238,41 +313,30 @@ class ForgeworkLightsTUI(App):
         except Exception:
             self._brightness_adjusting = False
     
+    @timed
     def on_theme_selection_panel_theme_selected(self, message: ThemeSelectionPanel.ThemeSelected) -> None:
         """Handle theme selection"""
-        import subprocess
-        
         try:
-            # Create config dir if it doesn't exist
-            LED_THEME_FILE.parent.mkdir(parents=True, exist_ok=True)
-            
+            # One atomic write; the daemon reloads via inotify
             if message.match_omarchy:
-                # Write "match" to led-theme file to follow Omarchy theme
-                LED_THEME_FILE.write_text("match\n")
+                # "match" follows the Omarchy theme
+                IO.update_control(led_theme="match")
                 print("Set LED theme to match Omarchy", file=sys.stderr)
-                
-                # Touch the symlink to trigger daemon reload via inotify
-                if THEME_SYMLINK.exists():
-                    THEME_SYMLINK.touch()
             else:
-                # Write specific theme name to led-theme file
-                LED_THEME_FILE.write_text(f"{message.theme_name}\n")
+                IO.update_control(led_theme=message.theme_name)
                 print(f"Set LED theme to: {message.theme_name}", file=sys.stderr)
-                
-                # Touch the LED theme file to trigger daemon reload via inotify
-                LED_THEME_FILE.touch()
             
             # Update the theme selection panel display to show new arrow position
             gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
-            gradient_panel._update_display()
+            gradient_panel.led_theme = "match" if message.match_omarchy else message.theme_name
 
             # Theme change will trigger daemon reload via inotify for LEDs.
 
             # Also reload TUI theme/CSS so colors update immediately.
             self._reload_tui_theme()
 
-            # Force immediate refresh of status after a short delay
-            self.set_timer(0.5, self.refresh_status)
+            # Refresh status now - its reads queue behind the write above
+            self.refresh_status()
             
         except Exception as e:
             print(f"Failed to apply theme: {e}", file=sys.stderr)
@@ -280,66 +344,57 @@ class ForgeworkLightsTUI(App):
     
     
     def _apply_brightness(self, brightness: int) -> None:
-        """Apply brightness to daemon and save to file"""
-        try:
-            decimal = brightness / 100.0
-            # Write to brightness file first
-            self.brightness_file.parent.mkdir(parents=True, exist_ok=True)
-            self.brightness_file.write_text(f"{decimal:.2f}\n")
-            # Then apply to daemon
-            result = subprocess.run(
-                [DAEMON_BINARY, "brightness", str(decimal)],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            if result.returncode != 0:
-                print(f"Brightness command failed: {result.stderr}", file=sys.stderr)
-        except Exception as e:
-            print(f"Failed to apply brightness: {e}", file=sys.stderr)
+        """Save brightness for the daemon (it watches the file via inotify)"""
+        IO.update_control(brightness=round(brightness / 100.0, 2))
+    
+    async def _read_brightness_pct(self) -> int:
+        """Read the current brightness as a percentage"""
+        state = await IO.run(control.read_state)
+        return int(state["brightness"] * 100)
     
     
+    @timed
     def on_theme_creator_theme_created(self, message: ThemeCreator.ThemeCreated) -> None:
         """Handle custom theme creation"""
         print(f"Theme created: {message.theme_name}", file=sys.stderr)
         # Refresh the theme selection panel to show the new theme
         gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
-        gradient_panel._theme_list = []  # Reset list to force reload
-        gradient_panel._update_display()
+        gradient_panel.reload_themes()
         
         # Theme change will trigger daemon to reload animation colors via inotify
     
+    @timed
     def on_theme_selection_panel_theme_edit_requested(self, message: ThemeSelectionPanel.ThemeEditRequested) -> None:
         """Handle theme edit request from gradient panel"""
         print(f"Edit requested for theme: {message.theme_key}", file=sys.stderr)
         # Load the theme into the theme creator
         theme_creator = self.query_one("#theme-creator", ThemeCreator)
-        theme_creator.load_theme_for_editing(message.theme_key, message.theme_name, message.colors)
+        theme_creator.load_theme_for_editing(message.theme)
     
-    def on_theme_selection_panel_theme_delete_requested(self, message: ThemeSelectionPanel.ThemeDeleteRequested) -> None:
+    @timed
+    async def on_theme_selection_panel_theme_delete_requested(self, message: ThemeSelectionPanel.ThemeDeleteRequested) -> None:
         """Handle theme delete request from gradient panel"""
         print(f"Delete requested for theme: {message.theme_key}", file=sys.stderr)
         
-        try:
-            # Load themes database
-            if not THEMES_DB_PATH.exists():
-                print("Themes database not found", file=sys.stderr)
-                return
-            
-            db_data = json.loads(THEMES_DB_PATH.read_text())
-            
+        deleted = []
+        
+        def delete_theme(db_data):
             if "themes" in db_data and message.theme_key in db_data["themes"]:
-                # Delete the theme
                 del db_data["themes"][message.theme_key]
-                
-                # Save back to file
-                THEMES_DB_PATH.write_text(json.dumps(db_data, indent=2))
+                deleted.append(message.theme_key)
+                return True
+            return False
+        
+        try:
+            # Read-modify-write happens on the I/O thread
+            await IO.run(themes_db.update_db, delete_theme)
+            
+            if deleted:
                 print(f"Deleted theme: {message.theme_name}", file=sys.stderr)
                 
                 # Refresh the theme selection panel to update the list
                 gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
-                gradient_panel._theme_list = []
-                gradient_panel._update_display()
+                gradient_panel.reload_themes()
                 self.refresh_status()
             else:
                 print(f"Theme not found in database: {message.theme_key}", file=sys.stderr)
@@ -347,22 +402,22 @@ class ForgeworkLightsTUI(App):
             print(f"Error deleting theme: {e}", file=sys.stderr)
             traceback.print_exc()
     
-    def on_theme_selection_panel_theme_sync_requested(self, message: ThemeSelectionPanel.ThemeSyncRequested) -> None:
+    @timed
+    async def on_theme_selection_panel_theme_sync_requested(self, message: ThemeSelectionPanel.ThemeSyncRequested) -> None:
         """Handle theme sync request from gradient panel"""
         print("\n=== Theme sync requested ===", file=sys.stderr)
         
         try:
-            # Import and run sync_themes from local tui package
+            # Import and run sync_themes from local tui package (on the I/O thread)
             from .sync_themes import sync_themes
 
-            changes = sync_themes(verbose=True)
+            changes = await IO.run(sync_themes, verbose=True)
             print(f"Sync completed: {changes} themes added/updated", file=sys.stderr)
             
             # Refresh the theme selection panel to show new themes
             print("Refreshing theme list...", file=sys.stderr)
             gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
-            gradient_panel._theme_list = []
-            gradient_panel._update_display()
+            gradient_panel.reload_themes()
             self.refresh_status()
             print("Theme list refreshed", file=sys.stderr)
             
@@ -370,23 +425,37 @@ class ForgeworkLightsTUI(App):
             print(f"ERROR: Exception during sync: {e}", file=sys.stderr)
             traceback.print_exc()
     
+    @timed
     def on_animations_panel_animation_selected(self, message: AnimationsPanel.AnimationSelected) -> None:
         """Handle animation selection - save choice for daemon to execute"""
         params_str = f" with params {message.params}" if message.params else ""
         print(f"[TUI] Animation selected: {message.animation_name}{params_str}", file=sys.stderr)
         
         try:
-            # Save animation preference to config file
+            # Save animation preference and its parameters in one write
             # Daemon will detect this change via inotify and switch animations
-            # Parameters are already saved by AnimationsPanel to animation-params.json
-            ANIMATION_FILE.parent.mkdir(parents=True, exist_ok=True)
-            ANIMATION_FILE.write_text(f"{message.animation_name}\n")
+            IO.update_control(
+                animation=message.animation_name,
+                animation_params={message.animation_name: dict(message.params)},
+            )
+            if message.animation_name == LAYERED_ANIMATION:
+                # Its frames come from a compositor process, started once the write is done
+                IO.submit(start_layered)
             print(f"[TUI] Saved animation preference - daemon will handle execution", file=sys.stderr)
             
         except Exception as e:
             print(f"[TUI] Failed to save animation: {e}", file=sys.stderr)
             traceback.print_exc()
     
+    @timed
+    def on_animations_panel_parameters_changed(self, message: AnimationsPanel.ParametersChanged) -> None:
+        """Handle parameter tweaks - the daemon applies them without restarting the animation"""
+        try:
+            IO.update_control(animation_params={message.animation_name: dict(message.params)})
+        except Exception as e:
+            print(f"[TUI] Failed to save animation parameters: {e}", file=sys.stderr)
+            traceback.print_exc()
+    
     # Animation execution is handled by the daemon
     # TUI only saves user's animation choice to config file
     
@@ -394,39 +463,24 @@ class ForgeworkLightsTUI(App):
         """Start inotify-based watcher for config file changes"""
         try:
             # Create inotify instance
-            self.inotify_fd = os.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            self.watcher = Watcher()
             
             # Watch Omarchy theme directory
             omarchy_dir = THEME_SYMLINK.parent
             if omarchy_dir.exists():
-                self.omarchy_wd = os.inotify_add_watch(
-                    self.inotify_fd,
-                    str(omarchy_dir),
-                    os.IN_ATTRIB | os.IN_CLOSE_WRITE | os.IN_MOVE_SELF | os.IN_DELETE_SELF | 
-                    os.IN_CREATE | os.IN_DELETE | os.IN_MOVED_TO | os.IN_MOVED_FROM
-                )
+                self.omarchy_wd = self.watcher.add(omarchy_dir)
                 print(f"Started inotify watcher on {omarchy_dir} (wd={self.omarchy_wd})", file=sys.stderr)
 
             # Watch Aether theme directory directly so we can detect palette changes
             if AETHER_THEME_DIR.exists() and AETHER_THEME_DIR.is_dir():
-                self.aether_wd = os.inotify_add_watch(
-                    self.inotify_fd,
-                    str(AETHER_THEME_DIR),
-                    os.IN_ATTRIB | os.IN_CLOSE_WRITE | os.IN_MOVE_SELF | os.IN_DELETE_SELF |
-                    os.IN_CREATE | os.IN_DELETE | os.IN_MOVED_TO | os.IN_MOVED_FROM,
-                )
+                self.aether_wd = self.watcher.add(AETHER_THEME_DIR)
                 print(f"Started inotify watcher on {AETHER_THEME_DIR} (wd={self.aether_wd})", file=sys.stderr)
             
             # Watch omarchy-argb config directory
             config_dir = LED_THEME_FILE.parent
             if config_dir.exists():
                 config_dir.mkdir(parents=True, exist_ok=True)
-                self.config_wd = os.inotify_add_watch(
-                    self.inotify_fd,
-                    str(config_dir),
-                    os.IN_ATTRIB | os.IN_CLOSE_WRITE | os.IN_MOVE_SELF | os.IN_DELETE_SELF | 
-                    os.IN_CREATE | os.IN_DELETE | os.IN_MOVED_TO | os.IN_MOVED_FROM
-                )
+                self.config_wd = self.watcher.add(config_dir)
                 print(f"Started inotify watcher on {config_dir} (wd={self.config_wd})", file=sys.stderr)
             
             # Initialize current theme
@@ -450,29 +504,13 @@ class ForgeworkLightsTUI(App):
         """Background loop to process inotify events"""
         print("[TUI] inotify loop started", file=sys.stderr)
         
-        while self.inotify_fd is not None and self.inotify_worker and not self.inotify_worker.is_cancelled:
+        while self.watcher is not None and self.inotify_worker and not self.inotify_worker.is_cancelled:
             try:
                 # Wait for events with a timeout
-                readable, _, _ = select.select([self.inotify_fd], [], [], 1.0)
-                
-                if not readable:
-                    continue
-                
-                # Read events
-                events = os.read(self.inotify_fd, 4096)
-                offset = 0
-                
-                while offset < len(events):
-                    # Parse inotify event structure
-                    wd, mask, cookie, name_len = struct.unpack_from('iIII', events, offset)
-                    offset += struct.calcsize('iIII')
-                    
-                    name = events[offset:offset + name_len].rstrip(b'\x00').decode('utf-8')
-                    offset += name_len
-                    
+                for wd, mask, name in self.watcher.read(1.0):
                     # Debug logging
                     print(f"inotify event: wd={wd}, name='{name}', mask={mask}", file=sys.stderr)
-                    
+
                     # Handle different file changes based on watch descriptor
                     if wd == self.omarchy_wd:
                         # Event from Omarchy theme directory - check for any event
@@ -485,7 +523,10 @@ class ForgeworkLightsTUI(App):
                         self.call_from_thread(self._on_aether_theme_changed)
                     elif wd == self.config_wd:
                         # Event from config directory
-                        if name == LED_THEME_FILE.name:
+                        if name == CONTROL_FILE.name:
+                            print(f"Detected control document change", file=sys.stderr)
+                            self.call_from_thread(self.refresh_status)
+                        elif name == LED_THEME_FILE.name:
                             print(f"Detected led-theme change", file=sys.stderr)
                             self.call_from_thread(self.refresh_status)
                         elif name == BRIGHTNESS_FILE.name:
@@ -505,7 +546,8 @@ class ForgeworkLightsTUI(App):
         
         print("[TUI] inotify loop exited", file=sys.stderr)
 
-    def _on_aether_theme_changed(self):
+    @timed
+    async def _on_aether_theme_changed(self):
         """Handle changes inside the Aether theme directory.
 
         When the Aether Omarchy theme changes on disk (e.g. its btop.theme
@@ -517,11 +559,11 @@ class ForgeworkLightsTUI(App):
             print("[TUI] _on_aether_theme_changed() called", file=sys.stderr)
 
             # Small delay to allow file writes to complete
-            time.sleep(0.1)
+            await asyncio.sleep(0.1)
 
             from .sync_themes import sync_themes
 
-            changes = sync_themes(verbose=True)
+            changes = await IO.run(sync_themes, verbose=True)
             print(f"[TUI] Aether theme sync completed, {changes} themes added/updated", file=sys.stderr)
 
             # themes.json rewrite will trigger _on_themes_db_changed via inotify,
@@ -534,20 +576,26 @@ class ForgeworkLightsTUI(App):
             traceback.print_exc()
 
     
-    def _on_omarchy_theme_changed(self):
+    @staticmethod
+    def _resolve_omarchy_theme() -> str | None:
+        """Name of the current Omarchy theme, None without its symlink (runs on the I/O executor)"""
+        # Force re-read by not using cached resolution
+        if THEME_SYMLINK.exists() and THEME_SYMLINK.is_symlink():
+            return THEME_SYMLINK.resolve(strict=False).name
+        return None
+
+    @timed
+    async def _on_omarchy_theme_changed(self):
         """Handle Omarchy theme change event (from inotify)"""
         try:
             print(f"[TUI] _on_omarchy_theme_changed() called", file=sys.stderr)
             
             # Small delay to ensure filesystem has settled
-            import time
-            time.sleep(0.1)
+            await asyncio.sleep(0.1)
             
             # Get new theme FIRST before checking anything
-            # Force re-read by not using cached resolution
-            if THEME_SYMLINK.exists() and THEME_SYMLINK.is_symlink():
-                current_theme_dir = THEME_SYMLINK.resolve(strict=False)
-                current_theme = current_theme_dir.name
+            current_theme = await IO.run(self._resolve_omarchy_theme)
+            if current_theme is not None:
                 print(f"[TUI] Current theme resolved: {current_theme}", file=sys.stderr)
             else:
                 print(f"[TUI] Theme symlink does not exist or is not a symlink", file=sys.stderr)
@@ -571,14 +619,12 @@ class ForgeworkLightsTUI(App):
             print(f"[TUI] Error handling theme change: {e}", file=sys.stderr)
             traceback.print_exc()
     
-    def _on_brightness_changed(self):
+    @timed
+    async def _on_brightness_changed(self):
         """Handle brightness file change (from inotify)"""
         try:
             # Read new brightness value
-            if self.brightness_file.exists():
-                brightness_pct = int(float(self.brightness_file.read_text().strip()) * 100)
-            else:
-                brightness_pct = 100
+            brightness_pct = await self._read_brightness_pct()
             
             # Update display only if not currently being adjusted by user
             panel = self.query_one("#brightness-panel", BrightnessPanel)
@@ -592,13 +638,13 @@ class ForgeworkLightsTUI(App):
         except Exception as e:
             pass  # Silently ignore
     
+    @timed
     def _on_themes_db_changed(self):
         """Handle themes database change (from inotify)"""
         try:
             # Refresh theme selection panel to show new/updated themes
             gradient_panel = self.query_one("#theme-selection-panel", ThemeSelectionPanel)
-            gradient_panel._theme_list = []
-            gradient_panel._update_display()
+            gradient_panel.reload_themes()
             
             # Theme update will trigger daemon to reload animation colors via inotify.
 
@@ -613,8 +659,9 @@ class ForgeworkLightsTUI(App):
         print("[TUI] Shutting down, cleaning up workers...", file=sys.stderr)
         
         # Stop timers first
-        if self.update_timer:
-            self.update_timer.stop()
+        self._stop_timers()
+        
+        self.diagnostics.uninstall()
         
         # Stop inotify watcher worker
         if self.inotify_worker:
@@ -622,13 +669,16 @@ class ForgeworkLightsTUI(App):
             self.inotify_worker.cancel()
         
         # Close inotify fd (this will cause the worker loop to exit)
-        if self.inotify_fd is not None:
+        if self.watcher is not None:
             print("[TUI] Closing inotify fd", file=sys.stderr)
+            watcher, self.watcher = self.watcher, None
             try:
-                os.close(self.inotify_fd)
+                watcher.close()
             except:
                 pass
-            self.inotify_fd = None
+        
+        # Flush queued config writes so the last change reaches the daemon
+        IO.shutdown()
         
         # Wait a moment for workers to finish
         time.sleep(0.1)
@@ -0,0 +1,259 @@
+"""
+Local event bus: typed LED state changes pushed to whoever is listening
+
+The daemon, the TUI, the sync tool and the Waybar emitter otherwise only
+learn about changes by watching files and reading them again, and state
+that never reaches a file in a readable form (a TUI preview) is invisible
+to the rest. Writers announce what they changed here instead:
+
+    theme-changed       {"led_theme": key}
+    brightness-changed  {"brightness": 0.0-1.0}
+    temperature-changed {"temperature": kelvin}
+    animation-changed   {"animation": key}
+    params-changed      {"animation_params": {animation: {...}}}  (changed ones only)
+    db-updated          {"path": ..., "themes": [changed keys] or None if unknown}
+    preview-started     {"name": ..., "colors": [...]}
+    preview-ended       {"led_theme": key restored, or None}
+
+control.update() and themes_db.write_packed() publish, so every Python
+writer (TUI, forgeworklights-quick, sync, generate-colors) is covered.
+Writers outside Python (the daemon's CLI, hand edits) do not publish;
+subscribers keep their file watches for those and use the bus for the
+deltas and the state files do not show.
+
+There is no broker process. Each subscriber listens on its own Unix socket
+in BUS_DIR, and publish() connects to every socket there and writes one
+JSON line, so a publisher with nobody listening costs one directory scan.
+Delivery is best effort - a subscriber that is gone or not accepting is
+skipped - and events carry absolute values, so a missed one is repaired
+by the next.
+
+Subscriber is the asyncio client. For tests, LocalBus is an in-process
+stand-in: inside use_local(bus), publish() and new Subscribers go through
+it and never touch a socket.
+"""
+import itertools
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from .constants import BUS_DIR
+
+THEME_CHANGED = "theme-changed"
+BRIGHTNESS_CHANGED = "brightness-changed"
+TEMPERATURE_CHANGED = "temperature-changed"
+ANIMATION_CHANGED = "animation-changed"
+PARAMS_CHANGED = "params-changed"
+DB_UPDATED = "db-updated"
+PREVIEW_STARTED = "preview-started"
+PREVIEW_ENDED = "preview-ended"
+
+EVENTS = (
+    THEME_CHANGED, BRIGHTNESS_CHANGED, TEMPERATURE_CHANGED, ANIMATION_CHANGED,
+    PARAMS_CHANGED, DB_UPDATED, PREVIEW_STARTED, PREVIEW_ENDED,
+)
+
+_MAX_MESSAGE = 64 * 1024  # bytes one connection may send
+_ids = itertools.count()
+
+# Set by use_local(); publish() and Subscriber then stay in this process
+_local = None
+
+
+class Event(NamedTuple):
+    """One published change; pid is the publisher's, so subscribers can skip their own."""
+    type: str
+    data: dict
+    pid: int
+    time: float
+
+
+def _encode(event: Event) -> bytes:
+    return (json.dumps(event._asdict(), separators=(",", ":")) + "\n").encode()
+
+
+def _decode(line: bytes) -> Event | None:
+    try:
+        message = json.loads(line)
+        event = Event(message["type"], message["data"], int(message["pid"]), float(message["time"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+    return event if event.type in EVENTS and isinstance(event.data, dict) else None
+
+
+def _owner_alive(socket_name: str) -> bool:
+    try:
+        os.kill(int(socket_name.split("-", 1)[0]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def publish(event_type: str, **data) -> int:
+    """Announce a change to every subscriber; returns how many were reached.
+
+    Never raises for delivery problems - callers have already written the
+    change to disk, which stays the source of truth.
+    """
+    if event_type not in EVENTS:
+        raise ValueError(f"Unknown event type {event_type!r}")
+    event = Event(event_type, data, os.getpid(), time.time())
+    if _local is not None:
+        return _local.publish(event)
+
+    try:
+        entries = [entry for entry in os.scandir(BUS_DIR) if entry.name.endswith(".sock")]
+    except OSError:
+        return 0
+    message = _encode(event)
+    reached = 0
+    for entry in entries:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC)
+        try:
+            sock.connect(entry.path)
+            sock.send(message)
+            reached += 1
+        except ConnectionRefusedError:
+            # Nobody listening: the subscriber died without cleaning up
+            if not _owner_alive(entry.name):
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+        except OSError:
+            pass  # backlog full or socket just removed; events are best effort
+        finally:
+            sock.close()
+    return reached
+
+
+class Subscriber:
+    """asyncio client: receives the events named in events (all if None).
+
+        async with bus.Subscriber([bus.THEME_CHANGED]) as events:
+            async for event in events:
+                ...
+    """
+
+    def __init__(self, events=None, bus: "LocalBus | None" = None):
+        self.events = frozenset(events) if events else None
+        self.path = None
+        self._bus = bus
+        self._loop = None
+        self._queue = None
+        self._server = None
+
+    async def start(self) -> "Subscriber":
+        # Imported here: publishers (every control write) never need asyncio
+        import asyncio
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._bus = self._bus or _local
+        if self._bus is not None:
+            self._bus.add(self)
+            return self
+
+        BUS_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.path = BUS_DIR / f"{os.getpid()}-{next(_ids)}.sock"
+        try:
+            self.path.unlink()  # left behind by an earlier process with our pid
+        except FileNotFoundError:
+            pass
+        old_umask = os.umask(0o077)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle, path=os.fspath(self.path))
+        finally:
+            os.umask(old_umask)
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+        elif self._bus is not None:
+            self._bus.remove(self)
+
+    async def __aenter__(self) -> "Subscriber":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Event:
+        return await self.get()
+
+    async def get(self) -> Event:
+        """Next event (waits for one)."""
+        return await self._queue.get()
+
+    def pending(self) -> list:
+        """Events already received, without waiting."""
+        events = []
+        while not self._queue.empty():
+            events.append(self._queue.get_nowait())
+        return events
+
+    async def _handle(self, reader, writer) -> None:
+        data = b""
+        try:
+            # Publishers write and close; read to EOF
+            while len(data) < _MAX_MESSAGE:
+                chunk = await reader.read(_MAX_MESSAGE - len(data))
+                if not chunk:
+                    break
+                data += chunk
+        finally:
+            writer.close()
+        for line in data.splitlines():
+            event = _decode(line)
+            if event is not None:
+                self.deliver(event)
+
+    def deliver(self, event: Event) -> None:
+        """Queue event if subscribed to it (safe from any thread)."""
+        if self.events is None or event.type in self.events:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+
+class LocalBus:
+    """In-process stand-in for the socket bus (see use_local)."""
+
+    def __init__(self):
+        self.published = []  # every event, in order
+        self._subscribers = []
+
+    def add(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    def remove(self, subscriber: Subscriber) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def publish(self, event: Event) -> int:
+        self.published.append(event)
+        for subscriber in list(self._subscribers):
+            subscriber.deliver(event)
+        return len(self._subscribers)
+
+
+@contextmanager
+def use_local(bus: LocalBus | None = None):
+    """Route publish() and new Subscribers through an in-process LocalBus."""
+    global _local
+    previous, _local = _local, bus or LocalBus()
+    try:
+        yield _local
+    finally:
+        _local = previous
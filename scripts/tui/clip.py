@@ -0,0 +1,482 @@
+"""
+Animation clips: LED frame sequences recorded from the daemon or baked from
+effects, and their playback
+
+    forgeworklights-clip record OUT.fwclip [--seconds=N] [--frames=N] [--daemon=PATH] [--helper=PATH]
+    forgeworklights-clip bake PLUGIN.py|FRAMES.txt|- OUT.fwclip [--seconds=N] [--frames=N] [--fps=N]
+    forgeworklights-clip play CLIP.fwclip [--loop]
+    forgeworklights-clip info CLIP.fwclip
+    forgeworklights-clip dump CLIP.fwclip
+
+`record` captures exactly what the daemon sends to the strip, with the
+time it was sent: the daemon runs fw_clip_helper instead of the root
+helper (ROOT_HELPER_ENV=CLIP_HELPER in its environment; --daemon=PATH
+starts one like that), which hands every frame to this process over
+CLIP_SOCKET. Stop the forgeworklights service first - both would drive the
+same files. `bake` renders an effect plugin (see tui.effects) or a file of
+rrggbb frame lines (`forgeworklights render ...`, `-` for stdin) offline,
+as fast as it computes, at --fps. `play` streams a clip to the daemon
+through the effect ring at the rate it was recorded, `info` prints its
+frame timing and `dump` its frames (seconds, then rrggbb per LED).
+`forgeworklights-menu --clip=FILE` plays one in the TUI's LED mirror.
+
+A clip file (little-endian) is a 40-byte header followed by one zlib stream:
+
+    char[4]  magic "FWLC"
+    u16      version (1)
+    u16      header size
+    u32      led_count
+    u32      frame count
+    u64      length (us): from the first frame to the end of the clip
+    u16      flags: CLIP_PROCESSED if the frames already had the daemon's
+             gamma and brightness applied (recorded rather than baked)
+    u16      reserved
+    f32      gamma exponent and f32 brightness the frames were made with
+    u32      reserved
+
+and in the stream, per frame, a u32 delay (us) after the previous frame and
+led_count * 3 bytes (R, G, B) XORed with the previous frame. Unchanged LEDs
+are zero bytes, so a frame that moves a little costs a few bytes after
+compression. Playback decompresses as it goes and undoes the delta with
+one big-integer XOR per frame; a processed clip also goes through one
+256-entry table that takes back the recording's brightness and gamma, since
+the daemon applies the current ones again.
+"""
+import math
+import os
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from .constants import (
+    CLIP_BAKE_FPS,
+    CLIP_HELPER,
+    CLIP_SOCKET,
+    DAEMON_BINARY,
+    EFFECT_FPS,
+    ROOT_HELPER_ENV,
+)
+
+CLIP_MAGIC = b"FWLC"
+CLIP_VERSION = 1
+CLIP_PROCESSED = 1
+# magic, version, header size, led_count, frame count, length (us),
+# flags, reserved, gamma, brightness, reserved
+_HEADER = struct.Struct("<4sHHIIQHHffI")
+_DELAY = struct.Struct("<I")
+_PACKET_TIME = struct.Struct("<Q")  # fw_clip_helper's send time in front of the frame
+_READ_SIZE = 1 << 16
+_MAX_DELAY = 0xFFFFFFFF
+
+
+class ClipWriter:
+    """Writes a clip frame by frame; the file appears (atomically) on close().
+
+    Used as a context manager, an exception discards the clip instead.
+    """
+
+    def __init__(self, path, led_count: int, flags: int = 0, gamma: float = 1.0, brightness: float = 1.0):
+        self.path = Path(path)
+        self.led_count = led_count
+        self.count = 0
+        self._meta = (flags, gamma, brightness)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(bytes(_HEADER.size))
+        self._zlib = zlib.compressobj(9)
+        self._previous = 0
+        self._first = None  # us
+        self._last = None
+
+    def add(self, frame, ns: int) -> None:
+        """Append a frame sent at ns (any monotonic clock, nanoseconds)."""
+        length = self.led_count * 3
+        if len(frame) != length:
+            raise ValueError(f"frame of {len(frame) // 3} LEDs in a clip of {self.led_count}")
+        us = ns // 1000
+        if self._first is None:
+            self._first = self._last = us
+        delay = min(_MAX_DELAY, max(0, us - self._last))
+        self._last += delay
+        current = int.from_bytes(frame, "little")
+        delta = (current ^ self._previous).to_bytes(length, "little")
+        self._previous = current
+        self._file.write(self._zlib.compress(_DELAY.pack(delay) + delta))
+        self.count += 1
+
+    def close(self, end_ns: int | None = None) -> None:
+        """Finish the clip; it lasts until end_ns (at least until its last frame)."""
+        if self._file.closed:
+            return
+        last = 0 if self._first is None else self._last - self._first
+        end = last if end_ns is None or self._first is None else max(last, end_ns // 1000 - self._first)
+        flags, gamma, brightness = self._meta
+        self._file.write(self._zlib.flush())
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(CLIP_MAGIC, CLIP_VERSION, _HEADER.size, self.led_count, self.count,
+                                      end, flags, 0, gamma, brightness, 0))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def discard(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            os.unlink(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, _value, _tb):
+        if kind is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class Clip:
+    """A clip file's header; frames() decodes it (ValueError if it is not a clip)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{self.path}: not a clip")
+        (magic, version, self._header_size, self.led_count, self.count, self.length_us,
+         self.flags, _reserved, self.gamma, self.brightness, _reserved2) = _HEADER.unpack(header)
+        if magic != CLIP_MAGIC or self._header_size < _HEADER.size or not self.led_count:
+            raise ValueError(f"{self.path}: not a clip")
+        if version != CLIP_VERSION:
+            raise ValueError(f"{self.path}: clip version {version} is not supported")
+
+    @property
+    def seconds(self) -> float:
+        return self.length_us / 1e6
+
+    @property
+    def processed(self) -> bool:
+        return bool(self.flags & CLIP_PROCESSED)
+
+    def frames(self):
+        """(seconds since the first frame, led_count * 3 RGB bytes) for every frame."""
+        length = self.led_count * 3
+        record = _DELAY.size + length
+        decoder = zlib.decompressobj()
+        pending = bytearray()
+        current = 0
+        us = 0
+        decoded = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._header_size)
+            while decoded < self.count:
+                chunk = f.read(_READ_SIZE)
+                try:
+                    pending += decoder.decompress(chunk) if chunk else decoder.flush()
+                except zlib.error as e:
+                    raise ValueError(f"{self.path}: corrupt clip ({e})") from None
+                start = 0
+                while decoded < self.count and len(pending) - start >= record:
+                    us += _DELAY.unpack_from(pending, start)[0]
+                    current ^= int.from_bytes(pending[start + _DELAY.size:start + record], "little")
+                    start += record
+                    decoded += 1
+                    yield us / 1e6, current.to_bytes(length, "little")
+                del pending[:start]
+                if not chunk and decoded < self.count:
+                    raise ValueError(f"{self.path}: clip ends after {decoded} of {self.count} frames")
+
+
+class Player:
+    """The frame a clip shows at any time since it started, looping or not."""
+
+    def __init__(self, clip: Clip, loop: bool = True):
+        self.clip = clip
+        self.loop = loop
+        # A clip ending on its last frame still shows that frame for a tick
+        self.period = max(clip.seconds, 1.0 / EFFECT_FPS)
+        self._rewind()
+
+    def _rewind(self) -> None:
+        self._frames = self.clip.frames()
+        self._at, self._frame = next(self._frames, (0.0, None))
+        self._next = next(self._frames, None)
+
+    def frame_at(self, t: float) -> bytes | None:
+        """The frame at t seconds; None past the end of a clip that does not loop."""
+        if self.loop:
+            t %= self.period
+        elif t >= self.period:
+            return None
+        if t < self._at:
+            self._rewind()
+        while self._next is not None and self._next[0] <= t:
+            self._at, self._frame = self._next
+            self._next = next(self._frames, None)
+        return self._frame
+
+    def resample(self, fps: float):
+        """Frames at fps, as the daemon would take them while the clip plays in real time."""
+        tick = 0
+        while (frame := self.frame_at(tick / fps)) is not None:
+            yield frame
+            tick += 1
+
+
+def replay_table(clip: Clip) -> bytes | None:
+    """256-entry table taking a processed clip's brightness and gamma back out (None if there is nothing to undo)."""
+    if not clip.processed:
+        return None
+    gamma = clip.gamma if clip.gamma > 0 else 1.0
+    brightness = clip.brightness if clip.brightness > 0 else 1.0
+    return bytes(
+        min(255, round(255 * min(1.0, value / 255 / brightness) ** (1.0 / gamma)))
+        for value in range(256)
+    )
+
+
+def _rgb(frame: bytes, order: str) -> bytes:
+    """A frame as the helper got it, in R, G, B order."""
+    if order != "GRB":
+        return frame
+    swapped = bytearray(frame)
+    swapped[0::3], swapped[1::3] = frame[1::3], frame[0::3]
+    return bytes(swapped)
+
+
+def record(path, seconds: float | None = None, frames: int | None = None, daemon: str | None = None,
+           helper: Path = CLIP_HELPER, socket_path: Path = CLIP_SOCKET) -> int:
+    """Record what the daemon sends into a clip at path; returns the frames recorded.
+
+    Raises OSError if the socket cannot be set up or the daemon started.
+    """
+    from . import control, themes_db
+    socket_path = Path(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        socket_path.unlink()  # left behind by a recorder that was killed
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+    writer = None
+    process = None
+    try:
+        sock.bind(str(socket_path))
+        order = themes_db.color_order()
+        if daemon:
+            process = subprocess.Popen([daemon, "daemon"], env={**os.environ, ROOT_HELPER_ENV: str(helper)},
+                                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+        else:
+            print(f"Recording to {path}: run the daemon with {ROOT_HELPER_ENV}={helper} "
+                  f"(Ctrl+C to stop)", file=sys.stderr)
+        deadline = None
+        while frames is None or writer is None or writer.count < frames:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            if process is not None and process.poll() is not None:
+                raise OSError(f"{daemon} exited with status {process.returncode}")
+            ready, _, _ = select.select([sock], [], [], 1.0 if timeout is None else min(timeout, 1.0))
+            if not ready:
+                continue
+            packet = sock.recv(_READ_SIZE)
+            if len(packet) <= _PACKET_TIME.size or (len(packet) - _PACKET_TIME.size) % 3:
+                continue
+            ns = _PACKET_TIME.unpack_from(packet)[0]
+            frame = _rgb(packet[_PACKET_TIME.size:], order)
+            if writer is None:
+                writer = ClipWriter(path, len(frame) // 3, CLIP_PROCESSED, themes_db.gamma_exponent(),
+                                    control.read_state()["brightness"])
+                if seconds is not None:
+                    deadline = time.monotonic() + seconds
+            elif len(frame) != writer.led_count * 3:
+                print(f"[clip] skipped a frame of {len(frame) // 3} LEDs", file=sys.stderr)
+                continue
+            writer.add(frame, ns)
+    except KeyboardInterrupt:
+        pass
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        sock.close()
+        try:
+            socket_path.unlink()
+        except FileNotFoundError:
+            pass
+    if writer is None:
+        return 0
+    end = time.clock_gettime_ns(time.CLOCK_MONOTONIC)
+    if frames is not None and writer.count >= frames:
+        end = None  # cut off at the last frame rather than when we noticed
+    writer.close(end)
+    return writer.count
+
+
+def _hex_frames(lines):
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield bytes.fromhex(line)
+            except ValueError:
+                raise ValueError(f"line {number}: not a frame of rrggbb values") from None
+
+
+def bake(source: str, path, fps: float | None = None, seconds: float | None = None,
+         frames: int | None = None) -> int:
+    """Render an effect plugin or a file of rrggbb frame lines into a clip; returns the frames baked."""
+    from . import themes_db
+    from .effects import load_plugin, to_frame
+    if source.endswith(".py"):
+        effect, plugin_fps = load_plugin(source)
+        fps = fps or plugin_fps
+        if frames is None and seconds is None:
+            raise ValueError("an effect runs forever: give --seconds or --frames")
+        led_count = themes_db.led_count()
+        stream = (to_frame(frame, led_count) for frame in effect(led_count))
+    else:
+        fps = fps or CLIP_BAKE_FPS
+        stream = _hex_frames(sys.stdin if source == "-" else open(source))
+    if frames is None and seconds is not None:
+        frames = max(1, round(seconds * fps))
+    writer = None
+    try:
+        for index, frame in enumerate(stream):
+            if frames is not None and index >= frames:
+                break
+            if writer is None:
+                if not frame or len(frame) % 3:
+                    raise ValueError("frames must be 3 bytes per LED")
+                writer = ClipWriter(path, len(frame) // 3)
+            writer.add(frame, round(index * 1e9 / fps))
+        if writer is None:
+            raise ValueError(f"no frames in {source}")
+        writer.close(round(writer.count * 1e9 / fps))
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return writer.count
+
+
+def play(clip: Clip, loop: bool = False) -> int:
+    """Stream a clip to the daemon through the effect ring at its own pace; returns the frames sent."""
+    from . import themes_db
+    from .effects import run, to_frame
+    led_count = themes_db.led_count()
+    if led_count != clip.led_count:
+        print(f"[clip] {clip.path.name} has {clip.led_count} LEDs, the strip {led_count}", file=sys.stderr)
+    table = replay_table(clip)
+
+    def frames(count):
+        for frame in Player(clip, loop).resample(EFFECT_FPS):
+            yield to_frame(frame if table is None else frame.translate(table), count)
+
+    return run(frames, EFFECT_FPS, led_count)
+
+
+def info(clip: Clip, out=sys.stdout) -> None:
+    """Print a clip's header and the timing of its frames."""
+    times = [t for t, _frame in clip.frames()]
+    intervals = sorted(b - a for a, b in zip(times, times[1:]))
+    source = (f"daemon output, gamma {clip.gamma:g}, brightness {clip.brightness:g}" if clip.processed
+              else "unprocessed frames")
+    print(f"{clip.path.name}: {clip.led_count} LEDs, {clip.count} frames over {clip.seconds:.2f} s ({source})",
+          file=out)
+    size = clip.path.stat().st_size
+    raw = clip.count * clip.led_count * 3
+    print(f"size: {size} bytes for {raw} bytes of frames ({raw / size:.1f}:1)", file=out)
+    if intervals:
+        def at(share):
+            return intervals[min(len(intervals) - 1, math.ceil(share * len(intervals)) - 1)] * 1000
+        print(f"intervals: min {intervals[0] * 1000:.1f} ms, median {at(0.5):.1f} ms, "
+              f"p95 {at(0.95):.1f} ms, max {intervals[-1] * 1000:.1f} ms", file=out)
+
+
+def usage() -> None:
+    print("Usage: forgeworklights-clip record OUT.fwclip [--seconds=N] [--frames=N] [--daemon=PATH] [--helper=PATH]")
+    print("       forgeworklights-clip bake PLUGIN.py|FRAMES.txt|- OUT.fwclip [--seconds=N] [--frames=N] [--fps=N]")
+    print("       forgeworklights-clip play CLIP.fwclip [--loop]")
+    print("       forgeworklights-clip info CLIP.fwclip")
+    print("       forgeworklights-clip dump CLIP.fwclip")
+    print(f"Recording needs the daemon running with {ROOT_HELPER_ENV}={CLIP_HELPER} "
+          f"(--daemon={DAEMON_BINARY} starts one).")
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if any(arg in ("-h", "--help") for arg in args):
+        usage()
+        return 0
+    options = {}
+    positional = []
+    for arg in args:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        else:
+            positional.append(arg)
+    command = positional[0] if positional else None
+
+    def stop(*_):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        seconds = float(options["seconds"]) if options.get("seconds") else None
+        frames = int(options["frames"]) if options.get("frames") else None
+        fps = float(options["fps"]) if options.get("fps") else None
+        if (seconds is not None and seconds <= 0) or (frames is not None and frames < 1) or \
+                (fps is not None and fps <= 0):
+            raise ValueError("--seconds, --frames and --fps must be positive")
+        if command == "record" and len(positional) == 2:
+            count = record(positional[1], seconds, frames, options.get("daemon"),
+                           Path(options.get("helper") or CLIP_HELPER))
+            if not count:
+                print("[clip] no frames recorded: was the daemon running with the clip helper?",
+                      file=sys.stderr)
+                return 1
+            print(f"{count} frames recorded to {positional[1]}", file=sys.stderr)
+            return 0
+        if command == "bake" and len(positional) == 3:
+            count = bake(positional[1], positional[2], fps, seconds, frames)
+            print(f"{count} frames baked to {positional[2]}", file=sys.stderr)
+            return 0
+        if command in ("play", "info", "dump") and len(positional) == 2:
+            clip = Clip(positional[1])
+            if command == "play":
+                try:
+                    play(clip, "loop" in options)
+                except KeyboardInterrupt:
+                    pass
+            elif command == "info":
+                info(clip)
+            else:
+                for t, frame in clip.frames():
+                    print(f"{t:.6f} {frame.hex()}")
+            return 0
+    except (OSError, ValueError, ImportError) as e:
+        print(f"[clip] {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    usage()
+    return 1
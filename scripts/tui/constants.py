@@ -1,6 +1,7 @@
 """
 Constants and configuration for ForgeworkLights TUI
 """
+import os
 from pathlib import Path
 
 
@@ -8,12 +9,39 @@ from pathlib import Path
 CONFIG_DIR = Path.home() / ".config/forgeworklights"
 CACHE_DIR = Path.home() / ".cache/forgeworklights"
 
+# Per-session runtime files (tmpfs); the daemon resolves the same location
+RUNTIME_DIR = (
+    Path(os.environ["XDG_RUNTIME_DIR"]) / "forgeworklights"
+    if os.environ.get("XDG_RUNTIME_DIR")
+    else CACHE_DIR
+)
+
 # File paths
 STATE_FILE = CACHE_DIR / "state.json"
+FRAME_FILE = RUNTIME_DIR / "frame.bin"  # live LED frames published by the daemon (see tui.frames)
+EFFECT_RING = RUNTIME_DIR / "effect.ring"  # frames from an external effect to the daemon (see tui.effects)
+LOCK_DIR = CACHE_DIR / "locks"  # fcntl lock files for shared config writes (see utils.atomic_file)
 BRIGHTNESS_FILE = CONFIG_DIR / "brightness"
+TEMPERATURE_FILE = CONFIG_DIR / "temperature"
 
 # LED themes database (used by daemon and gradient selection)
 THEMES_DB_PATH = CONFIG_DIR / "led_themes.json"
+# Packed gradients expanded for led_count, regenerated with the JSON (see tui.themes_db)
+THEMES_PACKED_PATH = THEMES_DB_PATH.with_suffix(".bin")
+
+# Daemon configuration (led_count etc.)
+LED_CONFIG_FILE = CONFIG_DIR / "config.toml"
+DEFAULT_LED_COUNT = 22  # matches the daemon's built-in default
+GRADIENT_CACHE_SIZE = 512  # expanded gradients memoized by tui.themes_db
+
+# Theme list with swatches for forgeworklights-quick, rewritten with the database
+QUICK_LIST_PATH = CACHE_DIR / "quick-list.tsv"
+QUICK_SWATCH_WIDTH = 12  # colors per launcher swatch
+
+# Gradient PNGs for launcher icons and notifications (see tui.swatches)
+SWATCH_DIR = CACHE_DIR / "swatches"
+SWATCH_IMAGE_SIZE = (96, 16)  # width (one gradient color per pixel column), height
+SWATCH_CACHE_LIMIT = 2 * 1024 * 1024  # bytes; least recently used images are evicted past this
 
 # TUI themes database (per-theme palettes for the TUI only)
 TUI_THEMES_DB_PATH = CONFIG_DIR / "tui_themes.json"
@@ -23,6 +51,14 @@ LED_THEME_FILE = CONFIG_DIR / "led-theme"
 ANIMATION_FILE = CONFIG_DIR / "animation"
 ANIMATION_PARAMS_FILE = CONFIG_DIR / "animation-params.json"
 
+# Color temperature (white point) the daemon applies, in kelvin (see include/color_utils.hpp)
+NEUTRAL_TEMPERATURE = 6500  # colors unchanged
+MIN_TEMPERATURE = 1000
+
+# Optional consolidated control document replacing the per-setting files above
+# (see tui.control); not to be confused with the daemon's STATE_FILE
+CONTROL_FILE = CONFIG_DIR / "state.json"
+
 # Binary and install paths
 BIN_DIR = Path("/usr/local/bin")
 DAEMON_BINARY = BIN_DIR / "forgeworklights"
@@ -41,3 +77,86 @@ AETHER_THEME_DIR = Path.home() / ".config/omarchy/themes/aether"
 # UI Settings
 MIN_WIDTH = 60
 AUTO_REFRESH_INTERVAL = 2.0  # seconds
+PARAM_COMMIT_INTERVAL = 1 / 30  # seconds; slider drags commit at most once per daemon frame
+MIRROR_POLL_INTERVAL = 1 / 30  # seconds; LED mirror checks for a new daemon frame (30 FPS)
+
+# External effects (see tui.effects)
+EFFECT_FPS = 30  # frames per second an effect is driven at (the daemon's rate)
+EFFECT_RING_SLOTS = 4  # frames an effect may run ahead of the daemon
+EFFECT_RESTART_DELAY = 2.0  # seconds before a crashed plugin process is restarted
+
+# Thermal effect (forgeworklights-effect thermal, see tui.effects.thermal)
+SYSFS_ROOT = Path("/sys")
+THERMAL_RATE = 4.0  # sensor reads (and frames) per second
+THERMAL_MIN_RATE = 2.0  # the daemon drops back to the gradient after a second without frames
+THERMAL_SMOOTHING = 2.0  # seconds; time constant of the moving average
+THERMAL_RANGE = (40.0, 90.0)  # degrees Celsius shown as an empty and a full strip
+THERMAL_BACKGROUND = 0.1  # brightness of the unfilled part of the gradient
+# Preferred CPU sensors (hwmon name or thermal zone type), first present wins
+THERMAL_SENSORS = ("k10temp", "zenpower", "coretemp", "x86_pkg_temp", "cpu_thermal", "acpitz")
+THERMAL_FALLBACK_STOPS = ("#50fa7b", "#f1fa8c", "#ff5555")  # when no theme gradient resolves
+
+# System meters (forgeworklights-effect meters, see tui.effects.meters)
+PROC_ROOT = Path("/proc")
+METER_RATE = 4.0  # samples per second, shared by every meter (one thread)
+METER_BUDGET = 0.005  # share of one CPU the sampling thread may use before it slows down
+METER_MAX_INTERVAL = 2.0  # seconds; the slowest the sampler backs off to
+METER_EASING = 0.2  # seconds; shown levels follow the samples with this time constant
+METER_PRESSURE_SCALE = 20.0  # PSI avg10 percent shown as a full meter
+METER_NETWORK_SCALE = 125_000_000  # bytes/s shown as a full meter (1 Gbit/s, log scale)
+
+# Audio visualizer (forgeworklights-effect audio, see tui.effects.audio)
+AUDIO_MONITOR = "@DEFAULT_MONITOR@"  # Pulse/PipeWire source captured by default: what is playing
+AUDIO_SAMPLE_RATE = 48000  # Hz; capture rate, and the rate of raw FIFO input
+AUDIO_CAPTURE_LATENCY_MS = 10  # parec's buffer
+AUDIO_BLOCK = 256  # samples per capture read (5 ms at 48 kHz)
+AUDIO_WINDOW = 2048  # samples per FFT (43 ms at 48 kHz)
+AUDIO_BAND_RANGE = (40.0, 16000.0)  # Hz spread over the LEDs, log-spaced
+AUDIO_DYNAMIC_RANGE = 36.0  # dB between a dark and a full LED
+AUDIO_GAIN_RELEASE = 6.0  # dB per second the automatic gain recovers after a loud passage
+AUDIO_FLOOR_DB = 0.0  # lowest full-scale reference, so near silence stays dark
+AUDIO_DECAY = 0.15  # seconds; time constant of a band falling after a peak
+AUDIO_LATENCY_BUDGET = 2 / EFFECT_FPS  # seconds from capture to the daemon's frame
+
+# Resident TUI (forgeworklights-menu --server, see tui.resident)
+MENU_SOCKET = RUNTIME_DIR / "menu.sock"
+BUS_DIR = RUNTIME_DIR / "bus"  # one socket per event bus subscriber (see tui.bus)
+RESIDENT_SIZE = (57, 80)  # rows, columns of the pty until a client attaches (floating window size)
+
+# Hyprland automation (forgeworklights-hyprland, see tui.hyprland)
+AUTOMATION_RULES_FILE = CONFIG_DIR / "automation.toml"
+HYPRLAND_DEBOUNCE = 0.15  # seconds of quiet after the last event before rules apply
+HYPRLAND_RECONNECT_DELAY = 2.0  # seconds between attempts while Hyprland is not reachable
+
+# Time-of-day scheduler (forgeworklights-schedule, see tui.scheduler)
+SCHEDULE_FILE = CONFIG_DIR / "schedule.toml"
+SCHEDULE_FADE = 60.0  # seconds a change crossfades over unless the schedule says otherwise
+SCHEDULE_MAX_FRAMES = 1024  # frames precomputed per crossfade; longer fades play them slower...
+SCHEDULE_MIN_FPS = 2.0  # ...but not below this (the daemon drops back after a second without frames)
+
+# Spatial layout (forgeworklights-layout, see tui.layout and tui.mesh)
+LAYOUT_FILE = CONFIG_DIR / "layout.json"
+LAYOUT_STRIP_WIDTH = 10.0  # millimetres; width of the strip bed looked for in mount models
+LAYOUT_RASTER = 0.5  # millimetres; grid the bed faces are rasterized on
+RIPPLE_RINGS = 2  # waves between the center and the farthest LED
+RIPPLE_SPEED = 0.5  # waves per second passing an LED
+
+# Animation clips (forgeworklights-clip, see tui.clip)
+CLIP_SOCKET = RUNTIME_DIR / "clip.sock"  # where fw_clip_helper sends the daemon's frames
+CLIP_HELPER = Path("/usr/local/libexec/fw_clip_helper")
+ROOT_HELPER_ENV = "FORGEWORKLIGHTS_ROOT_HELPER"  # the daemon runs this helper instead of fw_root_helper
+CLIP_BAKE_FPS = 30.0  # frame rate effects are baked at unless the plugin sets FPS
+
+# Layered animation (forgeworklights-effect layered, see tui.effects.layered)
+LAYERS_FILE = CONFIG_DIR / "layers.json"  # the layer stack, next to ANIMATION_PARAMS_FILE
+LAYERED_LOCK = RUNTIME_DIR / "layered.lock"  # held by the one compositor of a session
+LAYERED_BATCH = 6  # frames composited per vectorized pass (0.2 s at 30 FPS)
+
+# Waybar status emitter (see tui.waybar)
+DAEMON_POLL_INTERVAL = 5.0  # seconds; daemon exit is the one change inotify can't report
+WAYBAR_SWATCH_WIDTH = 24  # cells in the tooltip gradient swatch
+
+# Diagnostics (SIGUSR1 snapshots, see tui.diagnostics)
+DIAGNOSTICS_DIR = CACHE_DIR
+DIAGNOSTICS_KEEP = 10  # newest snapshots kept on disk
+HANDLER_LATENCY_HISTORY = 200  # handler timings kept in memory
@@ -0,0 +1,266 @@
+"""
+LED control state for ForgeworkLights (Python side of include/control_state.hpp)
+
+The settings the daemon acts on live either in one consolidated control
+document, CONFIG_DIR/state.json, or - when that file does not exist - in
+the legacy per-setting files (led-theme, brightness, temperature,
+animation, animation-params.json). Everything in the TUI reads and writes them
+through this module, so callers never need to know which layout is active.
+
+state.json layout:
+
+    {
+      "version": 12,                 # bumped on every write
+      "led_theme": "match",
+      "brightness": 0.8,
+      "temperature": 6500,           # white point in kelvin; 6500 = colors unchanged
+      "animation": "wave",
+      "animation_params": {"wave": {"speed": 1.0}},
+      "preview": null                # or {"name": ..., "colors": [...]} while previewing
+    }
+
+With state.json, one user action is one atomic write and one inotify
+wakeup for the daemon. Create it with `forgeworklights state migrate` (or
+migrate() below); `forgeworklights state off` switches back.
+
+Every update is also announced on the event bus (see tui.bus) as the
+typed changes it made, so listeners need not re-read these files.
+
+All functions here do blocking file I/O; the TUI calls them through the
+I/O executor.
+"""
+import copy
+
+from .constants import (
+    ANIMATION_FILE,
+    ANIMATION_PARAMS_FILE,
+    BRIGHTNESS_FILE,
+    CONTROL_FILE,
+    LED_THEME_FILE,
+    MIN_TEMPERATURE,
+    NEUTRAL_TEMPERATURE,
+    TEMPERATURE_FILE,
+    THEME_SYMLINK,
+)
+from . import bus
+from .utils import atomic_file
+
+PREVIEW_THEME = "__preview__"
+
+DEFAULT_STATE = {
+    "version": 0,
+    "led_theme": "match",
+    "brightness": 1.0,
+    "temperature": NEUTRAL_TEMPERATURE,
+    "animation": "static",
+    "animation_params": {},
+    "preview": None,
+}
+
+
+def enabled() -> bool:
+    """True when the consolidated state.json is in use."""
+    return CONTROL_FILE.exists()
+
+
+def read_state() -> dict:
+    """Current control state, from state.json or the legacy files."""
+    data, _gen = atomic_file.read_json(CONTROL_FILE)
+    if isinstance(data, dict):
+        return _normalize(data)
+    return _read_legacy()
+
+
+def active_theme_key(state: dict) -> str | None:
+    """Database key of the theme the daemon shows for this control state."""
+    led_theme = state["led_theme"]
+    if led_theme and led_theme != "match":
+        return led_theme
+    try:
+        if THEME_SYMLINK.is_symlink():
+            return THEME_SYMLINK.resolve().name
+    except OSError:
+        pass
+    return None
+
+
+def update(**changes) -> dict:
+    """Apply changes and return the resulting state.
+
+    Keys are those of DEFAULT_STATE (except version). animation_params is
+    merged per animation: {"wave": {...}} replaces only the wave entry.
+    """
+    unknown = set(changes) - (set(DEFAULT_STATE) - {"version"})
+    if unknown:
+        raise ValueError(f"Unknown control settings: {', '.join(sorted(unknown))}")
+
+    with atomic_file.file_lock(CONTROL_FILE):
+        data, _gen = atomic_file.read_json(CONTROL_FILE)
+        if isinstance(data, dict):
+            state = _normalize(data)
+            before = {key: state[key] for key in changes}
+            before["animation_params"] = dict(state["animation_params"])
+            _apply(state, changes)
+            state["version"] += 1
+            atomic_file.atomic_write_json(CONTROL_FILE, state)
+        else:
+            state = before = None
+
+    if state is None:
+        # The legacy files have no cheap "before", so every change is announced
+        state, before = _update_legacy(changes), {}
+    _publish(changes, before)
+    return state
+
+
+def begin_preview(colors: list) -> str:
+    """Show colors on the LEDs; returns the led_theme to restore afterwards."""
+    preview = {"name": "Preview", "colors": list(colors)}
+    saved = read_state()["led_theme"]
+    # Legacy layout: the preview theme is stored before led-theme switches to it
+    update(led_theme=PREVIEW_THEME, preview=preview)
+    return saved if saved != PREVIEW_THEME else "match"
+
+
+def end_preview(saved_theme: str) -> None:
+    """Restore the LED theme that was active before begin_preview()."""
+    update(led_theme=saved_theme, preview=None)
+
+
+def migrate(default_brightness: float = 1.0) -> bool:
+    """Create state.json from the legacy files (no-op if it already exists)."""
+    with atomic_file.file_lock(CONTROL_FILE):
+        if CONTROL_FILE.exists():
+            return False
+        state = _read_legacy(default_brightness)
+        state["version"] = 1
+        atomic_file.atomic_write_json(CONTROL_FILE, state)
+        return True
+
+
+def _normalize(data: dict) -> dict:
+    state = copy.deepcopy(DEFAULT_STATE)
+    for key in state:
+        if key in data and data[key] is not None:
+            state[key] = data[key]
+    state["preview"] = data.get("preview") if isinstance(data.get("preview"), dict) else None
+    if not isinstance(state["animation_params"], dict):
+        state["animation_params"] = {}
+    try:
+        state["brightness"] = min(1.0, max(0.0, float(state["brightness"])))
+    except (TypeError, ValueError):
+        state["brightness"] = DEFAULT_STATE["brightness"]
+    state["temperature"] = _temperature(state["temperature"])
+    return state
+
+
+def _temperature(value) -> float:
+    try:
+        return min(NEUTRAL_TEMPERATURE, max(MIN_TEMPERATURE, float(value)))
+    except (TypeError, ValueError):
+        return NEUTRAL_TEMPERATURE
+
+
+def _apply(state: dict, changes: dict) -> None:
+    for key, value in changes.items():
+        if key == "animation_params":
+            for anim_id, params in value.items():
+                state["animation_params"][anim_id] = dict(params)
+        else:
+            state[key] = value
+
+
+def _publish(changes: dict, before: dict) -> None:
+    """Announce changes on the event bus; before holds the previous values ({} if unknown)."""
+    def changed(key):
+        return key in changes and (key not in before or before[key] != changes[key])
+
+    if changed("preview"):
+        preview = changes["preview"]
+        if preview is None:
+            bus.publish(bus.PREVIEW_ENDED, led_theme=changes.get("led_theme"))
+        else:
+            bus.publish(bus.PREVIEW_STARTED, name=preview.get("name"), colors=preview.get("colors", []))
+    # Switching to and from the preview theme is reported as the preview itself
+    if changed("led_theme") and PREVIEW_THEME not in (changes["led_theme"], before.get("led_theme")):
+        bus.publish(bus.THEME_CHANGED, led_theme=changes["led_theme"])
+    if changed("brightness"):
+        bus.publish(bus.BRIGHTNESS_CHANGED, brightness=changes["brightness"])
+    if changed("temperature"):
+        bus.publish(bus.TEMPERATURE_CHANGED, temperature=changes["temperature"])
+    if changed("animation"):
+        bus.publish(bus.ANIMATION_CHANGED, animation=changes["animation"])
+    if "animation_params" in changes:
+        old_params = before.get("animation_params", {})
+        params = {
+            anim_id: dict(values) for anim_id, values in changes["animation_params"].items()
+            if old_params.get(anim_id) != dict(values)
+        }
+        if params:
+            bus.publish(bus.PARAMS_CHANGED, animation_params=params)
+
+
+def _read_text(path):
+    try:
+        return path.read_text().strip() or None
+    except OSError:
+        return None
+
+
+def _read_legacy(default_brightness: float = 1.0) -> dict:
+    state = copy.deepcopy(DEFAULT_STATE)
+    state["brightness"] = default_brightness
+    state["led_theme"] = _read_text(LED_THEME_FILE) or state["led_theme"]
+    state["animation"] = _read_text(ANIMATION_FILE) or state["animation"]
+    brightness = _read_text(BRIGHTNESS_FILE)
+    if brightness is not None:
+        try:
+            state["brightness"] = min(1.0, max(0.0, float(brightness)))
+        except ValueError:
+            pass
+    temperature = _read_text(TEMPERATURE_FILE)
+    if temperature is not None:
+        state["temperature"] = _temperature(temperature)
+    params, _gen = atomic_file.read_json(ANIMATION_PARAMS_FILE, {})
+    if isinstance(params, dict):
+        state["animation_params"] = params
+    return state
+
+
+def _update_legacy(changes: dict) -> dict:
+    """Write each changed setting to its own file (pre-state.json layout)."""
+    if "preview" in changes:
+        preview = changes["preview"]
+
+        def set_preview(db_data):
+            themes = db_data.setdefault("themes", {})
+            if preview is None:
+                if PREVIEW_THEME not in themes:
+                    return False
+                del themes[PREVIEW_THEME]
+            else:
+                themes[PREVIEW_THEME] = preview
+        # Imported here: the preview path is the only one that needs the
+        # gradient code, and launchers (tui.quick) apply settings without it
+        from . import themes_db
+        themes_db.update_db(set_preview)
+
+    if "animation_params" in changes:
+        def merge_params(params):
+            for anim_id, values in changes["animation_params"].items():
+                params[anim_id] = dict(values)
+        atomic_file.update_json(ANIMATION_PARAMS_FILE, merge_params)
+
+    if "brightness" in changes:
+        atomic_file.atomic_write_text(BRIGHTNESS_FILE, f"{changes['brightness']:.2f}\n")
+
+    if "temperature" in changes:
+        atomic_file.atomic_write_text(TEMPERATURE_FILE, f"{changes['temperature']:.0f}\n")
+
+    if "animation" in changes:
+        atomic_file.atomic_write_text(ANIMATION_FILE, f"{changes['animation']}\n")
+
+    if "led_theme" in changes:
+        atomic_file.atomic_write_text(LED_THEME_FILE, f"{changes['led_theme']}\n")
+
+    return _read_legacy()
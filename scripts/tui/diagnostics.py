@@ -0,0 +1,266 @@
+"""
+Runtime diagnostics for the ForgeworkLights TUI
+
+Sending SIGUSR1 to a running forgeworklights-menu writes a JSON snapshot of
+the app's internals to CACHE_DIR:
+
+    kill -USR1 $(pgrep -f forgeworklights-menu)
+
+The snapshot is collected on the event loop (widget tree, timers, workers,
+message queues) and then handed to a thread for the expensive parts
+(tracemalloc snapshot, JSON encoding, disk write), so input keeps flowing
+while a dump is in progress.
+
+tracemalloc is not running by default. The first dump starts it and records
+a baseline; every later dump reports the top allocators and the biggest
+growth since the previous dump. Set FORGEWORKLIGHTS_TRACEMALLOC=1 to trace
+from startup instead.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import os
+import signal
+import sys
+import time
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+
+from .constants import DIAGNOSTICS_DIR, DIAGNOSTICS_KEEP, HANDLER_LATENCY_HISTORY
+from .io_executor import IO
+
+TRACEMALLOC_FRAMES = 8
+TOP_ALLOCATORS = 25
+
+# Most recent handler timings: (qualified name, duration ms, wall-clock time)
+_latencies: deque = deque(maxlen=HANDLER_LATENCY_HISTORY)
+
+# name -> object exposing cache_info() (functools.lru_cache) or a callable
+# returning a dict with "hits" and "misses"
+_caches: dict = {}
+
+
+def timed(func):
+    """Record the wall time of a (sync or async) handler for diagnostics."""
+    name = func.__qualname__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _latencies.append((name, (time.perf_counter() - start) * 1000.0, time.time()))
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _latencies.append((name, (time.perf_counter() - start) * 1000.0, time.time()))
+    return wrapper
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a cache's hit/miss counters in diagnostics snapshots."""
+    _caches[name] = cache
+
+
+def cache_stats() -> dict:
+    """Return hit/miss/hit-rate figures for every registered cache."""
+    stats = {}
+    for name, cache in _caches.items():
+        try:
+            if hasattr(cache, "cache_info"):
+                info = cache.cache_info()
+                hits, misses = info.hits, info.misses
+                entry = {"hits": hits, "misses": misses, "size": info.currsize, "maxsize": info.maxsize}
+            else:
+                entry = dict(cache())
+                hits, misses = entry.get("hits", 0), entry.get("misses", 0)
+            total = hits + misses
+            entry["hit_rate"] = round(hits / total, 4) if total else None
+            stats[name] = entry
+        except Exception as e:
+            stats[name] = {"error": str(e)}
+    return stats
+
+
+def _section(collect, *args):
+    """Run one section's collector; its error takes its place if it fails."""
+    try:
+        return collect(*args)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _owner(node) -> str:
+    return type(node).__name__ + (f"#{node.id}" if getattr(node, "id", None) else "")
+
+
+def _widgets(widgets) -> dict:
+    counts = Counter(type(widget).__name__ for widget in widgets)
+    return {"total": sum(counts.values()), "by_type": dict(counts.most_common())}
+
+
+def _timers(nodes) -> list:
+    timers = []
+    for node in nodes:
+        for timer in list(getattr(node, "_timers", ())):
+            task = getattr(timer, "_task", None)
+            active = getattr(timer, "_active", None)
+            timers.append({
+                "name": getattr(timer, "name", None),
+                "owner": _owner(node),
+                "interval": getattr(timer, "_interval", None),
+                "repeat": getattr(timer, "_repeat", None),
+                "running": task is not None,
+                "paused": None if active is None else task is not None and not active.is_set(),
+            })
+    return timers
+
+
+def _workers(app) -> list:
+    return [
+        {
+            "name": worker.name,
+            "group": worker.group,
+            "state": worker.state.name,
+            "thread": getattr(worker, "_thread_worker", None),
+            "cancelled": worker.is_cancelled,
+        }
+        for worker in app.workers
+    ]
+
+
+def _message_queues(nodes) -> dict:
+    queues = {}
+    for node in nodes:
+        size = node.message_queue_size
+        if size:
+            key = _owner(node)
+            queues[key] = queues.get(key, 0) + size
+    return {"total": sum(queues.values()), "by_node": queues}
+
+
+class DiagnosticsDumper:
+    """Collects and writes diagnostics snapshots for a running Textual app."""
+
+    def __init__(self, app, directory=DIAGNOSTICS_DIR):
+        self.app = app
+        self.directory = directory
+        self._previous_snapshot = None
+        self._installed = False
+        if os.environ.get("FORGEWORKLIGHTS_TRACEMALLOC") and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def install(self) -> None:
+        """Register the SIGUSR1 handler on the running event loop."""
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.request_dump)
+            self._installed = True
+        except (NotImplementedError, RuntimeError, ValueError) as e:
+            print(f"[TUI] Diagnostics signal handler unavailable: {e}", file=sys.stderr)
+
+    def uninstall(self) -> None:
+        """Remove the SIGUSR1 handler."""
+        if not self._installed:
+            return
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+        except Exception:
+            pass
+        self._installed = False
+
+    def request_dump(self) -> None:
+        """Signal callback - schedule a dump without blocking the loop."""
+        self.app.run_worker(self.dump(), name="diagnostics_dump", group="diagnostics", exclusive=True)
+
+    async def dump(self):
+        """Collect a snapshot on the loop, then finish and write it off-loop."""
+        snapshot = self.collect()
+        path = await asyncio.to_thread(self._finish, snapshot)
+        print(f"[TUI] Wrote diagnostics snapshot to {path}", file=sys.stderr)
+        return path
+
+    def collect(self) -> dict:
+        """Gather everything that must be read on the event loop.
+
+        Timers and workers are read through Textual internals, which may
+        change between releases: a missing field comes out as null, and a
+        section that fails altogether is replaced by its error, so the rest
+        of the snapshot is still written.
+        """
+        app = self.app
+        nodes = [app]
+        for screen in app.screen_stack:
+            nodes.extend(screen.walk_children(with_self=True))
+
+        latencies = [
+            {"handler": name, "ms": round(ms, 3), "at": at}
+            for name, ms, at in list(_latencies)
+        ]
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+            "uptime_s": round(time.monotonic() - getattr(app, "_started_monotonic", time.monotonic()), 1),
+            "widgets": _section(_widgets, nodes[1:]),
+            "timers": _section(_timers, nodes),
+            "workers": _section(_workers, app),
+            "message_queues": _section(_message_queues, nodes),
+            "io_pending": _section(IO.pending),
+            "caches": cache_stats(),
+            "handler_latencies": latencies,
+            "asyncio_tasks": len(asyncio.all_tasks()),
+        }
+
+    def _finish(self, snapshot: dict):
+        """Thread side: add tracemalloc data and write the snapshot."""
+        snapshot["tracemalloc"] = self._tracemalloc_section()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = self.directory / f"diagnostics-{stamp}-{os.getpid()}.json"
+        path.write_text(json.dumps(snapshot, indent=2, default=str))
+        self._prune()
+        return path
+
+    def _tracemalloc_section(self) -> dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._previous_snapshot = tracemalloc.take_snapshot()
+            return {"status": "started", "note": "tracing began with this dump; send SIGUSR1 again for allocators"}
+
+        current = tracemalloc.take_snapshot()
+        traced, peak = tracemalloc.get_traced_memory()
+        section = {
+            "status": "tracing",
+            "traced_bytes": traced,
+            "peak_bytes": peak,
+            "top_allocators": [
+                {"where": str(stat.traceback[0]), "size": stat.size, "count": stat.count}
+                for stat in current.statistics("lineno")[:TOP_ALLOCATORS]
+            ],
+        }
+        if self._previous_snapshot is not None:
+            section["growth_since_last_dump"] = [
+                {"where": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in current.compare_to(self._previous_snapshot, "lineno")[:TOP_ALLOCATORS]
+            ]
+        self._previous_snapshot = current
+        return section
+
+    def _prune(self) -> None:
+        """Keep only the newest DIAGNOSTICS_KEEP snapshots."""
+        try:
+            dumps = sorted(self.directory.glob("diagnostics-*.json"), key=lambda p: p.stat().st_mtime)
+            for old in dumps[:-DIAGNOSTICS_KEEP]:
+                old.unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -0,0 +1,135 @@
+"""
+External effects: put any frames on the strip from Python
+
+    from tui import effects
+
+    def frames(led_count):
+        for step in itertools.count():
+            yield bytes(...)        # led_count * 3 bytes: R, G, B per LED
+
+    effects.run(frames)
+
+An effect is a callable that takes the strip's led_count and returns an
+iterator of frames - a generator function is the natural shape. A frame is
+led_count * 3 bytes, or a sequence of (r, g, b) tuples or "#rrggbb"
+strings (see to_frame). run() drives it at EFFECT_FPS into the shared-memory
+ring the daemon's "external" animation reads (see ring and
+include/effect_ring.hpp), and selects that animation while it runs. The
+daemon applies brightness, gamma and current limiting as for its own
+animations, and shows the theme gradient again once the effect stops.
+
+Effects never run inside the daemon. A user script calling run() is its
+own process; `forgeworklights-effect run plugin.py` loads a plugin file
+(one defining frames(led_count), see load_plugin) into a separate,
+lower-priority subprocess and restarts it if it crashes (see host). The
+daemon reads the ring without waiting on anything, so a slow or stuck
+effect only means the last frame stays up.
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from ..constants import EFFECT_FPS, EFFECT_RING, EFFECT_RING_SLOTS
+from ..utils.colors import hex_to_rgb
+from .ring import RingReader, RingWriter
+
+EXTERNAL_ANIMATION = "external"
+LAYERED_ANIMATION = "layered"  # ring-fed too, composited by effects.layered
+
+__all__ = ["EXTERNAL_ANIMATION", "LAYERED_ANIMATION", "RingReader", "RingWriter", "load_plugin", "run", "start_layered",
+           "to_frame"]
+
+
+def to_frame(frame, led_count: int):
+    """led_count * 3 RGB bytes from a frame in any accepted form (short frames are padded black).
+
+    A bytes-like frame of exactly that length is returned as is, so an
+    effect may keep rebuilding one buffer in place (push copies it).
+    """
+    length = led_count * 3
+    if isinstance(frame, (bytes, bytearray, memoryview)):
+        if len(frame) == length:
+            return frame
+        data = bytes(frame)
+    else:
+        data = bytearray()
+        for color in frame:
+            data += bytes(hex_to_rgb(color) if isinstance(color, str) else color)
+    return data[:length] if len(data) >= length else data + bytes(length - len(data))
+
+
+def load_plugin(path) -> tuple:
+    """(frames, fps) from a plugin file: its frames(led_count) callable and optional FPS."""
+    path = Path(path)
+    spec = importlib.util.spec_from_file_location(f"forgeworklights_effect_{path.stem}", path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load effect plugin {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    frames = getattr(module, "frames", None)
+    if not callable(frames):
+        raise ImportError(f"Effect plugin {path} does not define frames(led_count)")
+    return frames, float(getattr(module, "FPS", EFFECT_FPS))
+
+
+def start_layered() -> None:
+    """Start the compositor of the "layered" animation in the background (see layered).
+
+    It exits by itself once another animation is selected, and at once if
+    one is already running, so this is safe to call on every selection.
+    """
+    package_root = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    # Not waited for: subprocess reaps it once the Popen object is gone
+    subprocess.Popen([sys.executable, "-m", "tui.effects.host", LAYERED_ANIMATION], env=env,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
+def run(effect, fps: float = EFFECT_FPS, led_count: int | None = None, select: bool = True,
+        path: Path = EFFECT_RING, slots: int = EFFECT_RING_SLOTS, latest_only: bool = False) -> int:
+    """Drive effect into the daemon's ring until it is exhausted; returns the frames sent.
+
+    select switches the daemon to the "external" animation for the run and
+    back to the previous animation afterwards. latest_only is for effects
+    whose frames go stale (audio): one slot, and a frame the daemon has not
+    taken yet is replaced by the next instead of being queued behind it.
+    """
+    from .. import control, themes_db
+    led_count = led_count or themes_db.led_count()
+    interval = 1.0 / fps
+    # A running daemon frees a slot every frame; only a stalled or absent one costs drops
+    stall_timeout = 0.0 if latest_only else 2.0 / EFFECT_FPS
+    ring = RingWriter.create(led_count, path, 1 if latest_only else slots)
+    previous = None
+    if select:
+        previous = control.read_state()["animation"]
+        if previous != EXTERNAL_ANIMATION:
+            control.update(animation=EXTERNAL_ANIMATION)
+    sent = 0
+    try:
+        next_frame = time.monotonic()
+        for frame in effect(led_count):
+            # Effects faster than the daemon are held back here (backpressure);
+            # if it stops reading, the oldest frame is dropped instead
+            ring.push(to_frame(frame, led_count), timeout=stall_timeout)
+            sent += 1
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -interval:
+                next_frame = time.monotonic()  # the effect is slower than fps; don't try to catch up
+    finally:
+        ring.close()
+        if previous is not None and previous != EXTERNAL_ANIMATION:
+            # Only if nobody picked another animation in the meantime
+            if control.read_state()["animation"] == EXTERNAL_ANIMATION:
+                control.update(animation=previous)
+                if previous == LAYERED_ANIMATION:
+                    start_layered()  # its compositor left when this run took the ring over
+    return sent
@@ -0,0 +1,436 @@
+"""
+Audio visualizer: the strip as a spectrum analyzer
+
+    forgeworklights-effect audio [--device=SOURCE | --input=FILE] [--fps=N]
+    forgeworklights-effect audio-bench FILE.wav [--fps=N]
+
+A capture thread reads 16-bit PCM - from PulseAudio/PipeWire with parec
+(AUDIO_MONITOR by default: whatever is playing), or from a WAV file
+replayed in real time, a FIFO or a raw s16le mono file as a stand-in - in
+AUDIO_BLOCK sample blocks into PcmRing, a fixed-size ring of the most
+recent samples. Once per frame the newest AUDIO_WINDOW samples are
+windowed (Hann) and transformed, and the power is summed over led_count
+log-spaced bands across AUDIO_BAND_RANGE: the first LED is the bass, the
+last the treble. Each LED shows its own color of the active theme's
+gradient, brightened by its band's level in dB relative to a slowly
+releasing peak (automatic gain); bands jump up at once and fall off with
+the AUDIO_DECAY time constant.
+
+Latency: a frame is always computed from the newest samples, older audio
+is never queued, and frames go out through a single-slot ring
+(effects.run with latest_only) that the next one simply replaces if the
+daemon has not taken it yet. From capture to the daemon's frame that
+bounds it by one capture block, one analysis and one daemon frame -
+within two frames at 30 FPS. `audio-bench` replays a WAV file through
+the whole pipeline against a simulated daemon and reports the measured
+latency and CPU use.
+
+All buffers are allocated up front; the FFT's result is the only array
+created per frame (NumPy before 2.0 has no out= for it). Requires NumPy.
+"""
+import os
+import stat
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ..constants import (
+    AUDIO_BAND_RANGE,
+    AUDIO_BLOCK,
+    AUDIO_CAPTURE_LATENCY_MS,
+    AUDIO_DECAY,
+    AUDIO_DYNAMIC_RANGE,
+    AUDIO_FLOOR_DB,
+    AUDIO_GAIN_RELEASE,
+    AUDIO_LATENCY_BUDGET,
+    AUDIO_MONITOR,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_WINDOW,
+    DEFAULT_LED_COUNT,
+    EFFECT_FPS,
+    THERMAL_BACKGROUND,
+)
+from .ring import RingReader, RingWriter
+from .thermal import theme_gradient, theme_watcher
+
+_RING_WINDOWS = 4  # PcmRing holds this many analysis windows
+
+
+class Capture:
+    """A source of 16-bit little-endian PCM frames."""
+
+    channels = 1
+    rate = AUDIO_SAMPLE_RATE
+
+    def readinto(self, buffer: memoryview) -> int:
+        """Read up to len(buffer) bytes; 0 at the end of the stream."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MonitorCapture(Capture):
+    """What a PulseAudio/PipeWire source hears, through parec (libpulse; PipeWire via pipewire-pulse)."""
+
+    def __init__(self, device: str | None = None, rate: int = AUDIO_SAMPLE_RATE):
+        self.rate = rate
+        command = [
+            "parec", f"--device={device or AUDIO_MONITOR}", "--format=s16le", f"--rate={rate}",
+            "--channels=1", f"--latency-msec={AUDIO_CAPTURE_LATENCY_MS}", "--raw",
+        ]
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        except FileNotFoundError:
+            raise OSError("parec not found; install libpulse (it ships parec)") from None
+
+    def readinto(self, buffer):
+        return self.process.stdout.readinto(buffer) or 0
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+def _wav_format(f) -> tuple:
+    """(channels, rate, data bytes) of a 16-bit PCM WAV file, positioned at its samples."""
+    riff, _size, wave_id = struct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave_id != b"WAVE":
+        raise ValueError("not a WAV file")
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk, size = struct.unpack("<4sI", header)
+        if chunk == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", f.read(size + size % 2))
+        elif chunk == b"data":
+            if fmt is None or fmt[0] not in (1, 0xFFFE) or fmt[5] != 16:
+                raise ValueError("only 16-bit PCM WAV files are supported")
+            return fmt[1], fmt[2], size
+        else:
+            f.seek(size + size % 2, os.SEEK_CUR)
+
+
+class FileCapture(Capture):
+    """A WAV file, FIFO or raw s16le mono file (at AUDIO_SAMPLE_RATE) standing in for capture.
+
+    Regular files are paced to real time - a block is handed out when its
+    last sample would have been captured - so they behave like a live
+    source; a FIFO is paced by whoever writes it.
+    """
+
+    def __init__(self, path, realtime: bool | None = None):
+        self.file = open(path, "rb", buffering=0)
+        fifo = stat.S_ISFIFO(os.fstat(self.file.fileno()).st_mode)
+        self._remaining = None
+        if not fifo and self.file.read(4) == b"RIFF":
+            self.file.seek(0)
+            try:
+                self.channels, self.rate, self._remaining = _wav_format(self.file)
+            except (ValueError, struct.error) as e:
+                self.file.close()
+                raise OSError(f"{path}: {e}") from None
+        elif not fifo:
+            self.file.seek(0)
+        self.realtime = not fifo if realtime is None else realtime
+        self._bytes_per_second = self.rate * self.channels * 2
+        self._delivered = 0
+        self._started = None
+
+    def readinto(self, buffer):
+        if self._remaining is not None:
+            buffer = buffer[:self._remaining]
+        count = self.file.readinto(buffer) or 0
+        if self._remaining is not None:
+            self._remaining -= count
+        if self.realtime and count:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._delivered += count
+            delay = self._started + self._delivered / self._bytes_per_second - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return count
+
+    def close(self):
+        self.file.close()
+
+
+class PcmRing:
+    """The most recent mono samples (float32, -1 to 1) in a fixed-size ring.
+
+    One writer (the capture thread) and one reader; written only grows, so
+    the reader can tell when its copy was overtaken and retry.
+    """
+
+    def __init__(self, size: int):
+        self.samples = np.zeros(size, dtype=np.float32)
+        self.size = size
+        self.written = 0
+        self.captured_at = 0.0  # time.monotonic() when the newest block arrived
+
+    def write(self, block: np.ndarray) -> None:
+        n = len(block)
+        pos = self.written % self.size
+        first = min(n, self.size - pos)
+        self.samples[pos:pos + first] = block[:first]
+        self.samples[:n - first] = block[first:]
+        self.captured_at = time.monotonic()
+        self.written += n
+
+    def latest(self, out: np.ndarray) -> float:
+        """Copy the newest len(out) samples into out; returns when the newest arrived."""
+        want = len(out)
+        while True:
+            written, captured_at = self.written, self.captured_at
+            end = written % self.size
+            if end >= want:
+                out[:] = self.samples[end - want:end]
+            else:
+                out[:want - end] = self.samples[self.size - (want - end):]
+                out[want - end:] = self.samples[:end]
+            if self.written - written <= self.size - want:
+                return captured_at
+
+
+class CaptureWorker(threading.Thread):
+    """Reads capture blocks into a PcmRing until the stream ends or stop() is called."""
+
+    def __init__(self, capture: Capture, ring: PcmRing, block: int = AUDIO_BLOCK):
+        super().__init__(name="forgeworklights-audio", daemon=True)
+        self.capture = capture
+        self.ring = ring
+        self._raw = bytearray(block * capture.channels * 2)
+        self._view = memoryview(self._raw)
+        self._pcm = np.frombuffer(self._raw, dtype="<i2").reshape(block, capture.channels)
+        self._mono = np.empty(block, dtype=np.float32)
+        self.finished = threading.Event()
+        self._stopped = False
+
+    def run(self) -> None:
+        try:
+            size = len(self._raw)
+            while not self._stopped:
+                filled = 0
+                while filled < size:
+                    count = self.capture.readinto(self._view[filled:])
+                    if not count:
+                        return
+                    filled += count
+                np.mean(self._pcm, axis=1, dtype=np.float32, out=self._mono)
+                self._mono *= 1.0 / 32768.0
+                self.ring.write(self._mono)
+        except (OSError, ValueError):
+            pass  # the capture was closed under us
+        finally:
+            self.finished.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+
+
+class Analyzer:
+    """Band levels (0-1, one per LED) of a window of samples."""
+
+    def __init__(self, bands: int, rate: int, fps: float = EFFECT_FPS, window: int = AUDIO_WINDOW):
+        self.samples = np.zeros(window, dtype=np.float32)
+        self._hann = np.hanning(window).astype(np.float32)
+        self._windowed = np.empty(window, dtype=np.float32)
+        # Band edges as FFT bins, log-spaced; every band gets at least one bin
+        low, high = AUDIO_BAND_RANGE
+        edges = np.geomspace(low, min(high, rate / 2), bands + 1) * window / rate
+        starts = np.round(edges[:-1]).astype(np.intp)
+        for i in range(1, bands):
+            starts[i] = max(starts[i], starts[i - 1] + 1)
+        self._starts = starts
+        self._stop = max(int(round(edges[-1])), int(starts[-1]) + 1)
+        self._power = np.empty(self._stop, dtype=np.float32)
+        self._energy = np.empty(bands, dtype=np.float32)
+        self._fresh = np.empty(bands, dtype=np.float32)
+        self.levels = np.zeros(bands, dtype=np.float32)
+        self.peak = AUDIO_FLOOR_DB
+        self._release = AUDIO_GAIN_RELEASE / fps
+        self._fall = np.float32(np.exp(-1.0 / (fps * AUDIO_DECAY)))
+
+    def analyze(self) -> np.ndarray:
+        """Levels for the current contents of self.samples (updated in place)."""
+        np.multiply(self.samples, self._hann, out=self._windowed)
+        spectrum = np.fft.rfft(self._windowed)[:self._stop]
+        np.abs(spectrum, out=self._power, casting="same_kind")
+        np.square(self._power, out=self._power)
+        np.add.reduceat(self._power, self._starts, out=self._energy)
+        db = self._fresh
+        np.maximum(self._energy, 1e-12, out=db)
+        np.log10(db, out=db)
+        db *= 10.0
+        # Automatic gain: full scale follows the loudest band, recovering slowly
+        self.peak = max(float(db.max()), self.peak - self._release, AUDIO_FLOOR_DB)
+        db -= self.peak - AUDIO_DYNAMIC_RANGE
+        db *= 1.0 / AUDIO_DYNAMIC_RANGE
+        np.clip(db, 0.0, 1.0, out=db)
+        # Up at once, down with the AUDIO_DECAY time constant
+        self.levels *= self._fall
+        np.maximum(self.levels, db, out=self.levels)
+        return self.levels
+
+
+class SpectrumStrip:
+    """Frames of the gradient's colors scaled by per-LED levels."""
+
+    def __init__(self, gradient: bytes, background: float = THERMAL_BACKGROUND):
+        count = len(gradient) // 3
+        self._colors = np.frombuffer(gradient, dtype=np.uint8).reshape(count, 3).astype(np.float32)
+        self._scale = np.empty((count, 1), dtype=np.float32)
+        self._rgb = np.empty((count, 3), dtype=np.float32)
+        self._frame = np.empty(count * 3, dtype=np.uint8)
+        self.background = background
+
+    def render(self, levels: np.ndarray) -> memoryview:
+        """The frame's led_count * 3 bytes (a view of the same buffer every call)."""
+        scale = self._scale[:, 0]
+        np.multiply(levels, 1.0 - self.background, out=scale)
+        scale += self.background
+        np.multiply(self._colors, self._scale, out=self._rgb)
+        np.rint(self._rgb, out=self._rgb)
+        self._frame[:] = self._rgb.reshape(-1)
+        return self._frame.data
+
+
+class Visualizer:
+    """Capture thread, sample ring, analyzer and renderer for one strip."""
+
+    def __init__(self, capture: Capture, led_count: int, fps: float = EFFECT_FPS, gradient: bytes | None = None):
+        self.capture = capture
+        self.led_count = led_count
+        self.ring = PcmRing(AUDIO_WINDOW * _RING_WINDOWS)
+        self.worker = CaptureWorker(capture, self.ring)
+        self.analyzer = Analyzer(led_count, capture.rate, fps)
+        self.strip = SpectrumStrip(gradient if gradient is not None else theme_gradient(led_count))
+
+    def start(self) -> None:
+        self.worker.start()
+
+    @property
+    def finished(self) -> bool:
+        return self.worker.finished.is_set()
+
+    def frame(self) -> tuple:
+        """(frame, capture time of its newest sample) from the newest window."""
+        captured_at = self.ring.latest(self.analyzer.samples)
+        return self.strip.render(self.analyzer.analyze()), captured_at
+
+    def set_gradient(self, gradient: bytes) -> None:
+        self.strip = SpectrumStrip(gradient)
+
+    def close(self) -> None:
+        self.worker.stop()
+        self.capture.close()
+        self.worker.join(timeout=1.0)
+
+
+def effect(device: str | None = None, input_path=None, fps: float = EFFECT_FPS, follow_theme: bool = True):
+    """The visualizer as a frames(led_count) callable for effects.run (with latest_only).
+
+    Captures from input_path if given, else from the Pulse/PipeWire source
+    device (AUDIO_MONITOR by default); raises OSError right away if that fails.
+    """
+    capture = FileCapture(input_path) if input_path else MonitorCapture(device)
+
+    def frames(led_count):
+        visualizer = Visualizer(capture, led_count, fps)
+        visualizer.start()
+        watcher = theme_watcher() if follow_theme else None
+        check_every = max(1, round(fps))
+        tick = 0
+        try:
+            while not visualizer.finished:
+                tick += 1
+                if watcher is not None and tick % check_every == 0 and watcher.read(0):
+                    visualizer.set_gradient(theme_gradient(led_count))
+                yield visualizer.frame()[0]
+        finally:
+            if watcher is not None:
+                watcher.close()
+            visualizer.close()
+
+    return frames
+
+
+def _percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def benchmark(path, fps: float = EFFECT_FPS, led_count: int = DEFAULT_LED_COUNT) -> dict:
+    """Replay a WAV file in real time through the whole pipeline and measure it.
+
+    Frames go through a private single-slot ring to a simulated daemon
+    thread that takes one per frame at fps, like the real one. Latency is
+    from the arrival of a frame's newest samples to the daemon taking it.
+    """
+    capture = FileCapture(path, realtime=True)
+    interval = 1.0 / fps
+    shown = []  # (sequence, time taken)
+    with tempfile.TemporaryDirectory(prefix="fwl-audio-bench-") as tmp:
+        ring_path = Path(tmp) / "effect.ring"
+        writer = RingWriter.create(led_count, ring_path, slots=1)
+        reader = RingReader.open(ring_path, led_count)
+        gradient = bytes([255]) * (led_count * 3)  # plain white: independent of the theme
+        visualizer = Visualizer(capture, led_count, fps, gradient)
+        captured = []
+        analysis_cpu = 0.0
+        stop = threading.Event()
+
+        def daemon():
+            next_tick = time.monotonic()
+            while not stop.is_set():
+                if reader.pop() is not None:
+                    shown.append((reader.consumed - 1, time.monotonic()))
+                next_tick += interval
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+
+        consumer = threading.Thread(target=daemon, name="forgeworklights-bench-daemon", daemon=True)
+        wall_start, cpu_start = time.monotonic(), time.process_time()
+        visualizer.start()
+        consumer.start()
+        try:
+            next_frame = time.monotonic()
+            while not visualizer.finished:
+                started = time.thread_time()
+                frame, captured_at = visualizer.frame()
+                captured.append(captured_at)
+                writer.push(frame)  # replaces the previous frame if it was not taken
+                analysis_cpu += time.thread_time() - started
+                next_frame += interval
+                time.sleep(max(0.0, next_frame - time.monotonic()))
+        finally:
+            stop.set()
+            consumer.join()
+            visualizer.close()
+            wall = time.monotonic() - wall_start
+            cpu = time.process_time() - cpu_start
+            writer.close()
+            reader.close()
+
+    latencies = [taken - captured[seq] for seq, taken in shown if seq < len(captured) and captured[seq]]
+    return {
+        "frames": len(captured),
+        "shown": len(shown),
+        "replaced": len(captured) - len(shown),
+        "latency_median": _percentile(latencies, 0.5) if latencies else None,
+        "latency_p95": _percentile(latencies, 0.95) if latencies else None,
+        "latency_max": max(latencies) if latencies else None,
+        "over_budget": sum(1 for latency in latencies if latency > AUDIO_LATENCY_BUDGET),
+        "analysis_ms": 1000.0 * analysis_cpu / len(captured) if captured else 0.0,
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "seconds": wall,
+    }
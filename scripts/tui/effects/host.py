@@ -0,0 +1,472 @@
+"""
+Effect plugin host and reference consumer (installed as forgeworklights-effect)
+
+    forgeworklights-effect run PLUGIN.py [--fps=N]
+    forgeworklights-effect consume [--output=FILE] [--frames=N] [--fps=N]
+    forgeworklights-effect thermal [--rate=HZ] [--low=C] [--high=C] [--sensor=NAME] [--sysfs=DIR] [--frames=N]
+    forgeworklights-effect sensors [--sysfs=DIR]
+    forgeworklights-effect meters [SOURCE ...] [--rate=HZ] [--budget=SHARE] [--fps=N] [--levels]
+    forgeworklights-effect audio [--device=SOURCE | --input=FILE] [--fps=N]
+    forgeworklights-effect audio-bench FILE.wav [--fps=N]
+    forgeworklights-effect ripple [--axis=distance|angle|x|y] [--rings=N] [--speed=HZ] [--layout=FILE] [--frames=N]
+    forgeworklights-effect layered [--follow] [--layers=FILE] [--frames=N]
+
+`run` keeps a plugin going: the plugin is imported only in a child process
+(niced, so it yields the CPU to the daemon and the desktop), which drives
+its frames into the ring; this process selects the "external" animation,
+restarts the child EFFECT_RESTART_DELAY after a crash, and restores the
+previous animation when stopped (Ctrl+C / SIGTERM) or when the plugin's
+generator finishes.
+
+`consume` is a stand-in for the daemon when there is no hardware: it drains
+the ring at the daemon's frame rate and appends every frame it takes, raw
+RGB, to FILE (use it while the daemon is not running - the ring has one
+consumer). Frame counts, repeats and drops are printed at the end.
+
+`thermal` runs the built-in CPU temperature gauge (see thermal) in this
+process; with --frames it prints that many frames as rrggbb lines instead
+of driving the ring, one sample each, for checking it against a fake sysfs
+tree. `sensors` lists the temperature inputs it can use. `meters` shows
+CPU, memory, pressure, network and temperature meters side by side (see
+meters), also in this process; with --levels it prints the sources' levels
+instead, one sample for every line read from stdin, and the sampling
+interval the budget left at the end. `audio` is a spectrum analyzer of what is
+playing, and `audio-bench` measures its capture-to-daemon latency by
+replaying a WAV file (see audio; both need NumPy). `ripple` sends waves
+across the strip's physical layout (see ripple and tui.layout); --frames
+prints frames as `thermal` does. `layered` composites the stack of
+animations of the "layered" animation while it is selected (see layered;
+needs NumPy), niced like a plugin and once per session: the TUI starts it
+when Layered is picked, and `--follow` keeps it waiting for the next time.
+"""
+import fcntl
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from ..constants import (
+    AUDIO_LATENCY_BUDGET,
+    EFFECT_FPS,
+    EFFECT_RESTART_DELAY,
+    EFFECT_RING,
+    LAYERED_LOCK,
+    LAYERS_FILE,
+    LAYOUT_FILE,
+    METER_BUDGET,
+    METER_RATE,
+    PROC_ROOT,
+    RIPPLE_RINGS,
+    RIPPLE_SPEED,
+    SYSFS_ROOT,
+    THERMAL_MIN_RATE,
+    THERMAL_RANGE,
+    THERMAL_RATE,
+)
+from . import EXTERNAL_ANIMATION, LAYERED_ANIMATION, load_plugin, run, start_layered
+from .ring import RingReader
+
+PLUGIN_NICENESS = 5
+
+
+def _options(args: list) -> tuple:
+    options = {}
+    positional = []
+    for arg in args:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            options[name] = value
+        else:
+            positional.append(arg)
+    return positional, options
+
+
+def usage() -> None:
+    print("Usage: forgeworklights-effect run PLUGIN.py [--fps=N]")
+    print("       forgeworklights-effect consume [--output=FILE] [--frames=N] [--fps=N]")
+    print("       forgeworklights-effect thermal [--rate=HZ] [--low=C] [--high=C] [--sensor=NAME]"
+          " [--sysfs=DIR] [--frames=N]")
+    print("       forgeworklights-effect sensors [--sysfs=DIR]")
+    print("       forgeworklights-effect meters [SOURCE ...] [--rate=HZ] [--budget=SHARE] [--fps=N]"
+          " [--levels]")
+    print("         sources: cpu, memory, pressure[:cpu|io|memory], network[:IFACE], thermal")
+    print("       forgeworklights-effect audio [--device=SOURCE | --input=FILE] [--fps=N]")
+    print("       forgeworklights-effect audio-bench FILE.wav [--fps=N]")
+    print("       forgeworklights-effect ripple [--axis=distance|angle|x|y] [--rings=N] [--speed=HZ]"
+          " [--layout=FILE] [--frames=N]")
+    print("       forgeworklights-effect layered [--follow] [--layers=FILE] [--frames=N]")
+    print("A plugin defines frames(led_count), an iterator of led_count * 3 byte frames.")
+
+
+def _plugin_process(plugin: str, fps: float | None) -> int:
+    """Child side of `run`: import the plugin and drive it (the supervisor owns the animation)."""
+    os.nice(PLUGIN_NICENESS)
+    # The supervisor stops us with SIGTERM; unwind so run() removes the ring
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    frames, plugin_fps = load_plugin(plugin)
+    run(frames, fps=fps or plugin_fps, select=False)
+    return 0
+
+
+def supervise(plugin: str, fps: float | None = None) -> int:
+    """Run plugin in a child process until it finishes or we are stopped; restart it on crashes."""
+    from .. import control
+    package_root = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "tui.effects.host", "_plugin", str(Path(plugin).resolve())]
+    if fps:
+        command.append(f"--fps={fps}")
+
+    stopping = False
+    child = None
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        if child is not None and child.poll() is None:
+            child.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    previous = control.read_state()["animation"]
+    if previous != EXTERNAL_ANIMATION:
+        control.update(animation=EXTERNAL_ANIMATION)
+    try:
+        while not stopping:
+            child = subprocess.Popen(command, env=env)
+            returncode = child.wait()
+            if stopping or returncode == 0:
+                break
+            print(f"[effect] plugin exited with {returncode}; restarting in {EFFECT_RESTART_DELAY:g}s",
+                  file=sys.stderr)
+            deadline = time.monotonic() + EFFECT_RESTART_DELAY
+            while not stopping and time.monotonic() < deadline:
+                time.sleep(0.1)
+    finally:
+        if child is not None and child.poll() is None:
+            child.terminate()
+            child.wait()
+        if previous != EXTERNAL_ANIMATION and control.read_state()["animation"] == EXTERNAL_ANIMATION:
+            control.update(animation=previous)
+            if previous == LAYERED_ANIMATION:
+                start_layered()
+    return 0
+
+
+def consume(output: str, frames: int | None = None, fps: float = EFFECT_FPS) -> int:
+    """Reference consumer: take one frame per tick, like the daemon, and log them to output."""
+    interval = 1.0 / fps
+    ring = None
+    taken = repeats = 0
+    try:
+        with open(output, "ab") as out:
+            last = None
+            next_tick = time.monotonic()
+            while frames is None or taken + repeats < frames:
+                if ring is None or not ring.producer_alive():
+                    if ring is not None:
+                        ring.close()
+                    ring = RingReader.open(EFFECT_RING)
+                    if ring is not None and not ring.producer_alive():
+                        ring.close()  # left behind by an effect that was killed
+                        ring = None
+                frame = ring.pop() if ring is not None else None
+                if frame is not None:
+                    out.write(frame)
+                    last = frame
+                    taken += 1
+                elif last is not None:
+                    repeats += 1  # nothing new this tick: the daemon would show the last frame again
+                next_tick += interval
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dropped = ring.dropped if ring is not None else 0
+        if ring is not None:
+            ring.close()
+    print(f"{taken} frames written to {output}, {repeats} ticks without a new frame, "
+          f"{dropped} dropped by the producer", file=sys.stderr)
+    return 0
+
+
+def thermal(options: dict, frames: int | None = None) -> int:
+    """Run the thermal gauge (or print frames of it) with the command line's options."""
+    from . import thermal as gauge
+    from .. import themes_db
+    try:
+        rate = float(options.get("rate", THERMAL_RATE))
+        low = float(options.get("low", THERMAL_RANGE[0]))
+        high = float(options.get("high", THERMAL_RANGE[1]))
+    except ValueError:
+        usage()
+        return 1
+    if rate < THERMAL_MIN_RATE:
+        print(f"--rate must be at least {THERMAL_MIN_RATE:g} Hz: the daemon shows the theme again "
+              f"after a second without frames", file=sys.stderr)
+        return 1
+    if high <= low:
+        print("--high must be above --low", file=sys.stderr)
+        return 1
+    try:
+        effect = gauge.effect(options.get("sensor"), rate, low, high,
+                              sysfs=Path(options.get("sysfs", SYSFS_ROOT)), follow_theme=frames is None)
+    except OSError as e:
+        print(f"[thermal] {e}", file=sys.stderr)
+        return 1
+    if frames is None:
+        try:
+            run(effect, fps=rate)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    stream = effect(themes_db.led_count())
+    for _ in range(frames):
+        print(next(stream).hex())
+    stream.close()
+    return 0
+
+
+def sensors(sysfs: Path) -> int:
+    """Print every temperature input with its reading; * marks the ones thermal uses by default."""
+    from .thermal import Sensor, choose, discover
+    found = discover(sysfs)
+    if not found:
+        print(f"No temperature sensors under {sysfs}", file=sys.stderr)
+        return 1
+    chosen = {path for _label, path in choose(found)}
+    for label, path in found:
+        try:
+            sensor = Sensor(label, path)
+            value = sensor.read()
+            sensor.close()
+        except OSError:
+            value = None
+        reading = f"{value / 1000:.1f}°C" if value is not None else "unreadable"
+        print(f"{'*' if path in chosen else ' '} {label:<28} {reading:>10}  {path}")
+    return 0
+
+
+def meters(specs: list, options: dict, fps: float | None = None) -> int:
+    """Run the system meters with the command line's options."""
+    from . import meters as system_meters
+    levels = "--levels" in specs
+    specs = [spec for spec in specs if spec != "--levels"] or ["cpu"]
+    try:
+        rate = float(options.get("rate", METER_RATE))
+        budget = float(options.get("budget", METER_BUDGET))
+    except ValueError:
+        usage()
+        return 1
+    if rate <= 0 or budget <= 0:
+        print("--rate and --budget must be positive", file=sys.stderr)
+        return 1
+    fps = fps or EFFECT_FPS
+    proc = Path(options.get("proc", PROC_ROOT))
+    sysfs = Path(options.get("sysfs", SYSFS_ROOT))
+    try:
+        if levels:
+            sources = system_meters.open_sources(specs, proc, sysfs)
+        else:
+            effect = system_meters.effect(specs, rate, budget, fps, proc=proc, sysfs=sysfs)
+    except (OSError, ValueError) as e:
+        print(f"[meters] {e}", file=sys.stderr)
+        return 1
+    if levels:
+        sampler = system_meters.Sampler(sources, rate, budget)
+        try:
+            for _ in sys.stdin:
+                print(" | ".join(" ".join(f"{level:.2f}" for level in values) for values in sampler.step()),
+                      flush=True)
+            print(f"interval {sampler.interval:g}")
+        finally:
+            for source in sources:
+                source.close()
+        return 0
+    try:
+        run(effect, fps=fps)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def audio(options: dict, fps: float | None = None) -> int:
+    """Run the audio visualizer with the command line's options."""
+    try:
+        from . import audio as visualizer
+    except ImportError:
+        print("[audio] the audio visualizer needs NumPy", file=sys.stderr)
+        return 1
+    fps = fps or EFFECT_FPS
+    try:
+        effect = visualizer.effect(options.get("device"), options.get("input"), fps)
+    except OSError as e:
+        print(f"[audio] {e}", file=sys.stderr)
+        return 1
+    try:
+        run(effect, fps=fps, latest_only=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def audio_bench(path: str, fps: float | None = None) -> int:
+    """Replay path through the audio pipeline and print latency and CPU figures."""
+    try:
+        from . import audio as visualizer
+    except ImportError:
+        print("[audio] the audio visualizer needs NumPy", file=sys.stderr)
+        return 1
+    from .. import themes_db
+    fps = fps or EFFECT_FPS
+    try:
+        result = visualizer.benchmark(path, fps, themes_db.led_count())
+    except OSError as e:
+        print(f"[audio] {e}", file=sys.stderr)
+        return 1
+    if result["latency_p95"] is None:
+        print("[audio] no frame reached the simulated daemon (is the file empty?)", file=sys.stderr)
+        return 1
+    budget = AUDIO_LATENCY_BUDGET * 1000
+    print(f"{result['seconds']:.1f}s replayed at {fps:g} FPS: {result['frames']} frames, "
+          f"{result['shown']} taken by the daemon, {result['replaced']} replaced before it did")
+    print(f"latency (capture to daemon): median {result['latency_median'] * 1000:.1f} ms, "
+          f"p95 {result['latency_p95'] * 1000:.1f} ms, max {result['latency_max'] * 1000:.1f} ms "
+          f"(budget {budget:.1f} ms, {result['over_budget']} frames over)")
+    print(f"cpu: {result['analysis_ms']:.2f} ms per frame for analysis, "
+          f"{result['cpu_percent']:.1f}% of one core for the whole process")
+    return 0 if result["latency_p95"] * 1000 <= budget else 2
+
+
+def ripple(options: dict, fps: float | None = None, frames: int | None = None) -> int:
+    """Run the ripple effect (or print frames of it) with the command line's options."""
+    from . import ripple as waves
+    from .. import themes_db
+    try:
+        rings = int(options.get("rings", RIPPLE_RINGS))
+        speed = float(options.get("speed", RIPPLE_SPEED))
+    except ValueError:
+        usage()
+        return 1
+    if rings < 1:
+        print("--rings must be at least 1", file=sys.stderr)
+        return 1
+    fps = fps or EFFECT_FPS
+    try:
+        effect = waves.effect(options.get("axis", "distance"), rings, speed, fps,
+                              Path(options.get("layout", LAYOUT_FILE)), follow_theme=frames is None)
+    except ValueError as e:
+        print(f"[ripple] {e}", file=sys.stderr)
+        return 1
+    if frames is None:
+        try:
+            run(effect, fps=fps)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    stream = effect(themes_db.led_count())
+    for _ in range(frames):
+        print(next(stream).hex())
+    stream.close()
+    return 0
+
+
+def layered(options: dict, fps: float | None = None, frames: int | None = None, follow: bool = False) -> int:
+    """Composite the layered animation while it is selected (or print frames of it)."""
+    try:
+        from . import layered as compositor
+    except ImportError:
+        print("[layered] the layered animation needs NumPy", file=sys.stderr)
+        return 1
+    from .. import control, themes_db
+    from .thermal import theme_watcher
+    path = Path(options.get("layers", LAYERS_FILE))
+    try:
+        compositor.load(path)
+    except ValueError as e:
+        print(f"[layered] {path}: {e}", file=sys.stderr)
+        return 1
+    if frames is not None:
+        stream = compositor.effect(path, while_selected=False)(themes_db.led_count())
+        for _ in range(frames):
+            print(next(stream).hex())
+        stream.close()
+        return 0
+
+    LAYERED_LOCK.parent.mkdir(parents=True, exist_ok=True)
+    lock = open(LAYERED_LOCK, "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return 0  # this session's compositor is already running
+    os.nice(PLUGIN_NICENESS)
+
+    def stop(*_):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    watcher = theme_watcher() if follow else None
+    try:
+        while True:
+            if control.read_state()["animation"] == LAYERED_ANIMATION:
+                run(compositor.effect(path), fps=fps or EFFECT_FPS, select=False)
+            if not follow:
+                break
+            # Wait for the next change in the config directory (poll without inotify)
+            if watcher is not None:
+                watcher.read(None)
+            else:
+                time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.close()
+        lock.close()
+    return 0
+
+
+def main(argv=None) -> int:
+    args, options = _options(list(sys.argv[1:] if argv is None else argv))
+    if not args or args[0] in ("-h", "--help"):
+        usage()
+        return 0 if args else 1
+    try:
+        fps = float(options["fps"]) if "fps" in options else None
+        frames = int(options["frames"]) if "frames" in options else None
+    except ValueError:
+        usage()
+        return 1
+
+    command = args[0]
+    if command == "run" and len(args) == 2:
+        return supervise(args[1], fps)
+    if command == "_plugin" and len(args) == 2:
+        return _plugin_process(args[1], fps)
+    if command == "consume" and len(args) == 1:
+        return consume(options.get("output", "effect-frames.rgb"), frames, fps or EFFECT_FPS)
+    if command == "thermal" and len(args) == 1:
+        return thermal(options, frames)
+    if command == "audio" and len(args) == 1:
+        return audio(options, fps)
+    if command == "audio-bench" and len(args) == 2:
+        return audio_bench(args[1], fps)
+    if command == "ripple" and len(args) == 1:
+        return ripple(options, fps, frames)
+    if command == "layered" and args[1:] in ([], ["--follow"]):
+        return layered(options, fps, frames, follow=len(args) == 2)
+    if command == "meters":
+        return meters(args[1:], options, fps)
+    if command == "sensors" and len(args) == 1:
+        return sensors(Path(options.get("sysfs", SYSFS_ROOT)))
+    usage()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
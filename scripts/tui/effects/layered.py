@@ -0,0 +1,192 @@
+"""
+Layered animation: several of the daemon's animations composited into one
+
+    forgeworklights-effect layered [--follow] [--layers=FILE] [--frames=N]
+
+The daemon runs one animation at a time. Selecting "layered" makes it read
+the effect ring instead, as for "external", and this compositor fills the
+ring: it renders each layer of LAYERS_FILE with the reference renderer
+(tui.animations.render, so a layer looks exactly like that animation on its
+own) and blends them bottom to top. layers.json sits next to
+animation-params.json:
+
+    {
+      "layers": [
+        {"animation": "gradient-shift"},
+        {"animation": "breathe", "blend": "multiply", "opacity": 0.6, "params": {"period": 4}},
+        {"animation": "sparkle", "blend": "screen", "opacity": 0.8}
+      ]
+    }
+
+Each layer is drawn over the ones below it with a blend mode (add,
+multiply, screen or max; screen unless given) and mixed in by its opacity
+(0-1, 1 unless given); the bottom layer is simply drawn over black. A
+layer's parameters default to that animation's own from
+animation-params.json, and those to the animation's defaults. Without
+layers.json, DEFAULT_LAYERS is used. The "layered" entry of
+animation-params.json holds the Layered sliders of the TUI, one opacity
+scale for each of the first three layers.
+
+Frames are composited LAYERED_BATCH at a time: each layer renders the whole
+batch as one (frames, leds, 3) array and every blend is one NumPy
+expression over it. The stack, parameters and theme are looked at again
+between batches when something in the config directory has changed; the
+compositor exits once another animation is selected (with --follow it waits
+for "layered" to come back instead).
+
+Requires NumPy.
+"""
+import sys
+from typing import NamedTuple
+
+import numpy as np
+
+from ..animations import ANIMATIONS
+from ..animations import render
+from ..constants import LAYERED_BATCH, LAYERS_FILE
+from ..utils import atomic_file
+from ..utils.colors import rgb_to_hex
+from . import EXTERNAL_ANIMATION, LAYERED_ANIMATION
+from .thermal import theme_gradient, theme_watcher
+
+# Blend modes: the color of a layer (above) over what is below it, 0-255 floats
+BLEND_MODES = {
+    "add": lambda below, above: np.minimum(below + above, 255.0),
+    "multiply": lambda below, above: below * above / 255.0,
+    "screen": lambda below, above: 255.0 - (255.0 - below) * (255.0 - above) / 255.0,
+    "max": np.maximum,
+}
+DEFAULT_BLEND = "screen"
+
+
+class Layer(NamedTuple):
+    animation: str
+    blend: str = DEFAULT_BLEND
+    opacity: float = 1.0
+    params: tuple = ()  # (name, value) pairs over animation-params.json's
+
+
+DEFAULT_LAYERS = (
+    Layer("gradient-shift"),
+    Layer("breathe", "multiply", 0.6),
+    Layer("sparkle", "screen", 0.8),
+)
+
+
+def parse(data) -> tuple:
+    """Layers from the JSON of a layers file (ValueError for anything that is not one)."""
+    layers = data.get("layers") if isinstance(data, dict) else None
+    if not isinstance(layers, list) or not layers:
+        raise ValueError('expected {"layers": [...]} with at least one layer')
+    parsed = []
+    for number, entry in enumerate(layers, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"layer {number}: expected an object")
+        animation = entry.get("animation")
+        if animation not in ANIMATIONS or animation in (EXTERNAL_ANIMATION, LAYERED_ANIMATION):
+            raise ValueError(f"layer {number}: unknown animation {animation!r}")
+        blend = entry.get("blend", DEFAULT_BLEND)
+        if blend not in BLEND_MODES:
+            raise ValueError(f"layer {number}: unknown blend mode {blend!r} (one of {', '.join(BLEND_MODES)})")
+        opacity = entry.get("opacity", 1.0)
+        if isinstance(opacity, bool) or not isinstance(opacity, (int, float)) or not 0 <= opacity <= 1:
+            raise ValueError(f"layer {number}: opacity must be a number from 0 to 1")
+        params = entry.get("params", {})
+        if not isinstance(params, dict):
+            raise ValueError(f"layer {number}: params must be an object")
+        known = [param[0] for param in ANIMATIONS[animation]["params"]]
+        for name, value in params.items():
+            if name not in known:
+                raise ValueError(f"layer {number}: {animation} has no parameter {name!r}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"layer {number}: {name} must be a number")
+        parsed.append(Layer(animation, blend, float(opacity),
+                            tuple(sorted((name, float(value)) for name, value in params.items()))))
+    return tuple(parsed)
+
+
+def load(path=LAYERS_FILE) -> tuple | None:
+    """The layers in path; None if there is no such file (ValueError if it is not a layer stack)."""
+    data, gen = atomic_file.read_json(path)
+    if data is None:
+        if gen is not None:
+            raise ValueError("not valid JSON")
+        return None
+    return parse(data)
+
+
+class Compositor:
+    """A stack of layers rendered and blended a batch of frames at a time."""
+
+    def __init__(self, layers: tuple, colors, led_count: int, animation_params: dict | None = None,
+                 start: int = 0):
+        animation_params = animation_params or {}
+        self.layers = layers
+        self.led_count = led_count
+        # Each layer has its own animation (and random generator), seeded by its place
+        self._animations = [
+            render.make_animation(layer.animation, colors, led_count,
+                                  {**animation_params.get(layer.animation, {}), **dict(layer.params)}, seed)
+            for seed, layer in enumerate(layers)
+        ]
+        self.opacities = [layer.opacity for layer in layers]
+        self._tick = start  # frames rendered so far, so a rebuilt stack carries on in time
+
+    def scale_opacities(self, scales: dict) -> None:
+        """Multiply the layers' opacities by the Layered sliders (opacity_1, opacity_2, ...)."""
+        self.opacities = [layer.opacity * min(max(float(scales.get(f"opacity_{number}", 1.0)), 0.0), 1.0)
+                          for number, layer in enumerate(self.layers, 1)]
+
+    def render(self, count: int) -> np.ndarray:
+        """The next count frames as a (count, led_count, 3) uint8 array."""
+        times = (self._tick + np.arange(count)) / render.FRAME_RATE
+        self._tick += count
+        out = np.zeros((count, self.led_count, 3), dtype=np.float32)
+        for number, (animation, layer, opacity) in enumerate(zip(self._animations, self.layers, self.opacities)):
+            above = animation.render(times).astype(np.float32)
+            if number == 0:
+                out = above * opacity
+            elif opacity > 0:
+                out += (BLEND_MODES[layer.blend](out, above) - out) * opacity
+        return np.floor(np.clip(out, 0.0, 255.0) + 0.5).astype(np.uint8)
+
+
+def effect(path=LAYERS_FILE, batch: int = LAYERED_BATCH, while_selected: bool = True):
+    """The compositor as a frames(led_count) callable for effects.run.
+
+    With while_selected the frames end once an animation other than
+    "layered" is selected. A layers file that cannot be read keeps the
+    stack in use (DEFAULT_LAYERS at first) and says why on stderr.
+    """
+    from .. import control
+
+    def frames(led_count):
+        watcher = theme_watcher()
+        compositor = key = None
+        layers = DEFAULT_LAYERS
+        try:
+            while True:
+                if compositor is None or watcher is None or watcher.read(0):
+                    state = control.read_state()
+                    if while_selected and state["animation"] != LAYERED_ANIMATION:
+                        return
+                    try:
+                        layers = load(path) or DEFAULT_LAYERS
+                    except ValueError as e:
+                        print(f"[layered] {path}: {e}", file=sys.stderr)
+                    gradient = theme_gradient(led_count, state)
+                    params = state["animation_params"]
+                    new_key = (layers, gradient, [params.get(layer.animation) for layer in layers])
+                    if new_key != key:
+                        colors = [rgb_to_hex(*gradient[i:i + 3]) for i in range(0, len(gradient), 3)]
+                        start = compositor._tick if compositor is not None else 0
+                        compositor = Compositor(layers, colors, led_count, params, start)
+                        key = new_key
+                    compositor.scale_opacities(params.get(LAYERED_ANIMATION, {}))
+                for frame in compositor.render(batch):
+                    yield frame.tobytes()
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    return frames
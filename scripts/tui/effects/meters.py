@@ -0,0 +1,410 @@
+"""
+System meters: per-core load, memory, pressure, network and temperature on the strip
+
+    forgeworklights-effect meters [SOURCE ...] [--rate=HZ] [--budget=SHARE] [--fps=N] [--levels]
+
+Each SOURCE gets an equal segment of the strip, in the order given (default:
+cpu). A source with one channel is drawn as a meter filling its segment
+along the active theme's gradient (see thermal.Gauge); one with several -
+cpu, one channel per core - as per-LED bars, each LED colored from the
+gradient's cool to hot end by its channel's level and dimmed towards
+THERMAL_BACKGROUND when idle. Levels are eased over METER_EASING between
+samples so frames move smoothly at the effect frame rate.
+
+Sources (see SOURCES; more can be registered with @source):
+
+    cpu             busy share of every core, 0 while it is offline (/proc/stat)
+    memory          used share of MemTotal, MemAvailable counting as free (/proc/meminfo)
+    pressure[:RES]  PSI "some" avg10 of memory (default), cpu or io (/proc/pressure/RES),
+                    full at METER_PRESSURE_SCALE percent
+    network[:IF]    received + sent bytes/s over every interface but lo, or IF
+                    (/proc/net/dev), on a log scale up to METER_NETWORK_SCALE
+    thermal         the thermal effect's smoothed CPU temperature (see thermal)
+
+Every /proc file is opened once and re-read from offset 0 into a buffer
+that only grows. Counters are kept in array.array rows so a tick's deltas
+are taken over the whole row at once (map(sub, ...) runs in C), not field
+by field.
+
+All sources are sampled by one Sampler thread at one rate, so adding a
+meter adds reads, not wakeups. The thread measures its own CPU time; when
+sampling costs more than budget (a share of one CPU) it doubles its
+interval, up to METER_MAX_INTERVAL, and halves it again once the cost has
+dropped well below. Frames go to the daemon through the effect ring like
+any effect (see tui.effects.run).
+
+The /proc and sysfs roots are parameters, so fake trees of plain files
+stand in for the kernel's; --levels prints the levels a sample at a time
+for checking the sources against one.
+"""
+import math
+import os
+import threading
+import time
+from array import array
+from operator import sub
+from pathlib import Path
+
+from ..constants import (
+    EFFECT_FPS,
+    METER_BUDGET,
+    METER_EASING,
+    METER_MAX_INTERVAL,
+    METER_NETWORK_SCALE,
+    METER_PRESSURE_SCALE,
+    METER_RATE,
+    PROC_ROOT,
+    SYSFS_ROOT,
+    THERMAL_BACKGROUND,
+    THERMAL_RANGE,
+    THERMAL_SMOOTHING,
+)
+from .thermal import Gauge, Thermometer, choose, discover, open_sensors, theme_gradient, theme_watcher
+
+_INITIAL_READ_SIZE = 4096
+_LUT_SIZE = 256  # gradient steps per-LED bars pick their colors from
+
+
+class ProcFile:
+    """A /proc (or sysfs) file kept open and re-read from the start into one buffer."""
+
+    __slots__ = ("path", "fd", "_buffer")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        self._buffer = bytearray(_INITIAL_READ_SIZE)
+
+    def read(self) -> bytes:
+        """The file's current contents."""
+        while True:
+            length = os.preadv(self.fd, [self._buffer], 0)
+            if length < len(self._buffer):
+                return bytes(memoryview(self._buffer)[:length])
+            # Filled the buffer: the file may be longer; grow it for good and read again
+            self._buffer = bytearray(len(self._buffer) * 2)
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+SOURCES = {}
+
+
+def source(name: str):
+    """Class decorator registering a Source under name (for the command line)."""
+    def register(cls):
+        cls.name = name
+        SOURCES[name] = cls
+        return cls
+    return register
+
+
+class Source:
+    """A sampled quantity: channels levels between 0 and 1.
+
+    Subclasses open their files in __init__ (raising OSError when the
+    quantity is not available) and implement sample(). The optional
+    argument after the colon in a spec ("pressure:io") is passed as arg.
+    """
+
+    name = ""
+
+    def __init__(self, arg: str | None = None, proc: Path = PROC_ROOT, sysfs: Path = SYSFS_ROOT):
+        self.arg = arg
+        self.files = []
+        self.channels = 1
+
+    def _open(self, path: Path) -> ProcFile:
+        handle = ProcFile(path)
+        self.files.append(handle)
+        return handle
+
+    def sample(self, now: float) -> list:
+        """Current levels, one per channel (now is time.monotonic())."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        for handle in self.files:
+            handle.close()
+
+
+def _clamp(value: float) -> float:
+    return 0.0 if value < 0.0 else 1.0 if value > 1.0 else value
+
+
+@source("cpu")
+class CpuSource(Source):
+    """Busy share of every core since the previous sample."""
+
+    def __init__(self, arg=None, proc=PROC_ROOT, sysfs=SYSFS_ROOT):
+        super().__init__(arg, proc, sysfs)
+        self._stat = self._open(Path(proc) / "stat")
+        self._cores, self._busy, self._total = self._counters()
+        if not self._cores:
+            raise OSError(f"No per-core lines in {self._stat.path}")
+        # One channel per core number, so cores offline now keep their place
+        self.channels = max(self._cores) + 1
+
+    def _counters(self) -> tuple:
+        """(core numbers, busy, total): one entry per core line, in /proc/stat order."""
+        cores, busy, total = [], array("Q"), array("Q")
+        for line in self._stat.read().splitlines():
+            if not (line.startswith(b"cpu") and line[3:4].isdigit()):
+                continue
+            name, *values = line.split()[:9]
+            # user nice system idle iowait irq softirq steal (guest time is already in user)
+            fields = [int(v) for v in values]
+            all_time = sum(fields)
+            cores.append(int(name[3:]))
+            total.append(all_time)
+            busy.append(all_time - fields[3] - (fields[4] if len(fields) > 4 else 0))
+        return cores, busy, total
+
+    def sample(self, now):
+        cores, busy, total = self._counters()
+        levels = [0.0] * self.channels
+        if cores != self._cores:
+            # A core went on- or offline (offline ones have no line): start over from here
+            self._cores, self._busy, self._total = cores, busy, total
+            return levels
+        busy_delta = map(sub, busy, self._busy)
+        total_delta = map(sub, total, self._total)
+        self._busy, self._total = busy, total
+        for core, b, t in zip(cores, busy_delta, total_delta):
+            if core < self.channels and t:
+                levels[core] = b / t
+        return levels
+
+
+@source("memory")
+class MemorySource(Source):
+    """Share of memory in use (MemAvailable counts as free)."""
+
+    def __init__(self, arg=None, proc=PROC_ROOT, sysfs=SYSFS_ROOT):
+        super().__init__(arg, proc, sysfs)
+        self._meminfo = self._open(Path(proc) / "meminfo")
+
+    def sample(self, now):
+        total = available = None
+        for line in self._meminfo.read().splitlines():
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1])
+                break
+        if not total or available is None:
+            return [0.0]
+        return [_clamp(1.0 - available / total)]
+
+
+@source("pressure")
+class PressureSource(Source):
+    """Pressure stall information: share of time some task waited on a resource (avg10)."""
+
+    def __init__(self, arg=None, proc=PROC_ROOT, sysfs=SYSFS_ROOT):
+        super().__init__(arg, proc, sysfs)
+        self._pressure = self._open(Path(proc) / "pressure" / (arg or "memory"))
+
+    def sample(self, now):
+        for line in self._pressure.read().splitlines():
+            if line.startswith(b"some "):
+                avg10 = float(line.split()[1].partition(b"=")[2])
+                return [_clamp(avg10 / METER_PRESSURE_SCALE)]
+        return [0.0]
+
+
+@source("network")
+class NetworkSource(Source):
+    """Bytes received and sent per second, on a logarithmic scale."""
+
+    def __init__(self, arg=None, proc=PROC_ROOT, sysfs=SYSFS_ROOT):
+        super().__init__(arg, proc, sysfs)
+        self._dev = self._open(Path(proc) / "net/dev")
+        self._interface = arg.encode() if arg else None
+        self._bytes = self._counters()
+        self._time = time.monotonic()
+        self._log_scale = math.log1p(METER_NETWORK_SCALE)
+
+    def _counters(self) -> int:
+        count = 0
+        for line in self._dev.read().splitlines()[2:]:
+            interface, _, counters = line.partition(b":")
+            interface = interface.strip()
+            if (interface != self._interface) if self._interface else interface == b"lo":
+                continue
+            fields = counters.split()
+            count += int(fields[0]) + int(fields[8])  # bytes received, bytes sent
+        return count
+
+    def sample(self, now):
+        count = self._counters()
+        elapsed = now - self._time
+        delta = count - self._bytes  # negative when an interface went away
+        self._bytes, self._time = count, now
+        if elapsed <= 0 or delta <= 0:
+            return [0.0]
+        return [_clamp(math.log1p(delta / elapsed) / self._log_scale)]
+
+
+@source("thermal")
+class ThermalSource(Source):
+    """The thermal effect's smoothed temperature, as a share of THERMAL_RANGE."""
+
+    def __init__(self, arg=None, proc=PROC_ROOT, sysfs=SYSFS_ROOT):
+        super().__init__(arg, proc, sysfs)
+        sensors = open_sensors(choose(discover(sysfs), arg))
+        if not sensors:
+            raise OSError(f"No temperature sensor under {sysfs}")
+        # The EMA runs per sample; METER_RATE is close enough for its weight
+        self._thermometer = Thermometer(sensors, METER_RATE, THERMAL_SMOOTHING)
+
+    def sample(self, now):
+        celsius = self._thermometer.sample()
+        if celsius is None:
+            return [0.0]
+        low, high = THERMAL_RANGE
+        return [_clamp((celsius - low) / (high - low))]
+
+    def close(self):
+        self._thermometer.close()
+        super().close()
+
+
+def open_sources(specs: list, proc: Path = PROC_ROOT, sysfs: Path = SYSFS_ROOT) -> list:
+    """Source objects for specs like "cpu" or "network:wlan0"; raises ValueError/OSError."""
+    sources = []
+    try:
+        for spec in specs:
+            name, _, arg = spec.partition(":")
+            cls = SOURCES.get(name)
+            if cls is None:
+                raise ValueError(f"Unknown meter {name!r} (known: {', '.join(SOURCES)})")
+            sources.append(cls(arg or None, proc, sysfs))
+    except BaseException:
+        for opened in sources:
+            opened.close()
+        raise
+    return sources
+
+
+class Sampler(threading.Thread):
+    """One thread sampling every source at one rate, within a CPU budget.
+
+    values holds the latest levels (a list per source); it is replaced,
+    never mutated, so readers on other threads need no lock.
+    """
+
+    def __init__(self, sources: list, rate: float = METER_RATE, budget: float = METER_BUDGET):
+        super().__init__(name="forgeworklights-meters", daemon=True)
+        self.sources = sources
+        self.base_interval = self.interval = 1.0 / rate
+        self.budget = budget
+        self.cost = 0.0  # CPU seconds per sample, smoothed
+        self.values = [[0.0] * s.channels for s in sources]
+        self._stopped = threading.Event()
+
+    def sample_once(self) -> list:
+        now = time.monotonic()
+        values = [s.sample(now) for s in self.sources]
+        self.values = values
+        return values
+
+    def step(self) -> list:
+        """One sample, with its CPU time weighed against the budget to adjust the interval."""
+        started = time.thread_time()
+        values = self.sample_once()
+        self.cost += 0.25 * (time.thread_time() - started - self.cost)
+        if self.cost > self.budget * self.interval:
+            self.interval = min(self.interval * 2, METER_MAX_INTERVAL)
+        elif self.interval > self.base_interval and self.cost < self.budget * self.interval / 4:
+            self.interval = max(self.interval / 2, self.base_interval)
+        return values
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.step()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class MeterStrip:
+    """Renders the sources' levels into consecutive segments of one frame."""
+
+    def __init__(self, sources: list, led_count: int, background: float = THERMAL_BACKGROUND):
+        self.frame = bytearray(led_count * 3)
+        self.background = background
+        self.segments = []  # (start, length, gauge or None, channels)
+        base, extra = divmod(led_count, len(sources))
+        start = 0
+        for index, meter in enumerate(sources):
+            length = base + (1 if index < extra else 0)
+            gauge = Gauge(theme_gradient(length), background) if meter.channels == 1 and length else None
+            self.segments.append((start, length, gauge, meter.channels))
+            start += length
+        self._lut = theme_gradient(_LUT_SIZE)
+
+    def render(self, values: list) -> bytearray:
+        frame, lut, background = self.frame, self._lut, self.background
+        for (start, length, gauge, channels), levels in zip(self.segments, values):
+            if not length:
+                continue
+            if gauge is not None:
+                frame[start * 3:(start + length) * 3] = gauge.render(levels[0])
+                continue
+            # Per-LED bars: LED j shows the busiest of the channels that map onto it
+            for j in range(length):
+                first = j * channels // length
+                last = max(first + 1, (j + 1) * channels // length)
+                level = _clamp(max(levels[first:last]))
+                color = int(level * (_LUT_SIZE - 1)) * 3
+                scale = background + (1.0 - background) * level
+                offset = (start + j) * 3
+                frame[offset] = int(lut[color] * scale + 0.5)
+                frame[offset + 1] = int(lut[color + 1] * scale + 0.5)
+                frame[offset + 2] = int(lut[color + 2] * scale + 0.5)
+        return frame
+
+
+def effect(specs: list, rate: float = METER_RATE, budget: float = METER_BUDGET, fps: float = EFFECT_FPS,
+           proc: Path = PROC_ROOT, sysfs: Path = SYSFS_ROOT, follow_theme: bool = True):
+    """The meters as a frames(led_count) callable for effects.run, sampled on a background thread.
+
+    Raises ValueError for an unknown source and OSError for an unavailable
+    one right away.
+    """
+    sources = open_sources(specs, proc, sysfs)
+    # Per-frame weight easing the shown levels towards the samples
+    ease = 1.0 - math.exp(-1.0 / (fps * METER_EASING)) if METER_EASING > 0 else 1.0
+
+    def frames(led_count):
+        sampler = Sampler(sources, rate, budget)
+        sampler.sample_once()  # counters' first deltas
+        sampler.start()
+        strip = MeterStrip(sources, led_count)
+        watcher = theme_watcher() if follow_theme else None
+        shown = [list(levels) for levels in sampler.values]
+        check_every = max(1, round(fps))
+        tick = 0
+        try:
+            while True:
+                tick += 1
+                if watcher is not None and tick % check_every == 0 and watcher.read(0):
+                    strip = MeterStrip(sources, led_count)
+                for levels, targets in zip(shown, sampler.values):
+                    for i, target in enumerate(targets[:len(levels)]):
+                        levels[i] += ease * (target - levels[i])
+                yield strip.render(shown)
+        finally:
+            sampler.stop()
+            sampler.join()
+            if watcher is not None:
+                watcher.close()
+            for meter in sources:
+                meter.close()
+
+    return frames
+
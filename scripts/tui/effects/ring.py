@@ -0,0 +1,209 @@
+"""
+Shared-memory frame ring between an effect and the daemon
+
+Python side of include/effect_ring.hpp (see there for the layout): one
+producer (RingWriter, created by the effect) and one consumer (the
+daemon's "external" animation, or RingReader here), no locks. Frame n goes
+to slot n % slots; the producer zeroes the slot's stamp, writes the pixels,
+stores stamp n + 1 and then head n + 1. The consumer accepts a slot only if
+its stamp reads n + 1 before and after copying, so a frame overwritten
+mid-read is skipped rather than shown torn.
+
+Header fields and stamps are written through ctypes as single aligned
+64-bit stores, which keep their order on x86-64; on weaker architectures
+the stamp check still rejects torn slots.
+"""
+import ctypes
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+
+from ..constants import EFFECT_RING, EFFECT_RING_SLOTS
+from ..utils.atomic_file import TEMP_PREFIX, TEMP_SUFFIX
+
+RING_MAGIC = b"FWLR"
+RING_VERSION = 1
+MAX_SLOTS = 64
+# magic, version, header size, led_count, slots, head, tail, dropped, producer pid, reserved
+_HEADER = struct.Struct("<4sHHIIQQQII16x")
+_HEAD_OFFSET = 16
+_TAIL_OFFSET = 24
+_DROPPED_OFFSET = 32
+_PID_OFFSET = 40
+_STAMP_SIZE = 8
+_READ_ATTEMPTS = 3
+_FULL_WAIT = 0.001  # seconds between checks for room while the ring is full
+
+
+def slot_size(led_count: int) -> int:
+    return _STAMP_SIZE + ((led_count * 3 + 7) & ~7)
+
+
+class _Ring:
+    """A mapped ring file; the header fields as live 64-bit views."""
+
+    def __init__(self, buf: mmap.mmap, path: Path, inode: int):
+        _magic, _version, _header_size, self.led_count, self.slots, *_rest = _HEADER.unpack_from(buf, 0)
+        self.path = path
+        self.inode = inode
+        self._buf = buf
+        self._slot_size = slot_size(self.led_count)
+        self._head = ctypes.c_uint64.from_buffer(buf, _HEAD_OFFSET)
+        self._tail = ctypes.c_uint64.from_buffer(buf, _TAIL_OFFSET)
+        self._dropped = ctypes.c_uint64.from_buffer(buf, _DROPPED_OFFSET)
+        self._stamps = [ctypes.c_uint64.from_buffer(buf, self._slot_offset(i)) for i in range(self.slots)]
+
+    def _slot_offset(self, index: int) -> int:
+        return _HEADER.size + index * self._slot_size
+
+    @property
+    def published(self) -> int:
+        return self._head.value
+
+    @property
+    def consumed(self) -> int:
+        return self._tail.value
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped.value
+
+    def producer_pid(self) -> int:
+        return struct.unpack_from("<I", self._buf, _PID_OFFSET)[0]
+
+    def close(self) -> None:
+        if self._buf is None:
+            return
+        # The ctypes views export the buffer; they must go before the map can close
+        del self._head, self._tail, self._dropped, self._stamps
+        self._buf.close()
+        self._buf = None
+
+
+class RingWriter(_Ring):
+    """Producer end: created by the effect, which replaces any previous ring."""
+
+    @classmethod
+    def create(cls, led_count: int, path: Path = EFFECT_RING, slots: int = EFFECT_RING_SLOTS) -> "RingWriter":
+        if not 0 < slots <= MAX_SLOTS:
+            raise ValueError(f"slots must be 1-{MAX_SLOTS}")
+        if led_count <= 0:
+            raise ValueError("led_count must be positive")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        length = _HEADER.size + slots * slot_size(led_count)
+        # Built next to the target and renamed into place: a consumer sees a
+        # complete ring under a new inode or the old one
+        tmp = path.with_name(f"{TEMP_PREFIX}{path.name}.{os.getpid()}{TEMP_SUFFIX}")
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o600)
+        try:
+            os.ftruncate(fd, length)
+            buf = mmap.mmap(fd, length)
+            _HEADER.pack_into(buf, 0, RING_MAGIC, RING_VERSION, _HEADER.size, led_count, slots,
+                              0, 0, 0, os.getpid(), 0)
+            inode = os.fstat(fd).st_ino
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+        return cls(buf, path, inode)
+
+    def push(self, frame, timeout: float = 0.0) -> bool:
+        """Queue one frame of led_count * 3 bytes.
+
+        While the ring is full this waits up to timeout seconds for the
+        consumer (backpressure), then overwrites the oldest unread frame.
+        Returns False if a frame was dropped that way.
+        """
+        n = self._head.value
+        if n - self._tail.value >= self.slots and timeout > 0:
+            deadline = time.monotonic() + timeout
+            while n - self._tail.value >= self.slots and time.monotonic() < deadline:
+                time.sleep(_FULL_WAIT)
+        kept = n - self._tail.value < self.slots
+        if not kept:
+            self._dropped.value += 1
+
+        offset = self._slot_offset(n % self.slots)
+        stamp = self._stamps[n % self.slots]
+        stamp.value = 0
+        self._buf[offset + _STAMP_SIZE:offset + _STAMP_SIZE + self.led_count * 3] = frame
+        stamp.value = n + 1
+        self._head.value = n + 1
+        return kept
+
+    def close(self, unlink: bool = True) -> None:
+        """Unmap, and remove the ring so the daemon falls back to the theme."""
+        if unlink and self._buf is not None:
+            try:
+                if os.stat(self.path).st_ino == self.inode:
+                    os.unlink(self.path)
+            except OSError:
+                pass
+        super().close()
+
+
+class RingReader(_Ring):
+    """Consumer end, for tests and the reference consumer (the daemon has its own)."""
+
+    @classmethod
+    def open(cls, path: Path = EFFECT_RING, led_count: int | None = None) -> "RingReader | None":
+        """Map the ring at path (optionally only if it is for led_count LEDs); None if absent or invalid."""
+        path = Path(path)
+        try:
+            with open(path, "r+b") as f:
+                buf = mmap.mmap(f.fileno(), 0)
+                inode = os.fstat(f.fileno()).st_ino
+        except (OSError, ValueError):
+            return None
+        if len(buf) < _HEADER.size:
+            buf.close()
+            return None
+        magic, version, header_size, ring_leds, slots, *_rest = _HEADER.unpack_from(buf, 0)
+        valid = (
+            magic == RING_MAGIC and version == RING_VERSION and header_size == _HEADER.size
+            and 0 < slots <= MAX_SLOTS and ring_leds > 0
+            and (led_count is None or ring_leds == led_count)
+            and len(buf) >= _HEADER.size + slots * slot_size(ring_leds)
+        )
+        if not valid:
+            buf.close()
+            return None
+        return cls(buf, path, inode)
+
+    def pop(self) -> bytes | None:
+        """Oldest unread frame, or None if there is nothing new."""
+        length = self.led_count * 3
+        following = self._tail.value
+        for _attempt in range(_READ_ATTEMPTS):
+            published = self._head.value
+            if published <= following:
+                return None
+            if published - following > self.slots:
+                following = published - self.slots  # the oldest ones were overwritten
+            stamp = self._stamps[following % self.slots]
+            offset = self._slot_offset(following % self.slots) + _STAMP_SIZE
+            if stamp.value != following + 1:
+                following += 1
+                continue
+            frame = bytes(self._buf[offset:offset + length])
+            if stamp.value != following + 1:
+                following += 1
+                continue
+            self._tail.value = following + 1
+            return frame
+        self._tail.value = following
+        return None
+
+    def producer_alive(self) -> bool:
+        pid = self.producer_pid()
+        if pid <= 0:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
@@ -0,0 +1,85 @@
+"""
+Ripple effect: waves running across the strip's physical layout
+
+    forgeworklights-effect ripple [--axis=distance|angle|x|y] [--rings=N] [--speed=HZ] [--layout=FILE]
+
+Waves of brightness travel outward from the layout's center (--axis=distance,
+the default), around it (angle), or across it (x, y), RIPPLE_RINGS of them
+between the center and the farthest LED, each LED passed by RIPPLE_SPEED
+waves a second. Each LED keeps the color the active theme's gradient has
+at its place on the same axis, so the gradient too is laid out in space
+rather than along the strip.
+
+All the geometry is in the layout's Tables (see tui.layout), one byte per
+LED, and the wave shape is a 256-entry table, so a frame is two lookups
+and three integer multiplications per LED. The layout and the theme are
+looked at again about once a second; a new layout file or theme rebuilds
+the per-LED colors, nothing else changes per frame.
+"""
+import math
+
+from ..constants import EFFECT_FPS, LAYOUT_FILE, RIPPLE_RINGS, RIPPLE_SPEED
+from .. import layout as spatial
+from .thermal import theme_gradient, theme_watcher
+
+# Brightness along one wave, 0-256: a squared raised cosine, so the troughs go dark
+_WAVE = [round(256 * (0.5 + 0.5 * math.cos(math.tau * step / spatial.TABLE_SIZE)) ** 2)
+         for step in range(spatial.TABLE_SIZE)]
+
+
+class Ripple:
+    """Frames of waves along one layout table, colored by the theme gradient along it."""
+
+    def __init__(self, table: bytes, palette: bytes, rings: int = RIPPLE_RINGS):
+        self.led_count = len(table)
+        self._colors = [palette[value * 3:value * 3 + 3] for value in table]
+        # Where each LED is on the wave at phase 0
+        self._offsets = [(value * rings) & 255 for value in table]
+        self._frame = bytearray(self.led_count * 3)
+
+    def render(self, phase: int) -> bytearray:
+        """The frame at a phase (0-255 per wave); waves move outward as phase grows."""
+        frame = self._frame
+        wave = _WAVE
+        i = 0
+        for offset, (r, g, b) in zip(self._offsets, self._colors):
+            level = wave[(offset - phase) & 255]
+            frame[i] = r * level >> 8
+            frame[i + 1] = g * level >> 8
+            frame[i + 2] = b * level >> 8
+            i += 3
+        return frame
+
+
+def effect(axis: str = "distance", rings: int = RIPPLE_RINGS, speed: float = RIPPLE_SPEED,
+           fps: float = EFFECT_FPS, layout_file=LAYOUT_FILE, follow_theme: bool = True):
+    """The ripple effect as a frames(led_count) callable for effects.run.
+
+    Raises ValueError right away for an unknown axis.
+    """
+    if axis not in spatial.Tables.__slots__:
+        raise ValueError(f"unknown axis {axis!r} (one of {', '.join(spatial.Tables.__slots__)})")
+    step = spatial.TABLE_SIZE * speed / fps  # phase advance per frame
+
+    def frames(led_count):
+        def build():
+            table = spatial.tables(led_count, layout_file).table(axis)
+            return table, Ripple(table, theme_gradient(spatial.TABLE_SIZE), rings)
+
+        table, ripple = build()
+        watcher = theme_watcher() if follow_theme else None
+        check_every = max(1, round(fps))
+        tick = 0
+        try:
+            while True:
+                if tick and tick % check_every == 0 and (
+                        (watcher is not None and watcher.read(0))
+                        or spatial.tables(led_count, layout_file).table(axis) is not table):
+                    table, ripple = build()
+                yield ripple.render(int(tick * step) & 255)
+                tick += 1
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    return frames
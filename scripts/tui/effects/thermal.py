@@ -0,0 +1,260 @@
+"""
+Thermal effect: the strip as a CPU temperature gauge
+
+    forgeworklights-effect thermal [--rate=HZ] [--low=C] [--high=C] [--sensor=NAME]
+
+The theme gradients are btop's cpu_start/cpu_mid/cpu_end temperature colors;
+this effect uses them as such. The strip fills along the active theme's
+gradient from the first LED, empty at THERMAL_RANGE[0] and full at
+THERMAL_RANGE[1], with the unfilled part dimmed to THERMAL_BACKGROUND. The
+last lit LED is blended, so the level moves smoothly rather than in steps.
+
+Temperatures come from hwmon (class/hwmon/*/temp*_input) and thermal zones
+(class/thermal/thermal_zone*/temp), both in millidegrees. By default the
+first family in THERMAL_SENSORS that is present is used (k10temp on AMD,
+coretemp on Intel) and the hottest of its inputs counts; --sensor picks
+another (see `forgeworklights-effect sensors`). Readings are smoothed with
+an exponential moving average whose time constant is THERMAL_SMOOTHING.
+
+Each sensor file is opened once and re-read with preadv into a buffer
+allocated up front, and frames are rebuilt in one bytearray, so a tick is
+one read syscall per sensor plus a few arithmetic operations. The theme is
+re-resolved only when inotify reports a change in the config directory or
+the Omarchy theme link.
+
+Everything takes the sysfs root as a parameter (SYSFS_ROOT by default, or
+--sysfs=DIR), so a fake tree of plain files stands in for the kernel's.
+"""
+import math
+import os
+from pathlib import Path
+
+from ..constants import (
+    CONFIG_DIR,
+    SYSFS_ROOT,
+    THEME_SYMLINK,
+    THEMES_DB_PATH,
+    THERMAL_BACKGROUND,
+    THERMAL_FALLBACK_STOPS,
+    THERMAL_RANGE,
+    THERMAL_RATE,
+    THERMAL_SENSORS,
+    THERMAL_SMOOTHING,
+)
+from ..utils.atomic_file import read_json
+from ..utils.colors import hex_to_rgb
+
+_READ_SIZE = 16  # "-273150\n" and then some
+
+
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text().strip() or None
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _number(path: Path) -> int:
+    """Numeric suffix of hwmon3 / temp12_input / thermal_zone7, for natural ordering."""
+    digits = "".join(ch for ch in path.name.split("_input")[0] if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def discover(sysfs: Path = SYSFS_ROOT) -> list:
+    """Every temperature input under sysfs as (label, path), hwmon first.
+
+    Labels are "<hwmon name>/<temp label>" (e.g. "k10temp/Tctl", falling back
+    to "k10temp/temp1") and "<zone type>/<zone>" (e.g. "acpitz/thermal_zone0").
+    """
+    sysfs = Path(sysfs)
+    found = []
+    for hwmon in sorted((sysfs / "class/hwmon").glob("hwmon*"), key=_number):
+        name = _read_text(hwmon / "name") or hwmon.name
+        for temp in sorted(hwmon.glob("temp*_input"), key=_number):
+            channel = temp.name[:-len("_input")]
+            label = _read_text(hwmon / f"{channel}_label") or channel
+            found.append((f"{name}/{label}", temp))
+    for zone in sorted((sysfs / "class/thermal").glob("thermal_zone*"), key=_number):
+        if (zone / "temp").exists():
+            found.append((f"{_read_text(zone / 'type') or 'zone'}/{zone.name}", zone / "temp"))
+    return found
+
+
+def choose(found: list, sensor: str | None = None) -> list:
+    """The inputs to watch: those matching sensor (a full label or a family name),
+    else the first family of THERMAL_SENSORS present, else all of them."""
+    def family(label):
+        return label.split("/", 1)[0]
+
+    if sensor:
+        return [(label, path) for label, path in found if sensor in (label, family(label))]
+    for preferred in THERMAL_SENSORS:
+        matches = [(label, path) for label, path in found if family(label) == preferred]
+        if matches:
+            return matches
+    return list(found)
+
+
+class Sensor:
+    """One temperature input, kept open and re-read in place."""
+
+    __slots__ = ("label", "path", "fd", "_buffers", "_view")
+
+    def __init__(self, label: str, path: Path):
+        self.label = label
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        buffer = bytearray(_READ_SIZE)
+        self._buffers = [buffer]
+        self._view = memoryview(buffer)
+
+    def read(self) -> int | None:
+        """Current reading in millidegrees Celsius; None if the sensor cannot be read."""
+        try:
+            length = os.preadv(self.fd, self._buffers, 0)
+            return int(self._view[:length])
+        except (OSError, ValueError):
+            return None  # some inputs return EIO/ENODATA while their device sleeps
+
+    def close(self) -> None:
+        if self.fd is not None:
+            self._view.release()
+            os.close(self.fd)
+            self.fd = None
+
+
+def open_sensors(inputs: list) -> list:
+    """Sensor objects for the (label, path) inputs that can be opened."""
+    sensors = []
+    for label, path in inputs:
+        try:
+            sensors.append(Sensor(label, path))
+        except OSError:
+            continue
+    return sensors
+
+
+class Thermometer:
+    """The hottest of a set of sensors, smoothed with an exponential moving average."""
+
+    def __init__(self, sensors: list, rate: float = THERMAL_RATE, smoothing: float = THERMAL_SMOOTHING):
+        self.sensors = sensors
+        # Per-sample weight giving a time constant of smoothing seconds at rate samples/s
+        self.alpha = 1.0 - math.exp(-1.0 / (rate * smoothing)) if smoothing > 0 else 1.0
+        self.celsius = None
+
+    def sample(self) -> float | None:
+        """Read every sensor once; the smoothed temperature (None until a read succeeds)."""
+        hottest = None
+        for sensor in self.sensors:
+            value = sensor.read()
+            if value is not None and (hottest is None or value > hottest):
+                hottest = value
+        if hottest is not None:
+            reading = hottest / 1000.0
+            if self.celsius is None:
+                self.celsius = reading
+            else:
+                self.celsius += self.alpha * (reading - self.celsius)
+        return self.celsius
+
+    def close(self) -> None:
+        for sensor in self.sensors:
+            sensor.close()
+
+
+class Gauge:
+    """Frames of the strip filled along a gradient to a level between 0 and 1."""
+
+    def __init__(self, gradient: bytes, background: float = THERMAL_BACKGROUND):
+        self.led_count = len(gradient) // 3
+        self._lit = memoryview(bytes(gradient))
+        self._dim = memoryview(bytes(int(c * background + 0.5) for c in gradient))
+        self.frame = bytearray(self._dim)
+
+    def render(self, level: float) -> bytearray:
+        """The frame for level, built in place in self.frame (the same object every call)."""
+        lit = min(max(level, 0.0), 1.0) * self.led_count
+        whole = int(lit)
+        end = whole * 3
+        frame, full, dim = self.frame, self._lit, self._dim
+        frame[:end] = full[:end]
+        frame[end:] = dim[end:]
+        if whole < self.led_count:
+            part = lit - whole
+            for i in range(end, end + 3):
+                frame[i] = int(dim[i] + (full[i] - dim[i]) * part + 0.5)
+        return frame
+
+
+def theme_gradient(led_count: int, state: dict | None = None) -> bytes:
+    """The gradient of the theme a control state shows (the current one by default,
+    previews included) as led_count * 3 RGB bytes."""
+    from .. import control, themes_db
+    state = control.read_state() if state is None else state
+    key = control.active_theme_key(state)
+    theme = None
+    try:
+        if key == control.PREVIEW_THEME and state["preview"]:
+            theme = themes_db.Theme.from_hex(key, "Preview", state["preview"].get("colors") or [])
+        elif key is not None:
+            data, _gen = read_json(THEMES_DB_PATH)
+            theme = themes_db.load(data).get(key)
+    except (ValueError, TypeError, AttributeError):
+        theme = None
+    if theme is None or not theme.count:
+        theme = themes_db.Theme.from_hex("", "", THERMAL_FALLBACK_STOPS)
+    return b"".join(bytes(hex_to_rgb(color)) for color in themes_db.gradient(theme, led_count))
+
+
+def theme_watcher():
+    """inotify watches that fire when the active theme may have changed; None if unavailable."""
+    from ..watcher import Watcher
+    try:
+        watcher = Watcher()
+    except OSError:
+        return None
+    for directory in (CONFIG_DIR, THEME_SYMLINK.parent):
+        try:
+            watcher.add(directory)
+        except OSError:
+            pass
+    return watcher
+
+
+def level(celsius: float | None, low: float, high: float) -> float:
+    """Fill level for a temperature: 0 at low, 1 at high."""
+    if celsius is None:
+        return 0.0
+    return (celsius - low) / (high - low)
+
+
+def effect(sensor: str | None = None, rate: float = THERMAL_RATE, low: float = THERMAL_RANGE[0],
+           high: float = THERMAL_RANGE[1], smoothing: float = THERMAL_SMOOTHING,
+           sysfs: Path = SYSFS_ROOT, follow_theme: bool = True):
+    """The thermal effect as a frames(led_count) callable for effects.run.
+
+    Raises OSError right away if no matching sensor can be opened.
+    """
+    sensors = open_sensors(choose(discover(sysfs), sensor))
+    if not sensors:
+        raise OSError(f"No temperature sensor{f' {sensor!r}' if sensor else ''} under {sysfs}")
+    thermometer = Thermometer(sensors, rate, smoothing)
+
+    def frames(led_count):
+        gauge = Gauge(theme_gradient(led_count))
+        watcher = theme_watcher() if follow_theme else None
+        check_every = max(1, round(rate))  # look for theme changes about once a second
+        tick = 0
+        try:
+            while True:
+                tick += 1
+                if watcher is not None and tick % check_every == 0 and watcher.read(0):
+                    gauge = Gauge(theme_gradient(led_count))
+                yield gauge.render(level(thermometer.sample(), low, high))
+        finally:
+            if watcher is not None:
+                watcher.close()
+            thermometer.close()
+
+    return frames
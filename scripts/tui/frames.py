@@ -0,0 +1,99 @@
+"""
+Reader for the daemon's live frame file (FRAME_FILE)
+
+The daemon publishes every frame it sends to the strip - after gamma,
+brightness and current limiting - into a small fixed-size file that it
+keeps mapped (see include/frame_file.hpp for the layout). FrameReader maps
+the same file read-only; poll() is a handful of memory reads, so the TUI can
+call it at the daemon's frame rate on the UI loop.
+
+The sequence number is a seqlock: odd while the daemon is writing, bumped to
+the next even value when the frame is complete. A frame is only accepted
+if the same even sequence is seen before and after copying it, and an
+unchanged sequence means there is nothing new to draw.
+"""
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from .constants import FRAME_FILE
+
+FRAME_MAGIC = b"FWLF"
+FRAME_VERSION = 1
+# magic, version, header size, led_count, sequence, publish time (ns), reserved
+_HEADER = struct.Struct("<4sHHIIQQ")
+_SEQUENCE = struct.Struct("<I")
+_SEQUENCE_OFFSET = 12
+
+# Re-check the path for a new file (daemon restart) every this many polls
+_RECHECK_POLLS = 30
+
+
+class FrameReader:
+    """Polls FRAME_FILE for new frames; tolerates the daemon not running."""
+
+    def __init__(self, path: Path = FRAME_FILE):
+        self.path = Path(path)
+        self.led_count = 0
+        self._buf = None
+        self._inode = None
+        self._header_size = 0
+        self._sequence = None
+        self._polls = 0
+
+    def poll(self) -> bytes | None:
+        """led_count * 3 RGB bytes of a frame newer than the last one returned, else None."""
+        self._polls += 1
+        if self._buf is None or self._polls % _RECHECK_POLLS == 0:
+            self._reopen_if_replaced()
+        if self._buf is None:
+            return None
+        start = self._header_size
+        end = start + self.led_count * 3
+        for _attempt in range(3):
+            sequence = _SEQUENCE.unpack_from(self._buf, _SEQUENCE_OFFSET)[0]
+            if sequence == self._sequence:
+                return None
+            if sequence == 0:
+                return None  # nothing published yet
+            if sequence & 1:
+                continue  # mid-write
+            frame = self._buf[start:end]
+            if _SEQUENCE.unpack_from(self._buf, _SEQUENCE_OFFSET)[0] == sequence:
+                self._sequence = sequence
+                return frame
+        return None
+
+    def close(self) -> None:
+        if self._buf is not None:
+            self._buf.close()
+        self._buf = None
+        self._inode = None
+
+    def _reopen_if_replaced(self) -> None:
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            self.close()
+            return
+        if inode == self._inode:
+            return
+        self.close()
+        try:
+            with open(self.path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        if len(buf) < _HEADER.size:
+            buf.close()
+            return
+        magic, version, header_size, led_count, *_rest = _HEADER.unpack_from(buf, 0)
+        if magic != FRAME_MAGIC or version != FRAME_VERSION or len(buf) < header_size + led_count * 3:
+            buf.close()
+            return
+        self._buf = buf
+        self._inode = inode
+        self._header_size = header_size
+        self.led_count = led_count
+        self._sequence = None  # new file: its current frame counts as new
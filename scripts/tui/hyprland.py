@@ -0,0 +1,458 @@
+"""
+Hyprland automation (installed as forgeworklights-hyprland)
+
+    forgeworklights-hyprland [--rules=FILE] [--socket=PATH] [--dry-run] [--once]
+    forgeworklights-hyprland record FILE [--socket=PATH]
+    forgeworklights-hyprland replay FILE --socket=PATH [--speed=N]
+
+Follows Hyprland's event socket (.socket2.sock) and switches the LED theme
+and animation by the rules in AUTOMATION_RULES_FILE:
+
+    debounce = 0.15                  # seconds of quiet before rules apply
+
+    [workspaces]                     # by workspace name or id
+    "1" = { theme = "tokyo-night" }
+    "music" = { theme = "catppuccin", animation = "wave" }
+
+    [[windows]]                      # focused window class; first match wins
+    class = "firefox"                # regular expression, whole class
+    theme = "nord"
+
+    [fullscreen]                     # while a fullscreen window is focused
+    animation = "static"
+    class = "steam_app_.*|gamescope" # optional: only these windows count
+
+Fullscreen rules beat window rules, which beat workspace rules. Settings
+no rule covers stay as the user left them: the listener remembers the
+values it replaced and puts them back once no rule applies (or when it
+exits), and a value the user changes in the meantime becomes the new one
+to return to. The rules file is re-read when it changes.
+
+Events only update the focused workspace, window class and fullscreen
+state; the rules are evaluated DEBOUNCE seconds after the last one, so
+flipping through workspaces applies only the one that is landed on. All
+changes of one evaluation go out in a single control.update - one atomic
+write with state.json (see tui.control) - on a worker thread.
+
+--socket connects to any UNIX socket instead of Hyprland's; `replay`
+serves a recorded event stream (`record` writes one: seconds since the
+start, a tab, the event line) on such a socket, so rules can be tried and
+tested without a compositor. --dry-run prints the changes instead of
+making them and --once exits when the stream ends.
+"""
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+import tomllib
+from pathlib import Path
+
+from .animations import ANIMATIONS
+from .constants import AUTOMATION_RULES_FILE, HYPRLAND_DEBOUNCE, HYPRLAND_RECONNECT_DELAY
+from . import control
+from .effects import LAYERED_ANIMATION, start_layered
+from .utils import atomic_file
+
+# Rule keys and the control settings they set
+SETTINGS = {"theme": "led_theme", "animation": "animation"}
+
+
+def hyprland_socket(name: str = ".socket2.sock") -> Path | None:
+    """Path of the running Hyprland instance's socket (newer and older locations)."""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not signature:
+        return None
+    bases = [Path("/tmp/hypr")]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        bases.insert(0, Path(os.environ["XDG_RUNTIME_DIR"]) / "hypr")
+    for base in bases:
+        path = base / signature / name
+        if path.exists():
+            return path
+    return None
+
+
+def _settings(table: dict, where: str) -> dict:
+    """Control settings of one rule table; unknown animations are reported and dropped."""
+    settings = {}
+    for key, setting in SETTINGS.items():
+        value = table.get(key)
+        if value is None:
+            continue
+        if key == "animation" and value not in ANIMATIONS:
+            print(f"[hyprland] {where}: unknown animation {value!r}", file=sys.stderr)
+            continue
+        settings[setting] = str(value)
+    return settings
+
+
+class Rules:
+    """Parsed automation rules (see the module docstring for the file format)."""
+
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        self.debounce = float(data.get("debounce", HYPRLAND_DEBOUNCE))
+        self.workspaces = {
+            str(name): _settings(table, f"workspace {name}")
+            for name, table in data.get("workspaces", {}).items() if isinstance(table, dict)
+        }
+        self.windows = []
+        for index, table in enumerate(data.get("windows", [])):
+            if isinstance(table, dict) and table.get("class"):
+                self.windows.append((re.compile(table["class"]), _settings(table, f"window rule {index + 1}")))
+        fullscreen = data.get("fullscreen")
+        self.fullscreen = None
+        if isinstance(fullscreen, dict):
+            pattern = re.compile(fullscreen["class"]) if fullscreen.get("class") else None
+            self.fullscreen = (pattern, _settings(fullscreen, "fullscreen"))
+
+    @classmethod
+    def load(cls, path: Path = AUTOMATION_RULES_FILE) -> "Rules":
+        """Rules from path; no rules if it is missing, with a message if it does not parse."""
+        try:
+            with open(path, "rb") as f:
+                return cls(tomllib.load(f))
+        except FileNotFoundError:
+            return cls()
+        except (OSError, tomllib.TOMLDecodeError, re.error, TypeError, ValueError) as e:
+            print(f"[hyprland] {path}: {e}", file=sys.stderr)
+            return cls()
+
+    def resolve(self, context: "Context") -> dict:
+        """Settings the rules ask for in context."""
+        settings = {}
+        for key in (context.workspace_name, context.workspace_id):
+            if key is not None and key in self.workspaces:
+                settings.update(self.workspaces[key])
+                break
+        window_class = context.window_class or ""
+        for pattern, window_settings in self.windows:
+            if pattern.fullmatch(window_class):
+                settings.update(window_settings)
+                break
+        if self.fullscreen is not None and context.fullscreen:
+            pattern, fullscreen_settings = self.fullscreen
+            if pattern is None or pattern.fullmatch(window_class):
+                settings.update(fullscreen_settings)
+        return settings
+
+
+class Context:
+    """What the event stream says is focused."""
+
+    def __init__(self):
+        self.workspace_name = None
+        self.workspace_id = None
+        self.window_class = None
+        self._fullscreen = {}  # per workspace name: the event only covers the current one
+
+    @property
+    def fullscreen(self) -> bool:
+        return self._fullscreen.get(self.workspace_name, False)
+
+    def fold(self, line: str) -> bool:
+        """Apply one event line; True if it may change what the rules resolve to."""
+        name, sep, data = line.partition(">>")
+        if not sep:
+            return False
+        if name == "workspace":
+            self.workspace_name = data
+        elif name == "workspacev2":
+            workspace_id, _, self.workspace_name = data.partition(",")
+            self.workspace_id = workspace_id
+        elif name == "focusedmon":
+            self.workspace_name = data.partition(",")[2]
+        elif name == "activewindow":
+            self.window_class = data.partition(",")[0] or None
+        elif name == "fullscreen":
+            self._fullscreen[self.workspace_name] = data.strip() == "1"
+        elif name == "destroyworkspace":
+            self._fullscreen.pop(data, None)
+            return False
+        else:
+            return False
+        return True
+
+    def describe(self) -> str:
+        parts = [f"workspace {self.workspace_name or '-'}", f"class {self.window_class or '-'}"]
+        if self.fullscreen:
+            parts.append("fullscreen")
+        return ", ".join(parts)
+
+
+class Automation:
+    """Applies the rules for the current context on top of the user's own settings."""
+
+    def __init__(self, rules_path: Path = AUTOMATION_RULES_FILE, dry_run: bool = False, out=sys.stdout):
+        self.rules_path = rules_path
+        self.rules_generation = atomic_file.generation(rules_path)
+        self.rules = Rules.load(rules_path)
+        self.context = Context()
+        self.dry_run = dry_run
+        self.out = out
+        self.baseline = {}  # the user's values of the settings currently overridden
+        self.applied = {}  # what we set them to
+        self._simulated = None  # dry-run state
+
+    def _state(self) -> dict:
+        if not self.dry_run:
+            return control.read_state()
+        if self._simulated is None:
+            self._simulated = control.read_state()
+        return self._simulated
+
+    def _commit(self, changes: dict, why: str) -> None:
+        if not changes:
+            return
+        if self.dry_run:
+            self._simulated.update(changes)
+            print(f"{why}: " + " ".join(f"{key}={value}" for key, value in changes.items()),
+                  file=self.out, flush=True)
+        else:
+            control.update(**changes)
+            if changes.get("animation") == LAYERED_ANIMATION:
+                start_layered()
+
+    def evaluate(self) -> dict:
+        """Bring the control state in line with the rules; returns the changes made (blocking I/O)."""
+        generation = atomic_file.generation(self.rules_path)
+        if generation != self.rules_generation:
+            self.rules_generation, self.rules = generation, Rules.load(self.rules_path)
+        state = self._state()
+        if state["led_theme"] == control.PREVIEW_THEME:
+            return {}  # the TUI is previewing; leave it alone
+        wanted = self.rules.resolve(self.context)
+        changes = {}
+        for setting in SETTINGS.values():
+            current = state[setting]
+            if setting in self.applied and current != self.applied[setting]:
+                # Changed by the user while overridden: that is what to return to now
+                self.baseline[setting] = current
+                del self.applied[setting]
+            if setting in wanted:
+                self.baseline.setdefault(setting, current)
+                self.applied[setting] = wanted[setting]
+                target = wanted[setting]
+            elif setting in self.applied:
+                target = self.baseline.pop(setting)
+                del self.applied[setting]
+            else:
+                self.baseline.pop(setting, None)
+                continue
+            if target != current:
+                changes[setting] = target
+        self._commit(changes, self.context.describe())
+        return changes
+
+    def restore(self) -> dict:
+        """Put back every setting still overridden (unless the user changed it since)."""
+        state = self._state()
+        changes = {
+            setting: self.baseline[setting]
+            for setting, value in self.applied.items()
+            if state[setting] == value and setting in self.baseline
+        }
+        self.applied.clear()
+        self.baseline.clear()
+        self._commit(changes, "exit")
+        return changes
+
+
+async def _query(command: str) -> dict | None:
+    """One JSON request on Hyprland's command socket (.socket.sock); None if unavailable."""
+    path = hyprland_socket(".socket.sock")
+    if path is None:
+        return None
+    try:
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        writer.write(command.encode())
+        await writer.drain()
+        data = await reader.read()
+        writer.close()
+        return json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+
+async def _initial_context(context: Context) -> None:
+    """Fill in what is focused right now; the event stream only reports changes."""
+    workspace = await _query("j/activeworkspace")
+    if isinstance(workspace, dict):
+        context.workspace_name = str(workspace.get("name")) if workspace.get("name") is not None else None
+        context.workspace_id = str(workspace.get("id")) if workspace.get("id") is not None else None
+    window = await _query("j/activewindow")
+    if isinstance(window, dict):
+        context.window_class = window.get("class") or None
+        context._fullscreen[context.workspace_name] = bool(window.get("fullscreen"))
+
+
+async def listen(automation: Automation, socket_path: Path | None = None, once: bool = False) -> None:
+    """Follow the event stream, applying the rules after each burst of events."""
+    loop = asyncio.get_running_loop()
+    lock = asyncio.Lock()
+    pending = None
+
+    async def evaluate():
+        async with lock:
+            await asyncio.to_thread(automation.evaluate)
+
+    def schedule():
+        nonlocal pending
+        if pending is not None:
+            pending.cancel()
+        pending = loop.call_later(automation.rules.debounce, lambda: loop.create_task(evaluate()))
+
+    while True:
+        path = socket_path or hyprland_socket()
+        try:
+            if path is None:
+                raise OSError("Hyprland is not running (HYPRLAND_INSTANCE_SIGNATURE is not set)")
+            reader, writer = await asyncio.open_unix_connection(str(path))
+        except OSError as e:
+            if once:
+                raise
+            print(f"[hyprland] {e}; retrying in {HYPRLAND_RECONNECT_DELAY:g}s", file=sys.stderr)
+            await asyncio.sleep(HYPRLAND_RECONNECT_DELAY)
+            continue
+        if socket_path is None:
+            await _initial_context(automation.context)
+            await evaluate()
+        try:
+            while line := await reader.readline():
+                if automation.context.fold(line.decode("utf-8", "replace").rstrip("\n")):
+                    schedule()
+        finally:
+            writer.close()
+        if once:
+            break
+        await asyncio.sleep(HYPRLAND_RECONNECT_DELAY)  # Hyprland restarting
+    if pending is not None:
+        pending.cancel()
+    await evaluate()  # whatever the last burst left
+
+
+async def record(output: str, socket_path: Path | None = None) -> None:
+    """Append the live event stream to output with timestamps (for replay)."""
+    path = socket_path or hyprland_socket()
+    if path is None:
+        raise OSError("Hyprland is not running (HYPRLAND_INSTANCE_SIGNATURE is not set)")
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    started = time.monotonic()
+    try:
+        with open(output, "a") as out:
+            while line := await reader.readline():
+                out.write(f"{time.monotonic() - started:.3f}\t{line.decode('utf-8', 'replace')}")
+                out.flush()
+    finally:
+        writer.close()
+
+
+def read_recording(path: str) -> list:
+    """(seconds, line) pairs of a recording; lines without a timestamp follow the previous at once."""
+    events = []
+    last = 0.0
+    with open(path) as f:
+        for raw in f:
+            raw = raw.rstrip("\n")
+            if not raw or raw.startswith("#"):
+                continue
+            stamp, sep, line = raw.partition("\t")
+            if sep:
+                try:
+                    last = float(stamp)
+                except ValueError:
+                    line = raw
+            else:
+                line = raw
+            events.append((last, line))
+    return events
+
+
+async def replay(recording: str, socket_path: Path, speed: float = 1.0) -> None:
+    """Serve a recording on socket_path, like .socket2.sock, to the first client; then exit."""
+    events = read_recording(recording)
+    done = asyncio.Event()
+
+    async def serve(reader, writer):
+        started = time.monotonic()
+        try:
+            for at, line in events:
+                delay = started + at / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(f"{line}\n".encode())
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+            done.set()
+
+    socket_path = Path(socket_path)
+    socket_path.unlink(missing_ok=True)
+    server = await asyncio.start_unix_server(serve, path=str(socket_path))
+    try:
+        await done.wait()
+    finally:
+        server.close()
+        socket_path.unlink(missing_ok=True)
+
+
+def usage() -> None:
+    print("Usage: forgeworklights-hyprland [--rules=FILE] [--socket=PATH] [--dry-run] [--once]")
+    print("       forgeworklights-hyprland record FILE [--socket=PATH]")
+    print("       forgeworklights-hyprland replay FILE --socket=PATH [--speed=N]")
+    print(f"Applies the theme/animation rules in {AUTOMATION_RULES_FILE} as Hyprland focus changes.")
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if any(arg in ("-h", "--help") for arg in args):
+        usage()
+        return 0
+    options = {}
+    positional = []
+    for arg in args:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        else:
+            positional.append(arg)
+    socket_path = Path(options["socket"]) if options.get("socket") else None
+
+    try:
+        if positional[:1] == ["record"] and len(positional) == 2:
+            asyncio.run(record(positional[1], socket_path))
+            return 0
+        if positional[:1] == ["replay"] and len(positional) == 2 and socket_path is not None:
+            asyncio.run(replay(positional[1], socket_path, float(options.get("speed") or 1.0)))
+            return 0
+    except KeyboardInterrupt:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"[hyprland] {e}", file=sys.stderr)
+        return 1
+    if positional:
+        usage()
+        return 1
+
+    automation = Automation(Path(options.get("rules") or AUTOMATION_RULES_FILE), dry_run="dry-run" in options)
+
+    async def run():
+        # Stopped with SIGTERM (session end): unwind so the overrides are undone
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        await listen(automation, socket_path, once="once" in options)
+
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except OSError as e:
+        print(f"[hyprland] {e}", file=sys.stderr)
+        return 1
+    finally:
+        automation.restore()
+    return 0
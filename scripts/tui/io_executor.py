@@ -0,0 +1,167 @@
+"""
+Background disk I/O for the ForgeworkLights TUI
+
+Every config/database read and write made by the TUI goes through the
+shared IO executor instead of running inside a message handler:
+
+- One worker thread runs all operations in submission order, so writes to
+  a file land in the order they were issued and a read always observes
+  every write submitted before it. The daemon never sees out-of-order state.
+- Writes are fire-and-forget and return a concurrent.futures.Future;
+  failures are logged to stderr. Files are replaced atomically and
+  read-modify-write cycles hold the shared file lock (utils.atomic_file),
+  so the daemon and the sync CLI never see torn or lost updates.
+- Reads (and any other operation whose result is needed) are awaitable
+  from the UI event loop via IOExecutor.run() / read_text() / read_json().
+
+Data handed to write_json()/update_json() is serialized on the worker
+thread, so callers must pass a copy they will not mutate afterwards.
+"""
+import asyncio
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable
+
+from . import control
+from .utils import atomic_file
+
+FLUSH_TIMEOUT = 2.0  # seconds to wait for pending writes on shutdown
+
+
+def _log_failure(future: Future) -> None:
+    """Done-callback for fire-and-forget operations."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        print(f"[IO] Background operation failed: {error}", file=sys.stderr)
+
+
+class IOExecutor:
+    """Single-threaded, ordered executor for TUI file operations."""
+
+    def __init__(self):
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending: set[Future] = set()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forgeworklights-io")
+            return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) behind every previously submitted operation."""
+        future = self._pool().submit(fn, *args, **kwargs)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """Queue an operation and return an awaitable for its result."""
+        return asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def pending(self) -> int:
+        """Number of queued or running operations (for diagnostics)."""
+        return len(self._pending)
+
+    # Reads -----------------------------------------------------------------
+
+    def read_text(self, path: Path, default: str | None = None):
+        """Awaitable: stripped file contents, or default if missing/unreadable."""
+        return self.run(_read_text, Path(path), default)
+
+    def read_json(self, path: Path, default: Any = None):
+        """Awaitable: parsed JSON, or default if missing/invalid."""
+        return self.run(_read_json, Path(path), default)
+
+    # Writes ----------------------------------------------------------------
+
+    def write_text(self, path: Path, text: str, touch: bool = False) -> Future:
+        """Write text to path (optionally touching it afterwards)."""
+        future = self.submit(_write_text, Path(path), text, touch)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def write_json(self, path: Path, data: Any, indent: int = 2) -> Future:
+        """Serialize data and write it to path."""
+        future = self.submit(_write_json, Path(path), data, indent)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def update_json(self, path: Path, mutate: Callable[[Any], Any], default: Callable[[], Any] = dict) -> Future:
+        """Read-modify-write a JSON file on the I/O thread.
+
+        mutate(data) edits data in place; returning False skips the write.
+        The future resolves to the (possibly modified) data.
+        """
+        future = self.submit(_update_json, Path(path), mutate, default)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def update_control(self, **changes) -> Future:
+        """Apply LED control changes (tui.control.update) in one write."""
+        future = self.submit(control.update, **changes)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def touch(self, path: Path) -> Future:
+        """Update a file's mtime (used to nudge inotify watchers)."""
+        future = self.submit(_touch, Path(path))
+        future.add_done_callback(_log_failure)
+        return future
+
+    # Lifecycle -------------------------------------------------------------
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> None:
+        """Block until queued operations finish (used at shutdown)."""
+        if self._pending:
+            wait(list(self._pending), timeout=timeout)
+
+    def shutdown(self, timeout: float = FLUSH_TIMEOUT) -> None:
+        """Flush pending writes and stop the worker thread."""
+        self.flush(timeout)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _read_text(path: Path, default):
+    try:
+        return path.read_text().strip()
+    except (FileNotFoundError, OSError):
+        return default
+
+
+def _read_json(path: Path, default):
+    try:
+        return atomic_file.read_json(path, default)[0]
+    except OSError:
+        return default
+
+
+def _write_text(path: Path, text: str, touch: bool) -> None:
+    atomic_file.atomic_write_text(path, text)
+    if touch:
+        path.touch()
+
+
+def _write_json(path: Path, data, indent: int) -> None:
+    atomic_file.atomic_write_json(path, data, indent)
+
+
+def _update_json(path: Path, mutate, default):
+    return atomic_file.update_json(path, mutate, default)
+
+
+def _touch(path: Path) -> None:
+    if path.exists() or path.is_symlink():
+        path.touch()
+
+
+# Shared executor used by the app and every widget
+IO = IOExecutor()
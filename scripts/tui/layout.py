@@ -0,0 +1,333 @@
+"""
+Spatial LED layout: where each LED of the strip physically is
+
+    forgeworklights-layout model FILE.stl|FILE.3mf [--leds=N] [--strip-width=MM] [--bed-z=MM]
+                                 [--start=X,Y] [--reverse] [--output=FILE]
+    forgeworklights-layout points FILE|- [--center=X,Y[,Z]] [--output=FILE]
+    forgeworklights-layout show [--layout=FILE]
+
+A layout file (LAYOUT_FILE by default, "-" for stdout) maps strip indices
+to coordinates:
+
+    {
+      "version": 1,
+      "name": "Top_Plate_LED_Mount_V2",
+      "center": [125.28, 75.28, 8.5],      # the physical middle effects work from
+      "leds": [[42.27, 50.25, 8.5], ...]   # one [x, y] or [x, y, z] per LED, in strip order
+    }
+
+`model` builds one from a mount's geometry (see tui.mesh): the LEDs are
+spread evenly over the straight strip beds found in it, in order from the
+bed end nearest --start (the model's lowest x/y corner by default, where
+the cable comes in on Top_Plate_LED_Mount), and the center is the middle
+of the model. `points` takes one LED per line ("x y [z]" or "x,y[,z]",
+# comments allowed), center defaulting to the middle of the points.
+Without a layout file the strip is a straight line (linear()).
+
+Effects do not use the coordinates but a layout's Tables: per LED the
+distance from the center, the angle around it, and x and y across the
+layout, each quantized to one byte. They are computed once per layout
+file generation and strip length and cached, so a radial ripple is one
+lookup per LED and frame - wave[(distance[i] + phase) & 255] - with no
+trigonometry per frame (see tui.effects.ripple).
+"""
+import json
+import math
+import sys
+from pathlib import Path
+
+from .constants import LAYOUT_FILE, LAYOUT_STRIP_WIDTH
+from .utils import atomic_file
+
+LAYOUT_VERSION = 1
+TABLE_SIZE = 256  # levels of every table (one byte per LED)
+
+_cache = {}  # (path, generation, led_count) -> Tables
+
+
+class Layout:
+    """LED coordinates in strip order, and the center effects radiate from."""
+
+    __slots__ = ("name", "leds", "center", "dimensions")
+
+    def __init__(self, leds: list, center=None, name: str = ""):
+        if not leds:
+            raise ValueError("a layout needs at least one LED")
+        self.dimensions = max(len(p) for p in leds)
+        if self.dimensions not in (2, 3) or any(len(p) not in (2, 3) for p in leds):
+            raise ValueError("LED coordinates must be [x, y] or [x, y, z]")
+        self.leds = [tuple(float(c) for c in p) + (0.0,) * (3 - len(p)) for p in leds]
+        if center is None:
+            low, high = self.extent()
+            center = [(a + b) / 2 for a, b in zip(low, high)]
+        if len(center) not in (2, 3):
+            raise ValueError("center must be [x, y] or [x, y, z]")
+        self.center = tuple(float(c) for c in center) + (0.0,) * (3 - len(center))
+        self.name = name
+
+    def extent(self) -> tuple:
+        """((min x, min y, min z), (max x, max y, max z)) of the LEDs."""
+        return (tuple(min(p[i] for p in self.leds) for i in range(3)),
+                tuple(max(p[i] for p in self.leds) for i in range(3)))
+
+    def dumps(self) -> str:
+        """The layout file's text: to_json() with one LED per line."""
+        data = self.to_json()
+        fields = [f"  {json.dumps(key)}: {json.dumps(value)}" for key, value in data.items() if key != "leds"]
+        leds = ",\n".join(f"    {json.dumps(p)}" for p in data["leds"])
+        return "{\n" + ",\n".join(fields) + f',\n  "leds": [\n{leds}\n  ]\n}}\n'
+
+    def to_json(self) -> dict:
+        n = self.dimensions
+        return {
+            "version": LAYOUT_VERSION,
+            "name": self.name,
+            "center": [round(c, 3) for c in self.center[:n]],
+            "leds": [[round(c, 3) for c in p[:n]] for p in self.leds],
+        }
+
+    @classmethod
+    def from_json(cls, data) -> "Layout":
+        """Layout from a parsed layout file (ValueError if it is not one)."""
+        if not isinstance(data, dict) or not isinstance(data.get("leds"), list):
+            raise ValueError("not a layout file")
+        try:
+            return cls(data["leds"], data.get("center"), str(data.get("name", "")))
+        except TypeError:
+            raise ValueError("LED coordinates must be numbers") from None
+
+    def fit(self, led_count: int) -> "Layout":
+        """This layout for a strip of led_count LEDs, resampled along the strip if it differs."""
+        if led_count == len(self.leds):
+            return self
+        last = len(self.leds) - 1
+        leds = []
+        for index in range(led_count):
+            position = index * last / (led_count - 1) if led_count > 1 else 0.0
+            i = min(int(position), max(last - 1, 0))
+            t = position - i
+            a, b = self.leds[i], self.leds[min(i + 1, last)]
+            leds.append(tuple(p + (q - p) * t for p, q in zip(a, b)))
+        layout = Layout(leds, self.center, self.name)
+        layout.dimensions = self.dimensions
+        return layout
+
+
+def linear(led_count: int) -> Layout:
+    """The strip as a straight line, centered on its middle LED(s)."""
+    return Layout([(float(i), 0.0) for i in range(led_count)], ((led_count - 1) / 2, 0.0), "linear")
+
+
+def _quantize(value: float, low: float, high: float) -> int:
+    if high <= low:
+        return 0
+    return min(TABLE_SIZE - 1, max(0, int((value - low) / (high - low) * (TABLE_SIZE - 1) + 0.5)))
+
+
+class Tables:
+    """Per-LED lookup tables of a layout, one byte (0-255) per LED each.
+
+    distance: from the center, 255 for the farthest LED
+    angle:    around the center, counterclockwise from +x, 256 = a full turn
+    x, y:     position across the layout's extent, 0 at the low edge
+    """
+
+    __slots__ = ("distance", "angle", "x", "y")
+
+    def __init__(self, layout: Layout):
+        cx, cy, cz = layout.center
+        distances = [math.dist(p, layout.center) for p in layout.leds]
+        farthest = max(distances)
+        self.distance = bytes(_quantize(d, 0.0, farthest) for d in distances)
+        self.angle = bytes(
+            math.floor(math.atan2(y - cy, x - cx) / math.tau * TABLE_SIZE + 0.5) % TABLE_SIZE
+            for x, y, _z in layout.leds
+        )
+        (x0, y0, _z0), (x1, y1, _z1) = layout.extent()
+        self.x = bytes(_quantize(p[0], x0, x1) for p in layout.leds)
+        self.y = bytes(_quantize(p[1], y0, y1) for p in layout.leds)
+
+    def table(self, name: str) -> bytes:
+        """One of the tables by name (ValueError for an unknown one)."""
+        if name not in self.__slots__:
+            raise ValueError(f"no {name!r} table (one of {', '.join(self.__slots__)})")
+        return getattr(self, name)
+
+
+def load(path: Path = LAYOUT_FILE) -> Layout | None:
+    """The layout in path; None if there is none (ValueError if it is not a layout)."""
+    data, gen = atomic_file.read_json(path)
+    if data is None:
+        if gen is not None:
+            raise ValueError("not valid JSON")
+        return None
+    return Layout.from_json(data)
+
+
+def save(layout: Layout, path: Path = LAYOUT_FILE) -> None:
+    atomic_file.atomic_write_text(path, layout.dumps())
+
+
+def tables(led_count: int, path: Path = LAYOUT_FILE) -> Tables:
+    """Tables of the layout in path for led_count LEDs (a straight line without one),
+    computed once per file generation and strip length."""
+    key = (str(path), atomic_file.generation(path), led_count)
+    cached = _cache.get(key)
+    if cached is None:
+        try:
+            layout = load(path)
+        except ValueError as e:
+            print(f"[layout] {path}: {e}", file=sys.stderr)
+            layout = None
+        cached = _cache[key] = Tables((layout or linear(led_count)).fit(led_count))
+        # Older generations of the same file are never asked for again
+        for stale in [k for k in _cache if k[0] == key[0] and k != key]:
+            del _cache[stale]
+    return cached
+
+
+def from_model(path, led_count: int, strip_width: float = LAYOUT_STRIP_WIDTH, bed_z: float | None = None,
+               start: tuple | None = None, reverse: bool = False) -> Layout:
+    """Layout of led_count LEDs spread over the strip beds of a mount model (see tui.mesh)."""
+    from . import mesh
+    triangles = mesh.read_mesh(path)
+    low, high = mesh.bounds(triangles)
+    z, runs = mesh.strip_runs(triangles, strip_width, bed_z)
+    runs = mesh.chain(runs, start or (low[0], low[1]))
+    if reverse:
+        runs = [(b, a) for a, b in reversed(runs)]
+    # LEDs per run in proportion to its length (largest remainder)
+    lengths = [math.dist(a, b) for a, b in runs]
+    shares = [led_count * length / sum(lengths) for length in lengths]
+    counts = [int(share) for share in shares]
+    for i in sorted(range(len(runs)), key=lambda i: counts[i] - shares[i])[:led_count - sum(counts)]:
+        counts[i] += 1
+    leds = []
+    for (a, b), count in zip(runs, counts):
+        for k in range(count):
+            t = (k + 0.5) / count
+            leds.append((a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t, z))
+    center = ((low[0] + high[0]) / 2, (low[1] + high[1]) / 2, z)
+    return Layout(leds, center, Path(path).stem)
+
+
+def from_points(text: str, center=None, name: str = "") -> Layout:
+    """Layout from one "x y [z]" or "x,y[,z]" line per LED."""
+    leds = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].replace(",", " ").split()
+        if not line:
+            continue
+        try:
+            leds.append(tuple(float(value) for value in line))
+        except ValueError:
+            raise ValueError(f"line {number}: not a number") from None
+    return Layout(leds, center, name)
+
+
+def _numbers(value: str, what: str) -> tuple:
+    try:
+        numbers = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        numbers = ()
+    if len(numbers) not in (2, 3):
+        raise ValueError(f"{what} must be X,Y or X,Y,Z")
+    return numbers
+
+
+def show(layout: Layout, led_count: int, out=sys.stdout) -> None:
+    """Print the layout: a map of the LEDs (by index, last digit) and their tables."""
+    layout = layout.fit(led_count)
+    t = Tables(layout)
+    width, height = 64, 16
+    (x0, y0, _), (x1, y1, _) = layout.extent()
+    scale = min((width - 1) / (x1 - x0) if x1 > x0 else math.inf,
+                2 * (height - 1) / (y1 - y0) if y1 > y0 else math.inf)  # cells are about twice as tall
+    scale = 0.0 if scale == math.inf else scale
+    rows = [[" "] * width for _ in range(height)]
+
+    def plot(x, y, mark):
+        col, row = int((x - x0) * scale + 0.5), int((y1 - y) * scale / 2 + 0.5)
+        if 0 <= col < width and 0 <= row < height:
+            rows[row][col] = mark
+    plot(layout.center[0], layout.center[1], "+")
+    for index, (x, y, _z) in enumerate(layout.leds):
+        plot(x, y, str(index % 10))
+    print(f"{layout.name or 'layout'}: {len(layout.leds)} LEDs, center "
+          f"{', '.join(f'{c:g}' for c in layout.center[:layout.dimensions])}", file=out)
+    for row in rows:
+        if "".join(row).strip():
+            print("  " + "".join(row).rstrip(), file=out)
+    print(f"{'led':>4} {'position':>26}  distance angle   x   y", file=out)
+    for index, p in enumerate(layout.leds):
+        position = ", ".join(f"{c:.1f}" for c in p[:layout.dimensions])
+        print(f"{index:>4} {position:>26}  {t.distance[index]:>8} {t.angle[index]:>5} {t.x[index]:>3} "
+              f"{t.y[index]:>3}", file=out)
+
+
+def usage() -> None:
+    print("Usage: forgeworklights-layout model FILE.stl|FILE.3mf [--leds=N] [--strip-width=MM] [--bed-z=MM]")
+    print("                                    [--start=X,Y] [--reverse] [--output=FILE]")
+    print("       forgeworklights-layout points FILE|- [--center=X,Y[,Z]] [--output=FILE]")
+    print("       forgeworklights-layout show [--layout=FILE]")
+    print(f"Writes where each LED physically is to {LAYOUT_FILE} (for spatial effects).")
+
+
+def main(argv=None) -> int:
+    from . import themes_db
+    args = list(sys.argv[1:] if argv is None else argv)
+    if any(arg in ("-h", "--help") for arg in args):
+        usage()
+        return 0
+    options = {}
+    positional = []
+    for arg in args:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        else:
+            positional.append(arg)
+    command = positional[0] if positional else None
+
+    try:
+        led_count = int(options["leds"]) if options.get("leds") else themes_db.led_count()
+        if command == "show" and len(positional) == 1:
+            path = Path(options.get("layout") or LAYOUT_FILE)
+            layout = load(path)
+            if layout is None:
+                print(f"[layout] no layout in {path}; effects treat the strip as a straight line",
+                      file=sys.stderr)
+                layout = linear(led_count)
+            show(layout, led_count)
+            return 0
+        if command == "model" and len(positional) == 2:
+            layout = from_model(
+                positional[1], led_count,
+                float(options.get("strip-width") or LAYOUT_STRIP_WIDTH),
+                float(options["bed-z"]) if options.get("bed-z") else None,
+                _numbers(options["start"], "--start")[:2] if options.get("start") else None,
+                "reverse" in options,
+            )
+        elif command == "points" and len(positional) == 2:
+            text = sys.stdin.read() if positional[1] == "-" else Path(positional[1]).read_text()
+            center = _numbers(options["center"], "--center") if options.get("center") else None
+            name = "" if positional[1] == "-" else Path(positional[1]).stem
+            layout = from_points(text, center, name)
+        else:
+            usage()
+            return 1
+    except (OSError, ValueError) as e:
+        print(f"[layout] {e}", file=sys.stderr)
+        return 1
+
+    output = options.get("output") or str(LAYOUT_FILE)
+    if output == "-":
+        print(layout.dumps(), end="")
+        return 0
+    try:
+        save(layout, Path(output))
+    except OSError as e:
+        print(f"[layout] {e}", file=sys.stderr)
+        return 1
+    print(f"{len(layout.leds)} LEDs written to {output}", file=sys.stderr)
+    return 0
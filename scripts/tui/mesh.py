@@ -0,0 +1,205 @@
+"""
+Triangle meshes of the printed LED mounts, and where the strip lies in them
+
+read_mesh() loads the models under "3D Models" (binary or ASCII STL, or
+3MF with its build transform applied) as a list of triangles, each three
+(x, y, z) tuples in millimetres.
+
+strip_runs() finds the straight beds the strip is laid in: among the
+upward-facing faces it takes each height separately, rasterizes them onto
+a LAYOUT_RASTER grid, and keeps the bands about one strip wide and at
+least four times as long, along x or y. The height with the most run
+length is the bed (or the one given). This is aimed at printed channels
+like those of Top_Plate_LED_Mount; curved channels are not followed, but
+a layout can always be given point by point instead (see tui.layout).
+"""
+import math
+import struct
+import zipfile
+from collections import defaultdict
+from xml.etree import ElementTree
+
+from .constants import LAYOUT_RASTER, LAYOUT_STRIP_WIDTH
+
+_STL_HEADER = 80
+_STL_TRIANGLE = struct.Struct("<12fH")  # normal, three vertices, attribute
+_UP = 0.999  # face normal z for "facing up"
+_RUN_TOLERANCE = 2.0  # millimetres a band's ends may wander from row to row
+
+
+def _read_stl(data: bytes) -> list:
+    if len(data) >= _STL_HEADER + 4:
+        count = struct.unpack_from("<I", data, _STL_HEADER)[0]
+        if len(data) == _STL_HEADER + 4 + count * _STL_TRIANGLE.size:
+            triangles = []
+            for values in _STL_TRIANGLE.iter_unpack(data[_STL_HEADER + 4:]):
+                triangles.append((values[3:6], values[6:9], values[9:12]))
+            return triangles
+    # ASCII: "vertex x y z" lines, three per facet
+    vertices = []
+    for line in data.decode("ascii", errors="replace").splitlines():
+        words = line.split()
+        if len(words) == 4 and words[0] == "vertex":
+            vertices.append(tuple(float(value) for value in words[1:]))
+    if not vertices or len(vertices) % 3:
+        raise ValueError("not an STL file")
+    return [tuple(vertices[i:i + 3]) for i in range(0, len(vertices), 3)]
+
+
+def _read_3mf(path) -> list:
+    with zipfile.ZipFile(path) as archive:
+        name = next((n for n in archive.namelist() if n.lower().endswith(".model")), None)
+        if name is None:
+            raise ValueError("no 3D model in the 3MF archive")
+        root = ElementTree.fromstring(archive.read(name))
+    ns = {"m": root.tag[1:].split("}")[0]} if root.tag.startswith("{") else {"m": ""}
+    meshes = {}
+    for obj in root.iterfind(".//m:resources/m:object", ns):
+        mesh = obj.find("m:mesh", ns)
+        if mesh is None:
+            continue
+        vertices = [(float(v.get("x")), float(v.get("y")), float(v.get("z")))
+                    for v in mesh.iterfind("m:vertices/m:vertex", ns)]
+        meshes[obj.get("id")] = [
+            (vertices[int(t.get("v1"))], vertices[int(t.get("v2"))], vertices[int(t.get("v3"))])
+            for t in mesh.iterfind("m:triangles/m:triangle", ns)
+        ]
+    triangles = []
+    for item in root.iterfind(".//m:build/m:item", ns):
+        m = [float(value) for value in (item.get("transform") or "1 0 0 0 1 0 0 0 1 0 0 0").split()]
+
+        def place(p):
+            x, y, z = p
+            return (x * m[0] + y * m[3] + z * m[6] + m[9],
+                    x * m[1] + y * m[4] + z * m[7] + m[10],
+                    x * m[2] + y * m[5] + z * m[8] + m[11])
+        triangles += [tuple(map(place, triangle)) for triangle in meshes.get(item.get("objectid"), [])]
+    if not triangles:
+        raise ValueError("the 3MF build has no mesh objects")
+    return triangles
+
+
+def read_mesh(path) -> list:
+    """Triangles of an STL or 3MF file (raises ValueError if it is neither, OSError if unreadable)."""
+    if str(path).lower().endswith(".3mf"):
+        try:
+            return _read_3mf(path)
+        except (zipfile.BadZipFile, ElementTree.ParseError, KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"not a usable 3MF file: {e}") from None
+    with open(path, "rb") as f:
+        return _read_stl(f.read())
+
+
+def bounds(triangles: list) -> tuple:
+    """((min x, min y, min z), (max x, max y, max z)) of a mesh."""
+    points = [p for triangle in triangles for p in triangle]
+    return (tuple(min(p[i] for p in points) for i in range(3)),
+            tuple(max(p[i] for p in points) for i in range(3)))
+
+
+def _facing_up(triangle) -> bool:
+    (ax, ay, az), (bx, by, bz), (cx, cy, cz) = triangle
+    ux, uy, uz, vx, vy, vz = bx - ax, by - ay, bz - az, cx - ax, cy - ay, cz - az
+    nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    return length > 0 and nz / length > _UP
+
+
+def _rasterize(triangles: list, cell: float) -> set:
+    """Grid cells (i, j) whose centres lie in any of the (flat) triangles."""
+    cells = set()
+    for a, b, c in triangles:
+        det = (b[1] - c[1]) * (a[0] - c[0]) + (c[0] - b[0]) * (a[1] - c[1])
+        if abs(det) < 1e-12:
+            continue
+        xs, ys = (a[0], b[0], c[0]), (a[1], b[1], c[1])
+        for i in range(math.floor(min(xs) / cell), math.ceil(max(xs) / cell)):
+            px = (i + 0.5) * cell
+            for j in range(math.floor(min(ys) / cell), math.ceil(max(ys) / cell)):
+                py = (j + 0.5) * cell
+                s = ((b[1] - c[1]) * (px - c[0]) + (c[0] - b[0]) * (py - c[1])) / det
+                t = ((c[1] - a[1]) * (px - c[0]) + (a[0] - c[0]) * (py - c[1])) / det
+                if s >= -1e-9 and t >= -1e-9 and s + t <= 1 + 1e-9:
+                    cells.add((i, j))
+    return cells
+
+
+def _bands(cells: set, width: float, cell: float) -> list:
+    """Bands of cells along the first axis: (start, end, low, high) in millimetres."""
+    rows = defaultdict(list)
+    for i, j in cells:
+        rows[j].append(i)
+    tolerance = _RUN_TOLERANCE / cell
+    done, growing = [], []
+    for j in sorted(rows):
+        xs = sorted(rows[j])
+        runs, start = [], xs[0]
+        for previous, x in zip(xs, xs[1:]):
+            if x != previous + 1:
+                runs.append((start, previous))
+                start = x
+        runs.append((start, xs[-1]))
+        extended = []
+        for run_start, run_end in runs:
+            if (run_end - run_start + 1) * cell < 3 * width:
+                continue
+            for band in growing:
+                if band[3] == j - 1 and abs(band[0] - run_start) <= tolerance and abs(band[1] - run_end) <= tolerance:
+                    band[:] = [max(band[0], run_start), min(band[1], run_end), band[2], j]
+                    extended.append(band)
+                    break
+            else:
+                extended.append([run_start, run_end, j, j])
+        done += [band for band in growing if band not in extended]
+        growing = extended
+    bands = []
+    for start, end, low, high in done + growing:
+        across, along = (high - low + 1) * cell, (end - start + 1) * cell
+        if 0.6 * width <= across <= 1.6 * width and along >= 4 * across:
+            bands.append((start * cell, (end + 1) * cell, low * cell, (high + 1) * cell))
+    return bands
+
+
+def strip_runs(triangles: list, strip_width: float = LAYOUT_STRIP_WIDTH, bed_z: float | None = None,
+               cell: float = LAYOUT_RASTER) -> tuple:
+    """(bed height, runs): the straight strip beds as ((x, y), (x, y)) centre lines.
+
+    Raises ValueError if no face at the bed height (or none at all) forms a
+    strip-wide band.
+    """
+    levels = defaultdict(list)
+    for triangle in triangles:
+        if _facing_up(triangle):
+            levels[round(sum(p[2] for p in triangle) / 3, 2)].append(triangle)
+    if bed_z is not None:
+        levels = {z: faces for z, faces in levels.items() if abs(z - bed_z) < 0.05}
+    best = (0.0, None, [])
+    for z, faces in levels.items():
+        cells = _rasterize(faces, cell)
+        runs = [((x0, (y0 + y1) / 2), (x1, (y0 + y1) / 2)) for x0, x1, y0, y1 in _bands(cells, strip_width, cell)]
+        transposed = {(j, i) for i, j in cells}
+        runs += [(((x0 + x1) / 2, y0), ((x0 + x1) / 2, y1))
+                 for y0, y1, x0, x1 in _bands(transposed, strip_width, cell)]
+        length = sum(math.dist(a, b) for a, b in runs)
+        if length > best[0]:
+            best = (length, z, runs)
+    if best[1] is None:
+        where = f" at z={bed_z:g}" if bed_z is not None else ""
+        raise ValueError(f"no straight {strip_width:g} mm wide strip bed found{where}")
+    return best[1], best[2]
+
+
+def chain(runs: list, start: tuple) -> list:
+    """The runs in strip order, each pointing onward: from the run end nearest start,
+    then always on to the nearest end of the runs left."""
+    left = list(runs)
+    ordered = []
+    position = start
+    while left:
+        run = min(left, key=lambda r: min(math.dist(position, r[0]), math.dist(position, r[1])))
+        left.remove(run)
+        if math.dist(position, run[1]) < math.dist(position, run[0]):
+            run = (run[1], run[0])
+        ordered.append(run)
+        position = run[1]
+    return ordered
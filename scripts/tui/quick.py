@@ -0,0 +1,250 @@
+"""
+Launcher quick switcher (installed as forgeworklights-quick)
+
+Switching theme or animation from a keybinding should not start the
+Textual app. This prints the same theme and animation lists the TUI shows,
+one item per line with a color swatch, for rofi/wofi/walker/dmenu/fzf,
+and applies the chosen line with the same control write the TUI makes.
+
+    forgeworklights-quick themes|animations [--format=plain|ansi|pango]
+    forgeworklights-quick theme|animation <line or key>    ('-' reads stdin)
+    forgeworklights-quick menu themes|animations [--launcher=NAME]
+
+Themes come from QUICK_LIST_PATH, which every write of led_themes.json
+refreshes (see themes_db.quick_list), so listing is reading one small text
+file: no Textual, no NumPy, no JSON, no gradient math. Only if the cache is
+missing or older than the database is it rebuilt here, once. The list also
+names each theme's swatch image (see tui.swatches), which rofi shows as the
+row icon. Everything the list path does not need is imported where it is
+used, to keep start-up to a few modules.
+"""
+import os
+import sys
+
+from .animations import ANIMATIONS
+from .constants import QUICK_LIST_PATH, THEME_SYMLINK, THEMES_DB_PATH
+
+MATCH_KEY = "match"
+MATCH_NAME = "Match Omarchy"
+FORMATS = ("plain", "ansi", "pango")
+
+# Launcher command line and the list format it renders
+LAUNCHERS = {
+    "walker": (["walker", "--dmenu", "--placeholder", "{prompt}"], "plain"),
+    "rofi": (["rofi", "-dmenu", "-i", "-markup-rows", "-show-icons", "-p", "{prompt}"], "pango"),
+    "wofi": (["wofi", "--dmenu", "--allow-markup", "--prompt", "{prompt}"], "pango"),
+    "dmenu": (["dmenu", "-i", "-p", "{prompt}"], "plain"),
+    "fzf": (["fzf", "--ansi", "--prompt", "{prompt}> "], "ansi"),
+}
+
+_SWATCH = "█"
+
+# Launchers that take a per-row icon, and how it is appended to the row
+_ICON_SUFFIX = {"rofi": "\0icon\x1f{icon}"}
+
+
+def _parse_list(text: str, stamp: str) -> list | None:
+    """(key, name, swatch, icon) rows of a cached list, or None unless it was built from stamp."""
+    header, _, body = text.partition("\n")
+    if header != stamp:
+        return None
+    rows = []
+    for line in body.splitlines():
+        key, name, colors, icon = line.split("\t")
+        rows.append((key, name, [colors[i:i + 7] for i in range(0, len(colors), 7)], icon))
+    return rows
+
+
+def load_themes() -> list:
+    """(key, name, swatch, icon) for every listed theme, from the cache (rebuilt if stale)."""
+    try:
+        st = os.stat(THEMES_DB_PATH)
+    except OSError:
+        return []
+    # Same stamp as utils.atomic_file.generation(), see themes_db.quick_list
+    stamp = f"#forgeworklights-quick-list 2 {st.st_ino} {st.st_mtime_ns} {st.st_size}"
+    try:
+        with open(QUICK_LIST_PATH, encoding="utf-8") as f:
+            rows = _parse_list(f.read(), stamp)
+        if rows is not None:
+            return rows
+    except (OSError, ValueError):
+        pass
+
+    # Missing or older than the database (e.g. edited by hand)
+    from . import themes_db
+    from .utils.atomic_file import atomic_write_text, read_json
+    db, db_gen = read_json(THEMES_DB_PATH)
+    if db_gen is None:
+        return []
+    text = themes_db.quick_list(db, db_gen, themes_db.sync_swatches(db))
+    try:
+        atomic_write_text(QUICK_LIST_PATH, text)
+    except OSError:
+        pass
+    return _parse_list(text, text.partition("\n")[0])
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def theme_items() -> list:
+    """(key, label, swatch, icon) for "Match Omarchy" and every listed theme."""
+    themes = load_themes()
+    try:
+        current = THEME_SYMLINK.resolve().name if THEME_SYMLINK.is_symlink() else None
+    except OSError:
+        current = None
+    match = next(((swatch, icon) for key, _name, swatch, icon in themes if key == current), ([], ""))
+    return [(MATCH_KEY, MATCH_NAME, *match), *themes]
+
+
+def animation_items() -> list:
+    return [(key, f"{info['name']}  {info['description']}", [], "") for key, info in ANIMATIONS.items()]
+
+
+def format_line(label: str, swatch: list, fmt: str) -> str:
+    if fmt == "ansi" and swatch:
+        cells = "".join(
+            f"\x1b[38;2;{int(c[1:3], 16)};{int(c[3:5], 16)};{int(c[5:7], 16)}m{_SWATCH}" for c in swatch
+        )
+        return f"{cells}\x1b[0m  {label}"
+    if fmt == "pango":
+        cells = "".join(f'<span foreground="{c}">{_SWATCH}</span>' for c in swatch)
+        return f"{cells}  {_escape(label)}" if cells else _escape(label)
+    return label
+
+
+def resolve(selection: str, items: list) -> str | None:
+    """Key of the item a launcher returned (a printed line in any format, a label or a key)."""
+    import html
+    import re
+    # Row options (rofi's "\0icon\x1f...") are not part of the label
+    text = re.sub(r"\x1b\[[0-9;]*m|<[^>]*>", "", selection.split("\0", 1)[0])
+    text = html.unescape(text).replace(_SWATCH, "").strip()
+    for key, label, _swatch, _icon in items:
+        if text == key or text == label:
+            return key
+    lowered = text.lower()
+    for key, label, _swatch, _icon in items:
+        if lowered == key.lower() or lowered == label.lower() or lowered == label.split("  ")[0].lower():
+            return key
+    return None
+
+
+def apply_theme(key: str) -> None:
+    """Same control write as the TUI's theme selection."""
+    from . import control
+    control.update(led_theme=key)
+
+
+def apply_animation(key: str) -> None:
+    """Same control write as the TUI's animation selection (stored parameters are kept)."""
+    from . import control
+    from .effects import LAYERED_ANIMATION, start_layered
+    control.update(animation=key)
+    if key == LAYERED_ANIMATION:
+        start_layered()
+
+
+def _list_kind(name: str):
+    if name in ("themes", "theme"):
+        return theme_items, apply_theme, "LED theme"
+    if name in ("animations", "animation"):
+        return animation_items, apply_animation, "Animation"
+    return None
+
+
+def _pick_launcher(name: str | None) -> str | None:
+    import shutil
+    if name:
+        return name if name in LAUNCHERS else None
+    for candidate in LAUNCHERS:
+        if candidate == "fzf" and not sys.stdin.isatty():
+            continue
+        if shutil.which(candidate):
+            return candidate
+    return None
+
+
+def _apply(items: list, apply, selection: str) -> int:
+    key = resolve(selection, items)
+    if key is None:
+        print(f"Unknown selection: {selection.strip()}", file=sys.stderr)
+        return 1
+    apply(key)
+    print(key)
+    return 0
+
+
+def usage() -> None:
+    print("Usage: forgeworklights-quick themes|animations [--format=plain|ansi|pango]")
+    print("       forgeworklights-quick theme|animation <line or key>   ('-' reads stdin)")
+    print("       forgeworklights-quick menu themes|animations [--launcher=NAME]")
+    print(f"Launchers: {', '.join(LAUNCHERS)} (first one installed by default)")
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    options = {}
+    for arg in list(args):
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            options[name] = value
+            args.remove(arg)
+    if not args or args[0] in ("-h", "--help"):
+        usage()
+        return 0 if args else 1
+
+    command, rest = args[0], args[1:]
+
+    if command == "menu":
+        kind = _list_kind(rest[0]) if rest else None
+        launcher = _pick_launcher(options.get("launcher"))
+        if kind is None or launcher is None:
+            print("Usage: forgeworklights-quick menu themes|animations [--launcher=NAME]", file=sys.stderr)
+            if launcher is None:
+                print(f"No launcher found (tried {', '.join(LAUNCHERS)})", file=sys.stderr)
+            return 1
+        import subprocess
+        items_of, apply, prompt = kind
+        items = items_of()
+        command_line, fmt = LAUNCHERS[launcher]
+        icon_suffix = _ICON_SUFFIX.get(launcher)
+        lines = "\n".join(
+            format_line(label, swatch, fmt) + (icon_suffix.format(icon=icon) if icon_suffix and icon else "")
+            for _key, label, swatch, icon in items
+        ) + "\n"
+        result = subprocess.run(
+            [part.format(prompt=prompt) for part in command_line],
+            input=lines, capture_output=True, text=True,
+        )
+        if result.returncode != 0 or not result.stdout.strip():
+            return 1  # cancelled
+        return _apply(items, apply, result.stdout.splitlines()[0])
+
+    kind = _list_kind(command)
+    if kind is None:
+        usage()
+        return 1
+    items_of, apply, _prompt = kind
+    items = items_of()
+
+    if command in ("themes", "animations"):
+        fmt = options.get("format", "plain")
+        if fmt not in FORMATS:
+            print(f"Unknown format {fmt!r} (choose from {', '.join(FORMATS)})", file=sys.stderr)
+            return 1
+        try:
+            sys.stdout.write("\n".join(format_line(label, swatch, fmt) for _key, label, swatch, _icon in items) + "\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            pass
+        return 0
+
+    # theme / animation <selection>
+    selection = " ".join(rest)
+    if selection in ("", "-"):
+        selection = sys.stdin.readline()
+    return _apply(items, apply, selection)
@@ -0,0 +1,309 @@
+"""
+Resident TUI: `forgeworklights-menu --server` keeps one fully started app
+warm in the background, and `forgeworklights-menu` attaches to it
+
+A cold start imports Textual and every widget, parses the theme databases,
+builds the CSS and composes every panel before the first frame. The server
+does that once: the app runs on a pseudo-terminal it owns, and a client -
+nothing but this module and the standard library - connects over a Unix
+socket (MENU_SOCKET) and relays its terminal to that pty. On attach the
+app re-enters application mode on the new terminal and repaints, so the
+window has content after one round trip instead of a full start-up.
+The server sends the terminal setup Textual did once at start-up (alt
+screen, mouse, keyboard protocol) to each new client, then the app
+repaints the whole screen.
+
+Closing the window (or quitting with Ctrl+Q) only detaches; the app keeps
+running for the next click. A new client takes over from an attached one.
+Stop the server with SIGTERM.
+
+Client -> server messages are framed as a 1-byte type and a 4-byte length:
+b"i" carries terminal input, b"w" the terminal size (rows, columns).
+Server -> client is the raw terminal output.
+"""
+import fcntl
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+import termios
+import threading
+import tty
+
+from .constants import MENU_SOCKET, RESIDENT_SIZE
+
+_FRAME = struct.Struct(">cI")
+_WINSIZE = struct.Struct("HHHH")  # rows, columns, x pixels, y pixels (struct winsize)
+_READ_SIZE = 64 * 1024
+_SEND_TIMEOUT = 5.0  # seconds; a client that stops reading is dropped
+
+# Modes Textual's Linux driver turns on when entering application mode;
+# replayed to every client, since the app only did it once for the pty
+_TERMINAL_SETUP = (
+    "\x1b[?1049h"                                # alt screen
+    "\x1b[?1000h\x1b[?1003h\x1b[?1015h\x1b[?1006h"  # mouse
+    "\x1b[?25l\x1b[?1004h\x1b[>1u"               # cursor, focus, kitty keyboard protocol
+    "\x1b[?2004h\x1b[?7l"                        # bracketed paste, no line wrap
+).encode()
+
+# ...and undone when a client leaves, so the terminal is usable again if
+# the client ran in an existing one
+_TERMINAL_RESET = (
+    "\x1b[<u"                                    # kitty keyboard protocol
+    "\x1b[?1000l\x1b[?1003l\x1b[?1015l\x1b[?1006l\x1b[?1016l"  # mouse
+    "\x1b[?2004l\x1b[?1004l\x1b[?2048l"          # paste, focus, in-band resize
+    "\x1b[?7h\x1b[?1049l\x1b[?25h"               # line wrap, alt screen, cursor
+).encode()
+
+
+# Server log; serve() points it at the original stderr before the pty takes fd 2
+_log_stream = sys.stderr
+
+
+def _log(message: str) -> None:
+    print(f"[resident] {message}", file=_log_stream, flush=True)
+
+
+def _frame(kind: bytes, payload: bytes) -> bytes:
+    return _FRAME.pack(kind, len(payload)) + payload
+
+
+def _terminal_size(fd: int) -> tuple[int, int]:
+    try:
+        size = os.get_terminal_size(fd)
+        return size.lines, size.columns
+    except OSError:
+        return RESIDENT_SIZE
+
+
+def _connect(path=MENU_SOCKET) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+    try:
+        sock.connect(os.fspath(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+# --- Client ---
+
+def attach(path=MENU_SOCKET) -> int | None:
+    """Attach this terminal to a running server; None if there is none.
+
+    Returns once the server detaches the client (Ctrl+Q, another client
+    taking over, server exit) or the terminal goes away.
+    """
+    if not (os.isatty(0) and os.isatty(1)):
+        return None
+    sock = _connect(path)
+    if sock is None:
+        return None
+
+    stdin, stdout = 0, 1
+    saved = termios.tcgetattr(stdin)
+    wake_r, wake_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    old_wakeup = signal.set_wakeup_fd(wake_w)
+    # The handler only has to exist; the wakeup fd reports the signal
+    old_winch = signal.signal(signal.SIGWINCH, lambda *_: None)
+    selector = selectors.DefaultSelector()
+    try:
+        tty.setraw(stdin)
+        sock.sendall(_frame(b"w", struct.pack(">HH", *_terminal_size(stdout))))
+        selector.register(stdin, selectors.EVENT_READ)
+        selector.register(sock, selectors.EVENT_READ)
+        selector.register(wake_r, selectors.EVENT_READ)
+        while True:
+            for key, _ in selector.select():
+                if key.fileobj is sock:
+                    data = sock.recv(_READ_SIZE)
+                    if not data:
+                        return 0
+                    os.write(stdout, data)
+                elif key.fileobj == stdin:
+                    data = os.read(stdin, _READ_SIZE)
+                    if not data:
+                        return 0
+                    sock.sendall(_frame(b"i", data))
+                else:
+                    while os.read(wake_r, 64) == 64:
+                        pass
+                    sock.sendall(_frame(b"w", struct.pack(">HH", *_terminal_size(stdout))))
+    except (OSError, BlockingIOError):
+        # Server went away or the terminal closed
+        return 0
+    finally:
+        selector.close()
+        signal.signal(signal.SIGWINCH, old_winch)
+        signal.set_wakeup_fd(old_wakeup)
+        os.close(wake_r)
+        os.close(wake_w)
+        sock.close()
+        try:
+            termios.tcsetattr(stdin, termios.TCSADRAIN, saved)
+            os.write(stdout, _TERMINAL_RESET)
+        except OSError:
+            pass
+
+
+# --- Server ---
+
+class ResidentServer:
+    """Runs the app on a private pty and relays it to one client at a time."""
+
+    def __init__(self, path=MENU_SOCKET):
+        self.path = path
+        self.app = None
+        self._listener = None
+        self._master = None
+        self._client = None
+        self._pending = b""
+        self._sized = False
+        self._lock = threading.Lock()
+
+    # Called from the app (any thread)
+    def detach(self) -> None:
+        """Disconnect the attached client; the app keeps running."""
+        with self._lock:
+            client = self._client
+        if client is not None:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    @property
+    def attached(self) -> bool:
+        return self._client is not None
+
+    def serve(self) -> int:
+        global _log_stream
+        if _connect(self.path) is not None:
+            _log(f"already running on {self.path}")
+            return 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.path.unlink()  # stale socket from a server that was killed
+        except FileNotFoundError:
+            pass
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        old_umask = os.umask(0o077)
+        try:
+            self._listener.bind(os.fspath(self.path))
+        finally:
+            os.umask(old_umask)
+        self._listener.listen(4)
+
+        # The app's terminal: a pty sized like the floating window until a
+        # client reports its real size. Logging keeps going to the original stderr.
+        self._master, slave = os.openpty()
+        os.set_blocking(self._master, True)
+        self._set_size(*RESIDENT_SIZE)
+        log_fd = os.dup(2)
+        for fd in (0, 1, 2):
+            os.dup2(slave, fd)
+        os.close(slave)
+        sys.stderr = _log_stream = open(log_fd, "w", buffering=1, closefd=True)
+        os.environ.setdefault("TERM", "xterm-256color")
+        os.environ.setdefault("COLORTERM", "truecolor")
+
+        from .app import ForgeworkLightsTUI
+        self.app = ForgeworkLightsTUI(resident=self)
+        signal.signal(signal.SIGTERM, lambda *_: self.app.exit())
+        threading.Thread(target=self._relay, name="resident-relay", daemon=True).start()
+        _log(f"serving on {self.path}")
+        try:
+            self.app.run()
+        finally:
+            self._listener.close()
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+        _log("stopped")
+        return 0
+
+    def _set_size(self, rows: int, columns: int) -> None:
+        fcntl.ioctl(self._master, termios.TIOCSWINSZ, _WINSIZE.pack(rows, columns, 0, 0))
+
+    def _relay(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self._listener, selectors.EVENT_READ)
+        selector.register(self._master, selectors.EVENT_READ)
+        while True:
+            for key, _ in selector.select():
+                try:
+                    if key.fileobj is self._listener:
+                        self._accept(selector)
+                    elif key.fileobj == self._master:
+                        # Output is drained even while detached so the app never blocks
+                        data = os.read(self._master, _READ_SIZE)
+                        if self._client is not None:
+                            try:
+                                self._client.sendall(data)
+                            except OSError:
+                                self._drop(selector)
+                    elif key.fileobj is self._client:
+                        self._receive(selector)
+                except OSError as e:
+                    if key.fileobj == self._master:
+                        return  # app exited and closed the pty
+                    _log(f"relay error: {e}")
+
+    def _accept(self, selector) -> None:
+        client, _ = self._listener.accept()
+        client.settimeout(_SEND_TIMEOUT)
+        if self._client is not None:
+            _log("new client; detaching the previous one")
+            self._drop(selector)
+        with self._lock:
+            self._client = client
+        self._pending = b""
+        self._sized = False
+        selector.register(client, selectors.EVENT_READ)
+
+    def _drop(self, selector) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is None:
+            return
+        selector.unregister(client)
+        client.close()
+        self.app.post_message(self.app.ClientDetached())
+
+    def _receive(self, selector) -> None:
+        try:
+            data = self._client.recv(_READ_SIZE)
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(selector)
+            return
+        self._pending += data
+        while len(self._pending) >= _FRAME.size:
+            kind, length = _FRAME.unpack_from(self._pending)
+            if len(self._pending) < _FRAME.size + length:
+                break
+            payload = self._pending[_FRAME.size:_FRAME.size + length]
+            self._pending = self._pending[_FRAME.size + length:]
+            if kind == b"i":
+                os.write(self._master, payload)
+            elif kind == b"w" and length == 4:
+                self._resize(*struct.unpack(">HH", payload))
+
+    def _resize(self, rows: int, columns: int) -> None:
+        self._set_size(rows, columns)
+        # The pty is not our controlling terminal, so deliver SIGWINCH ourselves
+        os.kill(os.getpid(), signal.SIGWINCH)
+        if not self._sized:
+            # First size report: the client just attached and needs the
+            # terminal modes plus a full repaint
+            self._sized = True
+            self._client.sendall(_TERMINAL_SETUP)
+            self.app.post_message(self.app.ClientAttached())
+
+
+def serve() -> int:
+    return ResidentServer().serve()
@@ -0,0 +1,508 @@
+"""
+Time-of-day scheduler (installed as forgeworklights-schedule)
+
+    forgeworklights-schedule [--schedule=FILE] [--dry-run]
+    forgeworklights-schedule list [--date=YYYY-MM-DD] [--days=N] [--schedule=FILE]
+    forgeworklights-schedule scene [--at="YYYY-MM-DD HH:MM"] [--schedule=FILE]
+
+Changes the LED theme, brightness and color temperature at times of day
+by the rules in SCHEDULE_FILE:
+
+    fade = 60                 # seconds each change crossfades over
+    latitude = 52.5           # for sunrise and sunset
+    longitude = 13.4
+
+    [[rules]]
+    at = "07:30"
+    theme = "match"
+    brightness = 1.0
+    temperature = 6500        # kelvin; 6500 leaves colors as they are
+
+    [[rules]]
+    at = "sunset"             # or "sunrise", offset like "sunset-30m" or "sunrise+1h"
+    theme = "nord"
+    temperature = 3400
+    fade = 600                # this rule only
+
+    [[rules]]
+    at = "23:00"
+    brightness = "20%"
+
+A rule holds from its time until the next rule that sets the same setting,
+around the clock; settings no rule sets are left alone, and rules due at
+the same time apply in file order.
+
+Every change is a crossfade. Its frames - the old and new theme gradients,
+brightness and white point blended at each step - are computed once, into
+one bytearray (see Crossfade), and played through the effect ring (see
+tui.effects) with the daemon on the "external" animation; then the new
+settings are written in one control.update, and the daemon's own frame
+matches the last one played. The daemon is held at the brighter of the two
+brightnesses meanwhile and each frame is scaled down to its own (through
+the daemon's gamma). Animations other than static pause for the fade. When
+another effect or the layered compositor owns the ring, a theme preview is
+showing or the fade is 0, the settings are written directly. Selecting
+"layered" starts its compositor (see tui.effects.start_layered).
+
+Between changes the process sleeps until the next rule is due - on a
+CLOCK_REALTIME timerfd where Python has one (3.13+), which also wakes on
+clock changes and after suspend, else on a select timeout - or until
+inotify reports that the schedule file changed; it is then re-read and
+the settings it asks for now are faded to. Nothing polls.
+"""
+import errno
+import math
+import os
+import re
+import select
+import signal
+import sys
+import time
+import tomllib
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from .constants import (
+    EFFECT_FPS,
+    MIN_TEMPERATURE,
+    NEUTRAL_TEMPERATURE,
+    SCHEDULE_FADE,
+    SCHEDULE_FILE,
+    SCHEDULE_MAX_FRAMES,
+    SCHEDULE_MIN_FPS,
+)
+from . import control
+from .utils import atomic_file
+from .utils.colors import white_point_gains
+
+# Rule keys and the control settings they set
+SETTINGS = {"theme": "led_theme", "brightness": "brightness", "temperature": "temperature"}
+
+_CLOCK_TIME = re.compile(r"(\d{1,2}):(\d{2})")
+_SUN_TIME = re.compile(r"(sunrise|sunset)(?:\s*([+-])\s*(?:(\d+)h)?\s*(?:(\d+)m)?)?")
+
+
+def sun_times(day: date, latitude: float, longitude: float) -> tuple:
+    """(sunrise, sunset) on day as UTC datetimes; (None, None) on polar days and nights.
+
+    The sunrise equation at the usual -0.833 degree altitude (refraction and
+    the sun's disc), good to a minute or two outside the polar regions.
+    """
+    mean_noon = day.toordinal() - date(2000, 1, 1).toordinal() + 0.0008 - longitude / 360
+    anomaly = math.radians((357.5291 + 0.98560028 * mean_noon) % 360)
+    center = 1.9148 * math.sin(anomaly) + 0.02 * math.sin(2 * anomaly) + 0.0003 * math.sin(3 * anomaly)
+    ecliptic = math.radians((math.degrees(anomaly) + center + 180 + 102.9372) % 360)
+    transit = 2451545.0 + mean_noon + 0.0053 * math.sin(anomaly) - 0.0069 * math.sin(2 * ecliptic)
+    declination = math.asin(math.sin(ecliptic) * math.sin(math.radians(23.4397)))
+    phi = math.radians(latitude)
+    cos_hour = ((math.sin(math.radians(-0.833)) - math.sin(phi) * math.sin(declination))
+                / (math.cos(phi) * math.cos(declination)))
+    if not -1.0 <= cos_hour <= 1.0:
+        return None, None
+    half_day = math.degrees(math.acos(cos_hour)) / 360
+
+    def from_julian(day_number):
+        return datetime.fromtimestamp((day_number - 2440587.5) * 86400, timezone.utc)
+
+    return from_julian(transit - half_day), from_julian(transit + half_day)
+
+
+def _brightness(value) -> float:
+    if isinstance(value, str) and value.strip().endswith("%"):
+        value = float(value.strip()[:-1]) / 100
+    value = float(value)
+    if not 0.0 <= value <= 1.0:
+        raise ValueError(f"brightness {value:g} is not between 0 and 1 (or 0% and 100%)")
+    return value
+
+
+def _temperature(value) -> float:
+    value = float(value)
+    if not MIN_TEMPERATURE <= value <= NEUTRAL_TEMPERATURE:
+        raise ValueError(f"temperature {value:g} is not between {MIN_TEMPERATURE} and {NEUTRAL_TEMPERATURE} K")
+    return value
+
+
+class Rule:
+    """One [[rules]] entry: when it is due and the control settings it sets."""
+
+    __slots__ = ("at", "settings", "fade", "_clock", "_sun")
+
+    def __init__(self, at: str, settings: dict, fade: float):
+        self.at = at
+        self.settings = settings
+        self.fade = fade
+        self._clock = self._sun = None
+        if match := _CLOCK_TIME.fullmatch(at):
+            hour, minute = int(match[1]), int(match[2])
+            if hour > 23 or minute > 59:
+                raise ValueError(f"no such time {at!r}")
+            self._clock = (hour, minute)
+        elif match := _SUN_TIME.fullmatch(at):
+            if match[2] and not (match[3] or match[4]):
+                raise ValueError(f"offset without hours or minutes in {at!r}")
+            offset = timedelta(hours=int(match[3] or 0), minutes=int(match[4] or 0))
+            self._sun = (match[1], -offset if match[2] == "-" else offset)
+        else:
+            raise ValueError(f"'at' must be HH:MM, sunrise or sunset, not {at!r}")
+
+    @property
+    def solar(self) -> bool:
+        return self._sun is not None
+
+    def when(self, day: date, latitude: float | None, longitude: float | None) -> datetime | None:
+        """Local time the rule is due on day; None if it is not (the sun does not set)."""
+        if self._clock is not None:
+            # Naive local time; astimezone() settles DST gaps and overlaps
+            return datetime(day.year, day.month, day.day, *self._clock).astimezone()
+        event, offset = self._sun
+        sunrise, sunset = sun_times(day, latitude, longitude)
+        moment = sunrise if event == "sunrise" else sunset
+        return None if moment is None else (moment + offset).astimezone()
+
+
+class Schedule:
+    """Parsed schedule (see the module docstring for the file format)."""
+
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        self.fade = max(0.0, float(data.get("fade", SCHEDULE_FADE)))
+        self.latitude = float(data["latitude"]) if "latitude" in data else None
+        self.longitude = float(data["longitude"]) if "longitude" in data else None
+        self.rules = []
+        for index, table in enumerate(data.get("rules", [])):
+            where = f"rule {index + 1}"
+            try:
+                rule = self._rule(table)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[schedule] {where}: {e}", file=sys.stderr)
+                continue
+            if rule.solar and (self.latitude is None or self.longitude is None):
+                print(f"[schedule] {where}: {rule.at} needs latitude and longitude", file=sys.stderr)
+            elif not rule.settings:
+                print(f"[schedule] {where}: sets nothing (theme, brightness or temperature)", file=sys.stderr)
+            else:
+                self.rules.append(rule)
+
+    def _rule(self, table: dict) -> Rule:
+        settings = {}
+        if table.get("theme") is not None:
+            settings["led_theme"] = str(table["theme"])
+        if table.get("brightness") is not None:
+            settings["brightness"] = _brightness(table["brightness"])
+        if table.get("temperature") is not None:
+            settings["temperature"] = _temperature(table["temperature"])
+        fade = max(0.0, float(table.get("fade", self.fade)))
+        return Rule(str(table["at"]).strip().lower(), settings, fade)
+
+    @classmethod
+    def load(cls, path: Path = SCHEDULE_FILE) -> "Schedule":
+        """Schedule from path; empty if it is missing, with a message if it does not parse."""
+        try:
+            with open(path, "rb") as f:
+                return cls(tomllib.load(f))
+        except FileNotFoundError:
+            return cls()
+        except (OSError, tomllib.TOMLDecodeError, TypeError, ValueError) as e:
+            print(f"[schedule] {path}: {e}", file=sys.stderr)
+            return cls()
+
+    def events(self, first: date, days: int) -> list:
+        """(local time, rule) for every rule due on the days from first, in order."""
+        events = []
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            for index, rule in enumerate(self.rules):
+                when = rule.when(day, self.latitude, self.longitude)
+                if when is not None:
+                    events.append((when, index, rule))
+        events.sort(key=lambda event: (event[0], event[1]))
+        return [(when, rule) for when, _index, rule in events]
+
+    def scene(self, now: datetime) -> dict:
+        """The settings the rules ask for at now (only those some rule sets)."""
+        settings = {}
+        # Two days back covers every daily rule; sun rules may skip polar days
+        for when, rule in self.events(now.date() - timedelta(days=2), 3):
+            if when > now:
+                break
+            settings.update(rule.settings)
+        return {key: settings[key] for key in SETTINGS.values() if key in settings}
+
+    def next_change(self, now: datetime) -> tuple | None:
+        """(time, fade) of the first rules due after now; None without rules."""
+        upcoming = [(when, rule) for when, rule in self.events(now.date(), 3) if when > now]
+        if not upcoming:
+            return None
+        when = upcoming[0][0]
+        return when, max(rule.fade for due, rule in upcoming if due == when)
+
+
+def _ease(t: float) -> float:
+    """Smoothstep: a crossfade starts and ends gently."""
+    return t * t * (3.0 - 2.0 * t)
+
+
+class Crossfade:
+    """Every frame of a change between two settings, computed up front.
+
+    frames holds count frames of len(start_gradient) bytes back to back;
+    frame i blends the gradients, brightness and white point (in mireds) at
+    eased progress i / (count - 1). The daemon is held at self.brightness
+    during playback, so each frame is scaled to its own brightness relative
+    to that, undoing the daemon's gamma on the way.
+    """
+
+    def __init__(self, start_gradient: bytes, end_gradient: bytes, start: dict, end: dict,
+                 duration: float, gamma: float = 1.0):
+        size = self.frame_size = len(start_gradient)
+        # 30 FPS up to SCHEDULE_MAX_FRAMES; longer fades slow down, but not below SCHEDULE_MIN_FPS
+        self.count = max(2, min(round(duration * EFFECT_FPS),
+                                max(SCHEDULE_MAX_FRAMES, math.ceil(duration * SCHEDULE_MIN_FPS) + 1)))
+        self.fps = (self.count - 1) / duration
+        self.brightness = max(start["brightness"], end["brightness"])
+        start_mired, end_mired = 1e6 / start["temperature"], 1e6 / end["temperature"]
+        pairs = [(a, b, i % 3) for i, (a, b) in enumerate(zip(start_gradient, end_gradient))]
+        frames = self.frames = bytearray(self.count * size)
+        for index in range(self.count):
+            t = _ease(index / (self.count - 1))
+            level = start["brightness"] + (end["brightness"] - start["brightness"]) * t
+            scale = (level / self.brightness) ** (1.0 / gamma) if self.brightness > 0 else 0.0
+            gains = white_point_gains(1e6 / (start_mired + (end_mired - start_mired) * t))
+            factors = [gain * scale for gain in gains]
+            offset = index * size
+            frames[offset:offset + size] = bytes(
+                min(255, int((a + (b - a) * t) * factors[channel] + 0.5)) for a, b, channel in pairs
+            )
+        self._view = memoryview(frames)
+
+    def frame(self, index: int) -> memoryview:
+        offset = index * self.frame_size
+        return self._view[offset:offset + self.frame_size]
+
+
+def crossfade(state: dict, changes: dict, duration: float) -> None:
+    """Play a Crossfade from state to state + changes, then write the changes.
+
+    The settings are written even if playback is interrupted (SIGTERM), so
+    the strip never stays on a half-finished fade.
+    """
+    from . import themes_db
+    from .effects import EXTERNAL_ANIMATION, LAYERED_ANIMATION, run, start_layered
+    from .effects.thermal import theme_gradient
+
+    led_count = themes_db.led_count()
+    end = {**state, **changes}
+    fade = Crossfade(theme_gradient(led_count, state), theme_gradient(led_count, end), state, end,
+                     duration, themes_db.gamma_exponent())
+    previous = state["animation"]
+
+    def frames(_led_count):
+        yield fade.frame(0)
+        # The first frame is in the ring before the daemon switches over to it
+        control.update(animation=EXTERNAL_ANIMATION, brightness=fade.brightness, temperature=NEUTRAL_TEMPERATURE)
+        for index in range(1, fade.count):
+            yield fade.frame(index)
+
+    try:
+        run(frames, fade.fps, led_count, select=False)
+    finally:
+        final = dict(changes, brightness=end["brightness"], temperature=end["temperature"])
+        # Only if nobody picked another animation in the meantime
+        if control.read_state()["animation"] == EXTERNAL_ANIMATION:
+            final["animation"] = previous
+        control.update(**final)
+        if final.get("animation") == LAYERED_ANIMATION:
+            start_layered()
+
+
+class Alarm:
+    """Sleeps until a wall-clock time or until one of some files is readable.
+
+    A CLOCK_REALTIME timerfd (Python 3.13+) fires at the right time across
+    suspend and reports clock changes; without one, a select timeout is used.
+    """
+
+    def __init__(self):
+        self.fd = None
+        if hasattr(os, "timerfd_create"):
+            self.fd = os.timerfd_create(time.CLOCK_REALTIME, flags=os.TFD_NONBLOCK | os.TFD_CLOEXEC)
+
+    def wait(self, files: list, deadline: datetime | None) -> tuple:
+        """(the readable files, whether the clock was changed)."""
+        if self.fd is None:
+            timeout = None if deadline is None else max(0.0, deadline.timestamp() - time.time())
+            readable, _, _ = select.select(files, [], [], timeout)
+            return readable, False
+        if deadline is None:
+            os.timerfd_settime(self.fd, initial=0)  # disarmed
+        else:
+            os.timerfd_settime(self.fd, flags=os.TFD_TIMER_ABSTIME | os.TFD_TIMER_CANCEL_ON_SET,
+                               initial=max(deadline.timestamp(), 1e-9))
+        readable, _, _ = select.select(files + [self.fd], [], [])
+        clock_changed = False
+        if self.fd in readable:
+            readable.remove(self.fd)
+            try:
+                os.read(self.fd, 8)
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                clock_changed = e.errno == errno.ECANCELED
+        return readable, clock_changed
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def _now() -> datetime:
+    return datetime.now().astimezone()
+
+
+def _describe(settings: dict) -> str:
+    return " ".join(f"{key}={value:g}" if isinstance(value, float) else f"{key}={value}"
+                    for key, value in settings.items())
+
+
+class Scheduler:
+    """Moves the control state to what the schedule asks for, crossfading."""
+
+    def __init__(self, path: Path = SCHEDULE_FILE, dry_run: bool = False, out=sys.stdout):
+        self.path = path
+        self.generation = atomic_file.generation(path)
+        self.schedule = Schedule.load(path)
+        self.dry_run = dry_run
+        self.out = out
+        self._simulated = None  # dry-run state
+
+    def reload(self) -> bool:
+        """Re-read the schedule if the file changed; True if it did."""
+        generation = atomic_file.generation(self.path)
+        if generation == self.generation:
+            return False
+        self.generation = generation
+        self.schedule = Schedule.load(self.path)
+        return True
+
+    def _state(self) -> dict:
+        if not self.dry_run:
+            return control.read_state()
+        if self._simulated is None:
+            self._simulated = control.read_state()
+        return self._simulated
+
+    def apply(self, settings: dict, fade: float, label: str) -> None:
+        """Move to settings, crossfading over fade seconds where possible."""
+        from .effects import EXTERNAL_ANIMATION, LAYERED_ANIMATION, start_layered
+
+        state = self._state()
+        changes = {key: value for key, value in settings.items() if state[key] != value}
+        if not changes:
+            return
+        if self.dry_run:
+            print(f"{label}: {_describe(changes)} (fade {fade:g}s)", file=self.out, flush=True)
+            state.update(changes)
+            return
+        if state["led_theme"] == control.PREVIEW_THEME:
+            # The theme creator restores its own theme when the preview ends
+            changes.pop("led_theme", None)
+        elif fade > 0 and state["animation"] not in (EXTERNAL_ANIMATION, LAYERED_ANIMATION):
+            # A ring-fed animation keeps its producer; the crossfade would take the ring from it
+            crossfade(state, changes, fade)
+            return
+        if changes:
+            control.update(**changes)
+            if changes.get("animation") == LAYERED_ANIMATION:
+                start_layered()
+
+    def run(self) -> None:
+        """Apply the current settings, then follow the schedule until stopped."""
+        from .watcher import Watcher
+
+        self.apply(self.schedule.scene(_now()), self.schedule.fade, "start")
+        try:
+            watcher = Watcher()
+            watcher.add(self.path.parent)
+        except OSError as e:
+            print(f"[schedule] not following changes to {self.path}: {e}", file=sys.stderr)
+            watcher = None
+        alarm = Alarm()
+        try:
+            while True:
+                change = self.schedule.next_change(_now())
+                if change is None and watcher is None:
+                    return
+                readable, clock_changed = alarm.wait([watcher] if watcher else [], change and change[0])
+                reloaded = False
+                if readable and any(name == self.path.name for _wd, _mask, name in watcher.read(0)):
+                    reloaded = self.reload()
+                now = _now()
+                if reloaded or clock_changed:
+                    self.apply(self.schedule.scene(now), self.schedule.fade, "reloaded" if reloaded else "clock")
+                elif change is not None and now >= change[0]:
+                    self.apply(self.schedule.scene(now), change[1], f"{change[0]:%H:%M}")
+        finally:
+            alarm.close()
+            if watcher is not None:
+                watcher.close()
+
+
+def list_events(schedule: Schedule, first: date, days: int, out=sys.stdout) -> None:
+    for when, rule in schedule.events(first, days):
+        print(f"{when:%Y-%m-%d %H:%M}  {rule.at:<14} {_describe(rule.settings)} (fade {rule.fade:g}s)", file=out)
+
+
+def usage() -> None:
+    print("Usage: forgeworklights-schedule [--schedule=FILE] [--dry-run]")
+    print("       forgeworklights-schedule list [--date=YYYY-MM-DD] [--days=N] [--schedule=FILE]")
+    print('       forgeworklights-schedule scene [--at="YYYY-MM-DD HH:MM"] [--schedule=FILE]')
+    print(f"Changes theme, brightness and color temperature by the time of day, as set in {SCHEDULE_FILE}.")
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if any(arg in ("-h", "--help") for arg in args):
+        usage()
+        return 0
+    options = {}
+    positional = []
+    for arg in args:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+        else:
+            positional.append(arg)
+    path = Path(options.get("schedule") or SCHEDULE_FILE)
+
+    try:
+        if positional == ["list"]:
+            first = date.fromisoformat(options["date"]) if options.get("date") else _now().date()
+            list_events(Schedule.load(path), first, int(options.get("days") or 1))
+            return 0
+        if positional == ["scene"]:
+            at = datetime.fromisoformat(options["at"]).astimezone() if options.get("at") else _now()
+            print(_describe(Schedule.load(path).scene(at)))
+            return 0
+    except ValueError as e:
+        print(f"[schedule] {e}", file=sys.stderr)
+        return 1
+    if positional:
+        usage()
+        return 1
+
+    scheduler = Scheduler(path, dry_run="dry-run" in options)
+
+    def stop(*_):
+        raise KeyboardInterrupt
+    # Stopped with SIGTERM (session end): unwind, so a fade in progress is finished
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"[schedule] {e}", file=sys.stderr)
+        return 1
+    return 0
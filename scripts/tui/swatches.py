@@ -0,0 +1,169 @@
+"""
+Theme swatch images: each theme's gradient as a small PNG
+
+Launchers (rofi's row icons), notifications and anything else that wants a
+picture of a theme read these instead of drawing the gradient themselves.
+Files live in SWATCH_DIR and are content-addressed: the name is a hash of
+the expanded color list (and the image size), so a theme that did not
+change maps to a file that already exists, an edited one to a new file,
+and themes that share a gradient share an image.
+
+sync() runs with every write of led_themes.json (see themes_db.write_packed):
+it renders only the gradients that have no file yet, in parallel, and
+marks the ones it found as used. The directory is a cache, not a store -
+once it grows past SWATCH_CACHE_LIMIT the least recently used images are
+deleted, and anything deleted is simply rendered again when next needed.
+
+PNGs are encoded here with zlib; there is no imaging dependency.
+"""
+import hashlib
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .constants import SWATCH_CACHE_LIMIT, SWATCH_DIR, SWATCH_IMAGE_SIZE
+from . import themes_db
+from .utils.atomic_file import atomic_write_bytes
+from .utils.colors import hex_to_rgb
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Images found on disk (hits), rendered (misses) and evicted by this process
+_counts = {"hits": 0, "misses": 0, "evicted": 0}
+
+
+def _chunk(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def encode_png(width: int, height: int, rgb_rows: list) -> bytes:
+    """8-bit RGB PNG from height rows of width * 3 bytes each."""
+    # Filter type 0 (none) before every scanline
+    raw = b"".join(b"\x00" + bytes(row) for row in rgb_rows)
+    return (
+        _PNG_SIGNATURE
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(raw, 9))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def render(colors: list, height: int = SWATCH_IMAGE_SIZE[1]) -> bytes:
+    """PNG of a gradient: one pixel column per color, height rows tall."""
+    row = bytearray()
+    for color in colors:
+        row += bytes(hex_to_rgb(color))
+    return encode_png(len(colors), height, [row] * height)
+
+
+def digest(colors: list, size: tuple = SWATCH_IMAGE_SIZE) -> str:
+    """Cache key of a gradient rendered at size."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(f"{size[0]}x{size[1]}:".encode())
+    h.update("".join(colors).encode())
+    return h.hexdigest()
+
+
+def path_for(colors: list, size: tuple = SWATCH_IMAGE_SIZE) -> Path:
+    return SWATCH_DIR / f"{digest(colors, size)}.png"
+
+
+def _touch(path: Path) -> bool:
+    """Mark path as just used; False if it does not exist."""
+    try:
+        os.utime(path)
+    except OSError:
+        _counts["misses"] += 1
+        return False
+    _counts["hits"] += 1
+    return True
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of the image cache (for tui.diagnostics)."""
+    return dict(_counts)
+
+
+def _write(path: Path, colors: list, height: int) -> None:
+    atomic_write_bytes(path, render(colors, height))
+
+
+def sync(themes: list, size: tuple = SWATCH_IMAGE_SIZE) -> dict:
+    """Swatch images for Theme records, keyed by theme key; renders what is missing.
+
+    Themes without control points get no image. Existing files are only
+    touched, so they count as recently used when the cache is trimmed.
+    """
+    themes = [theme for theme in themes if theme.count]
+    gradients = themes_db.gradients(themes, size[0])
+    paths = {}
+    missing = {}
+    for theme, colors in zip(themes, gradients):
+        path = path_for(colors, size)
+        paths[theme.key] = path
+        if path not in missing and not _touch(path):
+            missing[path] = colors
+
+    if missing:
+        SWATCH_DIR.mkdir(parents=True, exist_ok=True)
+        # zlib and the file writes release the GIL, so threads render in parallel
+        with ThreadPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as pool:
+            for future in [pool.submit(_write, path, colors, size[1]) for path, colors in missing.items()]:
+                future.result()
+
+    evict(keep=set(paths.values()))
+    return paths
+
+
+def swatch_path(theme: themes_db.Theme, size: tuple = SWATCH_IMAGE_SIZE) -> Path | None:
+    """One theme's swatch image, rendered now if the cache does not have it."""
+    if not theme.count:
+        return None
+    colors = themes_db.gradient(theme, size[0])
+    path = path_for(colors, size)
+    if not _touch(path):
+        SWATCH_DIR.mkdir(parents=True, exist_ok=True)
+        _write(path, colors, size[1])
+    return path
+
+
+def evict(limit: int = SWATCH_CACHE_LIMIT, keep: set = frozenset()) -> int:
+    """Delete least recently used images until the cache fits in limit bytes.
+
+    Files in keep are never deleted. Returns the number of files removed.
+    """
+    entries = []
+    total = 0
+    try:
+        with os.scandir(SWATCH_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                total += st.st_size
+                entries.append((st.st_mtime_ns, st.st_size, Path(entry.path)))
+    except FileNotFoundError:
+        return 0
+    if total <= limit:
+        return 0
+
+    removed = 0
+    # Use time is the mtime (set by _touch): atime is unreliable under relatime/noatime
+    for _mtime, file_size, path in sorted(entries):
+        if total <= limit:
+            break
+        if path in keep:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= file_size
+        removed += 1
+    _counts["evicted"] += removed
+    return removed
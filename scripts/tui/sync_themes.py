@@ -10,9 +10,10 @@ import json
 import re
 from pathlib import Path
 
-from .utils.colors import generate_gradient
 from .constants import THEMES_DB_PATH, TUI_THEMES_DB_PATH, OMARCHY_THEME_DIRS, SHARE_DIR
 from .theme import DEFAULT_COLORS
+from .utils.atomic_file import atomic_write_json, file_lock, read_json
+from . import themes_db
 
 
 def extract_colors_from_btop(btop_file: Path):
@@ -96,9 +97,9 @@ def _extract_tui_palette_from_btop(btop_file: Path):
 def scan_theme_directory(theme_dir: Path):
     """Scan a theme directory for color information.
 
-    Returns a dict containing at least "name" and "colors". When
-    possible, also includes a "tui" key with a per-theme TUI palette
-    suitable for the ForgeworkLights TUI.
+    Returns a theme entry (see tui.themes_db) holding the palette's control
+    points. When possible, also includes a "tui" key with a per-theme TUI
+    palette suitable for the ForgeworkLights TUI.
     """
 
     theme_name = theme_dir.name
@@ -115,10 +116,7 @@ def scan_theme_directory(theme_dir: Path):
         if filepath.exists():
             colors = extractor(filepath)
             if colors:
-                entry = {
-                    "name": theme_name.replace("-", " ").title(),
-                    "colors": generate_gradient(colors, 14),
-                }
+                entry = themes_db.make_entry(theme_name.replace("-", " ").title(), colors)
 
                 # Attempt to enrich with a TUI palette when using btop.theme
                 if filename == "btop.theme":
@@ -148,116 +146,107 @@ def sync_themes(verbose: bool = False) -> int:
         if location.exists() and location.is_dir():
             theme_dirs.extend([d for d in location.iterdir() if d.is_dir()])
 
-    # Load existing LED themes.json
-    themes_path = THEMES_DB_PATH
-    themes_path.parent.mkdir(parents=True, exist_ok=True)
+    # Hold both database locks for the whole read-modify-write so concurrent
+    # TUI edits (and other sync runs) are never lost. Lock order is fixed:
+    # LED themes first, then TUI themes.
+    with file_lock(THEMES_DB_PATH), file_lock(TUI_THEMES_DB_PATH):
+        # Load existing LED themes.json
+        themes_path = THEMES_DB_PATH
+        themes_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if themes_path.exists():
-        try:
-            with open(themes_path, "r") as f:
-                data = json.load(f)
-        except Exception:
+        data, _gen = read_json(themes_path)
+        if not isinstance(data, dict) or not isinstance(data.get("themes"), dict):
             data = {"themes": {}}
-    else:
-        data = {"themes": {}}
-
-    # Load existing TUI themes database (tui_themes.json)
-    tui_themes_path = TUI_THEMES_DB_PATH
-    if tui_themes_path.exists():
-        try:
-            with open(tui_themes_path, "r") as f:
-                tui_data = json.load(f)
-                if not isinstance(tui_data, dict):
-                    tui_data = {"themes": {}}
-        except Exception:
-            tui_data = {"themes": {}}
-    else:
-        tui_data = {"themes": {}}
-
-    # Load premade LED themes for restoring deleted LED defaults
-    premade_themes_path = SHARE_DIR / "led_themes.json"
-    premade_themes = {}
-
-    if premade_themes_path.exists():
-        try:
-            with open(premade_themes_path, "r") as f:
-                premade_data = json.load(f)
-                premade_themes = premade_data.get("themes", {})
-                if verbose:
-                    print(
-                        f"Loaded {len(premade_themes)} premade themes from {premade_themes_path}"
-                    )
-        except Exception as e:
-            if verbose:
-                print(f"Warning: Could not load premade themes: {e}")
-
-    # Restore missing premade LED themes
-    restored_count = 0
-    for theme_key, theme_data in premade_themes.items():
-        if theme_key not in data["themes"]:
-            data["themes"][theme_key] = theme_data
-            restored_count += 1
-            if verbose:
-                print(f"✓ Restored: {theme_key} (from premade)")
-
-    if restored_count > 0 and verbose:
-        print(f"Restored {restored_count} deleted default themes")
 
-    if not theme_dirs:
-        if verbose:
-            print("No Omarchy theme directories found")
-        return restored_count
+        # Load existing TUI themes database (tui_themes.json)
+        tui_themes_path = TUI_THEMES_DB_PATH
+        tui_data, _gen = read_json(tui_themes_path)
+        if not isinstance(tui_data, dict):
+            tui_data = {"themes": {}}
 
-    # Scan all theme directories
-    new_count = 0
-    updated_count = 0
+        # Load premade LED themes for restoring deleted LED defaults
+        premade_themes_path = SHARE_DIR / "led_themes.json"
+        premade_themes = {}
 
-    for theme_dir in theme_dirs:
-        theme_key = theme_dir.name
-        theme_data = scan_theme_directory(theme_dir)
+        if premade_themes_path.exists():
+            try:
+                with open(premade_themes_path, "r") as f:
+                    premade_data = json.load(f)
+                    premade_themes = premade_data.get("themes", {})
+                    if verbose:
+                        print(
+                            f"Loaded {len(premade_themes)} premade themes from {premade_themes_path}"
+                        )
+            except Exception as e:
+                if verbose:
+                    print(f"Warning: Could not load premade themes: {e}")
 
-        if theme_data:
+        # Restore missing premade LED themes
+        restored_count = 0
+        for theme_key, theme_data in premade_themes.items():
             if theme_key not in data["themes"]:
                 data["themes"][theme_key] = theme_data
-                new_count += 1
+                restored_count += 1
                 if verbose:
-                    print(f"✓ Added: {theme_key}")
-            else:
-                # For most themes, keep the non-destructive behavior and never
-                # overwrite existing entries. The Aether theme is special: we
-                # want it to track the live Omarchy palette, so we allow it to
-                # be updated when its source changes.
-                if theme_key == "aether":
+                    print(f"✓ Restored: {theme_key} (from premade)")
+
+        if restored_count > 0 and verbose:
+            print(f"Restored {restored_count} deleted default themes")
+
+        if not theme_dirs:
+            if verbose:
+                print("No Omarchy theme directories found")
+            return restored_count
+
+        # Scan all theme directories
+        new_count = 0
+        updated_count = 0
+
+        for theme_dir in theme_dirs:
+            theme_key = theme_dir.name
+            theme_data = scan_theme_directory(theme_dir)
+
+            if theme_data:
+                if theme_key not in data["themes"]:
                     data["themes"][theme_key] = theme_data
-                    updated_count += 1
+                    new_count += 1
                     if verbose:
-                        print(f"✓ Updated: {theme_key} (Aether)")
-                elif verbose:
-                    print(f"⏭ Skipped: {theme_key} (already exists)")
-
-            # Update TUI themes database for any Omarchy-backed theme
-            if "tui" in theme_data:
-                if "themes" not in tui_data or not isinstance(tui_data["themes"], dict):
-                    tui_data["themes"] = {}
-                tui_data["themes"][theme_key] = theme_data["tui"]
-
-    # Save updated LED themes.json
-    with open(themes_path, "w") as f:
-        json.dump(data, f, indent=2)
-
-    # Save updated TUI themes database
-    with open(tui_themes_path, "w") as f:
-        json.dump(tui_data, f, indent=2)
-
-    if verbose:
-        print("\nSync complete:")
-        print(f"  Restored: {restored_count}")
-        print(f"  New themes: {new_count}")
-        print(f"  Updated: {updated_count}")
-        print(f"  Total themes: {len(data['themes'])}")
-        print(f"  Saved to: {themes_path}")
-
-    return restored_count + new_count + updated_count
+                        print(f"✓ Added: {theme_key}")
+                else:
+                    # For most themes, keep the non-destructive behavior and never
+                    # overwrite existing entries. The Aether theme is special: we
+                    # want it to track the live Omarchy palette, so we allow it to
+                    # be updated when its source changes.
+                    if theme_key == "aether":
+                        data["themes"][theme_key] = theme_data
+                        updated_count += 1
+                        if verbose:
+                            print(f"✓ Updated: {theme_key} (Aether)")
+                    elif verbose:
+                        print(f"⏭ Skipped: {theme_key} (already exists)")
+
+                # Update TUI themes database for any Omarchy-backed theme
+                if "tui" in theme_data:
+                    if "themes" not in tui_data or not isinstance(tui_data["themes"], dict):
+                        tui_data["themes"] = {}
+                    tui_data["themes"][theme_key] = theme_data["tui"]
+
+        # Save updated LED themes.json and its packed copy
+        gen = atomic_write_json(themes_path, data)
+        themes_db.write_packed(data, gen, themes_path)
+
+        # Save updated TUI themes database
+        atomic_write_json(tui_themes_path, tui_data)
+
+        if verbose:
+            print("\nSync complete:")
+            print(f"  Restored: {restored_count}")
+            print(f"  New themes: {new_count}")
+            print(f"  Updated: {updated_count}")
+            print(f"  Total themes: {len(data['themes'])}")
+            print(f"  Saved to: {themes_path}")
+
+        return restored_count + new_count + updated_count
 
 
 def main(argv=None) -> int:
@@ -0,0 +1,389 @@
+"""
+LED theme entries (led_themes.json) and their gradients
+
+A theme entry stores the control points of its gradient and the color space
+they are interpolated in:
+
+    "tokyo-night": {
+      "name": "Tokyo Night",
+      "stops": ["#470766", "#7aa2f7", "#c0caf5"],
+      "mode": "srgb"                 # or "linear" / "oklab", see utils.colors
+    }
+
+Entries written before "stops" existed carry a pre-expanded "colors" array
+instead; those colors are used as the stops. Expanded gradients are produced
+on demand for whatever length is needed - the strip's led_count, a preview
+width - and memoized per (stops, length, mode), so an edited theme never
+hits a stale entry.
+
+In memory the TUI holds each theme as a Theme record (see load()): a slotted
+object whose stops are packed RGB bytes, built once per database load and
+shared by the theme list, the creator and the previews. Hex strings are only
+produced again when a record is serialized or a gradient is rendered.
+
+Every write of led_themes.json also regenerates led_themes.bin, a packed
+copy of all gradients expanded for the strip (see include/packed_themes.hpp
+for the layout). The daemon and the TUI map it with mmap and look gradients
+up without parsing any JSON; the JSON stays the editable source of truth.
+The sidecar records which version of the JSON it was built from, so readers
+ignore it once the JSON has been edited by hand.
+
+The same writes refresh QUICK_LIST_PATH, the theme list with short
+pre-expanded swatches that forgeworklights-quick prints (see tui.quick),
+stamped with the JSON's version the same way, and render the swatch PNGs
+of new or changed gradients (see tui.swatches). Each write is announced on
+the event bus as db-updated (see tui.bus).
+"""
+import copy
+import mmap
+import struct
+from collections import OrderedDict
+from pathlib import Path
+
+from .constants import (
+    DEFAULT_LED_COUNT,
+    GRADIENT_CACHE_SIZE,
+    LED_CONFIG_FILE,
+    QUICK_LIST_PATH,
+    QUICK_SWATCH_WIDTH,
+    THEMES_DB_PATH,
+    THEMES_PACKED_PATH,
+)
+from . import bus
+from .utils import atomic_file
+from .utils.colors import GRADIENT_MODES, generate_gradients, hex_to_rgb, rgb_to_hex
+
+DEFAULT_MODE = "srgb"
+
+_cache: "OrderedDict[tuple, list]" = OrderedDict()
+_cache_counts = {"hits": 0, "misses": 0}
+
+
+def make_entry(name: str, stops: list, mode: str = DEFAULT_MODE) -> dict:
+    """New theme entry from its control points."""
+    if mode not in GRADIENT_MODES:
+        raise ValueError(f"Unknown gradient mode {mode!r}")
+    return {"name": name, "stops": list(stops), "mode": mode}
+
+
+def stops(entry: dict) -> list:
+    """Control points of a theme entry (legacy entries: their colors)."""
+    return list(entry.get("stops") or entry.get("colors") or [])
+
+
+def mode(entry: dict) -> str:
+    """Interpolation mode of a theme entry."""
+    value = entry.get("mode", DEFAULT_MODE)
+    # Return the shared constant rather than the parsed copy
+    return next((m for m in GRADIENT_MODES if m == value), DEFAULT_MODE)
+
+
+class Theme:
+    """One theme held in memory: its key, display name, mode and control points.
+
+    stops holds the control points as packed RGB bytes (three per stop)
+    rather than a list of hex strings, so a large library costs one small
+    object per theme. Records are immutable by convention - editing a theme
+    writes a new entry and the next load() builds new records.
+    """
+
+    __slots__ = ("key", "name", "mode", "stops")
+
+    def __init__(self, key: str, name: str, stops: bytes, mode: str = DEFAULT_MODE):
+        self.key = key
+        self.name = name
+        self.mode = mode
+        self.stops = stops
+
+    @classmethod
+    def from_hex(cls, key: str, name: str, colors: list, mode: str = DEFAULT_MODE) -> "Theme":
+        """Record from hex control points (raises ValueError on malformed colors)."""
+        rgb = bytearray()
+        for color in colors:
+            rgb += bytes(hex_to_rgb(color))
+        return cls(key, name, bytes(rgb), mode)
+
+    @classmethod
+    def from_entry(cls, key: str, entry: dict) -> "Theme":
+        """Record from a led_themes.json entry (legacy entries: their colors are the stops)."""
+        return cls.from_hex(key, entry.get("name", key), stops(entry), mode(entry))
+
+    @property
+    def count(self) -> int:
+        """Number of control points."""
+        return len(self.stops) // 3
+
+    def __repr__(self) -> str:
+        return f"Theme({self.key!r}, {self.name!r}, {self.hex_stops()!r}, {self.mode!r})"
+
+    def hex_stops(self) -> list:
+        """Control points as "#rrggbb" strings."""
+        rgb = self.stops
+        return [rgb_to_hex(rgb[i], rgb[i + 1], rgb[i + 2]) for i in range(0, len(rgb), 3)]
+
+    def to_entry(self) -> dict:
+        """led_themes.json entry for this record."""
+        return make_entry(self.name, self.hex_stops(), self.mode)
+
+
+def load(data: dict) -> dict:
+    """Theme records for every usable entry of a parsed database, keyed and sorted by key.
+
+    Entries that are not objects or whose colors do not parse are skipped.
+    """
+    themes = data.get("themes", {}) if isinstance(data, dict) else {}
+    records = {}
+    for key in sorted(themes):
+        entry = themes[key]
+        if not isinstance(entry, dict):
+            continue
+        try:
+            records[key] = Theme.from_entry(key, entry)
+        except (ValueError, TypeError, AttributeError):
+            continue
+    return records
+
+
+def gradient(theme: "Theme | dict", length: int) -> list:
+    """A theme's gradient expanded to length colors (exactly as the daemon expands it)."""
+    return gradients([theme], length)[0]
+
+
+def gradients(themes: list, length: int) -> list:
+    """Expanded gradients for many Theme records (or raw entries); cache misses are
+    resampled in one batch."""
+    records = [theme if isinstance(theme, Theme) else Theme.from_entry("", theme) for theme in themes]
+    keys = [(theme.stops, length, theme.mode) for theme in records]
+    missing = {key: theme for key, theme in zip(keys, records) if key not in _cache}
+    _cache_counts["misses"] += len(missing)
+    _cache_counts["hits"] += len(keys) - len(missing)
+    # One batch per mode (generate_gradients takes a single mode)
+    for batch_mode in {key[2] for key in missing}:
+        batch = [key for key in missing if key[2] == batch_mode]
+        expanded = generate_gradients([missing[key].hex_stops() for key in batch], length, batch_mode, round_srgb=True)
+        for key, colors in zip(batch, expanded):
+            _cache[key] = colors
+    results = []
+    for key in keys:
+        _cache.move_to_end(key)
+        results.append(list(_cache[key]))
+    while len(_cache) > GRADIENT_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return results
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and size of the gradient cache (for tui.diagnostics)."""
+    return {**_cache_counts, "size": len(_cache), "maxsize": GRADIENT_CACHE_SIZE}
+
+
+def _config_value(name: str) -> str | None:
+    """A setting from the daemon's config.toml as written there; None if unset."""
+    try:
+        lines = LED_CONFIG_FILE.read_text().splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        key, sep, value = line.partition("=")
+        if sep and not line.startswith("#") and key.strip() == name:
+            return value.strip().strip('"')
+    return None
+
+
+def led_count() -> int:
+    """Strip length from the daemon's config.toml (DEFAULT_LED_COUNT if unset)."""
+    try:
+        return max(1, int(_config_value("led_count")))
+    except (TypeError, ValueError):
+        return DEFAULT_LED_COUNT
+
+
+def gamma_exponent() -> float:
+    """The daemon's gamma_exponent from config.toml (1.0, no correction, if unset)."""
+    try:
+        return float(_config_value("gamma_exponent")) or 1.0
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def color_order() -> str:
+    """The byte order the daemon sends LEDs in: "RGB" if config.toml says so, else "GRB"."""
+    return "RGB" if _config_value("color_order") == "RGB" else "GRB"
+
+
+# --- Packed sidecar (led_themes.bin) ---
+
+PACKED_MAGIC = b"FWLB"
+PACKED_VERSION = 1
+# magic, version, header size, led_count, theme count,
+# source inode / mtime_ns / size, index offset, records offset
+_HEADER = struct.Struct("<4sHHIIQQQII")
+# key offset, key length, reserved, record offset
+_INDEX_ENTRY = struct.Struct("<IHHI")
+
+
+def packed_path(db_path: Path) -> Path:
+    """Packed sidecar of a themes database (led_themes.json -> led_themes.bin)."""
+    return Path(db_path).with_suffix(".bin")
+
+
+def update_db(mutate, path: Path = THEMES_DB_PATH) -> dict:
+    """Locked read-modify-write of led_themes.json that also refreshes the packed copy.
+
+    mutate(data) edits data in place; returning False skips both writes.
+    """
+    with atomic_file.file_lock(path):
+        data, _gen = atomic_file.read_json(path, None)
+        if not isinstance(data, dict):
+            data = {}
+        before = copy.deepcopy(data.get("themes"))
+        if mutate(data) is not False:
+            gen = atomic_file.atomic_write_json(path, data)
+            write_packed(data, gen, path, changed=_changed_keys(before, data.get("themes")))
+        return data
+
+
+def _changed_keys(before, after) -> list | None:
+    """Theme keys added, removed or edited between two "themes" objects (None if not comparable)."""
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        return None
+    return sorted(key for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+
+
+def write_packed(data: dict, source: atomic_file.Generation, path: Path = THEMES_DB_PATH,
+                 length: int | None = None, changed: list | None = None) -> None:
+    """Write the packed copy of data, which was just written to path as generation source.
+
+    Call with the database lock held, right after writing the JSON. The
+    launcher list cache and the swatch images are refreshed along with it,
+    and the write is published as db-updated (changed: the theme keys the
+    write touched, when the caller knows them).
+    """
+    atomic_file.atomic_write_bytes(packed_path(path), pack(data, source, length or led_count()))
+    if Path(path) == THEMES_DB_PATH:
+        atomic_file.atomic_write_text(QUICK_LIST_PATH, quick_list(data, source, sync_swatches(data)))
+    bus.publish(bus.DB_UPDATED, path=str(path), themes=changed)
+
+
+def sync_swatches(data: dict) -> dict:
+    """Swatch image paths for every theme of data, rendering new gradients
+    (see tui.swatches); {} if the cache cannot be written."""
+    from . import swatches
+    try:
+        return swatches.sync(list(load(data).values()))
+    except OSError:
+        return {}
+
+
+def pack(data: dict, source: atomic_file.Generation, length: int) -> bytes:
+    """Serialize every theme's gradient, expanded to length, into the packed layout."""
+    records = {key.encode("utf-8"): theme for key, theme in load(data).items() if theme.count}
+    keys = sorted(records)  # byte order, so readers can binary search
+    expanded = gradients([records[key] for key in keys], length)
+
+    index_offset = _HEADER.size
+    keys_offset = index_offset + _INDEX_ENTRY.size * len(keys)
+    records_offset = keys_offset + sum(len(key) for key in keys)
+    record_size = length * 3
+
+    index = bytearray()
+    key_offset = keys_offset
+    for i, key in enumerate(keys):
+        index += _INDEX_ENTRY.pack(key_offset, len(key), 0, records_offset + i * record_size)
+        key_offset += len(key)
+
+    records = bytearray()
+    for colors in expanded:
+        for color in colors:
+            records += bytes(hex_to_rgb(color))
+
+    header = _HEADER.pack(
+        PACKED_MAGIC, PACKED_VERSION, _HEADER.size, length, len(keys),
+        source.inode, source.mtime_ns, source.size, index_offset, records_offset,
+    )
+    return header + bytes(index) + b"".join(keys) + bytes(records)
+
+
+class PackedThemes:
+    """Read-only view of led_themes.bin (see open_packed)."""
+
+    def __init__(self, buf: mmap.mmap):
+        self._buf = buf
+        (_magic, _version, _header_size, self.led_count, self._count,
+         *_source, self._index_offset, _records) = _HEADER.unpack_from(buf, 0)
+        self._index = {}
+        for i in range(self._count):
+            key_offset, key_len, _reserved, record_offset = _INDEX_ENTRY.unpack_from(
+                buf, self._index_offset + i * _INDEX_ENTRY.size
+            )
+            key = bytes(buf[key_offset:key_offset + key_len]).decode("utf-8")
+            self._index[key] = record_offset
+
+    def keys(self) -> list:
+        return list(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def rgb(self, key: str) -> memoryview | None:
+        """A theme's led_count * 3 RGB bytes (no copy), or None."""
+        offset = self._index.get(key)
+        if offset is None:
+            return None
+        return memoryview(self._buf)[offset:offset + self.led_count * 3]
+
+    def close(self) -> None:
+        self._buf.close()
+
+
+def open_packed(path: Path = THEMES_PACKED_PATH, source_path: Path = THEMES_DB_PATH,
+                length: int | None = None) -> PackedThemes | None:
+    """Map the packed sidecar if it is current for the JSON at source_path and
+    was built for length LEDs (default: the configured led_count); else None."""
+    try:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buf) < _HEADER.size:
+        buf.close()
+        return None
+    (magic, version, _header_size, packed_length, theme_count,
+     inode, mtime_ns, size, _index, records) = _HEADER.unpack_from(buf, 0)
+    fresh = (
+        magic == PACKED_MAGIC
+        and version == PACKED_VERSION
+        and packed_length == (length or led_count())
+        and atomic_file.generation(source_path) == atomic_file.Generation(inode, mtime_ns, size)
+        and len(buf) >= records + theme_count * packed_length * 3
+    )
+    if not fresh:
+        buf.close()
+        return None
+    return PackedThemes(buf)
+
+
+# --- Launcher list cache (quick-list.tsv, read by tui.quick) ---
+
+QUICK_LIST_MAGIC = "#forgeworklights-quick-list"
+QUICK_LIST_VERSION = 2
+
+
+def quick_list(data: dict, source: atomic_file.Generation, icons: dict | None = None) -> str:
+    """The themes the TUI lists, with QUICK_SWATCH_WIDTH-color swatches, built from source.
+
+    Plain text so the reader needs no parser: a header line
+
+        #forgeworklights-quick-list 2 <inode> <mtime_ns> <size>
+
+    then one "key<TAB>name<TAB>#rrggbb#rrggbb...<TAB>icon" line per theme,
+    icon being the theme's swatch image from icons (empty if it has none).
+    """
+    icons = icons or {}
+    themes = [theme for key, theme in load(data).items() if key != "__preview__" and theme.count >= 3]
+    swatches = gradients(themes, QUICK_SWATCH_WIDTH)
+    lines = [f"{QUICK_LIST_MAGIC} {QUICK_LIST_VERSION} {source.inode} {source.mtime_ns} {source.size}"]
+    for theme, swatch in zip(themes, swatches):
+        name = " ".join(theme.name.split())  # no tabs or newlines
+        lines.append(f"{theme.key}\t{name}\t{''.join(swatch)}\t{icons.get(theme.key, '')}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,162 @@
+"""
+Crash-safe writes and advisory locking for shared ForgeworkLights files.
+
+The daemon, the sync CLI and any number of TUI instances read and write the
+same files under ~/.config/forgeworklights. Everything that writes one of
+them goes through this module:
+
+- Writes go to a temp file in the same directory, are fsynced and then
+  renamed over the target, so readers see either the old or the new
+  contents - never a truncated file.
+- Read-modify-write cycles hold an exclusive fcntl.flock() on a sidecar
+  lock file in LOCK_DIR (locking the target itself would not work, since
+  every write replaces its inode). The C++ CLI uses the same lock files.
+- A file's generation (inode, mtime_ns, size) changes on every replace,
+  which lets readers holding a cached copy tell whether it is still
+  current. Writers do not compare generations: they re-read under the
+  lock (update_json), so a concurrent change is merged, not lost.
+
+Temp files are named ".fwl-*.tmp" so they never match the names the
+daemon's inotify handler reacts to (e.g. anything containing
+"themes.json").
+"""
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+from ..constants import LOCK_DIR
+
+TEMP_PREFIX = ".fwl-"
+TEMP_SUFFIX = ".tmp"
+DEFAULT_MODE = 0o644
+
+
+class Generation(NamedTuple):
+    """Identity of one version of a file on disk."""
+    inode: int
+    mtime_ns: int
+    size: int
+
+
+def generation(path: Path) -> Generation | None:
+    """Current generation of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return Generation(st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def lock_path(path: Path) -> Path:
+    """Sidecar lock file shared by every writer of path."""
+    return LOCK_DIR / f"{Path(path).name}.lock"
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False):
+    """Hold an advisory flock on path's lock file for the duration of the block."""
+    lock_file = lock_path(path)
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> Generation:
+    """Replace path with data via temp file + fsync + rename.
+
+    The file keeps its existing permissions (0644 for new files). Returns the
+    generation of the newly written file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = DEFAULT_MODE
+
+    fd, tmp_name = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=TEMP_SUFFIX, dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fchmod(f.fileno(), mode)
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+    _fsync_dir(path.parent)
+    return generation(path)
+
+
+def atomic_write_text(path: Path, text: str) -> Generation:
+    """Atomically replace path with text (UTF-8)."""
+    return atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: Path, data: Any, indent: int = 2) -> Generation:
+    """Atomically replace path with data serialized as JSON."""
+    return atomic_write_text(path, json.dumps(data, indent=indent))
+
+
+def read_json(path: Path, default: Any = None) -> tuple[Any, Generation | None]:
+    """Read a JSON file, returning (data, generation).
+
+    Missing or invalid files yield (default, generation-or-None). Since every
+    writer replaces files atomically, invalid JSON means a genuinely corrupt
+    file, not a write in progress.
+    """
+    path = Path(path)
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+    except FileNotFoundError:
+        return default, None
+    gen = Generation(st.st_ino, st.st_mtime_ns, st.st_size)
+    try:
+        return json.loads(raw), gen
+    except ValueError:
+        return default, gen
+
+
+def update_json(path: Path, mutate: Callable[[Any], Any], default: Callable[[], Any] = dict, indent: int = 2) -> Any:
+    """Locked read-modify-write of a JSON file.
+
+    mutate(data) edits data in place; returning False skips the write.
+    Returns the (possibly modified) data.
+    """
+    with file_lock(path):
+        data, _gen = read_json(path, None)
+        if data is None:
+            data = default()
+        if mutate(data) is not False:
+            atomic_write_json(path, data, indent)
+        return data
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist a rename by syncing its directory (best effort)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
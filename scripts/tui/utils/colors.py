@@ -1,49 +1,278 @@
 """
 Color utility functions for gradient generation and color conversion.
 Shared by TUI widgets, sync scripts, and color generation tools.
+
+generate_gradients() resamples many palettes at once and is what the sync
+and generation scripts use; generate_gradient() is the single-palette
+convenience wrapper. Both interpolate in one of three color spaces:
+
+- "srgb":   straight interpolation of the 0-255 values (the historical
+            behavior - output is identical to earlier versions)
+- "linear": interpolation in linear light, which keeps blends between
+            saturated colors from dipping dark
+- "oklab":  interpolation in the OKLab perceptual space, which avoids the
+            muddy midpoints of sRGB blends (e.g. blue -> yellow)
+
+NumPy is used when it is installed; otherwise everything falls back to pure
+Python with the same results.
 """
+from itertools import product
+from math import floor, log
+
+from ..constants import MIN_TEMPERATURE, NEUTRAL_TEMPERATURE
+
+try:
+    import numpy as np
+except ImportError:  # optional - pure Python fallback below
+    np = None
+
+GRADIENT_MODES = ("srgb", "linear", "oklab")
+
+# Hex encode/decode tables: "ff"/"FF"/"fF"/"Ff" -> 255 and 255 -> "ff"
+_BYTE_TO_HEX = [f"{i:02x}" for i in range(256)]
+_HEX_TO_BYTE = {
+    "".join(chars): i
+    for i, pair in enumerate(_BYTE_TO_HEX)
+    for chars in product(*({c, c.upper()} for c in pair))
+}
+
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple"""
     hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    try:
+        return (_HEX_TO_BYTE[hex_color[0:2]], _HEX_TO_BYTE[hex_color[2:4]], _HEX_TO_BYTE[hex_color[4:6]])
+    except KeyError:
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
 def rgb_to_hex(r, g, b):
     """Convert RGB tuple to hex color"""
-    return f"#{int(r):02x}{int(g):02x}{int(b):02x}"
+    try:
+        return f"#{_BYTE_TO_HEX[int(r)]}{_BYTE_TO_HEX[int(g)]}{_BYTE_TO_HEX[int(b)]}"
+    except IndexError:
+        return f"#{int(r):02x}{int(g):02x}{int(b):02x}"
+
+def _blackbody(kelvin):
+    """Blackbody color of a temperature (Tanner Helland's fit, as the daemon computes it)"""
+    t = kelvin / 100
+    r = 255.0 if t <= 66 else 329.698727446 * (t - 60) ** -0.1332047592
+    g = 99.4708025861 * log(t) - 161.1195681661 if t <= 66 else 288.1221695283 * (t - 60) ** -0.0755148492
+    b = 255.0 if t >= 66 else 0.0 if t <= 19 else 138.5177312231 * log(t - 10) - 305.0447927307
+    return tuple(min(255.0, max(0.0, c)) for c in (r, g, b))
+
+def white_point_gains(kelvin):
+    """Per-channel gains (0-1) the daemon applies for a color temperature in kelvin"""
+    kelvin = min(NEUTRAL_TEMPERATURE, max(MIN_TEMPERATURE, kelvin))
+    return tuple(min(1.0, c / n) for c, n in zip(_blackbody(kelvin), _blackbody(NEUTRAL_TEMPERATURE)))
 
-def generate_gradient(colors, num_steps=22):
+def generate_gradient(colors, num_steps=22, mode="srgb"):
     """Generate smooth gradient with num_steps colors from input colors"""
-    if not colors:
-        return []
-    
-    rgb_colors = [hex_to_rgb(c) for c in colors]
-    num_colors = len(rgb_colors)
-    
-    if num_colors == 1:
-        # Single color - repeat it
-        return colors * num_steps
-    
-    gradient = []
+    return generate_gradients([colors], num_steps, mode)[0]
+
+def generate_gradients(palettes, num_steps=22, mode="srgb", round_srgb=False):
+    """Resample many palettes in one call.
+
+    palettes is a sequence of hex color lists; num_steps is either one length
+    for all of them or a sequence with one length per palette. Returns a list
+    of gradients (lists of "#rrggbb") in the same order. Palettes with the
+    same number of colors and target length are interpolated together.
+    round_srgb rounds srgb results to nearest like the daemon does, instead
+    of truncating like earlier versions of generate_gradient.
+    """
+    if mode not in GRADIENT_MODES:
+        raise ValueError(f"Unknown gradient mode {mode!r} (expected one of {', '.join(GRADIENT_MODES)})")
+    palettes = list(palettes)
+    if isinstance(num_steps, int):
+        lengths = [num_steps] * len(palettes)
+    else:
+        lengths = list(num_steps)
+        if len(lengths) != len(palettes):
+            raise ValueError("num_steps must be an int or have one entry per palette")
+
+    results = [None] * len(palettes)
+    groups = {}
+    for i, (colors, steps) in enumerate(zip(palettes, lengths)):
+        if not colors or steps <= 0:
+            results[i] = []
+        elif len(colors) == 1:
+            # Single color - repeat it
+            results[i] = list(colors) * steps
+        else:
+            groups.setdefault((len(colors), steps), []).append(i)
+
+    if np is not None:
+        interpolate, decode = _interpolate_numpy, _decode_numpy
+    else:
+        interpolate, decode = _interpolate_python, _decode_python
+    for (num_colors, steps), indices in groups.items():
+        rgb = decode([palettes[i] for i in indices])
+        for i, gradient in zip(indices, interpolate(rgb, num_colors, steps, mode, round_srgb)):
+            results[i] = gradient
+    return results
+
+
+# --- Color space conversions (all channels 0.0-1.0 unless noted) ---
+
+# OKLab matrices (Bjorn Ottosson, https://bottosson.github.io/posts/oklab/)
+_LINEAR_TO_LMS = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+_LMS_TO_OKLAB = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+_OKLAB_TO_LMS = (
+    (1.0, 0.3963377774, 0.2158037573),
+    (1.0, -0.1055613458, -0.0638541728),
+    (1.0, -0.0894841775, -1.2914855480),
+)
+_LMS_TO_LINEAR = (
+    (4.0767416621, -3.3077115913, 0.2309699292),
+    (-1.2684380046, 2.6097574011, -0.3413193965),
+    (-0.0041960863, -0.7034186168, 1.7076147010),
+)
+
+def _srgb_to_linear(c):
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+def _linear_to_srgb(c):
+    c = min(1.0, max(0.0, c))
+    return c * 12.92 if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+
+# Decoding only ever sees 0-255 inputs, so it is a table lookup
+_DECODE_LINEAR = [_srgb_to_linear(i / 255) for i in range(256)]
+
+def _mat3(m, v):
+    return tuple(m[r][0] * v[0] + m[r][1] * v[1] + m[r][2] * v[2] for r in range(3))
+
+def _cbrt(x):
+    return x ** (1 / 3) if x >= 0 else -((-x) ** (1 / 3))
+
+def _to_space(rgb, mode):
+    """0-255 RGB tuple -> interpolation space"""
+    if mode == "srgb":
+        return rgb
+    linear = tuple(_DECODE_LINEAR[c] for c in rgb)
+    if mode == "linear":
+        return linear
+    lms = _mat3(_LINEAR_TO_LMS, linear)
+    return _mat3(_LMS_TO_OKLAB, tuple(_cbrt(c) for c in lms))
+
+def _from_space(v, mode, round_srgb=False):
+    """Interpolation space -> hex"""
+    if mode == "srgb":
+        if round_srgb:
+            return rgb_to_hex(*(floor(c + 0.5) for c in v))
+        # Truncation matches the original generate_gradient output
+        return rgb_to_hex(*v)
+    if mode == "oklab":
+        lms = _mat3(_OKLAB_TO_LMS, v)
+        v = _mat3(_LMS_TO_LINEAR, tuple(c * c * c for c in lms))
+    return rgb_to_hex(*(floor(_linear_to_srgb(c) * 255 + 0.5) for c in v))
+
+
+# --- Batch hex decoding ---
+
+def _decode_python(palettes):
+    return [[hex_to_rgb(c) for c in colors] for colors in palettes]
+
+if np is not None:
+    # ASCII code -> nibble value (-1 for anything that is not a hex digit)
+    _NIBBLE = np.full(256, -1, dtype=np.int16)
+    for _i, _c in enumerate("0123456789abcdef"):
+        _NIBBLE[ord(_c)] = _NIBBLE[ord(_c.upper())] = _i
+    del _i, _c
+    # Byte value -> its two lowercase hex digits as ASCII codes
+    _HEX_ASCII = np.frombuffer("".join(_BYTE_TO_HEX).encode("ascii"), dtype=np.uint8).reshape(256, 2)
+
+def _decode_numpy(palettes):
+    """Palettes of equal length -> (palettes, colors, 3) int array"""
+    digits = "".join(c.lstrip("#") for colors in palettes for c in colors)
+    count = sum(len(colors) for colors in palettes)
+    if len(digits) != count * 6 or not digits.isascii():
+        return np.asarray(_decode_python(palettes))
+    nibbles = _NIBBLE[np.frombuffer(digits.encode("ascii"), dtype=np.uint8)]
+    if (nibbles < 0).any():
+        return np.asarray(_decode_python(palettes))
+    nibbles = nibbles.reshape(len(palettes), -1, 3, 2)
+    return nibbles[..., 0] * 16 + nibbles[..., 1]
+
+def _encode_numpy(channels):
+    """(palettes, steps, 3) ints 0-255 -> lists of "#rrggbb" """
+    palettes, steps = channels.shape[:2]
+    chars = np.empty((palettes, steps, 7), dtype=np.uint8)
+    chars[..., 0] = ord("#")
+    chars[..., 1:] = _HEX_ASCII[channels].reshape(palettes, steps, 6)
+    text = chars.tobytes().decode("ascii")
+    return [
+        [text[o:o + 7] for o in range(base, base + steps * 7, 7)]
+        for base in range(0, palettes * steps * 7, steps * 7)
+    ]
+
+
+# --- Interpolation kernels ---
+
+def _sample_positions(num_colors, num_steps):
+    """(index, fraction) into the palette for each output step"""
+    positions = []
     for i in range(num_steps):
         # Map position to color gradient (0.0 to 1.0)
         pos = i / (num_steps - 1) if num_steps > 1 else 0
         color_pos = pos * (num_colors - 1)
-        
         idx = int(color_pos)
-        frac = color_pos - idx
-        
         if idx >= num_colors - 1:
             # Last color
-            r, g, b = rgb_colors[num_colors - 1]
+            positions.append((num_colors - 2, 1.0))
         else:
-            # Interpolate between idx and idx+1
-            c1 = rgb_colors[idx]
-            c2 = rgb_colors[idx + 1]
-            r = c1[0] + (c2[0] - c1[0]) * frac
-            g = c1[1] + (c2[1] - c1[1]) * frac
-            b = c1[2] + (c2[2] - c1[2]) * frac
-        
-        gradient.append(rgb_to_hex(r, g, b))
-    
-    return gradient
+            positions.append((idx, color_pos - idx))
+    return positions
+
+def _interpolate_python(palettes_rgb, num_colors, num_steps, mode, round_srgb=False):
+    positions = _sample_positions(num_colors, num_steps)
+    gradients = []
+    for rgb in palettes_rgb:
+        stops = [_to_space(c, mode) for c in rgb]
+        gradient = []
+        for idx, frac in positions:
+            c1, c2 = stops[idx], stops[idx + 1]
+            if frac == 1.0:
+                v = c2
+            else:
+                v = tuple(a + (b - a) * frac for a, b in zip(c1, c2))
+            gradient.append(_from_space(v, mode, round_srgb))
+        gradients.append(gradient)
+    return gradients
+
+def _interpolate_numpy(palettes_rgb, num_colors, num_steps, mode, round_srgb=False):
+    stops = np.asarray(palettes_rgb, dtype=np.float64)  # (palettes, colors, 3)
+    if mode != "srgb":
+        stops = np.asarray(_DECODE_LINEAR)[stops.astype(np.intp)]
+        if mode == "oklab":
+            lms = np.cbrt(stops @ np.asarray(_LINEAR_TO_LMS).T)
+            stops = lms @ np.asarray(_LMS_TO_OKLAB).T
+
+    positions = _sample_positions(num_colors, num_steps)
+    idx = np.fromiter((p[0] for p in positions), dtype=np.intp, count=num_steps)
+    frac = np.fromiter((p[1] for p in positions), dtype=np.float64, count=num_steps)[:, None]
+    c1 = stops[:, idx]
+    c2 = stops[:, idx + 1]
+    # Take the end stop exactly rather than via c1 + (c2 - c1) * 1.0
+    values = np.where(frac == 1.0, c2, c1 + (c2 - c1) * frac)
+
+    if mode == "srgb" and round_srgb:
+        channels = np.floor(values + 0.5).astype(np.intp)
+    elif mode == "srgb":
+        # Truncation matches the original generate_gradient output
+        channels = values.astype(np.intp)
+    else:
+        if mode == "oklab":
+            lms = values @ np.asarray(_OKLAB_TO_LMS).T
+            values = (lms ** 3) @ np.asarray(_LMS_TO_LINEAR).T
+        values = np.clip(values, 0.0, 1.0)
+        encoded = np.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1 / 2.4) - 0.055)
+        channels = np.floor(encoded * 255 + 0.5).astype(np.intp)
+
+    return _encode_numpy(channels)
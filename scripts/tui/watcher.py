@@ -0,0 +1,93 @@
+"""
+inotify directory watcher shared by the TUI and forgeworklights-waybar
+
+The os module has no inotify bindings, so the three libc calls are made
+through ctypes. Watches are per directory (files are replaced atomically
+by rename, which a watch on the file itself would not survive); events
+come back as (wd, mask, name) tuples and callers dispatch on wd + name.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+
+# Event bits from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+
+# Everything that can mean "a file in this directory now has new contents"
+DIR_EVENTS = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVE_SELF | IN_DELETE_SELF |
+    IN_CREATE | IN_DELETE | IN_MOVED_TO | IN_MOVED_FROM
+)
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows)
+_READ_SIZE = 64 * 1024
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+_libc.inotify_init1.argtypes = [ctypes.c_int]
+_libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+_libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+
+def _check(result: int, what: str) -> int:
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"{what}: {os.strerror(err)}")
+    return result
+
+
+class Watcher:
+    """One inotify instance; read() blocks (with a timeout) for events."""
+
+    def __init__(self):
+        self.fd = _check(_libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC), "inotify_init1")
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def add(self, path, mask: int = DIR_EVENTS) -> int:
+        """Watch path; returns the watch descriptor events will carry."""
+        return _check(_libc.inotify_add_watch(self.fd, os.fsencode(path), mask), f"inotify_add_watch {path}")
+
+    def remove(self, wd: int) -> None:
+        try:
+            _check(_libc.inotify_rm_watch(self.fd, wd), "inotify_rm_watch")
+        except OSError:
+            pass  # already gone with its directory
+
+    def read(self, timeout: float | None = None) -> list:
+        """Pending events as (wd, mask, name); [] on timeout."""
+        fd = self.fd  # close() may run on another thread
+        if fd is None:
+            raise OSError("watcher is closed")
+        readable, _, _ = select.select([fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, name_len = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + name_len].rstrip(b"\x00").decode("utf-8", "replace")
+            offset += name_len
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        if self.fd is not None:
+            fd, self.fd = self.fd, None
+            os.close(fd)
@@ -0,0 +1,272 @@
+"""
+Waybar status emitter (installed as forgeworklights-waybar)
+
+Runs for the life of the bar in Waybar's continuous exec mode
+("return-type": "json", no "interval") and prints one JSON line
+
+    {"text": ..., "tooltip": ..., "class": ...}
+
+whenever the LED theme, brightness, animation or daemon state changes,
+instead of the bar forking jq every few seconds. Changes made by the TUI
+and the other Python tools arrive as event bus deltas (see tui.bus) and are
+folded into the cached state without reading any file; everything else
+(the daemon's CLI, hand edits) through the same inotify watches the TUI
+uses (config dir, Omarchy theme link), after which the state is re-read.
+Only a daemon exit has to be polled, which reads /proc in-process.
+
+The tooltip carries a Pango markup swatch of the active theme's gradient,
+rendered once per theme and reused until led_themes.json changes.
+
+Imports nothing from Textual, so it starts fast and stays small.
+"""
+import asyncio
+import html
+import json
+import os
+import signal
+import sys
+
+from .animations import ANIMATIONS
+from .constants import (
+    CONFIG_DIR,
+    DAEMON_POLL_INTERVAL,
+    RUNTIME_DIR,
+    THEME_SYMLINK,
+    THEMES_DB_PATH,
+    WAYBAR_SWATCH_WIDTH,
+)
+from . import bus
+from . import control
+from . import themes_db
+from .utils.atomic_file import read_json
+from .watcher import Watcher
+
+DAEMON_NAME = "forgeworklights"
+SETTLE_DELAY = 0.05  # seconds; writes arrive in bursts (temp file + rename)
+
+
+def daemon_running(pid_hint: int | None = None) -> int | None:
+    """PID of a running `forgeworklights daemon`, or None.
+
+    pid_hint (the last PID found) is checked first so the common case reads
+    one file instead of scanning /proc.
+    """
+    candidates = os.listdir("/proc")
+    if pid_hint is not None:
+        candidates.insert(0, str(pid_hint))
+    for entry in candidates:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                argv = f.read().split(b"\0")
+        except OSError:
+            continue
+        # argv, not comm: script wrappers such as forgeworklights-menu share the
+        # truncated comm "forgeworklights"
+        if len(argv) > 1 and os.path.basename(argv[0]) == DAEMON_NAME.encode() and argv[1] == b"daemon":
+            return int(entry)
+    return None
+
+
+def swatch(theme: themes_db.Theme, width: int = WAYBAR_SWATCH_WIDTH) -> str:
+    """Pango markup: the theme's gradient as width colored blocks."""
+    spans = []
+    run_color, run_length = None, 0
+    # Neighbouring cells often share a color; one span per run keeps the markup short
+    for color in [*themes_db.gradient(theme, width), None]:
+        if color == run_color:
+            run_length += 1
+            continue
+        if run_color is not None:
+            spans.append(f'<span foreground="{run_color}">{"█" * run_length}</span>')
+        run_color, run_length = color, 1
+    return "".join(spans)
+
+
+class StatusEmitter:
+    """Builds the module's JSON line; caches control state and theme data between changes."""
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.last_line = None
+        self.daemon_pid = None
+        self._state = None
+        self._themes = None
+        self._swatches = {}
+
+    def invalidate_state(self) -> None:
+        self._state = None
+
+    def apply_event(self, event: bus.Event) -> None:
+        """Fold a bus event into the cached state instead of re-reading the files."""
+        if event.type == bus.DB_UPDATED:
+            self.invalidate_themes()
+            return
+        state, data = self._state, event.data
+        if state is None:
+            return  # the next status() reads everything anyway
+        if event.type == bus.THEME_CHANGED:
+            state["led_theme"] = data["led_theme"]
+        elif event.type == bus.BRIGHTNESS_CHANGED:
+            state["brightness"] = data["brightness"]
+        elif event.type == bus.ANIMATION_CHANGED:
+            state["animation"] = data["animation"]
+        elif event.type == bus.PREVIEW_STARTED:
+            state["led_theme"] = control.PREVIEW_THEME
+            state["preview"] = {"name": data.get("name"), "colors": data.get("colors", [])}
+        elif event.type == bus.PREVIEW_ENDED:
+            state["preview"] = None
+            if data.get("led_theme"):
+                state["led_theme"] = data["led_theme"]
+
+    def invalidate_themes(self) -> None:
+        self._themes = None
+        self._swatches.clear()
+
+    def themes(self) -> dict:
+        if self._themes is None:
+            data, _gen = read_json(THEMES_DB_PATH)
+            self._themes = themes_db.load(data)
+        return self._themes
+
+    def status(self) -> dict:
+        if self._state is None:
+            self._state = control.read_state()
+        state = self._state
+        running = self.daemon_pid is not None
+
+        key = control.active_theme_key(state)
+        theme = None
+        if key == control.PREVIEW_THEME and state["preview"]:
+            colors = state["preview"].get("colors") or []
+            try:
+                theme = themes_db.Theme.from_hex(key, "Preview", colors)
+            except (ValueError, TypeError, AttributeError):
+                pass
+        elif key is not None:
+            theme = self.themes().get(key)
+        if theme is not None:
+            name = theme.name
+        elif key is not None:
+            name = key.replace("-", " ").title()
+        else:
+            name = "None"
+        if state["led_theme"] == "match":
+            name = f"Match ({name})"
+
+        animation = state["animation"]
+        animation_name = ANIMATIONS.get(animation, {}).get("name", animation.title())
+        brightness = int(round(state["brightness"] * 100))
+
+        lines = [
+            "<b>ForgeworkLights</b>",
+            f"Theme: {html.escape(name)}",
+            f"Animation: {html.escape(animation_name)}",
+            f"Brightness: {brightness}%",
+            f"Daemon: {'running' if running else 'stopped'}",
+        ]
+        if theme is not None:
+            if theme.key == control.PREVIEW_THEME:
+                lines.append(swatch(theme))
+            else:
+                cached = self._swatches.get(theme.key)
+                if cached is None:
+                    cached = self._swatches[theme.key] = swatch(theme)
+                lines.append(cached)
+
+        return {
+            "text": name if running else "Off",
+            "tooltip": "\n".join(lines),
+            "class": "running" if running else "stopped",
+        }
+
+    def emit(self) -> bool:
+        """Print the status line if it differs from the last one printed."""
+        line = json.dumps(self.status(), ensure_ascii=False)
+        if line == self.last_line:
+            return False
+        self.last_line = line
+        print(line, file=self.out, flush=True)
+        return True
+
+
+async def _stream(emitter: StatusEmitter) -> None:
+    """Emit on every bus event, file change and daemon poll until the pipe closes."""
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    files_changed = asyncio.Event()
+
+    watcher = Watcher()
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    config_wd = watcher.add(CONFIG_DIR)
+    # The daemon republishes its frame file on start, so starts show up at once
+    for directory in (THEME_SYMLINK.parent, RUNTIME_DIR):
+        if directory.is_dir():
+            watcher.add(directory)
+
+    def on_files() -> None:
+        events = watcher.read(0)
+        if any(wd == config_wd and name == THEMES_DB_PATH.name for wd, _mask, name in events):
+            emitter.invalidate_themes()
+        emitter.invalidate_state()
+        files_changed.set()
+        wake.set()
+
+    async def on_bus(events: bus.Subscriber) -> None:
+        async for event in events:
+            emitter.apply_event(event)
+            wake.set()
+
+    loop.add_reader(watcher.fileno(), on_files)
+    # Waybar stops the module with SIGTERM; unwind so the bus socket is removed
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        async with bus.Subscriber() as events:
+            forward = asyncio.create_task(on_bus(events))
+            next_poll = loop.time() + DAEMON_POLL_INTERVAL
+            try:
+                while True:
+                    try:
+                        await asyncio.wait_for(wake.wait(), max(0.0, next_poll - loop.time()))
+                    except asyncio.TimeoutError:
+                        pass
+                    wake.clear()
+                    if files_changed.is_set():
+                        # Let the rest of the burst land, then recompute once
+                        files_changed.clear()
+                        await asyncio.sleep(SETTLE_DELAY)
+                    if loop.time() >= next_poll:
+                        next_poll = loop.time() + DAEMON_POLL_INTERVAL
+                    emitter.daemon_pid = daemon_running(emitter.daemon_pid)
+                    emitter.emit()
+            finally:
+                forward.cancel()
+    finally:
+        loop.remove_reader(watcher.fileno())
+        watcher.close()
+
+
+def main(argv=None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if any(arg in ("-h", "--help") for arg in args):
+        print("Usage: forgeworklights-waybar [--once]")
+        print("Stream ForgeworkLights status to Waybar as JSON lines (\"return-type\": \"json\").")
+        print("--once prints the current status and exits.")
+        return 0
+
+    emitter = StatusEmitter()
+    emitter.daemon_pid = daemon_running()
+    try:
+        emitter.emit()
+    except BrokenPipeError:
+        return 0
+    if "--once" in args:
+        return 0
+
+    try:
+        asyncio.run(_stream(emitter))
+    except (BrokenPipeError, KeyboardInterrupt, asyncio.CancelledError):
+        # Waybar closed the pipe or stopped the module (reload/exit)
+        pass
+    return 0
@@ -3,6 +3,7 @@ ForgeworkLights TUI widgets
 """
 from .borders import BorderTop, BorderMiddle, Spacer, Filler, ControlFooterBorder
 from .status import StatusPanel
+from .led_mirror import LedMirror
 from .theme_selection import ThemeSelectionPanel
 from .brightness import BrightnessPanel
 from .theme_creator import ThemeCreator
@@ -19,6 +20,7 @@ __all__ = [
     "Filler",
     "ControlFooterBorder",
     "StatusPanel",
+    "LedMirror",
     "ThemeSelectionPanel",
     "BrightnessPanel",
     "ThemeCreator",
@@ -7,12 +7,13 @@ from textual.reactive import reactive
 from textual.app import ComposeResult
 from textual.message import Message
 from textual import events
-import json
-import sys
 from ..animations import ANIMATIONS
-from ..constants import ANIMATION_FILE, ANIMATION_PARAMS_FILE
+from .. import control
+from ..constants import PARAM_COMMIT_INTERVAL
 from .parameter_slider import ParameterSlider
 from ..theme import THEME
+from ..diagnostics import timed
+from ..io_executor import IO
 
 
 class AnimationsList(Vertical):
@@ -66,6 +67,13 @@ class AnimationsPanel(Static):
             self.animation_name = animation_name
             self.params = params
     
+    class ParametersChanged(Message):
+        """Message when parameters of the running animation should be committed"""
+        def __init__(self, animation_name: str, params: dict):
+            super().__init__()
+            self.animation_name = animation_name
+            self.params = params
+    
     class ListNavigated(Message):
         """Internal message when list navigation occurs"""
         def __init__(self, index: int):
@@ -90,6 +98,9 @@ class AnimationsPanel(Static):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.can_focus = False  # Parent doesn't need focus - children handle it
+        self._committed_animation = None  # Animation id last written to disk
+        self._params_dirty = False
+        self._commit_timer = None
     
     def compose(self) -> ComposeResult:
         """Compose split view: animations list (left) and parameters (right)"""
@@ -99,14 +110,13 @@ class AnimationsPanel(Static):
             with ParametersContainer(id="animations-right", classes="animations-section"):
                 yield Static("", id="animations-params-header")
     
-    def on_mount(self) -> None:
+    async def on_mount(self) -> None:
         """Initialize display and load current animation"""
-        # Load parameters from file
-        self._load_params()
-        
-        # Load current animation from config file
-        if ANIMATION_FILE.exists():
-            self.selected_animation = ANIMATION_FILE.read_text().strip()
+        # Load current animation and its parameters
+        state = await IO.run(control.read_state)
+        self.animation_params = state["animation_params"]
+        self.selected_animation = state["animation"]
+        self._committed_animation = state["animation"]
         
         # Sync focused index with currently selected animation
         try:
@@ -119,27 +129,6 @@ class AnimationsPanel(Static):
         
         self._update_display()
     
-    def _load_params(self) -> None:
-        """Load animation parameters from JSON file"""
-        if ANIMATION_PARAMS_FILE.exists():
-            try:
-                self.animation_params = json.loads(ANIMATION_PARAMS_FILE.read_text())
-                print(f"[AnimationsPanel] Loaded params from {ANIMATION_PARAMS_FILE}", file=sys.stderr)
-            except Exception as e:
-                print(f"[AnimationsPanel] Failed to load params: {e}", file=sys.stderr)
-                self.animation_params = {}
-        else:
-            self.animation_params = {}
-    
-    def _save_params(self) -> None:
-        """Save animation parameters to JSON file"""
-        try:
-            ANIMATION_PARAMS_FILE.parent.mkdir(parents=True, exist_ok=True)
-            ANIMATION_PARAMS_FILE.write_text(json.dumps(self.animation_params, indent=2))
-            print(f"[AnimationsPanel] Saved params to {ANIMATION_PARAMS_FILE}", file=sys.stderr)
-        except Exception as e:
-            print(f"[AnimationsPanel] Failed to save params: {e}", file=sys.stderr)
-    
     def _get_param_value(self, anim_id: str, param_name: str, default: float) -> float:
         """Get parameter value or default"""
         if anim_id in self.animation_params:
@@ -214,19 +203,47 @@ class AnimationsPanel(Static):
             self.sliders.append(slider)
             params_container.mount(slider)
     
+    @timed
     def on_parameter_slider_value_changed(self, message: ParameterSlider.ValueChanged) -> None:
         """Handle slider value changes"""
-        # Save to params dict
+        # Update in memory right away; the disk commit is throttled so a drag
+        # produces at most one write per PARAM_COMMIT_INTERVAL
         if self.selected_animation not in self.animation_params:
             self.animation_params[self.selected_animation] = {}
         self.animation_params[self.selected_animation][message.param_name] = message.value
         
-        # Save to file and send animation with new params (but don't rebuild display)
-        self._save_params()
-        params = self.animation_params.get(self.selected_animation, {})
-        self.post_message(self.AnimationSelected(self.selected_animation, params))
+        self._params_dirty = True
+        if self._commit_timer is None:
+            self._commit_timer = self.set_timer(PARAM_COMMIT_INTERVAL, self._commit_params)
         message.stop()  # Prevent bubbling
     
+    def on_descendant_blur(self, event: events.DescendantBlur) -> None:
+        """Commit pending parameter changes when a slider loses focus"""
+        if isinstance(event.widget, ParameterSlider):
+            self.flush_params()
+    
+    def flush_params(self) -> None:
+        """Commit pending parameter changes now instead of at the next tick"""
+        if self._commit_timer is not None:
+            self._commit_timer.stop()
+        self._commit_params()
+    
+    def on_unmount(self) -> None:
+        """Don't lose a drag that ends with the app closing"""
+        if self._params_dirty:
+            params = dict(self.animation_params.get(self.selected_animation, {}))
+            IO.update_control(animation_params={self.selected_animation: params})
+            self._params_dirty = False
+    
+    def _commit_params(self) -> None:
+        """Send the latest parameters of the current animation (if changed)"""
+        self._commit_timer = None
+        if not self._params_dirty:
+            return
+        self._params_dirty = False
+        params = dict(self.animation_params.get(self.selected_animation, {}))
+        self.post_message(self.ParametersChanged(self.selected_animation, params))
+    
     def on_animations_panel_list_navigated(self, message: ListNavigated) -> None:
         """Handle animation list navigation"""
         self.focused_index = message.index
@@ -256,8 +273,18 @@ class AnimationsPanel(Static):
     
     def _apply_animation(self) -> None:
         """Apply the current animation with parameters"""
-        params = self.animation_params.get(self.selected_animation, {})
-        self.post_message(self.AnimationSelected(self.selected_animation, params))
+        # The selection carries the latest params, superseding any pending commit
+        if self._commit_timer is not None:
+            self._commit_timer.stop()
+            self._commit_timer = None
+        self._params_dirty = False
+        params = dict(self.animation_params.get(self.selected_animation, {}))
+        if self.selected_animation == self._committed_animation:
+            # Re-selecting the running animation only touches its parameters
+            self.post_message(self.ParametersChanged(self.selected_animation, params))
+        else:
+            self._committed_animation = self.selected_animation
+            self.post_message(self.AnimationSelected(self.selected_animation, params))
         self._update_display()
     
     def on_focus(self, event: events.Focus) -> None:
@@ -0,0 +1,95 @@
+"""
+Live LED strip mirror - shows the frame the daemon last sent to the strip,
+or plays a clip (see tui.clip)
+"""
+import time
+
+from textual.widgets import Static
+from textual.timer import Timer
+
+from ..constants import MIRROR_POLL_INTERVAL
+from ..clip import Player
+from ..frames import FrameReader
+from ..theme import THEME
+
+
+class LedMirror(Static):
+    """One line showing every LED as the daemon drives it (read from FRAME_FILE)
+
+    Polls at the daemon's frame rate while visible, redraws only when the
+    daemon has published a new frame, and stops polling while hidden or
+    while a resident app has no terminal attached (set_paused).
+
+    Given a clip (tui.clip.Clip), it loops that instead, frames timed as
+    recorded, and leaves the daemon alone. paused starts it paused, as a
+    resident app does until a terminal attaches.
+    """
+
+    def __init__(self, clip=None, paused: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._reader = FrameReader()
+        self._player = Player(clip) if clip is not None else None
+        self._clip_started = time.monotonic()
+        self._frame = b""
+        self._timer: Timer | None = None
+        self._hidden = False
+        self._paused = paused
+
+    def on_mount(self) -> None:
+        self._timer = self.set_interval(MIRROR_POLL_INTERVAL, self._poll)
+        self._update_timer()
+
+    def on_show(self) -> None:
+        self._hidden = False
+        self._update_timer()
+
+    def on_hide(self) -> None:
+        self._hidden = True
+        self._update_timer()
+
+    def set_paused(self, paused: bool) -> None:
+        self._paused = paused
+        self._update_timer()
+
+    def _update_timer(self) -> None:
+        if self._timer is None:
+            return
+        if self._hidden or self._paused:
+            self._timer.pause()
+        else:
+            self._timer.resume()
+
+    def on_unmount(self) -> None:
+        self._reader.close()
+
+    def _poll(self) -> None:
+        if self._player is not None:
+            frame = self._player.frame_at(time.monotonic() - self._clip_started)
+        else:
+            frame = self._reader.poll()
+        if frame is not None and frame != self._frame:
+            self._frame = frame
+            self.refresh()
+
+    def render(self) -> str:
+        width = max(60, self.size.width if self.size.width > 0 else 70)
+        content_width = width - 2  # Account for │  │
+        border_color = THEME["box_outline"]
+        label = "   Clip: " if self._player is not None else "   LEDs: "
+
+        frame = self._frame
+        count = len(frame) // 3
+        if count:
+            # Two cells per LED when they fit, otherwise one
+            cell = "██" if count * 2 <= content_width - len(label) else "█"
+            count = min(count, (content_width - len(label)) // len(cell))
+            leds = "".join(
+                f"[#{frame[i]:02x}{frame[i + 1]:02x}{frame[i + 2]:02x}]{cell}[/]"
+                for i in range(0, count * 3, 3)
+            )
+            padding = content_width - len(label) - count * len(cell)
+            body = f"[{THEME['main_fg']}]{label}[/]{leds}{' ' * padding}"
+        else:
+            waiting = "empty clip" if self._player is not None else "waiting for daemon"
+            body = f"[dim]{label + waiting:<{content_width}}[/]"
+        return f"[{border_color}]│[/]{body}[{border_color}]│[/]"
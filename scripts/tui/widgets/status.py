@@ -1,16 +1,11 @@
 """
 Status panel widget for ForgeworkLights TUI
 """
-from pathlib import Path
 from textual.widgets import Static
 from textual.reactive import reactive
 
 from ..theme import THEME
 
-# Import paths from constants
-THEME_SYMLINK = Path.home() / ".config/omarchy/current/theme"
-LED_THEME_FILE = Path.home() / ".config/forgeworklights/led-theme"
-
 
 class StatusPanel(Static):
     """Display daemon status information"""
@@ -35,28 +30,8 @@ class StatusPanel(Static):
         width = max(60, self.size.width if self.size.width > 0 else 70)
         content_width = width - 2  # Account for │  │
         
-        # Read LED theme preference - match gradient panel pattern
-        led_theme = "match"
-        try:
-            if LED_THEME_FILE.exists():
-                led_theme = LED_THEME_FILE.read_text().strip()
-        except:
-            pass
-        
-        # Get theme display - read symlink directly like gradient panel does
-        if led_theme == "match":
-            # Get current Omarchy theme by reading symlink directly
-            omarchy_theme_name = "Unknown"
-            try:
-                if THEME_SYMLINK.exists() and THEME_SYMLINK.is_symlink():
-                    theme_dir = THEME_SYMLINK.resolve()
-                    omarchy_theme_name = theme_dir.name.capitalize()
-            except:
-                pass
-            theme_display = f"Match ({omarchy_theme_name})"
-        else:
-            # Use specific LED theme name
-            theme_display = led_theme.capitalize()
+        # Theme display is resolved by the app (off the UI loop) on refresh
+        theme_display = self.current_theme or "Unknown"
         
         # Format status lines (brightness is shown via dedicated slider widget)
         hint_text = " TAB to switch sections (shift=reverse)"
@@ -8,17 +8,30 @@ from textual.app import ComposeResult
 from textual.message import Message
 from textual import events
 from pathlib import Path
-import json
+import asyncio
 import sys
-import subprocess
 from .color_selector import ColorSelector
 from .countdown_bar import CountdownBar
 from .theme_button import ThemeButton
-from ..utils.colors import generate_gradient
-from ..constants import LED_THEME_FILE, DAEMON_BINARY
+from .. import control, themes_db
+from ..io_executor import IO
 from ..theme import THEME
 
 
+def _drop_preview_theme(db_data: dict) -> bool:
+    """update_json mutator: remove the temporary preview theme (no write if absent)"""
+    themes = db_data.get("themes", {})
+    if "__preview__" not in themes:
+        return False
+    del themes["__preview__"]
+    return True
+
+
+def _end_preview(saved_theme) -> None:
+    """I/O thread: restore the LED theme captured when the preview started"""
+    control.end_preview(saved_theme.result())
+
+
 class ThemeCreator(Container):
     """Widget for creating custom themes with 3-color gradients"""
     
@@ -41,16 +54,13 @@ class ThemeCreator(Container):
         self.themes_db_path = themes_db_path
         self.can_focus = False  # Don't take focus, let inputs handle it
         self.editing_theme_key = None  # Track if we're editing an existing theme
+        self.editing_mode = themes_db.DEFAULT_MODE  # Interpolation mode kept when saving an edit
     
     def on_mount(self) -> None:
         """Initialize preview and color picker"""
         try:
             # Clean up any leftover preview theme from previous session
-            if self.themes_db_path.exists():
-                db_data = json.loads(self.themes_db_path.read_text())
-                if "__preview__" in db_data.get("themes", {}):
-                    del db_data["themes"]["__preview__"]
-                    self.themes_db_path.write_text(json.dumps(db_data, indent=2))
+            IO.submit(themes_db.update_db, _drop_preview_theme, self.themes_db_path)
             
             self._update_preview()
             # Initialize color picker with first color
@@ -120,59 +130,27 @@ class ThemeCreator(Container):
         preview = self.query_one("#gradient-preview", Static)
         
         # Create compact 2-line gradient preview - width should span 3 color inputs (14 chars each + spacing = ~45)
-        gradient = self._create_gradient_preview([self.color1, self.color2, self.color3], 45)
+        theme = themes_db.Theme.from_hex("", self.theme_name, [self.color1, self.color2, self.color3], self.editing_mode)
+        gradient = self._create_gradient_preview(theme, 45)
         preview.update(gradient)
     
-    def _create_gradient_preview(self, colors, width):
-        """Create a gradient preview string with thick blocks"""
-        lines = []
-        # Create 2 lines of compact gradient
-        for _ in range(2):
-            result = []
-            for i in range(width):
-                # Interpolate between the three colors
-                pos = i / (width - 1) if width > 1 else 0
-                
-                if pos <= 0.5:
-                    # First half: interpolate between color1 and color2
-                    t = pos * 2
-                    color = self._interpolate_colors(colors[0], colors[1], t)
-                else:
-                    # Second half: interpolate between color2 and color3
-                    t = (pos - 0.5) * 2
-                    color = self._interpolate_colors(colors[1], colors[2], t)
-                
-                result.append(f"[{color}]█[/]")
-            lines.append("".join(result))
-        
-        return "\n".join(lines)
-    
-    def _interpolate_colors(self, color1, color2, t):
-        """Interpolate between two hex colors"""
-        # Parse hex colors
-        r1 = int(color1[1:3], 16)
-        g1 = int(color1[3:5], 16)
-        b1 = int(color1[5:7], 16)
-        
-        r2 = int(color2[1:3], 16)
-        g2 = int(color2[3:5], 16)
-        b2 = int(color2[5:7], 16)
-        
-        # Interpolate
-        r = int(r1 + (r2 - r1) * t)
-        g = int(g1 + (g2 - g1) * t)
-        b = int(b1 + (b2 - b1) * t)
-        
-        return f"#{r:02x}{g:02x}{b:02x}"
+    def _create_gradient_preview(self, theme: themes_db.Theme, width):
+        """Create a 2-line gradient preview string with thick blocks (same resampling as the daemon)"""
+        row = "".join(f"[{color}]█[/]" for color in themes_db.gradient(theme, width))
+        return f"{row}\n{row}"
     
-    def load_theme_for_editing(self, theme_key: str, theme_name: str, colors: list) -> None:
-        """Load a theme into the creator for editing"""
-        print(f"\n*** Loading theme for editing: {theme_key} ***", file=sys.stderr)
+    def load_theme_for_editing(self, theme: themes_db.Theme) -> None:
+        """Load a theme record into the creator for editing"""
+        print(f"\n*** Loading theme for editing: {theme.key} ***", file=sys.stderr)
         
-        # Store the theme key for editing
-        self.editing_theme_key = theme_key
+        # Store the theme key and mode for editing
+        self.editing_theme_key = theme.key
+        self.editing_mode = theme.mode
+        theme_name = theme.name
         
-        # Extract first, middle, and last colors from the 22-color gradient
+        # Take first, middle, and last control points (legacy themes store an
+        # expanded gradient; three-stop themes map straight back)
+        colors = theme.hex_stops()
         if len(colors) >= 3:
             self.color1 = colors[0]
             self.color2 = colors[len(colors) // 2]
@@ -211,37 +189,10 @@ class ThemeCreator(Container):
             return
         
         try:
-            # Generate the 22-color gradient
-            colors_22 = generate_gradient([self.color1, self.color2, self.color3], 22)
-            
-            if len(colors_22) != 22:
-                preview.update(f"✗ Got {len(colors_22)} colors, expected 22")
-                return
-            
-            # Save current theme to restore later
-            if LED_THEME_FILE.exists():
-                self.saved_theme = LED_THEME_FILE.read_text().strip()
-            else:
-                self.saved_theme = "match"
-            
-            # Create temporary preview theme
-            if self.themes_db_path.exists():
-                db_data = json.loads(self.themes_db_path.read_text())
-            else:
-                db_data = {"themes": {}}
-            
-            db_data["themes"]["__preview__"] = {
-                "name": "Preview",
-                "colors": colors_22
-            }
-            
-            # Save themes database with preview theme
-            self.themes_db_path.write_text(json.dumps(db_data, indent=2))
-            
-            # Apply preview theme
-            LED_THEME_FILE.parent.mkdir(parents=True, exist_ok=True)
-            LED_THEME_FILE.write_text("__preview__\n")
-            LED_THEME_FILE.touch()
+            # Apply the temporary preview theme (the daemon expands the stops to
+            # its strip length); the future resolves to the theme to restore afterwards
+            stops = [self.color1, self.color2, self.color3]
+            self.saved_theme = IO.submit(control.begin_preview, stops)
             
             # Show countdown and mark as previewing
             self.is_previewing = True
@@ -269,16 +220,8 @@ class ThemeCreator(Container):
             countdown = self.query_one("#preview-countdown", CountdownBar)
             preview = self.query_one("#gradient-preview", Static)
             
-            # Remove the temporary preview theme from database
-            if self.themes_db_path.exists():
-                db_data = json.loads(self.themes_db_path.read_text())
-                if "__preview__" in db_data.get("themes", {}):
-                    del db_data["themes"]["__preview__"]
-                    self.themes_db_path.write_text(json.dumps(db_data, indent=2))
-            
-            # Restore original theme
-            LED_THEME_FILE.write_text(f"{self.saved_theme}\n")
-            LED_THEME_FILE.touch()
+            # Remove the temporary preview theme and restore the original theme
+            IO.submit(_end_preview, self.saved_theme)
             
             # Hide countdown bar
             countdown.display = False
@@ -319,19 +262,8 @@ class ThemeCreator(Container):
             preview.update("✗ Invalid color format")
             return
         
-        # Generate the 22-color gradient
         try:
-            colors_22 = generate_gradient([self.color1, self.color2, self.color3], 22)
-            
-            if len(colors_22) != 22:
-                preview.update(f"✗ Got {len(colors_22)} colors, expected 22")
-                return
-            
-            # Load existing themes
-            if self.themes_db_path.exists():
-                db_data = json.loads(self.themes_db_path.read_text())
-            else:
-                db_data = {"themes": {}}
+            stops = [self.color1, self.color2, self.color3]
             
             # Add or update theme
             if self.editing_theme_key:
@@ -339,29 +271,46 @@ class ThemeCreator(Container):
             else:
                 theme_key = self.theme_name.lower().replace(' ', '-')
             
-            db_data["themes"][theme_key] = {
-                "name": self.theme_name.title(),
-                "colors": colors_22
-            }
-            
-            # Save back to file
-            self.themes_db_path.write_text(json.dumps(db_data, indent=2))
+            # Only the control points are stored; gradients are expanded on demand
+            theme_entry = themes_db.make_entry(self.theme_name.title(), stops, self.editing_mode)
             
-            # Show success message
-            action_verb = "Updated" if self.editing_theme_key else "Saved"
-            theme_input.placeholder = f"✓ {action_verb} '{self.theme_name}'!"
-            preview.update(f"✓ {action_verb} '{self.theme_name}' with {len(colors_22)} colors!")
+            # Read-modify-write the database on the I/O thread
+            def add_theme(db_data):
+                db_data.setdefault("themes", {})[theme_key] = theme_entry
+            saved = IO.submit(themes_db.update_db, add_theme, self.themes_db_path)
             
-            # Post message to notify app
-            self.post_message(self.ThemeCreated(theme_key))
-            
-            # Clear inputs and exit editing mode
-            self.action_clear()
+            self.run_worker(
+                self._finish_save(saved, theme_key, self.theme_name, len(stops)),
+                name="save_theme",
+                group="theme-creator",
+            )
             
         except Exception as e:
             theme_input.placeholder = f"✗ Error: {str(e)}"
             preview.update(f"✗ Error: {str(e)[:50]}")
     
+    async def _finish_save(self, saved, theme_key: str, theme_name: str, color_count: int) -> None:
+        """Report the result of a queued save once the write has landed"""
+        theme_input = self.query_one("#theme-name-input", Input)
+        preview = self.query_one("#gradient-preview", Static)
+        try:
+            await asyncio.wrap_future(saved)
+        except Exception as e:
+            theme_input.placeholder = f"✗ Error: {str(e)}"
+            preview.update(f"✗ Error: {str(e)[:50]}")
+            return
+        
+        # Show success message
+        action_verb = "Updated" if self.editing_theme_key else "Saved"
+        theme_input.placeholder = f"✓ {action_verb} '{theme_name}'!"
+        preview.update(f"✓ {action_verb} '{theme_name}' with {color_count} colors!")
+        
+        # Post message to notify app
+        self.post_message(self.ThemeCreated(theme_key))
+        
+        # Clear inputs and exit editing mode
+        self.action_clear()
+    
     def action_clear(self) -> None:
         """Clear all inputs"""
         self.theme_name = ""
@@ -369,6 +318,7 @@ class ThemeCreator(Container):
         self.color2 = "#ff006e"
         self.color3 = "#3a0ca3"
         self.editing_theme_key = None  # Exit editing mode
+        self.editing_mode = themes_db.DEFAULT_MODE
         theme_input = self.query_one("#theme-name-input", Input)
         theme_input.value = ""
         theme_input.placeholder = "Theme Name"
@@ -1,7 +1,6 @@
 """
 Theme selection panel widget for ForgeworkLights TUI
 """
-import json
 import re
 from pathlib import Path
 from textual.containers import ScrollableContainer
@@ -10,8 +9,12 @@ from textual.reactive import reactive
 from textual.app import ComposeResult
 from textual.message import Message
 
-from ..constants import THEMES_DB_PATH, THEME_SYMLINK, LED_THEME_FILE
+from ..constants import THEMES_DB_PATH
+from .. import themes_db
+from .. import control
 from ..theme import THEME
+from ..diagnostics import timed
+from ..io_executor import IO
 
 
 class ThemeSelectionPanel(ScrollableContainer):
@@ -26,11 +29,11 @@ class ThemeSelectionPanel(ScrollableContainer):
     
     class ThemeEditRequested(Message):
         """Message when a theme edit is requested"""
-        def __init__(self, theme_key: str, theme_name: str, colors: list):
+        def __init__(self, theme: themes_db.Theme):
             super().__init__()
-            self.theme_key = theme_key
-            self.theme_name = theme_name
-            self.colors = colors
+            self.theme = theme
+            self.theme_key = theme.key
+            self.theme_name = theme.name
     
     class ThemeDeleteRequested(Message):
         """Message when a theme delete is requested"""
@@ -44,6 +47,7 @@ class ThemeSelectionPanel(ScrollableContainer):
         pass
     
     current_theme = reactive("")
+    led_theme = reactive("match")  # Contents of the led-theme file
     selected_index = reactive(0)
     selected_element = reactive("name")  # 'name', 'edit', or 'delete'
     is_focused = reactive(False)
@@ -63,7 +67,8 @@ class ThemeSelectionPanel(ScrollableContainer):
         super().__init__(**kwargs)
         self._content = Static("", id="theme-selection-content")
         self._content.can_focus = False  # Prevent inner widget from stealing focus
-        self._theme_list = []  # Store theme keys for navigation
+        self._theme_list = ["__MATCH_OMARCHY__"]  # Theme keys for navigation, rebuilt per load
+        self._themes = {}  # Listed Theme records by key (sorted), rebuilt per load
         self.can_focus = True
     
     def compose(self) -> ComposeResult:
@@ -73,32 +78,50 @@ class ThemeSelectionPanel(ScrollableContainer):
         """Update display when theme changes"""
         self._update_display()
     
+    def watch_led_theme(self, led_theme: str) -> None:
+        """Move the current-theme arrow when the LED theme changes"""
+        self._update_display()
+    
     def on_mount(self) -> None:
         """Initial display"""
         self._update_display()
+        self.reload_themes()
+    
+    def reload_themes(self) -> None:
+        """Re-read the themes database (off the UI loop) and redraw"""
+        self.run_worker(self._load_themes(), name="load_themes", group="theme-db", exclusive=True)
+    
+    async def _load_themes(self) -> None:
+        state = await IO.run(control.read_state)
+        led_theme = state["led_theme"]
+        db_data = await IO.read_json(THEMES_DB_PATH, {})
+        records = await IO.run(themes_db.load, db_data)
+        # Hide the temporary preview theme and anything without three stops
+        self._themes = {
+            key: theme for key, theme in records.items()
+            if key != "__preview__" and theme.count >= 3
+        }
+        self._theme_list = ["__MATCH_OMARCHY__", *self._themes]
+        self.led_theme = led_theme
+        self._update_display()
     
     def on_resize(self) -> None:
         """Refresh display on resize"""
         self._update_display()
     
+    @timed
     def _update_display(self) -> None:
         """Render theme list with selection highlighting"""
         width = max(60, self.size.width if self.size.width > 0 else 70)
         content_width = width - 4  # Account for borders │  │
         
         lines = []
-        self._theme_list = []
         
         # Use reactive focus state - only show selection highlight if focused
         show_highlight = self.is_focused
         
         # Get current LED theme setting
-        led_theme = "match"
-        try:
-            if LED_THEME_FILE.exists():
-                led_theme = LED_THEME_FILE.read_text().strip()
-        except:
-            pass
+        led_theme = self.led_theme
         
         try:
             # Add instruction line at top (below Theme Selection border)
@@ -110,7 +133,6 @@ class ThemeSelectionPanel(ScrollableContainer):
             lines.append(instr_line)
             
             # Add "Match Omarchy Theme" option at the top
-            self._theme_list.append("__MATCH_OMARCHY__")
             is_selected = self.selected_index == 0
             marker = "→" if led_theme == "match" else " "
             
@@ -132,98 +154,90 @@ class ThemeSelectionPanel(ScrollableContainer):
             blank_padding = max(1, width - 2)  # -2 for borders
             lines.append(f"[{THEME['box_outline']}]│{' ' * blank_padding}│[/]")
             
-            # Load and display themes from database
-            if THEMES_DB_PATH.exists():
-                db_data = json.loads(THEMES_DB_PATH.read_text())
-                if "themes" in db_data:
-                    for idx, theme_key in enumerate(sorted(db_data["themes"].keys()), start=1):
-                        if theme_key == "__preview__":
-                            continue  # hide temporary preview theme
-                        theme_data = db_data["themes"][theme_key]
-                        colors = theme_data.get("colors", [])
-                        theme_name = theme_data.get("name", theme_key)
+            # Display themes from the cached database
+            if self._themes:
+                for idx, theme in enumerate(self._themes.values(), start=1):
+                    theme_key = theme.key
+                    theme_name = theme.name
                         
-                        if len(colors) >= 3:
-                            self._theme_list.append(theme_key)
+                    # Mark current LED theme (not Omarchy theme)
+                    marker = "→" if theme_key == led_theme else " "
+                    is_selected = self.selected_index == idx
 
-                            # Mark current LED theme (not Omarchy theme)
-                            marker = "→" if theme_key == led_theme else " "
-                            is_selected = self.selected_index == idx
+                    # Theme name column
+                    name_padded = f"{theme_name[:18]:<18}"
+                        
+                    # Show confirmation message if this theme is pending deletion
+                    # Note: 🗑 emoji and ✓ both take 2 char widths in most terminals, ✎ takes 1 char
+                    if self.pending_delete_key == theme_key:
+                        icons = " ✎ ✓"  # space(1) + edit(1) + space(1) + check(2)
+                        icons_width = 5
+                        trailing_spaces = 1
+                    else:
+                        icons = " ✎ 🗑"  # space(1) + edit(1) + space(1) + trash(2)
+                        icons_width = 5
+                        trailing_spaces = 1
 
-                            # Theme name column
-                            name_padded = f"{theme_name[:18]:<18}"
-                            
-                            # Show confirmation message if this theme is pending deletion
-                            # Note: 🗑 emoji and ✓ both take 2 char widths in most terminals, ✎ takes 1 char
+                    # Use remaining content width for the gradient preview, leaving room for name and icons
+                    # marker(1) + space(1) + name(18) + space(1) + gradient(width) + spaces + icons(width) + trailing_spaces + borders(2)
+                    # First, choose a tentative maximum for gradient width based on available content width
+                    max_gradient_width = max(10, content_width - (1 + 1 + 18 + 1 + icons_width + trailing_spaces + 4))
+                    gradient_width = max_gradient_width
+                    gradient = self._create_gradient_preview(theme, gradient_width)
+
+                    # Recompute visible length including borders so we can pad out to full panel width
+                    visible_len = 1 + 1 + 18 + 1 + gradient_width + icons_width + trailing_spaces + 2
+                    padding_needed = max(1, width - visible_len)
+                        
+                    # Build line with selection highlight (only when focused)
+                    # Highlight different parts based on selected_element
+                    if is_selected and show_highlight:
+                        if self.selected_element == "name":
+                            # Highlight theme name only
+                            line = f"│ {marker} [bold {THEME['hi_fg']} on {THEME['selected_bg']}]{name_padded}[/] {gradient}{' ' * padding_needed}{icons}{' ' * trailing_spaces}│"
+                        elif self.selected_element == "edit":
+                            # Highlight edit icon with background (2 chars wide)
                             if self.pending_delete_key == theme_key:
-                                icons = " ✎ ✓"  # space(1) + edit(1) + space(1) + check(2)
-                                icons_width = 5
-                                trailing_spaces = 1
+                                # " ✎ ✓ " with edit highlighted (check is 2 chars wide)
+                                line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} [bold {THEME['hi_fg']} on {THEME['selected_bg']}]✎ [/]✓ │"
                             else:
-                                icons = " ✎ 🗑"  # space(1) + edit(1) + space(1) + trash(2)
-                                icons_width = 5
-                                trailing_spaces = 1
-
-                            # Use remaining content width for the gradient preview, leaving room for name and icons
-                            # marker(1) + space(1) + name(18) + space(1) + gradient(width) + spaces + icons(width) + trailing_spaces + borders(2)
-                            # First, choose a tentative maximum for gradient width based on available content width
-                            max_gradient_width = max(10, content_width - (1 + 1 + 18 + 1 + icons_width + trailing_spaces + 4))
-                            gradient_width = max_gradient_width
-                            gradient = self._create_gradient_preview(colors, gradient_width)
-
-                            # Recompute visible length including borders so we can pad out to full panel width
-                            visible_len = 1 + 1 + 18 + 1 + gradient_width + icons_width + trailing_spaces + 2
-                            padding_needed = max(1, width - visible_len)
-                            
-                            # Build line with selection highlight (only when focused)
-                            # Highlight different parts based on selected_element
-                            if is_selected and show_highlight:
-                                if self.selected_element == "name":
-                                    # Highlight theme name only
-                                    line = f"│ {marker} [bold {THEME['hi_fg']} on {THEME['selected_bg']}]{name_padded}[/] {gradient}{' ' * padding_needed}{icons}{' ' * trailing_spaces}│"
-                                elif self.selected_element == "edit":
-                                    # Highlight edit icon with background (2 chars wide)
-                                    if self.pending_delete_key == theme_key:
-                                        # " ✎ ✓ " with edit highlighted (check is 2 chars wide)
-                                        line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} [bold {THEME['hi_fg']} on {THEME['selected_bg']}]✎ [/]✓ │"
-                                    else:
-                                        # " ✎ 🗑 " with edit highlighted
-                                        line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} [bold {THEME['hi_fg']} on {THEME['selected_bg']}]✎ [/]🗑 │"
-                                elif self.selected_element == "delete":
-                                    # Highlight delete icon with background (2 chars wide)
-                                    if self.pending_delete_key == theme_key:
-                                        # " ✎ ✓ " with checkmark highlighted (check is 2 chars wide)
-                                        line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} ✎ [bold {THEME['hi_fg']} on {THEME['selected_bg']}]✓[/] │"
-                                    else:
-                                        # " ✎ 🗑 " with trash highlighted (edit in normal color)
-                                        line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} ✎ [bold {THEME['hi_fg']} on {THEME['selected_bg']}]🗑[/] │"
+                                # " ✎ 🗑 " with edit highlighted
+                                line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} [bold {THEME['hi_fg']} on {THEME['selected_bg']}]✎ [/]🗑 │"
+                        elif self.selected_element == "delete":
+                            # Highlight delete icon with background (2 chars wide)
+                            if self.pending_delete_key == theme_key:
+                                # " ✎ ✓ " with checkmark highlighted (check is 2 chars wide)
+                                line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} ✎ [bold {THEME['hi_fg']} on {THEME['selected_bg']}]✓[/] │"
                             else:
-                                line = f"│ [{THEME['main_fg']}]{marker} {name_padded}[/] {gradient}{' ' * padding_needed}{icons}{' ' * trailing_spaces}│"
-                            
-                            lines.append(f"[{THEME['box_outline']}]{line}[/]")
+                                # " ✎ 🗑 " with trash highlighted (edit in normal color)
+                                line = f"│ {marker} {name_padded} {gradient}{' ' * padding_needed} ✎ [bold {THEME['hi_fg']} on {THEME['selected_bg']}]🗑[/] │"
+                    else:
+                        line = f"│ [{THEME['main_fg']}]{marker} {name_padded}[/] {gradient}{' ' * padding_needed}{icons}{' ' * trailing_spaces}│"
+                        
+                    lines.append(f"[{THEME['box_outline']}]{line}[/]")
                     
-                    # Add blank line after theme list
-                    if self._theme_list:  # Only if themes were added
-                        blank_padding = max(1, width - 2)  # -2 for borders
-                        lines.append(f"[{THEME['box_outline']}]│{' ' * blank_padding}│[/]")
+                # Add blank line after theme list
+                if self._theme_list:  # Only if themes were added
+                    blank_padding = max(1, width - 2)  # -2 for borders
+                    lines.append(f"[{THEME['box_outline']}]│{' ' * blank_padding}│[/]")
                     
-                    # Add Sync button in bottom right
-                    sync_text = "Sync"
-                    # Total visible length: sync_text + borders(2)
-                    sync_padding = max(1, width - len(sync_text) - 2)
-                    # Check if Sync is the selected element (last item in list)
-                    is_sync_selected = (len(self._theme_list) > 0 and 
-                                       self.selected_index == len(self._theme_list) and
-                                       self.selected_element == "name")
+                # Add Sync button in bottom right
+                sync_text = "Sync"
+                # Total visible length: sync_text + borders(2)
+                sync_padding = max(1, width - len(sync_text) - 2)
+                # Check if Sync is the selected element (last item in list)
+                is_sync_selected = (len(self._theme_list) > 0 and 
+                                   self.selected_index == len(self._theme_list) and
+                                   self.selected_element == "name")
                     
-                    if is_sync_selected and show_highlight:
-                        # Highlighted - use theme colors
-                        sync_line = f"[{THEME['box_outline']}]│{' ' * sync_padding}[bold {THEME['hi_fg']} on {THEME['selected_bg']}]{sync_text}[/]│[/]"
-                    else:
-                        # Normal - use theme colors
-                        sync_line = f"[{THEME['box_outline']}]│{' ' * sync_padding}[{THEME['main_fg']}]{sync_text}[/]│[/]"
+                if is_sync_selected and show_highlight:
+                    # Highlighted - use theme colors
+                    sync_line = f"[{THEME['box_outline']}]│{' ' * sync_padding}[bold {THEME['hi_fg']} on {THEME['selected_bg']}]{sync_text}[/]│[/]"
+                else:
+                    # Normal - use theme colors
+                    sync_line = f"[{THEME['box_outline']}]│{' ' * sync_padding}[{THEME['main_fg']}]{sync_text}[/]│[/]"
                     
-                    lines.append(sync_line)
+                lines.append(sync_line)
             
             if len(lines) <= 1:
                 empty_text = "No themes found"
@@ -471,17 +485,12 @@ class ThemeSelectionPanel(ScrollableContainer):
         if theme_key == "__MATCH_OMARCHY__":
             return  # Can't edit Match Omarchy option
         
-        # Load theme data from database
+        # Look up theme data in the cached database
         try:
-            if THEMES_DB_PATH.exists():
-                db_data = json.loads(THEMES_DB_PATH.read_text())
-                if "themes" in db_data and theme_key in db_data["themes"]:
-                    theme_data = db_data["themes"][theme_key]
-                    colors = theme_data.get("colors", [])
-                    theme_name = theme_data.get("name", theme_key)
-                    
-                    # Post message to load theme for editing
-                    self.post_message(self.ThemeEditRequested(theme_key, theme_name, colors))
+            theme = self._themes.get(theme_key)
+            if theme is not None:
+                # Post message to load theme for editing
+                self.post_message(self.ThemeEditRequested(theme))
         except Exception as e:
             import sys
             print(f"Error loading theme for editing: {e}", file=sys.stderr)
@@ -499,17 +508,13 @@ class ThemeSelectionPanel(ScrollableContainer):
         if self.pending_delete_key == theme_key:
             # Second click - confirm deletion
             try:
-                if THEMES_DB_PATH.exists():
-                    db_data = json.loads(THEMES_DB_PATH.read_text())
-                    if "themes" in db_data and theme_key in db_data["themes"]:
-                        theme_data = db_data["themes"][theme_key]
-                        theme_name = theme_data.get("name", theme_key)
-                        
-                        # Post message to request theme deletion
-                        self.post_message(self.ThemeDeleteRequested(theme_key, theme_name))
-                        
-                        # Clear pending deletion state
-                        self.pending_delete_key = None
+                theme = self._themes.get(theme_key)
+                if theme is not None:
+                    # Post message to request theme deletion
+                    self.post_message(self.ThemeDeleteRequested(theme_key, theme.name))
+                    
+                    # Clear pending deletion state
+                    self.pending_delete_key = None
             except Exception as e:
                 import sys
                 print(f"Error loading theme for deletion: {e}", file=sys.stderr)
@@ -518,41 +523,9 @@ class ThemeSelectionPanel(ScrollableContainer):
             # First click - mark for deletion
             self.pending_delete_key = theme_key
     
-    def _create_gradient_preview(self, colors: list, width: int) -> str:
-        """Create a visual gradient using colored blocks (matches daemon interpolation)"""
-        from ..utils.colors import hex_to_rgb, rgb_to_hex
-        
-        blocks = []
-        
-        # Use shared color conversion utilities
-        rgb_colors = [hex_to_rgb(c) for c in colors]
-        num_colors = len(rgb_colors)
-        
-        if num_colors < 2:
-            # Single color or no colors
-            hex_color = colors[0] if colors else "#808080"
-            return f"[{hex_color} on {THEME['main_bg']}]▄[/]" * width
-        
-        for i in range(width):
-            # Map LED position to color gradient (same algorithm as daemon)
-            pos = i / (width - 1) if width > 1 else 0  # 0.0 to 1.0
-            color_pos = pos * (num_colors - 1)  # 0.0 to (num_colors-1)
-            
-            idx = int(color_pos)
-            frac = color_pos - idx
-            
-            if idx >= num_colors - 1:
-                # Last color
-                r, g, b = rgb_colors[num_colors - 1]
-            else:
-                # Interpolate between idx and idx+1
-                c1 = rgb_colors[idx]
-                c2 = rgb_colors[idx + 1]
-                r = c1[0] + (c2[0] - c1[0]) * frac
-                g = c1[1] + (c2[1] - c1[1]) * frac
-                b = c1[2] + (c2[2] - c1[2]) * frac
-            
-            hex_color = rgb_to_hex(r, g, b)
-            blocks.append(f"[{hex_color} on {THEME['main_bg']}]▄[/]")
-        
-        return "".join(blocks)
+    def _create_gradient_preview(self, theme: themes_db.Theme, width: int) -> str:
+        """Create a visual gradient using colored blocks (same resampling as the daemon)"""
+        return "".join(
+            f"[{hex_color} on {THEME['main_bg']}]▄[/]"
+            for hex_color in themes_db.gradient(theme, width)
+        )
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""CLI wrapper for the ForgeworkLights Waybar status emitter.
+
+This script is installed as forgeworklights-waybar and delegates to the
+shared tui.waybar module; point a Waybar custom module's "exec" at it with
+"return-type": "json" (see waybar/README.md).
+"""
+
+import sys
+
+from tui.waybar import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
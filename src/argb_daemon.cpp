@@ -5,6 +5,10 @@
 #include "color_utils.hpp"
 #include "theme_database.hpp"
 #include "animations.hpp"
+#include "atomic_file.hpp"
+#include "control_state.hpp"
+#include "frame_file.hpp"
+#include "effect_ring.hpp"
 #include <sys/inotify.h>
 #include <unistd.h>
 #include <vector>
@@ -15,11 +19,13 @@
 #include <optional>
 #include <cstring>
 #include <fstream>
+#include <sstream>
 #include <cstdio>
 #include <pwd.h>
 #include <sys/types.h>
 #include <cmath>
 #include <memory>
+#include <algorithm>
 
 namespace forgeworklights {
 
@@ -80,7 +86,17 @@ int ARGBDaemon::run() {
   wd_brightness_dir = add_watch(brightness_dir);
   log(std::string("watching brightness dir: ") + brightness_dir);
 
+  // Consolidated control document (state.json). When present it replaces the
+  // led-theme, brightness, animation and animation-params.json files.
+  std::string control_path = control_state_path(brightness_dir);
+  std::optional<ControlState> control = ControlState::load(control_path);
+  if (control) {
+    log(std::string("using control document: ") + control_path +
+        " (version " + std::to_string(control->version) + ")");
+  }
+
   auto read_led_theme_preference = [&]() -> std::string {
+    if (control) return control->led_theme;
     // Read LED theme preference from config file
     std::string pref_file = config_base() + "/forgeworklights/led-theme";
     std::ifstream in(pref_file);
@@ -94,6 +110,7 @@ int ARGBDaemon::run() {
   };
   
   auto read_animation_preference = [&]() -> std::string {
+    if (control) return control->animation;
     // Read animation preference from config file
     std::string anim_file = config_base() + "/forgeworklights/animation";
     std::ifstream in(anim_file);
@@ -145,6 +162,7 @@ int ARGBDaemon::run() {
   };
 
   auto read_brightness = [&](){
+    if (control) return control->brightness;
     std::string p = config_base() + "/forgeworklights/brightness";
     std::ifstream in(p);
     if (!in.good()) return cfg_.max_brightness;
@@ -154,13 +172,20 @@ int ARGBDaemon::run() {
     return v;
   };
 
+  auto read_temperature = [&](){
+    if (control) return control->temperature;
+    std::ifstream in(config_base() + "/forgeworklights/temperature");
+    double v = NEUTRAL_TEMPERATURE;
+    if (in.good()) in >> v;
+    return std::clamp(v, MIN_TEMPERATURE, NEUTRAL_TEMPERATURE);
+  };
+
   auto write_state = [&](const std::vector<RGB>& leds){
     const char* h = std::getenv("HOME");
     std::string cache_dir = std::string(h?h:"/") + "/.cache/forgeworklights";
     std::filesystem::create_directories(cache_dir);
     std::string state_path = cache_dir + "/state.json";
-    std::ofstream out(state_path);
-    if (!out.good()) return;
+    std::ostringstream out;
     out << "{\n";
     out << "  \"theme\": \"" << (theme ? std::filesystem::path(theme->theme_dir).filename().string() : "none") << "\",\n";
     out << "  \"colors\": [\n";
@@ -172,6 +197,8 @@ int ARGBDaemon::run() {
     }
     out << "  ]\n";
     out << "}\n";
+    // Replace atomically so status readers never see a half-written file
+    atomic_write_file(state_path, out.str());
   };
 
   // Sync themes from Omarchy directory on startup
@@ -190,20 +217,20 @@ int ARGBDaemon::run() {
   std::string db_dir;
 
   // Try user-led_themes.json first, then legacy themes.json, then system-wide copies
-  if (!theme_db.load(db_path)) {
+  if (!theme_db.load(db_path, cfg_.led_count)) {
     // Legacy user path
     std::string legacy_user = std::string(home ? home : "/") + "/.config/forgeworklights/themes.json";
-    if (theme_db.load(legacy_user)) {
+    if (theme_db.load(legacy_user, cfg_.led_count)) {
       db_path = legacy_user;
     } else {
       // New system-wide path
       std::string system_new = "/usr/local/share/forgeworklights/led_themes.json";
-      if (theme_db.load(system_new)) {
+      if (theme_db.load(system_new, cfg_.led_count)) {
         db_path = system_new;
       } else {
         // Legacy system-wide path
         std::string system_legacy = "/usr/local/share/forgeworklights/themes.json";
-        theme_db.load(system_legacy);
+        theme_db.load(system_legacy, cfg_.led_count);
         db_path = system_legacy;
       }
     }
@@ -217,9 +244,10 @@ int ARGBDaemon::run() {
   auto reload_theme_database = [&]() {
     auto themes = theme_db.list_themes();
     log(std::string("Reloading theme database from: ") + db_path);
-    if (theme_db.load(db_path)) {
+    if (theme_db.load(db_path, cfg_.led_count)) {
       auto new_themes = theme_db.list_themes();
-      log(std::string("Reloaded ") + std::to_string(new_themes.size()) + " themes from database");
+      log(std::string("Reloaded ") + std::to_string(new_themes.size()) + " themes from database" +
+          (theme_db.packed() ? " (packed)" : ""));
     } else {
       log("Failed to reload theme database");
     }
@@ -228,22 +256,37 @@ int ARGBDaemon::run() {
   // Debug: log loaded themes
   {
     auto themes = theme_db.list_themes();
-    log(std::string("Loaded ") + std::to_string(themes.size()) + " themes from database");
+    log(std::string("Loaded ") + std::to_string(themes.size()) + " themes from database" +
+        (theme_db.packed() ? " (packed)" : ""));
     for (const auto& t : themes) {
       log(std::string("  - ") + t);
     }
   }
 
+  // A theme's gradient at the configured strip length; database themes are
+  // memoized per (theme, length, mode), inline previews are resampled directly
+  auto expand_theme = [&](const std::string& db_key, const ThemeColors& theme_colors) {
+    if (!db_key.empty()) {
+      if (auto gradient = theme_db.gradient(db_key, cfg_.led_count)) return *gradient;
+    }
+    return resample_gradient(theme_colors.colors, cfg_.led_count, theme_colors.mode);
+  };
+
   auto compose = [&](){
     std::vector<RGB> leds(cfg_.led_count);
     
     // Try to get colors from database first
     std::optional<ThemeColors> db_colors;
+    std::string db_key;
     std::string led_theme_pref = read_led_theme_preference();
     
-    if (led_theme_pref != "match") {
+    if (control && led_theme_pref == "__preview__" && !control->preview_colors.empty()) {
+      // Theme creator preview carried inline in the control document
+      db_colors = ThemeColors{"Preview", control->preview_colors};
+    } else if (led_theme_pref != "match") {
       // Use LED-specific theme from database
-      db_colors = theme_db.get(led_theme_pref);
+      db_key = led_theme_pref;
+      db_colors = theme_db.get(db_key);
       if (db_colors) {
         log(std::string("Using LED theme from database: ") + led_theme_pref + 
             " with " + std::to_string(db_colors->colors.size()) + " colors");
@@ -252,37 +295,13 @@ int ARGBDaemon::run() {
       }
     } else if (theme) {
       // Match Omarchy theme
-      std::string theme_name = std::filesystem::path(theme->theme_dir).filename().string();
-      db_colors = theme_db.get(theme_name);
+      db_key = std::filesystem::path(theme->theme_dir).filename().string();
+      db_colors = theme_db.get(db_key);
     }
     
     if (db_colors && db_colors->colors.size() >= 3) {
-      // Use curated database colors (5-color gradient for smooth transitions)
-      const auto& colors = db_colors->colors;
-      int num_colors = colors.size();
-      
-      for (int i = 0; i < cfg_.led_count; ++i) {
-        // Map LED position to color gradient
-        double pos = (double)i / (double)(cfg_.led_count - 1);  // 0.0 to 1.0
-        double color_pos = pos * (num_colors - 1);  // 0.0 to (num_colors-1)
-        
-        int idx = (int)color_pos;
-        double frac = color_pos - idx;
-        
-        if (idx >= num_colors - 1) {
-          // Last color
-          leds[i] = colors[num_colors - 1];
-        } else {
-          // Interpolate between idx and idx+1
-          const RGB& c1 = colors[idx];
-          const RGB& c2 = colors[idx + 1];
-          RGB c;
-          c.r = (uint8_t)std::round(c1.r + (c2.r - c1.r) * frac);
-          c.g = (uint8_t)std::round(c1.g + (c2.g - c1.g) * frac);
-          c.b = (uint8_t)std::round(c1.b + (c2.b - c1.b) * frac);
-          leds[i] = c;
-        }
-      }
+      // Theme control points expanded to the strip length
+      leds = expand_theme(db_key, *db_colors);
     } else if (palette) {
       // Fallback: Use BTOP 3-color gradient
       int mid_idx = cfg_.led_count / 2;
@@ -310,6 +329,7 @@ int ARGBDaemon::run() {
         leds[i]=c;
       }
     }
+    apply_white_point(leds, read_temperature());
     double brightness = read_brightness();
     apply_gamma_brightness_safety(leds, gamma, brightness, safety_enabled_);
     return leds;
@@ -320,16 +340,21 @@ int ARGBDaemon::run() {
     std::vector<std::string> colors;
     std::string led_theme_pref = read_led_theme_preference();
     std::optional<ThemeColors> db_colors;
+    std::string db_key;
     
-    if (led_theme_pref != "match") {
-      db_colors = theme_db.get(led_theme_pref);
+    if (control && led_theme_pref == "__preview__" && !control->preview_colors.empty()) {
+      db_colors = ThemeColors{"Preview", control->preview_colors};
+    } else if (led_theme_pref != "match") {
+      db_key = led_theme_pref;
+      db_colors = theme_db.get(db_key);
     } else if (theme) {
-      std::string theme_name = std::filesystem::path(theme->theme_dir).filename().string();
-      db_colors = theme_db.get(theme_name);
+      db_key = std::filesystem::path(theme->theme_dir).filename().string();
+      db_colors = theme_db.get(db_key);
     }
     
     if (db_colors && db_colors->colors.size() >= 3) {
-      for (const auto& c : db_colors->colors) {
+      // One color per LED, so animations sample the theme's own interpolation
+      for (const auto& c : expand_theme(db_key, *db_colors)) {
         char buf[8];
         std::snprintf(buf, sizeof(buf), "#%02X%02X%02X", c.r, c.g, c.b);
         colors.push_back(std::string(buf));
@@ -338,94 +363,33 @@ int ARGBDaemon::run() {
     return colors;
   };
   
-  // Helper to read animation parameters from JSON file
+  // Animation parameters, parsed once per change rather than per lookup.
+  // With the control document they come from `control`; otherwise from
+  // animation-params.json, re-read when that file changes.
+  ControlState::AnimationParams legacy_params = ControlState::legacy_params(brightness_dir);
   auto get_param = [&](const std::string& anim_name, const std::string& param_name, double default_val) -> double {
-    std::string params_file = config_base() + "/forgeworklights/animation-params.json";
-    std::ifstream in(params_file);
-    if (!in.good()) return default_val;
-    
-    std::string content((std::istreambuf_iterator<char>(in)), std::istreambuf_iterator<char>());
-    
-    // Simple JSON parsing for: { "animation": { "param": value } }
-    size_t anim_pos = content.find("\"" + anim_name + "\"");
-    if (anim_pos == std::string::npos) return default_val;
-    
-    size_t param_pos = content.find("\"" + param_name + "\"", anim_pos);
-    if (param_pos == std::string::npos) return default_val;
-    
-    size_t colon_pos = content.find(":", param_pos);
-    if (colon_pos == std::string::npos) return default_val;
-    
-    size_t value_start = colon_pos + 1;
-    while (value_start < content.size() && (content[value_start] == ' ' || content[value_start] == '\t')) {
-      value_start++;
-    }
-    
-    size_t value_end = value_start;
-    while (value_end < content.size() && (std::isdigit(content[value_end]) || content[value_end] == '.' || content[value_end] == '-')) {
-      value_end++;
-    }
-    
-    if (value_end > value_start) {
-      try {
-        return std::stod(content.substr(value_start, value_end - value_start));
-      } catch (...) {
-        return default_val;
-      }
-    }
-    
-    return default_val;
+    const auto& params = control ? control->animation_params : legacy_params;
+    auto anim = params.find(anim_name);
+    if (anim == params.end()) return default_val;
+    auto value = anim->second.find(param_name);
+    return value == anim->second.end() ? default_val : value->second;
   };
   
   // Helper to create animation based on name
   auto create_animation = [&](const std::string& anim_name) -> std::unique_ptr<BaseAnimation> {
     std::vector<std::string> theme_colors = get_theme_colors_hex();
     if (theme_colors.empty()) {
-      // Fallback colors (22-color gradient)
-      theme_colors = {"#8a8a8d", "#948c81", "#9e8d76", "#a88f6b", "#b29160", "#bc9356", 
-                      "#c6954b", "#d09740", "#da9936", "#e49b2b", "#ee9d20", "#f29918", 
-                      "#ed9214", "#e88a11", "#e4820d", "#df7a0f", "#da7211", "#d66a13", 
-                      "#d16214", "#cd5a16", "#c85218", "#c3491a", "#bf411c", "#ba391e"};
+      theme_colors = fallback_theme_colors();
     }
-    
-    if (anim_name == "static") {
-      return std::make_unique<StaticAnimation>(cfg_.led_count, theme_colors);
-    } else if (anim_name == "breathe") {
-      double period = get_param("breathe", "period", 3.0);
-      return std::make_unique<BreatheAnimation>(cfg_.led_count, theme_colors, period);
-    } else if (anim_name == "wave") {
-      double speed = get_param("wave", "speed", 0.5);
-      return std::make_unique<WaveAnimation>(cfg_.led_count, theme_colors, speed);
-    } else if (anim_name == "ripple") {
-      double period = get_param("ripple", "period", 2.0);
-      double ripple_width = get_param("ripple", "ripple_width", 0.3);
-      return std::make_unique<RippleAnimation>(cfg_.led_count, theme_colors, period, ripple_width);
-    } else if (anim_name == "runner") {
-      double speed = get_param("runner", "speed", 20.0);
-      int trail_length = static_cast<int>(get_param("runner", "trail_length", 8.0));
-      int num_runners = static_cast<int>(get_param("runner", "num_runners", 2.0));
-      return std::make_unique<RunnerAnimation>(cfg_.led_count, theme_colors, speed, trail_length, num_runners);
-    } else if (anim_name == "bounce") {
-      double period = get_param("bounce", "period", 2.0);
-      int segment_size = static_cast<int>(get_param("bounce", "segment_size", 5.0));
-      return std::make_unique<BounceAnimation>(cfg_.led_count, theme_colors, period, segment_size);
-    } else if (anim_name == "sparkle") {
-      double sparkle_rate = get_param("sparkle", "sparkle_rate", 0.1);
-      int sparkle_duration = static_cast<int>(get_param("sparkle", "sparkle_duration", 15.0));
-      return std::make_unique<SparkleAnimation>(cfg_.led_count, theme_colors, sparkle_rate, sparkle_duration);
-    } else if (anim_name == "gradient-shift") {
-      double period = get_param("gradient-shift", "period", 10.0);
-      double shift_amount = get_param("gradient-shift", "shift_amount", 1.0);
-      return std::make_unique<GradientShiftAnimation>(cfg_.led_count, theme_colors, period, shift_amount);
-    } else if (anim_name == "drift") {
-      double min_speed = get_param("drift", "min_speed", 0.3);
-      double max_speed = get_param("drift", "max_speed", 10.0);
-      double twinkle = get_param("drift", "twinkle", 0.0);
-      return std::make_unique<DriftAnimation>(cfg_.led_count, theme_colors, min_speed, max_speed, twinkle);
-    } else {
-      // Default to static
-      return std::make_unique<StaticAnimation>(cfg_.led_count, theme_colors);
+    if (anim_name == "external" || anim_name == "layered") {
+      // Frames pushed by an external effect process (see effect_ring.hpp);
+      // "layered" is the animation stack composited by forgeworklights-effect layered
+      return std::make_unique<ExternalAnimation>(cfg_.led_count, theme_colors);
     }
+    return make_animation(anim_name, cfg_.led_count, theme_colors,
+                          [&](const std::string& name, double fallback) {
+                            return get_param(anim_name, name, fallback);
+                          });
   };
   
   // Initial resolve and send
@@ -434,10 +398,17 @@ int ARGBDaemon::run() {
   std::unique_ptr<BaseAnimation> animation = create_animation(current_animation);
   log(std::string("Created animation: ") + current_animation);
   
+  // Live frame output for the TUI's strip mirror (optional)
+  std::string frame_path = frame_file_path();
+  auto frame_out = FrameFile::create(frame_path, cfg_.led_count);
+  if (!frame_out) log(std::string("could not create frame file ") + frame_path);
+
   auto leds = animation->render_frame();
+  apply_white_point(leds, read_temperature());
   double brightness = read_brightness();
   apply_gamma_brightness_safety(leds, gamma, brightness, safety_enabled_);
   tool.sendFrame(0, leds, cfg_.color_order);
+  if (frame_out) frame_out->publish(leds);
   write_state(leds);
   if (!leds.empty()) {
     auto c = leds[0];
@@ -454,7 +425,9 @@ int ARGBDaemon::run() {
   
   for(;;){
     bool animation_changed = false;
+    bool params_changed = false;
     bool theme_changed = false;
+    bool database_changed = false;
 
     ssize_t n = read(fd, buf, sizeof(buf));
     if (n > 0) {
@@ -479,9 +452,40 @@ int ARGBDaemon::run() {
         } else if (ev->wd == wd_brightness_dir) {
           if (ev->len > 0) {
             std::string nm(ev->name);
-            if (nm == "brightness") {
+            if (nm == "state.json") {
+              // One event per user action: diff against what we had
+              auto next = ControlState::load(control_path);
+              if (next && (!control || next->version != control->version)) {
+                if (!control) log("event: control document enabled");
+                bool theme_diff = !control || next->led_theme != control->led_theme ||
+                                  (next->led_theme == "__preview__" &&
+                                   (next->preview_colors.size() != control->preview_colors.size() ||
+                                    !std::equal(next->preview_colors.begin(), next->preview_colors.end(),
+                                                control->preview_colors.begin(),
+                                                [](const RGB& a, const RGB& b){
+                                                  return a.r == b.r && a.g == b.g && a.b == b.b;
+                                                })));
+                bool anim_diff = !control || next->animation != control->animation;
+                bool params_diff = !control || next->animation_params != control->animation_params;
+                log(std::string("event: control document v") + std::to_string(next->version));
+                control = std::move(next);
+                theme_changed = theme_changed || theme_diff;
+                animation_changed = animation_changed || anim_diff;
+                params_changed = params_changed || params_diff;
+              } else if (!next && control && !std::filesystem::exists(control_path)) {
+                log("event: control document removed, using per-setting files");
+                control.reset();
+                legacy_params = ControlState::legacy_params(brightness_dir);
+                theme_changed = true;
+              }
+            } else if (control && (nm == "brightness" || nm == "temperature" || nm == "led-theme" ||
+                                   nm == "animation" || nm == "animation-params.json")) {
+              // Superseded by state.json while it exists
+            } else if (nm == "brightness") {
               log("event: brightness changed");
               // Brightness changes don't need animation recreation
+            } else if (nm == "temperature") {
+              log("event: color temperature changed");
             } else if (nm == "led-theme") {
               log("event: LED theme preference changed");
               theme_changed = true;
@@ -490,21 +494,22 @@ int ARGBDaemon::run() {
               animation_changed = true;
             } else if (nm == "animation-params.json") {
               log("event: animation parameters changed");
-              animation_changed = true;
-            } else if (nm == "led_themes.json" || nm == "themes.json" || nm.find("themes.json") != std::string::npos) {
-              log("event: LED themes database changed");
-              reload_theme_database();
-              theme_changed = true;
+              legacy_params = ControlState::legacy_params(brightness_dir);
+              params_changed = true;
+            } else if (nm == "led_themes.json" || nm == "themes.json" || nm.find("themes.json") != std::string::npos ||
+                       nm == "led_themes.bin") {
+              log(std::string("event: LED themes database changed: ") + nm);
+              database_changed = true;
             }
           }
         } else if (ev->wd == wd_themes_db) {
           if (ev->len > 0) {
             std::string nm(ev->name);
             log(std::string("event in themes db dir: ") + nm);
-            if (nm == "led_themes.json" || nm == "themes.json" || nm.find("themes.json") != std::string::npos) {
+            if (nm == "led_themes.json" || nm == "themes.json" || nm.find("themes.json") != std::string::npos ||
+                nm == "led_themes.bin") {
               log("event: LED themes database changed");
-              reload_theme_database();
-              theme_changed = true;
+              database_changed = true;
             }
           }
         }
@@ -512,6 +517,12 @@ int ARGBDaemon::run() {
       }
     }
 
+    if (database_changed) {
+      // JSON and its packed copy are written back to back: reload once per batch
+      reload_theme_database();
+      theme_changed = true;
+    }
+
     if (theme_changed) {
       load_theme();
       
@@ -540,21 +551,38 @@ int ARGBDaemon::run() {
       log("─────────────────────────────────────────────────────");
     }
     
-    if (animation_changed) {
-      // Animation type changed - recreate
-      current_animation = read_animation_preference();
-      animation = create_animation(current_animation);
-      log(std::string("Switched to animation: ") + current_animation);
+    if (animation_changed && !theme_changed) {
+      // Animation type changed - recreate (a rewrite with the same name is
+      // treated as a parameter update)
+      std::string next_animation = read_animation_preference();
+      if (next_animation != current_animation) {
+        current_animation = next_animation;
+        animation = create_animation(current_animation);
+        log(std::string("Switched to animation: ") + current_animation);
+        params_changed = false;
+      } else {
+        params_changed = true;
+      }
+    }
+    
+    if (params_changed && !theme_changed) {
+      // Parameter tweaks (e.g. slider drags) apply in place so the
+      // animation keeps its phase instead of restarting every commit
+      animation->apply_params([&](const std::string& name, double fallback) {
+        return get_param(current_animation, name, fallback);
+      });
     }
 
     // Render next animation frame
     leds = animation->render_frame();
+    apply_white_point(leds, read_temperature());
     double brightness = read_brightness();
     apply_gamma_brightness_safety(leds, gamma, brightness, safety_enabled_);
     
     // Send frame if changed
     if (leds.size() != prev_frame.size() || std::memcmp(leds.data(), prev_frame.data(), leds.size()*sizeof(RGB)) != 0) {
       tool.sendFrame(0, leds, cfg_.color_order);
+      if (frame_out) frame_out->publish(leds);
       // Only write state periodically to avoid excessive I/O
       static int frame_count = 0;
       if (++frame_count % 30 == 0) { // Every second at 30 FPS
@@ -0,0 +1,89 @@
+#include "atomic_file.hpp"
+#include <filesystem>
+#include <cerrno>
+#include <cstdlib>
+#include <fcntl.h>
+#include <sys/file.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+namespace forgeworklights {
+
+namespace {
+
+bool write_all(int fd, const char* data, size_t len) {
+  while (len > 0) {
+    ssize_t n = ::write(fd, data, len);
+    if (n < 0) {
+      if (errno == EINTR) continue;
+      return false;
+    }
+    data += n;
+    len -= static_cast<size_t>(n);
+  }
+  return true;
+}
+
+void fsync_dir(const std::string& dir) {
+  int fd = ::open(dir.c_str(), O_RDONLY | O_DIRECTORY | O_CLOEXEC);
+  if (fd < 0) return;
+  ::fsync(fd);
+  ::close(fd);
+}
+
+std::string lock_dir() {
+  const char* home = std::getenv("HOME");
+  return std::string(home ? home : "/") + "/.cache/forgeworklights/locks";
+}
+
+}
+
+bool atomic_write_file(const std::string& path, const std::string& contents) {
+  std::filesystem::path target(path);
+  std::string dir = target.parent_path().empty() ? "." : target.parent_path().string();
+  std::error_code ec;
+  std::filesystem::create_directories(dir, ec);
+
+  mode_t mode = 0644;
+  struct stat st{};
+  if (::stat(path.c_str(), &st) == 0) mode = st.st_mode & 07777;
+
+  // Temp name must not match anything the daemon's inotify handler reacts to
+  std::string tmpl = dir + "/.fwl-XXXXXX.tmp";
+  int fd = ::mkostemps(tmpl.data(), 4, O_CLOEXEC);
+  if (fd < 0) return false;
+
+  bool ok = write_all(fd, contents.data(), contents.size()) &&
+            ::fchmod(fd, mode) == 0 &&
+            ::fsync(fd) == 0;
+  ok = (::close(fd) == 0) && ok;
+  if (ok) ok = ::rename(tmpl.c_str(), path.c_str()) == 0;
+  if (!ok) {
+    ::unlink(tmpl.c_str());
+    return false;
+  }
+  fsync_dir(dir);
+  return true;
+}
+
+FileLock::FileLock(const std::string& path) {
+  std::string dir = lock_dir();
+  std::error_code ec;
+  std::filesystem::create_directories(dir, ec);
+  std::string lock_path = dir + "/" + std::filesystem::path(path).filename().string() + ".lock";
+  fd_ = ::open(lock_path.c_str(), O_RDWR | O_CREAT | O_CLOEXEC, 0600);
+  if (fd_ < 0) return;
+  while (::flock(fd_, LOCK_EX) != 0) {
+    if (errno != EINTR) {
+      ::close(fd_);
+      fd_ = -1;
+      return;
+    }
+  }
+}
+
+FileLock::~FileLock() {
+  if (fd_ >= 0) ::close(fd_);
+}
+
+}
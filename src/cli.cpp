@@ -3,12 +3,17 @@
 #include "argb_daemon.hpp"
 #include "config.hpp"
 #include "color_utils.hpp"
+#include "atomic_file.hpp"
+#include "control_state.hpp"
+#include "animations.hpp"
 #include <iostream>
 #include <vector>
 #include <filesystem>
 #include <fstream>
 #include <cstring>
 #include <algorithm>
+#include <sstream>
+#include <map>
 
 namespace forgeworklights { namespace cli {
 
@@ -36,10 +41,15 @@ double read_brightness_value(const std::string& path) {
   return clamp01(v);
 }
 
-void write_brightness_value(const std::string& path, double value) {
-  std::ofstream out(path);
+bool write_brightness_value(const std::string& path, double value) {
+  std::ostringstream out;
   out.setf(std::ios::fixed); out.precision(3);
   out << clamp01(value) << "\n";
+  if (!atomic_write_file(path, out.str())) {
+    std::cerr << "Failed to write " << path << std::endl;
+    return false;
+  }
+  return true;
 }
 
 const std::vector<std::string> kAnimationOrder = {
@@ -68,9 +78,90 @@ std::string read_animation_value(const std::string& path) {
   return "static";
 }
 
-void write_animation_value(const std::string& path, const std::string& value) {
-  std::ofstream out(path);
-  out << value << "\n";
+bool write_animation_value(const std::string& path, const std::string& value) {
+  if (!atomic_write_file(path, value + "\n")) {
+    std::cerr << "Failed to write " << path << std::endl;
+    return false;
+  }
+  return true;
+}
+
+bool control_state_enabled(const std::string& dir) {
+  return std::filesystem::exists(forgeworklights::control_state_path(dir));
+}
+
+// Apply a change through state.json; reports failure on stderr
+bool update_control(const std::string& dir, const std::function<void(forgeworklights::ControlState&)>& mutate,
+                    forgeworklights::ControlState* out = nullptr) {
+  auto state = forgeworklights::update_control_state(dir, mutate);
+  if (!state) {
+    std::cerr << "Failed to update " << forgeworklights::control_state_path(dir) << std::endl;
+    return false;
+  }
+  if (out) *out = *state;
+  return true;
+}
+
+// render <animation> [--seed=N] [--frames=N] [--fps=N] [--leds=N] [param=value ...] [#rrggbb ...]
+// Prints one line per frame: the LEDs as concatenated rrggbb. Frame k is
+// rendered at t = k / fps from a fixed seed, so the output is reproducible
+// and comparable with scripts/render-frames.py.
+int render_frames(int argc, char** argv) {
+  std::string name = argv[2];
+  if (!is_valid_animation(name)) {
+    std::cerr << "Unknown animation: " << name << std::endl;
+    return 1;
+  }
+  uint32_t seed = 0;
+  int frames = 30;
+  double fps = 30.0;
+  int leds = 22;
+  std::map<std::string, double> params;
+  std::vector<std::string> colors;
+  try {
+    for (int i = 3; i < argc; ++i) {
+      std::string arg = argv[i];
+      if (arg.rfind("--seed=", 0) == 0) {
+        seed = static_cast<uint32_t>(std::stoul(arg.substr(7)));
+      } else if (arg.rfind("--frames=", 0) == 0) {
+        frames = std::stoi(arg.substr(9));
+      } else if (arg.rfind("--fps=", 0) == 0) {
+        fps = std::stod(arg.substr(6));
+      } else if (arg.rfind("--leds=", 0) == 0) {
+        leds = std::stoi(arg.substr(7));
+      } else if (arg.find('=') != std::string::npos) {
+        auto eq = arg.find('=');
+        params[arg.substr(0, eq)] = std::stod(arg.substr(eq + 1));
+      } else {
+        colors.push_back(arg);
+      }
+    }
+  } catch (...) {
+    std::cerr << "Invalid render argument" << std::endl;
+    return 1;
+  }
+  if (frames < 0 || leds < 1 || !(fps > 0.0)) {
+    std::cerr << "Invalid render argument" << std::endl;
+    return 1;
+  }
+  if (colors.empty()) colors = fallback_theme_colors();
+
+  auto animation = make_animation(name, leds, colors, [&](const std::string& key, double fallback) {
+    auto it = params.find(key);
+    return it != params.end() ? it->second : fallback;
+  });
+  animation->seed(seed);
+  std::string line;
+  char hex[8];
+  for (int k = 0; k < frames; ++k) {
+    line.clear();
+    for (const auto& c : animation->render_at(k / fps)) {
+      std::snprintf(hex, sizeof(hex), "%02x%02x%02x", c.r, c.g, c.b);
+      line += hex;
+    }
+    std::cout << line << '\n';
+  }
+  return 0;
 }
 
 double parse_step(int argc, char** argv, double default_step) {
@@ -88,7 +179,7 @@ double parse_step(int argc, char** argv, double default_step) {
 
 static int usage() {
   std::cout << "Usage: forgeworklights <once|daemon|brightness|brightness-up|brightness-down|"
-               "brightness-off|animation> [args] [--safety=on|off]\n";
+               "brightness-off|animation|state|render> [args] [--safety=on|off]\n";
   std::cout << "  once                   - Send test pattern once\n";
   std::cout << "  daemon                 - Run theme-syncing daemon\n";
   std::cout << "  brightness <0.0-1.0>   - Set brightness\n";
@@ -97,6 +188,11 @@ static int usage() {
   std::cout << "  brightness-off         - Turn LEDs off (brightness 0)\n";
   std::cout << "  animation set <name>   - Set animation (static, breathe, ...)\n";
   std::cout << "  animation next|prev    - Cycle animation selection\n";
+  std::cout << "  state show             - Print the state.json control document\n";
+  std::cout << "  state migrate          - Create state.json from the per-setting files\n";
+  std::cout << "  state off              - Write state.json back to per-setting files and remove it\n";
+  std::cout << "  render <name> [...]    - Print seeded frames of an animation (--seed=N --frames=N\n";
+  std::cout << "                           --fps=N --leds=N, param=value, colors); see scripts/render-frames.py\n";
   std::cout << "\nOptions:\n";
   std::cout << "  --safety=on|off        - Enable/disable 2.4A current limiting (default: on)\n";
   return 1;
@@ -150,26 +246,39 @@ int run(int argc, char** argv) {
     double v = clamp01(std::stod(argv[2]));
     std::string dir = config_dir_path();
     std::string path = dir + "/brightness";
-    write_brightness_value(path, v);
+    if (control_state_enabled(dir)) {
+      if (!update_control(dir, [&](forgeworklights::ControlState& s){ s.brightness = v; })) return 1;
+    } else if (!write_brightness_value(path, v)) {
+      return 1;
+    }
     std::cout << v << std::endl;
     return 0;
   } else if (cmd == "brightness-up" || cmd == "brightness-down") {
     double step = parse_step(argc, argv, 0.05);
     std::string dir = config_dir_path();
     std::string path = dir + "/brightness";
-    double current = read_brightness_value(path);
-    if (cmd == "brightness-up") {
-      current = clamp01(current + step);
+    double delta = cmd == "brightness-up" ? step : -step;
+    double current = 0.0;
+    if (control_state_enabled(dir)) {
+      forgeworklights::ControlState state;
+      if (!update_control(dir, [&](forgeworklights::ControlState& s){ s.brightness = clamp01(s.brightness + delta); },
+                          &state)) return 1;
+      current = state.brightness;
     } else {
-      current = clamp01(current - step);
+      FileLock lock(path);  // read-modify-write: don't lose concurrent steps
+      current = clamp01(read_brightness_value(path) + delta);
+      if (!write_brightness_value(path, current)) return 1;
     }
-    write_brightness_value(path, current);
     std::cout << current << std::endl;
     return 0;
   } else if (cmd == "brightness-off") {
     std::string dir = config_dir_path();
     std::string path = dir + "/brightness";
-    write_brightness_value(path, 0.0);
+    if (control_state_enabled(dir)) {
+      if (!update_control(dir, [](forgeworklights::ControlState& s){ s.brightness = 0.0; })) return 1;
+    } else if (!write_brightness_value(path, 0.0)) {
+      return 1;
+    }
     std::cout << 0.0 << std::endl;
     return 0;
   } else if (cmd == "animation") {
@@ -187,23 +296,38 @@ int run(int argc, char** argv) {
         std::cerr << "Unknown animation: " << name << std::endl;
         return 1;
       }
-      write_animation_value(path, name);
+      if (control_state_enabled(dir)) {
+        if (!update_control(dir, [&](forgeworklights::ControlState& s){ s.animation = name; })) return 1;
+      } else if (!write_animation_value(path, name)) {
+        return 1;
+      }
       std::cout << name << std::endl;
       return 0;
     } else if (action == "next" || action == "prev") {
-      std::string current = read_animation_value(path);
-      auto it = std::find(kAnimationOrder.begin(), kAnimationOrder.end(), current);
-      int idx = 0;
-      if (it != kAnimationOrder.end()) {
-        idx = static_cast<int>(std::distance(kAnimationOrder.begin(), it));
-      }
-      if (action == "next") {
-        idx = (idx + 1) % kAnimationOrder.size();
+      auto step_from = [&](const std::string& current) {
+        auto it = std::find(kAnimationOrder.begin(), kAnimationOrder.end(), current);
+        int idx = 0;
+        if (it != kAnimationOrder.end()) {
+          idx = static_cast<int>(std::distance(kAnimationOrder.begin(), it));
+        }
+        if (action == "next") {
+          idx = (idx + 1) % kAnimationOrder.size();
+        } else {
+          idx = (idx - 1 + static_cast<int>(kAnimationOrder.size())) % static_cast<int>(kAnimationOrder.size());
+        }
+        return kAnimationOrder[idx];
+      };
+      std::string next_value;
+      if (control_state_enabled(dir)) {
+        if (!update_control(dir, [&](forgeworklights::ControlState& s){
+              next_value = step_from(s.animation);
+              s.animation = next_value;
+            })) return 1;
       } else {
-        idx = (idx - 1 + static_cast<int>(kAnimationOrder.size())) % static_cast<int>(kAnimationOrder.size());
+        FileLock lock(path);  // read-modify-write: don't lose concurrent steps
+        next_value = step_from(read_animation_value(path));
+        if (!write_animation_value(path, next_value)) return 1;
       }
-      std::string next_value = kAnimationOrder[idx];
-      write_animation_value(path, next_value);
       std::cout << next_value << std::endl;
       return 0;
     } else if (action == "list") {
@@ -215,6 +339,51 @@ int run(int argc, char** argv) {
       std::cerr << "Unknown animation subcommand: " << action << std::endl;
       return usage();
     }
+  } else if (cmd == "state") {
+    if (argc < 3) return usage();
+    std::string action = argv[2];
+    std::string dir = config_dir_path();
+    std::string path = forgeworklights::control_state_path(dir);
+    FileLock lock(path);
+    if (action == "show") {
+      auto state = forgeworklights::ControlState::load(path);
+      if (!state) {
+        std::cerr << "state.json not in use (per-setting files are authoritative)" << std::endl;
+        return 1;
+      }
+      std::cout << state->to_json();
+      return 0;
+    } else if (action == "migrate") {
+      if (forgeworklights::ControlState::load(path)) {
+        std::cout << "already using " << path << std::endl;
+        return 0;
+      }
+      forgeworklights::Config cfg;
+      cfg.load_from_default();
+      auto state = forgeworklights::ControlState::from_legacy(dir, cfg.max_brightness);
+      state.version = 1;
+      if (!atomic_write_file(path, state.to_json())) {
+        std::cerr << "Failed to write " << path << std::endl;
+        return 1;
+      }
+      std::cout << "migrated to " << path << std::endl;
+      return 0;
+    } else if (action == "off") {
+      auto state = forgeworklights::ControlState::load(path);
+      if (!state) return 0;
+      if (!state->write_legacy(dir)) {
+        std::cerr << "Failed to write per-setting files" << std::endl;
+        return 1;
+      }
+      std::filesystem::remove(path);
+      std::cout << "state.json removed; using per-setting files" << std::endl;
+      return 0;
+    }
+    std::cerr << "Unknown state subcommand: " << action << std::endl;
+    return usage();
+  } else if (cmd == "render") {
+    if (argc < 3) return usage();
+    return render_frames(argc, argv);
   }
   return usage();
 }
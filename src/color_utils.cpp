@@ -71,4 +71,128 @@ void apply_gamma_brightness_safety(std::vector<RGB>& leds, const Gamma& g,
   }
 }
 
+// --- White point ---
+
+namespace {
+
+// Blackbody color of a temperature (Tanner Helland's fit, 1000-40000 K)
+void blackbody(double kelvin, double rgb[3]) {
+  double t = kelvin / 100.0;
+  rgb[0] = t <= 66.0 ? 255.0 : 329.698727446 * std::pow(t - 60.0, -0.1332047592);
+  rgb[1] = t <= 66.0 ? 99.4708025861 * std::log(t) - 161.1195681661
+                     : 288.1221695283 * std::pow(t - 60.0, -0.0755148492);
+  rgb[2] = t >= 66.0 ? 255.0 : t <= 19.0 ? 0.0 : 138.5177312231 * std::log(t - 10.0) - 305.0447927307;
+  for (int i = 0; i < 3; ++i) rgb[i] = std::clamp(rgb[i], 0.0, 255.0);
+}
+
+}
+
+void white_point_gains(double kelvin, double gains[3]) {
+  kelvin = std::clamp(kelvin, MIN_TEMPERATURE, NEUTRAL_TEMPERATURE);
+  double color[3], neutral[3];
+  blackbody(kelvin, color);
+  blackbody(NEUTRAL_TEMPERATURE, neutral);
+  for (int i = 0; i < 3; ++i) gains[i] = std::min(1.0, color[i] / neutral[i]);
+}
+
+void apply_white_point(std::vector<RGB>& leds, double kelvin) {
+  if (kelvin >= NEUTRAL_TEMPERATURE) return;
+  double gains[3];
+  white_point_gains(kelvin, gains);
+  for (auto& c : leds) {
+    c.r = static_cast<uint8_t>(std::round(c.r * gains[0]));
+    c.g = static_cast<uint8_t>(std::round(c.g * gains[1]));
+    c.b = static_cast<uint8_t>(std::round(c.b * gains[2]));
+  }
+}
+
+// --- Gradient resampling ---
+
+namespace {
+
+struct Vec3 { double x, y, z; };
+
+double srgb_to_linear(double c) {
+  return c <= 0.04045 ? c / 12.92 : std::pow((c + 0.055) / 1.055, 2.4);
+}
+
+double linear_to_srgb(double c) {
+  c = std::clamp(c, 0.0, 1.0);
+  return c <= 0.0031308 ? c * 12.92 : 1.055 * std::pow(c, 1.0 / 2.4) - 0.055;
+}
+
+// OKLab conversion (Bjorn Ottosson, https://bottosson.github.io/posts/oklab/)
+Vec3 linear_to_oklab(const Vec3& c) {
+  double l = std::cbrt(0.4122214708 * c.x + 0.5363325363 * c.y + 0.0514459929 * c.z);
+  double m = std::cbrt(0.2119034982 * c.x + 0.6806995451 * c.y + 0.1073969566 * c.z);
+  double s = std::cbrt(0.0883024619 * c.x + 0.2817188376 * c.y + 0.6299787005 * c.z);
+  return {0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+          1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+          0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s};
+}
+
+Vec3 oklab_to_linear(const Vec3& c) {
+  double l = c.x + 0.3963377774 * c.y + 0.2158037573 * c.z;
+  double m = c.x - 0.1055613458 * c.y - 0.0638541728 * c.z;
+  double s = c.x - 0.0894841775 * c.y - 1.2914855480 * c.z;
+  l = l * l * l; m = m * m * m; s = s * s * s;
+  return {4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+          -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+          -0.0041960863 * l - 0.7034186168 * m + 1.7076147010 * s};
+}
+
+uint8_t to_byte(double v) {
+  return static_cast<uint8_t>(std::clamp(std::round(v), 0.0, 255.0));
+}
+
+}
+
+std::vector<RGB> resample_gradient(const std::vector<RGB>& stops, int length, const std::string& mode) {
+  std::vector<RGB> out;
+  if (stops.empty() || length <= 0) return out;
+  out.reserve(length);
+  if (stops.size() == 1) {
+    out.assign(length, stops.front());
+    return out;
+  }
+
+  enum class Space { Srgb, Linear, Oklab };
+  Space space = mode == "oklab" ? Space::Oklab : mode == "linear" ? Space::Linear : Space::Srgb;
+
+  std::vector<Vec3> points;
+  points.reserve(stops.size());
+  for (const auto& c : stops) {
+    if (space == Space::Srgb) {
+      points.push_back({double(c.r), double(c.g), double(c.b)});
+      continue;
+    }
+    Vec3 lin{srgb_to_linear(c.r / 255.0), srgb_to_linear(c.g / 255.0), srgb_to_linear(c.b / 255.0)};
+    points.push_back(space == Space::Oklab ? linear_to_oklab(lin) : lin);
+  }
+
+  int num_colors = static_cast<int>(points.size());
+  for (int i = 0; i < length; ++i) {
+    // Map LED position to color gradient (same mapping the TUI uses)
+    double pos = length > 1 ? double(i) / double(length - 1) : 0.0;
+    double color_pos = pos * (num_colors - 1);
+    int idx = static_cast<int>(color_pos);
+    if (idx >= num_colors - 1) {
+      out.push_back(stops.back());
+      continue;
+    }
+    double frac = color_pos - idx;
+    const Vec3& a = points[idx];
+    const Vec3& b = points[idx + 1];
+    Vec3 v{a.x + (b.x - a.x) * frac, a.y + (b.y - a.y) * frac, a.z + (b.z - a.z) * frac};
+    if (space == Space::Srgb) {
+      out.push_back(RGB{to_byte(v.x), to_byte(v.y), to_byte(v.z)});
+      continue;
+    }
+    if (space == Space::Oklab) v = oklab_to_linear(v);
+    out.push_back(RGB{to_byte(linear_to_srgb(v.x) * 255.0), to_byte(linear_to_srgb(v.y) * 255.0),
+                      to_byte(linear_to_srgb(v.z) * 255.0)});
+  }
+  return out;
+}
+
 }
@@ -0,0 +1,177 @@
+#include "control_state.hpp"
+#include "atomic_file.hpp"
+#include "color_utils.hpp"
+#include "json_lite.hpp"
+#include <algorithm>
+#include <cstdio>
+#include <fstream>
+#include <sstream>
+
+namespace forgeworklights {
+
+namespace {
+
+std::string trim(std::string s) {
+  s.erase(0, s.find_first_not_of(" \t\n\r"));
+  s.erase(s.find_last_not_of(" \t\n\r") + 1);
+  return s;
+}
+
+std::optional<std::string> read_first_line(const std::string& path) {
+  std::ifstream in(path);
+  if (!in.good()) return std::nullopt;
+  std::string line;
+  std::getline(in, line);
+  line = trim(line);
+  if (line.empty()) return std::nullopt;
+  return line;
+}
+
+std::optional<RGB> parse_hex(const std::string& hex) {
+  std::string h = hex.size() == 7 && hex[0] == '#' ? hex.substr(1) : hex;
+  if (h.size() != 6) return std::nullopt;
+  unsigned int val = 0;
+  if (std::sscanf(h.c_str(), "%x", &val) != 1) return std::nullopt;
+  return RGB{static_cast<uint8_t>((val >> 16) & 0xFF), static_cast<uint8_t>((val >> 8) & 0xFF),
+             static_cast<uint8_t>(val & 0xFF)};
+}
+
+std::string to_hex(const RGB& c) {
+  char buf[8];
+  std::snprintf(buf, sizeof(buf), "#%02x%02x%02x", c.r, c.g, c.b);
+  return buf;
+}
+
+ControlState::AnimationParams params_from(const json::Value& v) {
+  ControlState::AnimationParams params;
+  for (const auto& [anim, values] : v.as_object()) {
+    for (const auto& [name, value] : values.as_object()) {
+      if (value.is_number()) params[anim][name] = value.as_number();
+    }
+  }
+  return params;
+}
+
+json::Value params_to(const ControlState::AnimationParams& params) {
+  json::Value::Object out;
+  for (const auto& [anim, values] : params) {
+    json::Value::Object obj;
+    for (const auto& [name, value] : values) obj[name] = value;
+    out[anim] = std::move(obj);
+  }
+  return out;
+}
+
+}
+
+std::string control_state_path(const std::string& config_dir) {
+  return config_dir + "/state.json";
+}
+
+std::optional<double> ControlState::param(const std::string& anim, const std::string& name) const {
+  auto a = animation_params.find(anim);
+  if (a == animation_params.end()) return std::nullopt;
+  auto p = a->second.find(name);
+  if (p == a->second.end()) return std::nullopt;
+  return p->second;
+}
+
+std::string ControlState::to_json() const {
+  json::Value::Object doc;
+  doc["version"] = static_cast<double>(version);
+  doc["led_theme"] = led_theme;
+  doc["brightness"] = brightness;
+  doc["temperature"] = temperature;
+  doc["animation"] = animation;
+  doc["animation_params"] = params_to(animation_params);
+  if (preview_colors.empty()) {
+    doc["preview"] = json::Value();
+  } else {
+    json::Value::Array colors;
+    for (const auto& c : preview_colors) colors.push_back(to_hex(c));
+    doc["preview"] = json::Value::Object{{"name", "Preview"}, {"colors", std::move(colors)}};
+  }
+  return json::Value(std::move(doc)).dump(2);
+}
+
+std::optional<ControlState> ControlState::from_json(const std::string& text) {
+  auto doc = json::parse(text);
+  if (!doc || !doc->is_object()) return std::nullopt;
+  ControlState s;
+  if (auto v = doc->find("version")) s.version = static_cast<uint64_t>(v->as_number(0.0));
+  if (auto v = doc->find("led_theme"); v && v->is_string() && !v->as_string().empty()) s.led_theme = v->as_string();
+  if (auto v = doc->find("brightness"); v && v->is_number()) {
+    s.brightness = std::min(1.0, std::max(0.0, v->as_number()));
+  }
+  if (auto v = doc->find("temperature"); v && v->is_number()) {
+    s.temperature = std::clamp(v->as_number(), MIN_TEMPERATURE, NEUTRAL_TEMPERATURE);
+  }
+  if (auto v = doc->find("animation"); v && v->is_string() && !v->as_string().empty()) s.animation = v->as_string();
+  if (auto v = doc->find("animation_params")) s.animation_params = params_from(*v);
+  if (auto v = doc->find("preview"); v && v->is_object()) {
+    if (auto colors = v->find("colors")) {
+      for (const auto& c : colors->as_array()) {
+        if (auto rgb = parse_hex(c.as_string())) s.preview_colors.push_back(*rgb);
+      }
+    }
+  }
+  return s;
+}
+
+std::optional<ControlState> ControlState::load(const std::string& path) {
+  std::ifstream in(path);
+  if (!in.good()) return std::nullopt;
+  std::stringstream ss;
+  ss << in.rdbuf();
+  return from_json(ss.str());
+}
+
+ControlState::AnimationParams ControlState::legacy_params(const std::string& config_dir) {
+  if (auto params = json::parse_file(config_dir + "/animation-params.json")) {
+    return params_from(*params);
+  }
+  return {};
+}
+
+ControlState ControlState::from_legacy(const std::string& config_dir, double default_brightness) {
+  ControlState s;
+  s.brightness = default_brightness;
+  if (auto v = read_first_line(config_dir + "/led-theme")) s.led_theme = *v;
+  if (auto v = read_first_line(config_dir + "/brightness")) {
+    try { s.brightness = std::min(1.0, std::max(0.0, std::stod(*v))); } catch (...) {}
+  }
+  if (auto v = read_first_line(config_dir + "/temperature")) {
+    try { s.temperature = std::clamp(std::stod(*v), MIN_TEMPERATURE, NEUTRAL_TEMPERATURE); } catch (...) {}
+  }
+  if (auto v = read_first_line(config_dir + "/animation")) s.animation = *v;
+  s.animation_params = legacy_params(config_dir);
+  return s;
+}
+
+bool ControlState::write_legacy(const std::string& config_dir) const {
+  char buf[32];
+  std::snprintf(buf, sizeof(buf), "%.3f\n", brightness);
+  bool ok = atomic_write_file(config_dir + "/brightness", buf);
+  std::snprintf(buf, sizeof(buf), "%.0f\n", temperature);
+  ok = atomic_write_file(config_dir + "/temperature", buf) && ok;
+  ok = atomic_write_file(config_dir + "/animation", animation + "\n") && ok;
+  ok = atomic_write_file(config_dir + "/animation-params.json", params_to(animation_params).dump(2)) && ok;
+  // A preview never outlives the control document
+  std::string theme = led_theme == "__preview__" ? "match" : led_theme;
+  ok = atomic_write_file(config_dir + "/led-theme", theme + "\n") && ok;
+  return ok;
+}
+
+std::optional<ControlState> update_control_state(const std::string& config_dir,
+                                                 const std::function<void(ControlState&)>& mutate) {
+  std::string path = control_state_path(config_dir);
+  FileLock lock(path);
+  auto state = ControlState::load(path);
+  if (!state) return std::nullopt;
+  mutate(*state);
+  state->version += 1;
+  if (!atomic_write_file(path, state->to_json())) return std::nullopt;
+  return state;
+}
+
+}
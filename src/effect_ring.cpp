@@ -0,0 +1,165 @@
+#include "effect_ring.hpp"
+#include <atomic>
+#include <cerrno>
+#include <cstdlib>
+#include <cstring>
+#include <fcntl.h>
+#include <signal.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+namespace forgeworklights {
+
+namespace {
+
+constexpr char MAGIC[4] = {'F', 'W', 'L', 'R'};
+constexpr uint16_t VERSION = 1;
+constexpr size_t HEADER_SIZE = 64;
+constexpr size_t HEAD_OFFSET = 16;
+constexpr size_t TAIL_OFFSET = 24;
+constexpr size_t PID_OFFSET = 40;
+constexpr uint32_t MAX_SLOTS = 64;
+constexpr int MAX_READ_ATTEMPTS = 3;
+
+// Re-check the path for a new ring (producer restart) every this many frames
+constexpr int RECHECK_POLLS = 30;
+// A producer that has not sent a frame for this long is treated as gone
+constexpr auto STALE_AFTER = std::chrono::seconds(1);
+
+template <typename T>
+T read_le(const uint8_t* p) {
+  T v = 0;
+  for (size_t i = 0; i < sizeof(T); ++i) v |= static_cast<T>(p[i]) << (8 * i);
+  return v;
+}
+
+size_t slot_size_for(int led_count) {
+  return 8 + ((static_cast<size_t>(led_count) * 3 + 7) & ~static_cast<size_t>(7));
+}
+
+std::atomic_ref<uint64_t> field(uint8_t* data, size_t offset) {
+  return std::atomic_ref<uint64_t>(*reinterpret_cast<uint64_t*>(data + offset));
+}
+
+}
+
+std::string effect_ring_path() {
+  const char* runtime = std::getenv("XDG_RUNTIME_DIR");
+  if (runtime && *runtime) return std::string(runtime) + "/forgeworklights/effect.ring";
+  const char* home = std::getenv("HOME");
+  return std::string(home ? home : "/") + "/.cache/forgeworklights/effect.ring";
+}
+
+std::unique_ptr<EffectRing> EffectRing::open(const std::string& path, int led_count) {
+  int fd = ::open(path.c_str(), O_RDWR | O_CLOEXEC);
+  if (fd < 0) return nullptr;
+  struct stat st{};
+  if (::fstat(fd, &st) != 0 || static_cast<size_t>(st.st_size) < HEADER_SIZE) {
+    ::close(fd);
+    return nullptr;
+  }
+  size_t length = static_cast<size_t>(st.st_size);
+  void* map = ::mmap(nullptr, length, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+  ::close(fd);
+  if (map == MAP_FAILED) return nullptr;
+
+  auto* data = static_cast<uint8_t*>(map);
+  uint32_t ring_leds = read_le<uint32_t>(data + 8);
+  uint32_t slots = read_le<uint32_t>(data + 12);
+  bool valid = std::memcmp(data, MAGIC, sizeof(MAGIC)) == 0 &&
+               read_le<uint16_t>(data + 4) == VERSION &&
+               read_le<uint16_t>(data + 6) == HEADER_SIZE &&
+               ring_leds == static_cast<uint32_t>(led_count) &&
+               slots > 0 && slots <= MAX_SLOTS &&
+               length >= HEADER_SIZE + slots * slot_size_for(led_count);
+  if (!valid) {
+    ::munmap(map, length);
+    return nullptr;
+  }
+  return std::unique_ptr<EffectRing>(new EffectRing(data, length, led_count, slots, st.st_ino));
+}
+
+EffectRing::EffectRing(uint8_t* data, size_t length, int led_count, uint32_t slots, ino_t inode)
+  : data_(data), length_(length), led_count_(led_count), slots_(slots),
+    slot_size_(slot_size_for(led_count)), inode_(inode) {}
+
+EffectRing::~EffectRing() {
+  ::munmap(data_, length_);
+}
+
+std::optional<std::vector<RGB>> EffectRing::pop() {
+  auto head = field(data_, HEAD_OFFSET);
+  auto tail = field(data_, TAIL_OFFSET);
+  std::vector<RGB> frame(led_count_);
+
+  uint64_t next = tail.load(std::memory_order_relaxed);
+  for (int attempt = 0; attempt < MAX_READ_ATTEMPTS; ++attempt) {
+    uint64_t published = head.load(std::memory_order_acquire);
+    if (published <= next) return std::nullopt;  // nothing new (or a producer restart in progress)
+    if (published - next > slots_) next = published - slots_;  // oldest ones were overwritten
+
+    uint8_t* slot = data_ + HEADER_SIZE + (next % slots_) * slot_size_;
+    auto stamp = field(slot, 0);
+    if (stamp.load(std::memory_order_acquire) != next + 1) {
+      ++next;  // being overwritten right now; try the following frame
+      continue;
+    }
+    std::memcpy(frame.data(), slot + 8, static_cast<size_t>(led_count_) * 3);
+    std::atomic_thread_fence(std::memory_order_acquire);
+    if (stamp.load(std::memory_order_relaxed) != next + 1) {
+      ++next;
+      continue;
+    }
+    tail.store(next + 1, std::memory_order_release);
+    return frame;
+  }
+  tail.store(next, std::memory_order_release);
+  return std::nullopt;
+}
+
+bool EffectRing::producer_alive() const {
+  pid_t pid = static_cast<pid_t>(read_le<uint32_t>(data_ + PID_OFFSET));
+  if (pid <= 0) return false;
+  return ::kill(pid, 0) == 0 || errno == EPERM;
+}
+
+ExternalAnimation::ExternalAnimation(int led_count, const std::vector<std::string>& theme_colors)
+  : BaseAnimation(led_count, theme_colors) {
+  reopen_if_replaced();
+}
+
+void ExternalAnimation::reopen_if_replaced() {
+  std::string path = effect_ring_path();
+  struct stat st{};
+  if (::stat(path.c_str(), &st) != 0) {
+    ring_.reset();
+    return;
+  }
+  if (ring_ && ring_->inode() == st.st_ino) {
+    if (!ring_->producer_alive()) ring_.reset();
+    return;
+  }
+  ring_ = EffectRing::open(path, led_count_);
+  if (ring_ && !ring_->producer_alive()) ring_.reset();
+}
+
+std::vector<RGB> ExternalAnimation::render_at(double t) {
+  (void)t;
+  if (!ring_ || ++polls_ % RECHECK_POLLS == 0) reopen_if_replaced();
+  auto now = std::chrono::steady_clock::now();
+  if (ring_) {
+    if (auto frame = ring_->pop()) {
+      last_frame_ = std::move(*frame);
+      last_frame_time_ = now;
+    }
+  }
+  if (ring_ && !last_frame_.empty() && now - last_frame_time_ < STALE_AFTER) return last_frame_;
+
+  // No live effect: the plain theme gradient, like "static"
+  std::vector<RGB> frame;
+  for (int i = 0; i < led_count_; i++) frame.push_back(get_led_base_color(i));
+  return frame;
+}
+
+}
@@ -0,0 +1,98 @@
+#include "frame_file.hpp"
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <cstdlib>
+#include <cstring>
+#include <filesystem>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+namespace forgeworklights {
+
+namespace {
+
+constexpr char MAGIC[4] = {'F', 'W', 'L', 'F'};
+constexpr uint16_t VERSION = 1;
+constexpr size_t HEADER_SIZE = 32;
+constexpr size_t SEQUENCE_OFFSET = 12;
+constexpr size_t TIME_OFFSET = 16;
+
+template <typename T>
+void write_le(uint8_t* p, T v) {
+  for (size_t i = 0; i < sizeof(T); ++i) p[i] = static_cast<uint8_t>(v >> (8 * i));
+}
+
+}
+
+std::string frame_file_path() {
+  const char* runtime = std::getenv("XDG_RUNTIME_DIR");
+  if (runtime && *runtime) return std::string(runtime) + "/forgeworklights/frame.bin";
+  const char* home = std::getenv("HOME");
+  return std::string(home ? home : "/") + "/.cache/forgeworklights/frame.bin";
+}
+
+std::unique_ptr<FrameFile> FrameFile::create(const std::string& path, int led_count) {
+  if (led_count <= 0) return nullptr;
+  std::error_code ec;
+  std::filesystem::create_directories(std::filesystem::path(path).parent_path(), ec);
+
+  // Build the new file next to the target and rename it into place
+  std::string tmp = path + ".XXXXXX";
+  int fd = ::mkstemp(tmp.data());
+  if (fd < 0) return nullptr;
+  size_t length = HEADER_SIZE + static_cast<size_t>(led_count) * 3;
+  if (::fchmod(fd, 0644) != 0 || ::ftruncate(fd, static_cast<off_t>(length)) != 0) {
+    ::close(fd);
+    ::unlink(tmp.c_str());
+    return nullptr;
+  }
+  void* map = ::mmap(nullptr, length, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+  ::close(fd);
+  if (map == MAP_FAILED) {
+    ::unlink(tmp.c_str());
+    return nullptr;
+  }
+  auto* data = static_cast<uint8_t*>(map);
+  std::memcpy(data, MAGIC, sizeof(MAGIC));
+  write_le<uint16_t>(data + 4, VERSION);
+  write_le<uint16_t>(data + 6, HEADER_SIZE);
+  write_le<uint32_t>(data + 8, static_cast<uint32_t>(led_count));
+  if (::rename(tmp.c_str(), path.c_str()) != 0) {
+    ::munmap(map, length);
+    ::unlink(tmp.c_str());
+    return nullptr;
+  }
+  return std::unique_ptr<FrameFile>(new FrameFile(data, length, led_count));
+}
+
+FrameFile::FrameFile(uint8_t* data, size_t length, int led_count)
+  : data_(data), length_(length), led_count_(led_count) {}
+
+FrameFile::~FrameFile() {
+  ::munmap(data_, length_);
+}
+
+void FrameFile::publish(const std::vector<RGB>& leds) {
+  std::atomic_ref<uint32_t> sequence(*reinterpret_cast<uint32_t*>(data_ + SEQUENCE_OFFSET));
+  sequence.store(++sequence_, std::memory_order_relaxed);  // odd: write in progress
+  std::atomic_thread_fence(std::memory_order_release);
+
+  auto now = std::chrono::steady_clock::now().time_since_epoch();
+  write_le<uint64_t>(data_ + TIME_OFFSET,
+                     std::chrono::duration_cast<std::chrono::nanoseconds>(now).count());
+  uint8_t* out = data_ + HEADER_SIZE;
+  size_t count = std::min(leds.size(), static_cast<size_t>(led_count_));
+  for (size_t i = 0; i < count; ++i) {
+    out[i * 3] = leds[i].r;
+    out[i * 3 + 1] = leds[i].g;
+    out[i * 3 + 2] = leds[i].b;
+  }
+  std::memset(out + count * 3, 0, (led_count_ - count) * 3);
+
+  sequence.store(++sequence_, std::memory_order_release);  // even: frame complete
+}
+
+}
@@ -10,6 +10,14 @@ namespace forgeworklights {
 
 // Path to the root helper binary
 static constexpr const char* ROOT_HELPER = "/usr/local/libexec/fw_root_helper";
+// Environment variable naming a stand-in helper (e.g. fw_clip_helper to record
+// frames without hardware); it runs with the daemon's own privileges
+static constexpr const char* ROOT_HELPER_ENV = "FORGEWORKLIGHTS_ROOT_HELPER";
+
+static const char* root_helper() {
+  const char* override_path = std::getenv(ROOT_HELPER_ENV);
+  return (override_path && *override_path) ? override_path : ROOT_HELPER;
+}
 
 FrameworkTool::FrameworkTool(std::string tool_path) : tool_path_(std::move(tool_path)) {}
 
@@ -44,6 +52,7 @@ bool FrameworkTool::sendFrame(int zone, const std::vector<RGB>& leds, ColorOrder
   
   // Convert to hex string for helper
   std::string hex_payload = bytes_to_hex(led_data);
+  const char* helper = root_helper();
   
   std::fprintf(stderr, "[forgeworklights] sending %zu LEDs via root helper\n", leds.size());
   
@@ -56,7 +65,7 @@ bool FrameworkTool::sendFrame(int zone, const std::vector<RGB>& leds, ColorOrder
   
   if (pid == 0) {
     // Child process: exec the root helper
-    execl(ROOT_HELPER, ROOT_HELPER, hex_payload.c_str(), nullptr);
+    execl(helper, helper, hex_payload.c_str(), nullptr);
     // If exec fails, exit immediately
     std::perror("[forgeworklights] execl failed");
     std::exit(1);
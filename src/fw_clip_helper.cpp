@@ -0,0 +1,82 @@
+// fw_clip_helper.cpp
+// Stand-in for fw_root_helper that records frames instead of driving the strip
+// Run the daemon with FORGEWORKLIGHTS_ROOT_HELPER pointing here and each frame
+// it sends goes to `forgeworklights-clip record` (see scripts/tui/clip.py)
+// as one datagram on $XDG_RUNTIME_DIR/forgeworklights/clip.sock:
+//   u64      send time (CLOCK_MONOTONIC, ns, little-endian)
+//   led_count * 3 bytes, in the strip's color order
+// Without a recorder listening the frame is dropped; the daemon never waits.
+// Unprivileged: install it 755, never setuid.
+
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <cstdint>
+#include <ctime>
+#include <string>
+#include <vector>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+static constexpr int BYTES_PER_LED = 3;  // RGB
+static constexpr size_t TIME_SIZE = 8;
+
+// Helper to convert hex char to nibble
+static int hex_to_nibble(char c) {
+  if (c >= '0' && c <= '9') return c - '0';
+  if (c >= 'A' && c <= 'F') return c - 'A' + 10;
+  if (c >= 'a' && c <= 'f') return c - 'a' + 10;
+  return -1;
+}
+
+// Same location rule as the daemon's frame file (frame_file_path)
+static std::string socket_path() {
+  const char* runtime = std::getenv("XDG_RUNTIME_DIR");
+  if (runtime && *runtime) return std::string(runtime) + "/forgeworklights/clip.sock";
+  const char* home = std::getenv("HOME");
+  return std::string(home ? home : "/") + "/.cache/forgeworklights/clip.sock";
+}
+
+int main(int argc, char** argv) {
+  // Timestamp first: as close to the daemon's send as we can get
+  timespec now{};
+  clock_gettime(CLOCK_MONOTONIC, &now);
+  uint64_t ns = static_cast<uint64_t>(now.tv_sec) * 1000000000ull + static_cast<uint64_t>(now.tv_nsec);
+
+  if (argc != 2) {
+    std::fprintf(stderr, "fw_clip_helper: usage: fw_clip_helper <HEX_LED_DATA>\n");
+    return 1;
+  }
+  size_t len = std::strlen(argv[1]);
+  if (len == 0 || len % (2 * BYTES_PER_LED) != 0) {
+    std::fprintf(stderr, "fw_clip_helper: HEX_LED_DATA must be hex-encoded RGB data (3 bytes per LED)\n");
+    return 1;
+  }
+
+  std::vector<uint8_t> packet(TIME_SIZE + len / 2);
+  for (size_t i = 0; i < TIME_SIZE; ++i) packet[i] = static_cast<uint8_t>(ns >> (8 * i));
+  for (size_t i = 0; i < len; i += 2) {
+    int hi = hex_to_nibble(argv[1][i]);
+    int lo = hex_to_nibble(argv[1][i + 1]);
+    if (hi < 0 || lo < 0) {
+      std::fprintf(stderr, "fw_clip_helper: invalid hex character\n");
+      return 1;
+    }
+    packet[TIME_SIZE + i / 2] = static_cast<uint8_t>((hi << 4) | lo);
+  }
+
+  std::string path = socket_path();
+  sockaddr_un addr{};
+  addr.sun_family = AF_UNIX;
+  if (path.size() >= sizeof(addr.sun_path)) return 0;
+  std::memcpy(addr.sun_path, path.c_str(), path.size() + 1);
+
+  int fd = socket(AF_UNIX, SOCK_DGRAM | SOCK_CLOEXEC, 0);
+  if (fd < 0) return 0;
+  // No recorder (ENOENT, ECONNREFUSED) or a full queue (EAGAIN): drop the frame
+  sendto(fd, packet.data(), packet.size(), MSG_DONTWAIT,
+         reinterpret_cast<const sockaddr*>(&addr), sizeof(addr));
+  close(fd);
+  return 0;
+}
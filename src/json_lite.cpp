@@ -0,0 +1,294 @@
+#include "json_lite.hpp"
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <fstream>
+#include <iterator>
+
+namespace forgeworklights { namespace json {
+
+namespace {
+
+const std::string kEmptyString;
+const Value::Array kEmptyArray;
+const Value::Object kEmptyObject;
+
+class Parser {
+public:
+  explicit Parser(const std::string& text) : s_(text) {}
+
+  std::optional<Value> parse_document() {
+    auto v = parse_value(0);
+    skip_ws();
+    if (!v || pos_ != s_.size()) return std::nullopt;
+    return v;
+  }
+
+private:
+  static constexpr int kMaxDepth = 64;
+
+  void skip_ws() {
+    while (pos_ < s_.size() && (s_[pos_] == ' ' || s_[pos_] == '\t' || s_[pos_] == '\n' || s_[pos_] == '\r')) ++pos_;
+  }
+
+  bool consume(char c) {
+    skip_ws();
+    if (pos_ < s_.size() && s_[pos_] == c) { ++pos_; return true; }
+    return false;
+  }
+
+  bool literal(const char* word) {
+    size_t n = std::char_traits<char>::length(word);
+    if (s_.compare(pos_, n, word) != 0) return false;
+    pos_ += n;
+    return true;
+  }
+
+  std::optional<Value> parse_value(int depth) {
+    if (depth > kMaxDepth) return std::nullopt;
+    skip_ws();
+    if (pos_ >= s_.size()) return std::nullopt;
+    char c = s_[pos_];
+    if (c == '{') return parse_object(depth);
+    if (c == '[') return parse_array(depth);
+    if (c == '"') {
+      auto str = parse_string();
+      if (!str) return std::nullopt;
+      return Value(std::move(*str));
+    }
+    if (literal("true")) return Value(true);
+    if (literal("false")) return Value(false);
+    if (literal("null")) return Value();
+    return parse_number();
+  }
+
+  std::optional<Value> parse_number() {
+    const char* begin = s_.c_str() + pos_;
+    char* end = nullptr;
+    double v = std::strtod(begin, &end);
+    if (end == begin || !std::isfinite(v)) return std::nullopt;
+    pos_ += static_cast<size_t>(end - begin);
+    return Value(v);
+  }
+
+  static void append_utf8(std::string& out, unsigned cp) {
+    if (cp < 0x80) {
+      out += static_cast<char>(cp);
+    } else if (cp < 0x800) {
+      out += static_cast<char>(0xC0 | (cp >> 6));
+      out += static_cast<char>(0x80 | (cp & 0x3F));
+    } else if (cp < 0x10000) {
+      out += static_cast<char>(0xE0 | (cp >> 12));
+      out += static_cast<char>(0x80 | ((cp >> 6) & 0x3F));
+      out += static_cast<char>(0x80 | (cp & 0x3F));
+    } else {
+      out += static_cast<char>(0xF0 | (cp >> 18));
+      out += static_cast<char>(0x80 | ((cp >> 12) & 0x3F));
+      out += static_cast<char>(0x80 | ((cp >> 6) & 0x3F));
+      out += static_cast<char>(0x80 | (cp & 0x3F));
+    }
+  }
+
+  // Four hex digits of a \u escape at pos_
+  bool parse_hex4(unsigned& cp) {
+    if (pos_ + 4 > s_.size()) return false;
+    cp = 0;
+    for (size_t i = 0; i < 4; ++i) {
+      char c = s_[pos_ + i];
+      unsigned digit = c >= '0' && c <= '9' ? c - '0'
+                     : c >= 'a' && c <= 'f' ? c - 'a' + 10
+                     : c >= 'A' && c <= 'F' ? c - 'A' + 10 : 16;
+      if (digit > 15) return false;
+      cp = cp * 16 + digit;
+    }
+    pos_ += 4;
+    return true;
+  }
+
+  std::optional<std::string> parse_string() {
+    if (pos_ >= s_.size() || s_[pos_] != '"') return std::nullopt;
+    ++pos_;
+    std::string out;
+    while (pos_ < s_.size()) {
+      char c = s_[pos_++];
+      if (c == '"') return out;
+      if (c != '\\') { out += c; continue; }
+      if (pos_ >= s_.size()) return std::nullopt;
+      char e = s_[pos_++];
+      switch (e) {
+        case '"': out += '"'; break;
+        case '\\': out += '\\'; break;
+        case '/': out += '/'; break;
+        case 'b': out += '\b'; break;
+        case 'f': out += '\f'; break;
+        case 'n': out += '\n'; break;
+        case 'r': out += '\r'; break;
+        case 't': out += '\t'; break;
+        case 'u': {
+          unsigned cp = 0;
+          if (!parse_hex4(cp)) return std::nullopt;
+          if (cp >= 0xD800 && cp < 0xDC00) {
+            // High surrogate: characters beyond U+FFFF (json.dumps' default) come as a pair
+            size_t after_high = pos_;
+            unsigned low = 0;
+            pos_ += 2;
+            if (s_.compare(after_high, 2, "\\u") == 0 && parse_hex4(low) && low >= 0xDC00 && low < 0xE000) {
+              cp = 0x10000 + ((cp - 0xD800) << 10) + (low - 0xDC00);
+            } else {
+              pos_ = after_high;  // unpaired: whatever follows is parsed on its own
+              cp = 0xFFFD;
+            }
+          } else if (cp >= 0xDC00 && cp < 0xE000) {
+            cp = 0xFFFD;  // a low surrogate on its own
+          }
+          append_utf8(out, cp);
+          break;
+        }
+        default: return std::nullopt;
+      }
+    }
+    return std::nullopt;
+  }
+
+  std::optional<Value> parse_array(int depth) {
+    ++pos_;  // [
+    Value::Array items;
+    if (consume(']')) return Value(std::move(items));
+    for (;;) {
+      auto v = parse_value(depth + 1);
+      if (!v) return std::nullopt;
+      items.push_back(std::move(*v));
+      if (consume(',')) continue;
+      if (consume(']')) return Value(std::move(items));
+      return std::nullopt;
+    }
+  }
+
+  std::optional<Value> parse_object(int depth) {
+    ++pos_;  // {
+    Value::Object members;
+    if (consume('}')) return Value(std::move(members));
+    for (;;) {
+      skip_ws();
+      auto key = parse_string();
+      if (!key || !consume(':')) return std::nullopt;
+      auto v = parse_value(depth + 1);
+      if (!v) return std::nullopt;
+      members[*key] = std::move(*v);
+      if (consume(',')) continue;
+      if (consume('}')) return Value(std::move(members));
+      return std::nullopt;
+    }
+  }
+
+  const std::string& s_;
+  size_t pos_ = 0;
+};
+
+void dump_string(std::string& out, const std::string& s) {
+  out += '"';
+  for (unsigned char c : s) {
+    switch (c) {
+      case '"': out += "\\\""; break;
+      case '\\': out += "\\\\"; break;
+      case '\n': out += "\\n"; break;
+      case '\r': out += "\\r"; break;
+      case '\t': out += "\\t"; break;
+      default:
+        if (c < 0x20) {
+          char buf[8];
+          std::snprintf(buf, sizeof(buf), "\\u%04x", c);
+          out += buf;
+        } else {
+          out += static_cast<char>(c);
+        }
+    }
+  }
+  out += '"';
+}
+
+void newline(std::string& out, int indent, int depth) {
+  if (indent <= 0) return;
+  out += '\n';
+  out.append(static_cast<size_t>(indent * depth), ' ');
+}
+
+}
+
+const std::string& Value::as_string() const { return is_string() ? string_ : kEmptyString; }
+const Value::Array& Value::as_array() const { return is_array() ? *array_ : kEmptyArray; }
+const Value::Object& Value::as_object() const { return is_object() ? *object_ : kEmptyObject; }
+
+const Value* Value::find(const std::string& key) const {
+  if (!is_object()) return nullptr;
+  auto it = object_->find(key);
+  return it == object_->end() ? nullptr : &it->second;
+}
+
+std::string Value::dump(int indent) const {
+  std::string out;
+  dump_to(out, indent, 0);
+  if (indent > 0) out += '\n';
+  return out;
+}
+
+void Value::dump_to(std::string& out, int indent, int depth) const {
+  switch (type_) {
+    case Type::Null: out += "null"; break;
+    case Type::Bool: out += bool_ ? "true" : "false"; break;
+    case Type::Number: {
+      char buf[32];
+      if (number_ == std::floor(number_) && std::fabs(number_) < 1e15) {
+        std::snprintf(buf, sizeof(buf), "%.0f", number_);
+      } else {
+        std::snprintf(buf, sizeof(buf), "%.15g", number_);
+      }
+      out += buf;
+      break;
+    }
+    case Type::String: dump_string(out, string_); break;
+    case Type::Array: {
+      if (array_->empty()) { out += "[]"; break; }
+      out += '[';
+      bool first = true;
+      for (const auto& item : *array_) {
+        if (!first) out += ',';
+        first = false;
+        newline(out, indent, depth + 1);
+        item.dump_to(out, indent, depth + 1);
+      }
+      newline(out, indent, depth);
+      out += ']';
+      break;
+    }
+    case Type::Object: {
+      if (object_->empty()) { out += "{}"; break; }
+      out += '{';
+      bool first = true;
+      for (const auto& [key, value] : *object_) {
+        if (!first) out += ',';
+        first = false;
+        newline(out, indent, depth + 1);
+        dump_string(out, key);
+        out += indent > 0 ? ": " : ":";
+        value.dump_to(out, indent, depth + 1);
+      }
+      newline(out, indent, depth);
+      out += '}';
+      break;
+    }
+  }
+}
+
+std::optional<Value> parse(const std::string& text) {
+  return Parser(text).parse_document();
+}
+
+std::optional<Value> parse_file(const std::string& path) {
+  std::ifstream in(path, std::ios::binary);
+  if (!in.good()) return std::nullopt;
+  std::string content((std::istreambuf_iterator<char>(in)), std::istreambuf_iterator<char>());
+  return parse(content);
+}
+
+} }
@@ -0,0 +1,117 @@
+#include "packed_themes.hpp"
+#include <cstring>
+#include <filesystem>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+namespace forgeworklights {
+
+namespace {
+
+constexpr char MAGIC[4] = {'F', 'W', 'L', 'B'};
+constexpr uint16_t VERSION = 1;
+constexpr size_t HEADER_SIZE = 48;
+constexpr size_t INDEX_ENTRY_SIZE = 12;
+
+template <typename T>
+T read_le(const uint8_t* p) {
+  T v = 0;
+  for (size_t i = 0; i < sizeof(T); ++i) v |= static_cast<T>(p[i]) << (8 * i);
+  return v;
+}
+
+}
+
+std::string packed_themes_path(const std::string& json_path) {
+  return std::filesystem::path(json_path).replace_extension(".bin").string();
+}
+
+std::unique_ptr<PackedThemes> PackedThemes::open(const std::string& path, const std::string& source_json,
+                                                 int led_count) {
+  struct stat source;
+  if (::stat(source_json.c_str(), &source) != 0 || led_count <= 0) return nullptr;
+
+  int fd = ::open(path.c_str(), O_RDONLY | O_CLOEXEC);
+  if (fd < 0) return nullptr;
+  struct stat st;
+  if (::fstat(fd, &st) != 0 || static_cast<size_t>(st.st_size) < HEADER_SIZE) {
+    ::close(fd);
+    return nullptr;
+  }
+  size_t length = static_cast<size_t>(st.st_size);
+  void* map = ::mmap(nullptr, length, PROT_READ, MAP_PRIVATE, fd, 0);
+  ::close(fd);
+  if (map == MAP_FAILED) return nullptr;
+  const uint8_t* p = static_cast<const uint8_t*>(map);
+
+  uint64_t mtime_ns = static_cast<uint64_t>(source.st_mtim.tv_sec) * 1000000000ull +
+                      static_cast<uint64_t>(source.st_mtim.tv_nsec);
+  uint32_t count = read_le<uint32_t>(p + 12);
+  uint32_t index_offset = read_le<uint32_t>(p + 40);
+  uint32_t records_offset = read_le<uint32_t>(p + 44);
+  bool valid = std::memcmp(p, MAGIC, 4) == 0 &&
+               read_le<uint16_t>(p + 4) == VERSION &&
+               read_le<uint32_t>(p + 8) == static_cast<uint32_t>(led_count) &&
+               read_le<uint64_t>(p + 16) == static_cast<uint64_t>(source.st_ino) &&
+               read_le<uint64_t>(p + 24) == mtime_ns &&
+               read_le<uint64_t>(p + 32) == static_cast<uint64_t>(source.st_size) &&
+               index_offset + static_cast<uint64_t>(count) * INDEX_ENTRY_SIZE <= length &&
+               records_offset + static_cast<uint64_t>(count) * led_count * 3 <= length;
+  if (!valid) {
+    ::munmap(map, length);
+    return nullptr;
+  }
+  return std::unique_ptr<PackedThemes>(new PackedThemes(p, length, led_count, count, index_offset));
+}
+
+PackedThemes::PackedThemes(const uint8_t* data, size_t length, int led_count, uint32_t count,
+                           uint32_t index_offset)
+  : data_(data), length_(length), led_count_(led_count), count_(count), index_offset_(index_offset) {}
+
+PackedThemes::~PackedThemes() {
+  ::munmap(const_cast<uint8_t*>(data_), length_);
+}
+
+std::string PackedThemes::key_at(uint32_t i) const {
+  const uint8_t* entry = data_ + index_offset_ + i * INDEX_ENTRY_SIZE;
+  uint32_t offset = read_le<uint32_t>(entry);
+  uint16_t len = read_le<uint16_t>(entry + 4);
+  if (offset + static_cast<uint64_t>(len) > length_) return {};
+  return std::string(reinterpret_cast<const char*>(data_ + offset), len);
+}
+
+const uint8_t* PackedThemes::find(const std::string& key) const {
+  uint32_t lo = 0, hi = count_;
+  while (lo < hi) {
+    uint32_t mid = lo + (hi - lo) / 2;
+    int cmp = key_at(mid).compare(key);
+    if (cmp == 0) {
+      uint32_t record = read_le<uint32_t>(data_ + index_offset_ + mid * INDEX_ENTRY_SIZE + 8);
+      if (record + static_cast<uint64_t>(led_count_) * 3 > length_) return nullptr;
+      return data_ + record;
+    }
+    if (cmp < 0) lo = mid + 1; else hi = mid;
+  }
+  return nullptr;
+}
+
+bool PackedThemes::gradient(const std::string& key, std::vector<RGB>& out) const {
+  const uint8_t* rgb = find(key);
+  if (!rgb) return false;
+  out.resize(led_count_);
+  for (int i = 0; i < led_count_; ++i) {
+    out[i] = RGB{rgb[i * 3], rgb[i * 3 + 1], rgb[i * 3 + 2]};
+  }
+  return true;
+}
+
+std::vector<std::string> PackedThemes::keys() const {
+  std::vector<std::string> out;
+  out.reserve(count_);
+  for (uint32_t i = 0; i < count_; ++i) out.push_back(key_at(i));
+  return out;
+}
+
+}
@@ -1,138 +1,68 @@
 #include "theme_database.hpp"
-#include <fstream>
-#include <sstream>
+#include "color_utils.hpp"
+#include "json_lite.hpp"
 #include <algorithm>
-#include <cstdio>
-#include <cstring>
 
 namespace forgeworklights {
 
-// Simple JSON parsing for our specific format
-static std::string trim(const std::string& str) {
-  auto start = str.find_first_not_of(" \t\n\r");
-  if (start == std::string::npos) return "";
-  auto end = str.find_last_not_of(" \t\n\r");
-  return str.substr(start, end - start + 1);
-}
-
-static std::string unquote(const std::string& str) {
-  std::string s = trim(str);
-  if (s.size() >= 2 && s.front() == '"' && s.back() == '"') {
-    return s.substr(1, s.size() - 2);
-  }
-  return s;
+static bool parse_hex_color(const std::string& hex, RGB& out) {
+  std::string h = (!hex.empty() && hex[0] == '#') ? hex.substr(1) : hex;
+  if (h.length() != 6 || h.find_first_not_of("0123456789abcdefABCDEF") != std::string::npos) return false;
+  unsigned int val = std::stoul(h, nullptr, 16);
+  out = RGB{static_cast<uint8_t>((val >> 16) & 0xFF), static_cast<uint8_t>((val >> 8) & 0xFF),
+            static_cast<uint8_t>(val & 0xFF)};
+  return true;
 }
 
-static RGB parse_hex_color(const std::string& hex) {
-  RGB c{0, 0, 0};
-  std::string h = hex;
-  if (h[0] == '#') h = h.substr(1);
-  if (h.length() == 6) {
-    unsigned int val;
-    if (std::sscanf(h.c_str(), "%x", &val) == 1) {
-      c.r = (val >> 16) & 0xFF;
-      c.g = (val >> 8) & 0xFF;
-      c.b = val & 0xFF;
-    }
+static std::vector<RGB> parse_colors(const json::Value* list) {
+  std::vector<RGB> colors;
+  if (!list || !list->is_array()) return colors;
+  for (const auto& item : list->as_array()) {
+    RGB c;
+    if (item.is_string() && parse_hex_color(item.as_string(), c)) colors.push_back(c);
   }
-  return c;
+  return colors;
 }
 
-bool ThemeDatabase::load(const std::string& path) {
+bool ThemeDatabase::load(const std::string& path, int led_count) {
   db_path_ = path;
   themes_.clear();
+  gradients_.clear();
+  packed_.reset();
   
-  std::ifstream file(path);
-  if (!file.good()) return false;
-  
-  std::string line;
-  std::string current_theme;
-  std::vector<RGB> current_colors;
-  std::string current_name;
-  
-  while (std::getline(file, line)) {
-    line = trim(line);
-    
-    // Look for theme key (but skip root "themes" object)
-    if (line.find("\"") != std::string::npos && line.find(":") != std::string::npos && 
-        line.find("{") != std::string::npos) {
-      // Extract theme name first
-      auto quote1 = line.find('"');
-      auto quote2 = line.find('"', quote1 + 1);
-      if (quote1 != std::string::npos && quote2 != std::string::npos) {
-        std::string theme_key = line.substr(quote1 + 1, quote2 - quote1 - 1);
-        
-        // Skip the root "themes" object
-        if (theme_key == "themes") continue;
-        
-        // Save previous theme if any
-        if (!current_theme.empty() && !current_colors.empty()) {
-          themes_[current_theme] = ThemeColors{current_name, current_colors};
-        }
-        
-        current_theme = theme_key;
-        current_colors.clear();
-        current_name.clear();
-      }
-    }
-    // Look for "name" field
-    else if (line.find("\"name\"") != std::string::npos) {
-      auto colon = line.find(':');
-      if (colon != std::string::npos) {
-        auto value = line.substr(colon + 1);
-        // Remove trailing comma if present
-        auto comma = value.find(',');
-        if (comma != std::string::npos) value = value.substr(0, comma);
-        current_name = unquote(value);
-      }
-    }
-    // Look for "colors" array
-    else if (line.find("\"colors\"") != std::string::npos) {
-      auto bracket = line.find('[');
-      if (bracket != std::string::npos) {
-        // Colors on same line
-        auto closing = line.find(']', bracket);
-        if (closing != std::string::npos) {
-          std::string colors_str = line.substr(bracket + 1, closing - bracket - 1);
-          
-          // Parse individual colors
-          size_t pos = 0;
-          while (pos < colors_str.length()) {
-            auto quote1 = colors_str.find('"', pos);
-            if (quote1 == std::string::npos) break;
-            auto quote2 = colors_str.find('"', quote1 + 1);
-            if (quote2 == std::string::npos) break;
-            
-            std::string color_hex = colors_str.substr(quote1 + 1, quote2 - quote1 - 1);
-            current_colors.push_back(parse_hex_color(color_hex));
-            pos = quote2 + 1;
-          }
-        }
-      }
-    }
-    // Look for color values in multi-line arrays
-    else if (line.find('"') != std::string::npos && line.find('#') != std::string::npos) {
-      // Extract hex color from quoted string
-      auto quote1 = line.find('"');
-      auto quote2 = line.find('"', quote1 + 1);
-      if (quote1 != std::string::npos && quote2 != std::string::npos) {
-        std::string color_str = line.substr(quote1 + 1, quote2 - quote1 - 1);
-        if (color_str.length() > 0 && color_str[0] == '#') {
-          current_colors.push_back(parse_hex_color(color_str));
-        }
-      }
-    }
+  if (led_count > 0) {
+    packed_ = PackedThemes::open(packed_themes_path(path), path, led_count);
+    if (packed_ && packed_->size() > 0) return true;
+    packed_.reset();
   }
   
-  // Save last theme
-  if (!current_theme.empty() && !current_colors.empty()) {
-    themes_[current_theme] = ThemeColors{current_name, current_colors};
+  auto doc = json::parse_file(path);
+  if (!doc) return false;
+  const json::Value* themes = doc->find("themes");
+  if (!themes || !themes->is_object()) return false;
+  
+  for (const auto& [key, entry] : themes->as_object()) {
+    if (!entry.is_object()) continue;
+    ThemeColors theme;
+    // Control points; entries written before "stops" carry an expanded "colors" array
+    theme.colors = parse_colors(entry.find("stops"));
+    if (theme.colors.empty()) theme.colors = parse_colors(entry.find("colors"));
+    if (theme.colors.empty()) continue;
+    if (const json::Value* name = entry.find("name"); name && name->is_string()) theme.name = name->as_string();
+    if (const json::Value* mode = entry.find("mode"); mode && mode->is_string()) theme.mode = mode->as_string();
+    themes_[key] = std::move(theme);
   }
   
   return !themes_.empty();
 }
 
 std::optional<ThemeColors> ThemeDatabase::get(const std::string& theme_name) const {
+  if (packed_) {
+    // Already expanded: one color per LED, which resamples onto itself
+    ThemeColors theme{theme_name, {}};
+    if (!packed_->gradient(theme_name, theme.colors)) return std::nullopt;
+    return theme;
+  }
   auto it = themes_.find(theme_name);
   if (it != themes_.end()) {
     return it->second;
@@ -140,11 +70,38 @@ std::optional<ThemeColors> ThemeDatabase::get(const std::string& theme_name) con
   return std::nullopt;
 }
 
+std::optional<std::vector<RGB>> ThemeDatabase::gradient(const std::string& theme_name, int length) const {
+  if (packed_ && length == packed_->led_count()) {
+    std::vector<RGB> colors;
+    if (!packed_->gradient(theme_name, colors)) return std::nullopt;
+    return colors;
+  }
+  if (packed_) {
+    auto theme = get(theme_name);
+    if (!theme) return std::nullopt;
+    return resample_gradient(theme->colors, length);
+  }
+  auto it = themes_.find(theme_name);
+  if (it == themes_.end()) return std::nullopt;
+  auto key = std::make_tuple(theme_name, length, it->second.mode);
+  auto cached = gradients_.find(key);
+  if (cached == gradients_.end()) {
+    cached = gradients_.emplace(key, resample_gradient(it->second.colors, length, it->second.mode)).first;
+  }
+  return cached->second;
+}
+
 bool ThemeDatabase::save_custom(const std::string& theme_name, const std::vector<RGB>& colors) {
   if (colors.size() < 3) return false;
   
-  // Update in-memory
+  // Update in-memory (switching the packed view over to the parsed JSON)
+  if (packed_) {
+    auto keys = packed_->keys();
+    for (const auto& key : keys) themes_[key] = *get(key);
+    packed_.reset();
+  }
   themes_[theme_name] = ThemeColors{theme_name, colors};
+  gradients_.clear();
   
   // TODO: Write back to JSON file (for now just keep in memory)
   // This would require proper JSON serialization
@@ -153,6 +110,7 @@ bool ThemeDatabase::save_custom(const std::string& theme_name, const std::vector
 }
 
 std::vector<std::string> ThemeDatabase::list_themes() const {
+  if (packed_) return packed_->keys();  // already sorted
   std::vector<std::string> names;
   names.reserve(themes_.size());
   for (const auto& pair : themes_) {
@@ -0,0 +1,95 @@
+#!/bin/bash
+# Shared file write tests
+# Runs writers looping tui.utils.atomic_file.update_json on one file at the
+# same time, plus a reader, and checks that no increment is lost, that no
+# reader sees a half-written file and that no temp file is left behind
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+TESTS_PASSED=0
+TESTS_FAILED=0
+ROUNDS=300
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+export PYTHONPATH="$SCRIPT_DIR/../scripts${PYTHONPATH:+:$PYTHONPATH}"
+SHARED="$WORK/shared/counter.json"
+mkdir -p "$HOME" "$XDG_RUNTIME_DIR" "$WORK/shared"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+writer() {  # writer NAME: ROUNDS increments of the shared and of its own counter
+    python3 -c '
+import sys
+from pathlib import Path
+from tui.utils import atomic_file
+
+name, rounds = sys.argv[2], int(sys.argv[3])
+
+def increment(data):
+    data["total"] = data.get("total", 0) + 1
+    data[name] = data.get(name, 0) + 1
+
+for _ in range(rounds):
+    atomic_file.update_json(Path(sys.argv[1]), increment)' "$SHARED" "$1" "$ROUNDS"
+}
+
+echo "========================================"
+echo "  Shared File Write Tests"
+echo "========================================"
+echo ""
+
+echo "Concurrent writers..."
+# Reads until the writers are done; prints how many reads were not valid JSON
+python3 -c '
+import os, sys
+from pathlib import Path
+from tui.utils import atomic_file
+torn = 0
+while not os.path.exists(sys.argv[2]):
+    data, gen = atomic_file.read_json(Path(sys.argv[1]))
+    if gen is not None and not isinstance(data, dict):
+        torn += 1
+print(torn)' "$SHARED" "$WORK/done" > "$WORK/torn.txt" &
+READER=$!
+writer a &
+A=$!
+writer b &
+B=$!
+wait "$A" "$B"
+touch "$WORK/done"
+wait "$READER"
+
+count() { python3 -c 'import json, sys; print(json.load(open(sys.argv[1])).get(sys.argv[2]))' "$SHARED" "$1"; }
+check "no increment lost" "$((2 * ROUNDS))" "$(count total)"
+check "every write of the first writer" "$ROUNDS" "$(count a)"
+check "every write of the second writer" "$ROUNDS" "$(count b)"
+check "readers never see a partial file" "0" "$(cat "$WORK/torn.txt")"
+check "no temp files left behind" "none" "$(ls -A "$WORK/shared" | grep -q '^\.fwl-.*\.tmp$' || echo none)"
+check "lock files kept out of the directory" "counter.json" "$(ls -A "$WORK/shared")"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -0,0 +1,105 @@
+#!/bin/bash
+# Animation clip tests
+# Records the daemon through fw_clip_helper (no hardware), bakes rendered
+# frames into a clip and plays it back into a stand-in for the daemon
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+BUILD_DIR="${1:-./build}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+CLIP_PY="$SCRIPT_DIR/../scripts/led-clip.py"
+EFFECT_PY="$SCRIPT_DIR/../scripts/effect-host.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+if [ ! -f "$BUILD_DIR/forgeworklights" ] || [ ! -f "$BUILD_DIR/fw_clip_helper" ]; then
+    echo -e "${RED}Error: forgeworklights and fw_clip_helper not found in $BUILD_DIR${NC}"
+    echo "Build them first with: cmake --build build"
+    exit 1
+fi
+BUILD_DIR="$(cd "$BUILD_DIR" && pwd)"
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+# A home of our own: a GRB strip of 22 LEDs running the wave animation
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+mkdir -p "$HOME/.config/forgeworklights" "$XDG_RUNTIME_DIR"
+printf 'led_count = 22\ncolor_order = "GRB"\ngamma_exponent = 1.33\n' > "$HOME/.config/forgeworklights/config.toml"
+echo wave > "$HOME/.config/forgeworklights/animation"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+echo "========================================"
+echo "  Animation Clip Tests"
+echo "========================================"
+echo ""
+
+echo "Recording..."
+python3 "$CLIP_PY" record "$WORK/recorded.fwclip" --seconds=2 \
+    --daemon="$BUILD_DIR/forgeworklights" --helper="$BUILD_DIR/fw_clip_helper" 2>/dev/null
+info=$(python3 "$CLIP_PY" info "$WORK/recorded.fwclip")
+check "daemon frames recorded" "22 LEDs" "$(echo "$info" | head -1 | grep -o '22 LEDs')"
+check "marked as daemon output" "gamma 1.33" "$(echo "$info" | head -1 | grep -o 'gamma 1.33')"
+median=$(echo "$info" | sed -n 's/.*median \([0-9.]*\) ms.*/\1/p')
+check "frames about 33 ms apart" "yes" "$(awk -v m="$median" 'BEGIN { if (m > 28 && m < 40) print "yes" }')"
+last=$(python3 "$CLIP_PY" dump "$WORK/recorded.fwclip" 2>/dev/null | tail -1 | cut -d' ' -f2)
+shown=$(python3 -c 'import sys; print(open(sys.argv[1], "rb").read()[32:].hex())' "$XDG_RUNTIME_DIR/forgeworklights/frame.bin")
+check "RGB as the daemon published it (GRB strip)" "$shown" "$last"
+check "helper without a recorder drops the frame" "0" "$("$BUILD_DIR/fw_clip_helper" 0A0B0C; echo $?)"
+check "helper rejects partial LEDs" "1" "$("$BUILD_DIR/fw_clip_helper" 0A0B 2>/dev/null; echo $?)"
+
+echo ""
+echo "Baking..."
+"$BUILD_DIR/forgeworklights" render wave --frames=90 > "$WORK/wave.txt"
+python3 "$CLIP_PY" bake - "$WORK/wave.fwclip" < "$WORK/wave.txt" 2>/dev/null
+check "rendered frames in the clip" "90 frames over 3.00 s" \
+    "$(python3 "$CLIP_PY" info "$WORK/wave.fwclip" | head -1 | grep -o '90 frames over 3.00 s')"
+check "frames round-trip exactly" "same" "$(python3 "$CLIP_PY" dump "$WORK/wave.fwclip" 2>/dev/null | cut -d' ' -f2 | cmp -s - "$WORK/wave.txt" && echo same)"
+check "clip smaller than its frames" "yes" "$([ "$(stat -c %s "$WORK/wave.fwclip")" -lt 5940 ] && echo yes)"
+check "frame times at --fps" "1.000000" "$(python3 "$CLIP_PY" dump "$WORK/wave.fwclip" 2>/dev/null | sed -n 31p | cut -d' ' -f1)"
+
+echo ""
+echo "Playback..."
+python3 "$EFFECT_PY" consume --output="$WORK/played.rgb" --frames=100 2>/dev/null &
+sleep 0.5
+python3 "$CLIP_PY" play "$WORK/wave.fwclip"
+wait
+played=$(python3 -c '
+import sys
+data = open(sys.argv[1], "rb").read()
+frames = [data[i:i + 66].hex() for i in range(0, len(data), 66)]
+print("\n".join(f for i, f in enumerate(frames) if i == 0 or f != frames[i - 1]))' "$WORK/played.rgb")
+check "every frame played, in order" "same" "$(echo "$played" | cmp -s - "$WORK/wave.txt" && echo same)"
+check "animation restored" "wave" "$(cat "$HOME/.config/forgeworklights/animation")"
+
+echo ""
+echo "Errors..."
+check "not a clip" "1" "$(python3 "$CLIP_PY" info "$WORK/wave.txt" 2>/dev/null; echo $?)"
+head -c 200 "$WORK/wave.fwclip" > "$WORK/cut.fwclip"
+check "truncated clip" "1" "$(python3 "$CLIP_PY" dump "$WORK/cut.fwclip" >/dev/null 2>&1; echo $?)"
+check "bad frame line" "1" "$(echo 12345 | python3 "$CLIP_PY" bake - "$WORK/bad.fwclip" 2>/dev/null; echo $?)"
+check "no temporary files left behind" "none" "$(ls -A "$WORK" | grep -q '^\.' || echo none)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
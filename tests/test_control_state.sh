@@ -0,0 +1,121 @@
+#!/bin/bash
+# Control state tests
+# Moves the settings between the per-setting files and state.json with
+# `forgeworklights state migrate|off`, writes state.json from both Python
+# (tui.control.update) and the C++ CLI, and checks that every value - a
+# non-ASCII theme key and nested animation_params included - survives each
+# hand-over (no daemon, no hardware)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+BUILD_DIR="${1:-./build}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+if [ ! -f "$BUILD_DIR/forgeworklights" ]; then
+    echo -e "${RED}Error: forgeworklights not found in $BUILD_DIR${NC}"
+    echo "Build it first with: cmake --build build"
+    exit 1
+fi
+FWL="$(cd "$BUILD_DIR" && pwd)/forgeworklights"
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+export PYTHONPATH="$SCRIPT_DIR/../scripts${PYTHONPATH:+:$PYTHONPATH}"
+CONFIG="$HOME/.config/forgeworklights"
+STATE="$CONFIG/state.json"
+mkdir -p "$CONFIG" "$XDG_RUNTIME_DIR"
+# Outside the Basic Multilingual Plane too: Python writes it as a surrogate pair
+THEME_KEY="café-夜-🌙"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+# A field of `forgeworklights state show`, as Python sees it (JSON, sorted keys)
+shown() {
+    "$FWL" state show | python3 -c 'import json, sys; print(json.dumps(json.load(sys.stdin)[sys.argv[1]], sort_keys=True, ensure_ascii=False))' "$1"
+}
+
+control() {  # control 'PYTHON KEYWORD ARGUMENTS'
+    python3 -c "from tui import control; control.update($1)"
+}
+
+echo "========================================"
+echo "  Control State Tests"
+echo "========================================"
+echo ""
+
+echo "Migrating..."
+echo nord > "$CONFIG/led-theme"
+echo 0.5 > "$CONFIG/brightness"
+echo 5000 > "$CONFIG/temperature"
+echo wave > "$CONFIG/animation"
+echo '{"wave": {"speed": 0.7}}' > "$CONFIG/animation-params.json"
+check "show without state.json fails" "1" "$("$FWL" state show >/dev/null 2>&1; echo $?)"
+"$FWL" state migrate > /dev/null
+check "state.json created" "yes" "$([ -f "$STATE" ] && echo yes)"
+check "first version" "1" "$(shown version)"
+check "theme from led-theme" '"nord"' "$(shown led_theme)"
+check "brightness from its file" "0.5" "$(shown brightness)"
+check "temperature from its file" "5000" "$(shown temperature)"
+check "animation parameters from their file" '{"wave": {"speed": 0.7}}' "$(shown animation_params)"
+check "migrating twice keeps the document" "already using $STATE" "$("$FWL" state migrate)"
+
+echo ""
+echo "Python writes, C++ reads..."
+control "led_theme='$THEME_KEY', brightness=0.25, animation='ripple', animation_params={'ripple': {'period': 2.5, 'width': 0.3}}"
+check "version went up" "2" "$(shown version)"
+check "non-ASCII theme key" "\"$THEME_KEY\"" "$(shown led_theme)"
+check "brightness" "0.25" "$(shown brightness)"
+check "animation" '"ripple"' "$(shown animation)"
+check "nested parameters merged per animation" '{"ripple": {"period": 2.5, "width": 0.3}, "wave": {"speed": 0.7}}' "$(shown animation_params)"
+
+echo ""
+echo "C++ writes, Python reads..."
+"$FWL" brightness 0.75 > /dev/null
+check "version went up again" "3" "$(shown version)"
+read_state() { python3 -c 'import json, sys; from tui import control; print(json.dumps(control.read_state()[sys.argv[1]], sort_keys=True, ensure_ascii=False))' "$1"; }
+check "brightness from the CLI" "0.75" "$(read_state brightness)"
+check "theme key kept through the C++ writer" "\"$THEME_KEY\"" "$(read_state led_theme)"
+check "parameters kept through the C++ writer" '{"ripple": {"period": 2.5, "width": 0.3}, "wave": {"speed": 0.7}}' "$(read_state animation_params)"
+control "temperature=4000"
+check "Python after C++: next version" "4" "$(shown version)"
+check "Python after C++: brightness kept" "0.75" "$(shown brightness)"
+
+echo ""
+echo "Back to the per-setting files..."
+"$FWL" state off > /dev/null
+check "state.json removed" "none" "$([ -e "$STATE" ] || echo none)"
+check "led-theme" "$THEME_KEY" "$(cat "$CONFIG/led-theme")"
+check "brightness" "0.750" "$(cat "$CONFIG/brightness")"
+check "temperature" "4000" "$(cat "$CONFIG/temperature")"
+check "animation" "ripple" "$(cat "$CONFIG/animation")"
+check "animation-params.json" '{"ripple": {"period": 2.5, "width": 0.3}, "wave": {"speed": 0.7}}' \
+    "$(python3 -c 'import json, sys; print(json.dumps(json.load(open(sys.argv[1])), sort_keys=True))' "$CONFIG/animation-params.json")"
+check "Python reads the same theme from the files" "\"$THEME_KEY\"" "$(read_state led_theme)"
+check "off again is a no-op" "0" "$("$FWL" state off > /dev/null; echo $?)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
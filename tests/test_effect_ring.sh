@@ -0,0 +1,123 @@
+#!/bin/bash
+# Effect ring tests
+# Runs the real daemon (recorded through fw_clip_helper, no hardware) on the
+# "external" animation while Python effects fill the ring, and checks the
+# frames it sends, the animation restored afterwards and its fallback to the
+# theme gradient once the writer is gone or stalls
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+BUILD_DIR="${1:-./build}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+CLIP_PY="$SCRIPT_DIR/../scripts/led-clip.py"
+EFFECT_PY="$SCRIPT_DIR/../scripts/effect-host.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+if [ ! -f "$BUILD_DIR/forgeworklights" ] || [ ! -f "$BUILD_DIR/fw_clip_helper" ]; then
+    echo -e "${RED}Error: forgeworklights and fw_clip_helper not found in $BUILD_DIR${NC}"
+    echo "Build them first with: cmake --build build"
+    exit 1
+fi
+BUILD_DIR="$(cd "$BUILD_DIR" && pwd)"
+
+WORK=$(mktemp -d)
+trap 'pkill -9 -f "$WORK/" 2>/dev/null; rm -rf "$WORK"' EXIT
+# A home of our own: 22 LEDs on static, at full brightness and without gamma,
+# so the frames an effect writes reach the strip byte for byte
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+CONFIG="$HOME/.config/forgeworklights"
+mkdir -p "$CONFIG" "$XDG_RUNTIME_DIR"
+printf 'led_count = 22\ngamma_exponent = 1.0\n' > "$CONFIG/config.toml"
+echo static > "$CONFIG/animation"
+echo 1.0 > "$CONFIG/brightness"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+plugin() {  # plugin NAME FRAME_EXPRESSION [COUNT] (then stalls, still running)
+    {
+        echo "import time"
+        echo "def frames(led_count):"
+        echo "    for _ in range(${3:-1000000}):"
+        echo "        yield $2"
+        echo "    time.sleep(60)"
+    } > "$WORK/$1.py"
+}
+plugin ramp 'bytes(range(3 * led_count))'
+plugin reversed 'bytes(reversed(range(3 * led_count)))'
+plugin green 'bytes([0, 255, 0]) * led_count' 30
+RAMP=$(python3 -c 'print(bytes(range(66)).hex())')
+REVERSED=$(python3 -c 'print(bytes(reversed(range(66))).hex())')
+GREEN_FRAME=$(python3 -c 'print((bytes([0, 255, 0]) * 22).hex())')
+
+echo "========================================"
+echo "  Effect Ring Tests"
+echo "========================================"
+echo ""
+
+echo "Running the daemon..."
+python3 "$CLIP_PY" record "$WORK/strip.fwclip" --seconds=10 \
+    --daemon="$BUILD_DIR/forgeworklights" --helper="$BUILD_DIR/fw_clip_helper" 2>/dev/null &
+RECORDER=$!
+sleep 1
+# 1. Stopped with Ctrl+C: the previous animation comes back
+python3 "$EFFECT_PY" run "$WORK/ramp.py" 2>/dev/null &
+EFFECT=$!
+sleep 1.5
+check "external while an effect runs" "external" "$(cat "$CONFIG/animation")"
+kill -INT "$EFFECT"
+wait "$EFFECT" || true
+check "previous animation restored on SIGINT" "static" "$(cat "$CONFIG/animation")"
+check "ring removed" "none" "$([ -e "$XDG_RUNTIME_DIR/forgeworklights/effect.ring" ] || echo none)"
+sleep 1
+# 2. Killed: the animation stays external, the daemon sees the producer is gone
+python3 "$EFFECT_PY" run "$WORK/reversed.py" 2>/dev/null &
+EFFECT=$!
+sleep 1.5
+{ pkill -9 -f "$WORK/reversed.py"; wait "$EFFECT"; } 2>/dev/null || true
+check "killed effect leaves external selected" "external" "$(cat "$CONFIG/animation")"
+sleep 1.5
+# 3. Stalled: a second of green, then no frames while the producer lives on
+python3 "$EFFECT_PY" run "$WORK/green.py" 2>/dev/null &
+EFFECT=$!
+sleep 3.5
+{ pkill -9 -f "$WORK/green.py"; wait "$EFFECT"; } 2>/dev/null || true
+wait "$RECORDER"
+
+# The recorder only sees changes: one line per distinct frame, with its time
+python3 "$CLIP_PY" dump "$WORK/strip.fwclip" 2>/dev/null > "$WORK/frames.txt"
+gradient=$(head -1 "$WORK/frames.txt" | cut -d' ' -f2)
+sequence=$(awk -v g="$gradient" -v r="$RAMP" -v v="$REVERSED" -v n="$GREEN_FRAME" '
+    { name = $2 == g ? "gradient" : $2 == r ? "ramp" : $2 == v ? "reversed" : $2 == n ? "green" : "other" }
+    name != last { printf "%s%s", sep, name; sep = " "; last = name }' "$WORK/frames.txt")
+
+echo ""
+echo "Frames..."
+check "effect frames byte for byte, gradient between them" \
+    "gradient ramp gradient reversed gradient green gradient" "$sequence"
+stall=$(awk -v n="$GREEN_FRAME" '$2 == n { green = $1 } green && $2 != n { print $1 - green; exit }' "$WORK/frames.txt")
+check "gradient about a second into a stall" "yes" "$(awk -v s="$stall" 'BEGIN { if (s >= 0.9 && s < 2.5) print "yes" }')"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -0,0 +1,103 @@
+#!/bin/bash
+# Hyprland automation against a recorded event stream
+# Replays a recording on a stand-in socket and checks the settings
+# `forgeworklights-hyprland --dry-run` would apply (no Hyprland, no daemon)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+AUTOMATION_PY="$SCRIPT_DIR/../scripts/hyprland-automation.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+# A home of our own: the baseline is theme "match" and animation "breathe"
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+mkdir -p "$HOME/.config/forgeworklights" "$XDG_RUNTIME_DIR"
+echo breathe > "$HOME/.config/forgeworklights/animation"
+
+cat > "$WORK/rules.toml" <<'EOF'
+debounce = 0.1
+
+[workspaces]
+"2" = { theme = "nord" }
+
+[[windows]]
+class = "firefox"
+animation = "wave"
+
+[fullscreen]
+class = "steam_app_.*"
+animation = "static"
+EOF
+
+# seconds<TAB>event; the flips to 3 and 4 come faster than the debounce
+printf '%s\n' \
+    $'0.000\tworkspace>>1' \
+    $'0.010\tactivewindow>>kitty,~' \
+    $'0.300\tworkspace>>2' \
+    $'0.310\tactivewindow>>firefox,Mozilla' \
+    $'0.600\tworkspace>>3' \
+    $'0.620\tworkspace>>4' \
+    $'0.640\tworkspace>>2' \
+    $'0.900\tactivewindow>>steam_app_1234,Game' \
+    $'0.910\tfullscreen>>1' \
+    $'1.200\tfullscreen>>0' \
+    $'1.210\tactivewindow>>firefox,Mozilla' \
+    $'1.500\tworkspace>>1' \
+    $'1.500\tactivewindow>>kitty,~' \
+    $'1.800\tworkspace>>2' > "$WORK/events.log"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+echo "========================================"
+echo "  Hyprland Automation Tests (replay)"
+echo "========================================"
+echo ""
+
+SOCKET="$WORK/events.sock"
+python3 "$AUTOMATION_PY" replay "$WORK/events.log" --socket="$SOCKET" &
+for _ in $(seq 100); do [ -S "$SOCKET" ] && break; sleep 0.05; done
+output=$(python3 "$AUTOMATION_PY" --socket="$SOCKET" --rules="$WORK/rules.toml" --dry-run --once)
+wait
+
+line() { echo "$output" | sed -n "$1p"; }
+
+echo "Rules..."
+check "workspace and window rules" "workspace 2, class firefox: led_theme=nord animation=wave" "$(line 1)"
+check "fullscreen rule wins" "workspace 2, class steam_app_1234, fullscreen: animation=static" "$(line 2)"
+check "leaving fullscreen" "workspace 2, class firefox: animation=wave" "$(line 3)"
+check "no rule restores the baseline" "workspace 1, class kitty: led_theme=match animation=breathe" "$(line 4)"
+check "rapid flips debounced" "0" "$(echo "$output" | grep -c 'workspace [34]' || true)"
+check "exit restores the baseline" "exit: led_theme=match" "$(echo "$output" | tail -1)"
+check "dry run leaves settings alone" "breathe" "$(cat "$HOME/.config/forgeworklights/animation")"
+
+echo ""
+echo "Errors..."
+check "Hyprland not running" "1" "$(env -u HYPRLAND_INSTANCE_SIGNATURE python3 "$AUTOMATION_PY" --once 2>/dev/null; echo $?)"
+check "replay without --socket" "1" "$(python3 "$AUTOMATION_PY" replay "$WORK/events.log" >/dev/null 2>&1; echo $?)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -0,0 +1,126 @@
+#!/bin/bash
+# Layered animation tests
+# Composites layer stacks with forgeworklights-effect layered and checks the
+# blend modes, opacities and parameters frame by frame (no daemon, no hardware)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+EFFECT_PY="$SCRIPT_DIR/../scripts/effect-host.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+WORK=$(mktemp -d)
+COMPOSITOR=
+trap '[ -n "$COMPOSITOR" ] && kill "$COMPOSITOR" 2>/dev/null; rm -rf "$WORK"' EXIT
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+CONFIG="$HOME/.config/forgeworklights"
+mkdir -p "$CONFIG" "$XDG_RUNTIME_DIR"
+echo "led_count = 22" > "$CONFIG/config.toml"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+# Frame N (hex; the first by default) of a stack given as the JSON list of its layers
+frame() { echo "{\"layers\": [$1]}" > "$WORK/layers.json"; python3 "$EFFECT_PY" layered --layers="$WORK/layers.json" --frames="${2:-1}" | tail -1; }
+# Apply a Python expression of a and b (0-255 channels) to every byte of two frames
+per_byte() { python3 -c 'import sys; f = eval("lambda a, b: " + sys.argv[1]); a, b = bytes.fromhex(sys.argv[2]), bytes.fromhex(sys.argv[3]); print(bytes(min(255, int(f(x, y) + 0.5)) for x, y in zip(a, b)).hex())' "$@"; }
+
+echo "========================================"
+echo "  Layered Animation Tests"
+echo "========================================"
+echo ""
+
+if ! python3 -c 'import numpy' 2>/dev/null; then
+    echo "NumPy is not installed; skipping"
+    exit 0
+fi
+
+echo "Blend modes..."
+static=$(frame '{"animation": "static"}')
+check "a frame per LED" "132" "$(echo -n "$static" | wc -c)"
+check "max of a layer and itself" "$static" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "max"}')"
+check "add" "$(per_byte 'a + b' "$static" "$static")" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "add"}')"
+check "multiply" "$(per_byte 'a * b / 255' "$static" "$static")" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "multiply"}')"
+check "screen" "$(per_byte '255 - (255 - a) * (255 - b) / 255' "$static" "$static")" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "screen"}')"
+sparkle=$(frame '{"animation": "sparkle"}' 10)
+check "max keeps the brighter layer" "$(per_byte 'max(a, b)' "$static" "$sparkle")" "$(frame '{"animation": "static"}, {"animation": "sparkle", "blend": "max"}' 10)"
+
+echo ""
+echo "Opacity..."
+check "bottom layer over black" "$(per_byte 'a / 2' "$static" "$static")" "$(frame '{"animation": "static", "opacity": 0.5}')"
+check "half an added layer" "$(per_byte 'a + (min(255, 2 * a) - a) / 2' "$static" "$static")" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "add", "opacity": 0.5}')"
+check "invisible layer" "$static" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "add", "opacity": 0}')"
+echo '{"layered": {"opacity_2": 0}}' > "$CONFIG/animation-params.json"
+check "Layered slider scales a layer" "$static" "$(frame '{"animation": "static"}, {"animation": "static", "blend": "add"}')"
+rm "$CONFIG/animation-params.json"
+
+echo ""
+echo "Parameters..."
+breathe=$(frame '{"animation": "breathe"}' 20)
+custom=$(frame '{"animation": "breathe", "params": {"period": 5}}' 20)
+check "layer parameters apply" "differ" "$([ "$breathe" != "$custom" ] && echo differ)"
+echo '{"breathe": {"period": 5}}' > "$CONFIG/animation-params.json"
+check "animation-params.json when the layer sets none" "$custom" "$(frame '{"animation": "breathe"}' 20)"
+rm "$CONFIG/animation-params.json"
+rm "$WORK/layers.json"
+check "sample is the built-in stack" "same" "$([ "$(python3 "$EFFECT_PY" layered --layers="$WORK/none.json" --frames=15)" = "$(python3 "$EFFECT_PY" layered --layers="$SCRIPT_DIR/../config/layers.json.sample" --frames=15)" ] && echo same)"
+
+echo ""
+echo "Compositor..."
+echo layered > "$CONFIG/animation"
+cp "$SCRIPT_DIR/../config/layers.json.sample" "$CONFIG/layers.json"
+python3 "$EFFECT_PY" layered --frames=90 > "$WORK/expected.txt"
+python3 "$EFFECT_PY" layered &
+COMPOSITOR=$!
+sleep 1
+check "one compositor per session" "0" "$(timeout 5 python3 "$EFFECT_PY" layered; echo $?)"
+python3 "$EFFECT_PY" consume --output="$WORK/frames.rgb" --frames=20 >/dev/null 2>&1
+check "frames reach the ring in order" "yes" "$(python3 -c 'import sys; n = 66; data = open(sys.argv[1], "rb").read(); got = [data[i:i + n].hex() for i in range(0, len(data), n)]; ref = open(sys.argv[2]).read().split(); start = ref.index(got[0]) if got[0] in ref else -1; print("yes" if start >= 0 and got == ref[start:start + len(got)] else "no")' "$WORK/frames.rgb" "$WORK/expected.txt")"
+echo static > "$CONFIG/animation"
+for _ in 1 2 3 4 5 6 7 8 9 10; do kill -0 "$COMPOSITOR" 2>/dev/null || break; sleep 0.2; done
+check "exits once deselected" "exited" "$(kill -0 "$COMPOSITOR" 2>/dev/null || echo exited)"
+check "ring removed" "none" "$([ -e "$XDG_RUNTIME_DIR/forgeworklights/effect.ring" ] || echo none)"
+COMPOSITOR=
+printf 'def frames(led_count):\n    for _ in range(5):\n        yield bytes(led_count * 3)\n' > "$WORK/plugin.py"
+echo layered > "$CONFIG/animation"
+python3 "$EFFECT_PY" run "$WORK/plugin.py" >/dev/null 2>&1
+check "a plugin hands back to layered" "layered" "$(cat "$CONFIG/animation")"
+sleep 1
+check "and restarts its compositor" "0" "$(timeout 5 python3 "$EFFECT_PY" layered; echo $?)"
+echo static > "$CONFIG/animation"
+sleep 1
+
+echo ""
+echo "Errors..."
+layers_error() { echo "$1" > "$WORK/bad.json"; python3 "$EFFECT_PY" layered --layers="$WORK/bad.json" --frames=1 >/dev/null 2>&1 || echo $?; }
+check "not JSON" "1" "$(layers_error '{"layers": [')"
+check "no layers" "1" "$(layers_error '{"layers": []}')"
+check "unknown animation" "1" "$(layers_error '{"layers": [{"animation": "plasma"}]}')"
+check "layered inside layered" "1" "$(layers_error '{"layers": [{"animation": "layered"}]}')"
+check "unknown blend mode" "1" "$(layers_error '{"layers": [{"animation": "wave", "blend": "overlay"}]}')"
+check "opacity out of range" "1" "$(layers_error '{"layers": [{"animation": "wave", "opacity": 2}]}')"
+check "unknown parameter" "1" "$(layers_error '{"layers": [{"animation": "wave", "params": {"period": 2}}]}')"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -0,0 +1,94 @@
+#!/bin/bash
+# Spatial LED layout tests
+# Extracts the layout from the shipped mount model and checks the lookup
+# tables and ripple frames built from it (no daemon, no hardware)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+LAYOUT_PY="$SCRIPT_DIR/../scripts/led-layout.py"
+EFFECT_PY="$SCRIPT_DIR/../scripts/effect-host.py"
+MODEL="$SCRIPT_DIR/../3D Models/Top_Plate_LED_Mount/Top_Plate_LED_Mount_V2.stl"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+mkdir -p "$HOME/.config/forgeworklights" "$XDG_RUNTIME_DIR"
+echo "led_count = 22" > "$HOME/.config/forgeworklights/config.toml"
+LAYOUT="$HOME/.config/forgeworklights/layout.json"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+# Table values of one LED: "distance angle x y" from `show` (its row is the one with a position)
+tables() { python3 "$LAYOUT_PY" show --leds="${2:-22}" | awk -v led="$1" '$1 == led && /,/ { print $(NF-3), $(NF-2), $(NF-1), $NF }'; }
+
+echo "========================================"
+echo "  Spatial Layout Tests"
+echo "========================================"
+echo ""
+
+echo "Model..."
+python3 "$LAYOUT_PY" model "$MODEL" 2>/dev/null
+leds() { python3 -c 'import json, sys; print(" ".join(str(p[int(sys.argv[2])]) for p in json.load(open(sys.argv[1]))["leds"]))' "$LAYOUT" "$1"; }
+check "one LED per strip position" "22" "$(leds 0 | wc -w)"
+check "11 LEDs on each strip bed" "11 11" "$(leds 1 | tr ' ' '\n' | sort | uniq -c | awk '{print $1}' | xargs)"
+check "LEDs lie on the bed" "8.5" "$(leds 2 | tr ' ' '\n' | sort -u | xargs)"
+check "strip starts at the cable corner" "42.273 50.25" "$(python3 -c 'import json, sys; print(*json.load(open(sys.argv[1]))["leds"][0][:2])' "$LAYOUT")"
+check "shipped layout is up to date" "same" "$(cmp -s "$LAYOUT" "$SCRIPT_DIR/../config/layout.json" && echo same)"
+check "--reverse starts at the other end" "35.568" "$(python3 "$LAYOUT_PY" model "$MODEL" --reverse --output=- | sed -n 6p | tr -d '[],' | awk '{print $1}')"
+
+echo ""
+echo "Tables..."
+check "middle of a bed is nearest the center" "69 192 132 0" "$(tables 5)"
+check "far corner" "255 117 0 255" "$(tables 21)"
+check "resampled for a longer strip" "44" "$(python3 "$LAYOUT_PY" show --leds=44 | awk '$1 ~ /^[0-9]+$/ && /,/' | wc -l)"
+
+echo ""
+echo "Ripple..."
+frames=$(python3 "$EFFECT_PY" ripple --frames=3)
+check "one frame per line" "3" "$(echo "$frames" | wc -l)"
+check "a frame per LED" "132" "$(echo "$frames" | head -1 | tr -d '\n' | wc -c)"
+check "waves move" "3" "$(echo "$frames" | sort -u | wc -l)"
+frame=$(echo "$frames" | sed -n 2p)
+check "LEDs as far from the center match" "${frame:30:6}" "${frame:96:6}"
+check "other LEDs differ" "differ" "$([ "${frame:30:6}" != "${frame:0:6}" ] && echo differ)"
+
+echo ""
+echo "Points..."
+printf '# a square\n0 0\n10,0\n10 10\n0 10\n' > "$WORK/points.txt"
+python3 "$LAYOUT_PY" points "$WORK/points.txt" 2>/dev/null
+check "corners at the same distance" "255 255 255 255" "$(for i in 0 1 2 3; do tables $i 4 | awk '{print $1}'; done | xargs)"
+check "angles a quarter turn apart" "160 224 32 96" "$(for i in 0 1 2 3; do tables $i 4 | awk '{print $2}'; done | xargs)"
+
+echo ""
+echo "Errors..."
+check "model without a strip bed" "1" "$(python3 "$LAYOUT_PY" model "$SCRIPT_DIR/../3D Models/BlankLEDCover/BlankLEDCover.stl" --output=- >/dev/null 2>&1; echo $?)"
+check "not a model" "1" "$(python3 "$LAYOUT_PY" model "$SCRIPT_DIR/README.md" --output=- 2>/dev/null; echo $?)"
+check "bad point" "1" "$(echo "1 x" | python3 "$LAYOUT_PY" points - --output=- 2>/dev/null; echo $?)"
+check "unknown axis" "1" "$(python3 "$EFFECT_PY" ripple --axis=z --frames=1 2>/dev/null; echo $?)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
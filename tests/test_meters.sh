@@ -0,0 +1,154 @@
+#!/bin/bash
+# System meter tests against a fake /proc tree
+# Builds stat / meminfo / pressure / net/dev files in a temporary directory and
+# checks the levels `forgeworklights-effect meters --levels` reads from them,
+# one sample per line sent to it (no daemon or ring is involved)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+EFFECT_PY="$SCRIPT_DIR/../scripts/effect-host.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+WORK=$(mktemp -d)
+METERS=
+trap '[ -n "$METERS" ] && kill "$METERS" 2>/dev/null; rm -rf "$WORK"' EXIT
+PROC="$WORK/proc"
+SYSFS="$WORK/sys"
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+mkdir -p "$HOME" "$XDG_RUNTIME_DIR" "$PROC/pressure" "$PROC/net"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+cores() {  # cores N:BUSY:IDLE ... (cumulative jiffies, one argument per online core)
+    echo "cpu  0 0 0 0 0 0 0 0 0 0" > "$PROC/stat"
+    for core in "$@"; do
+        IFS=: read -r n busy idle <<< "$core"
+        echo "cpu$n $busy 0 0 $idle 0 0 0 0 0 0" >> "$PROC/stat"
+    done
+    echo "intr 0" >> "$PROC/stat"
+}
+
+net() {  # net LO_BYTES ETH0_BYTES WLAN0_BYTES (received; sent is the same again)
+    {
+        echo "Inter-|   Receive                                                |  Transmit"
+        echo " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed"
+        echo "    lo: $1 0 0 0 0 0 0 0 $1 0 0 0 0 0 0 0"
+        echo "  eth0: $2 0 0 0 0 0 0 0 $2 0 0 0 0 0 0 0"
+        echo " wlan0: $3 0 0 0 0 0 0 0 $3 0 0 0 0 0 0 0"
+    } > "$PROC/net/dev"
+}
+
+# Keep a meters process reading samples from fd 3 and printing levels to fd 4;
+# it has taken a first sample (its baseline) once start returns
+start() {
+    rm -f "$WORK/in" "$WORK/out"
+    mkfifo "$WORK/in" "$WORK/out"
+    python3 "$EFFECT_PY" meters "$@" --proc="$PROC" --sysfs="$SYSFS" --levels < "$WORK/in" > "$WORK/out" &
+    METERS=$!
+    exec 3> "$WORK/in" 4< "$WORK/out"
+    sample
+}
+sample() { echo >&3; read -r -t 10 LEVELS <&4 || LEVELS=; }
+stop() { exec 3>&-; cat <&4 > /dev/null; exec 4<&-; wait "$METERS" || true; METERS=; }
+
+echo "========================================"
+echo "  System Meter Tests (fake /proc)"
+echo "========================================"
+echo ""
+
+echo "CPU..."
+cores 0:0:0 1:0:0
+start cpu
+cores 0:100:0 1:0:100
+sample
+check "busy and idle core" "1.00 0.00" "$LEVELS"
+cores 0:150:50 1:25:175
+sample
+check "shares of the last interval" "0.50 0.25" "$LEVELS"
+cores 0:250:50
+sample
+check "core offline: counters start over" "0.00 0.00" "$LEVELS"
+cores 0:350:50
+sample
+check "remaining core after one went offline" "1.00 0.00" "$LEVELS"
+cores 0:350:150 1:25:275
+sample
+check "core back online: counters start over" "0.00 0.00" "$LEVELS"
+cores 0:450:150 1:25:375
+sample
+check "both cores again" "1.00 0.00" "$LEVELS"
+cores 1:125:375
+sample
+cores 1:225:375
+sample
+check "cores keep their place" "0.00 1.00" "$LEVELS"
+stop
+
+echo ""
+echo "Memory, pressure and network..."
+printf 'MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    250 kB\n' > "$PROC/meminfo"
+printf 'some avg10=10.00 avg60=0.00 avg300=0.00 total=0\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n' > "$PROC/pressure/memory"
+printf 'some avg10=40.00 avg60=0.00 avg300=0.00 total=0\n' > "$PROC/pressure/io"
+net 0 0 0
+start memory pressure pressure:io network network:wlan0
+sample
+check "memory, pressure, idle network" "0.75 | 0.50 | 1.00 | 0.00 | 0.00" "$LEVELS"
+net 1000000000 0 0
+sample
+check "loopback traffic is left out" "0.75 | 0.50 | 1.00 | 0.00 | 0.00" "$LEVELS"
+net 1000000000 1000000000 0
+sample
+check "traffic on one interface" "0.75 | 0.50 | 1.00 | 1.00 | 0.00" "$LEVELS"
+net 1000000000 1000000000 0
+sample
+check "no traffic since" "0.75 | 0.50 | 1.00 | 0.00 | 0.00" "$LEVELS"
+stop
+
+echo ""
+echo "Temperature..."
+mkdir -p "$SYSFS/class/hwmon/hwmon0"
+echo k10temp > "$SYSFS/class/hwmon/hwmon0/name"
+echo 65000 > "$SYSFS/class/hwmon/hwmon0/temp1_input"
+check "share of THERMAL_RANGE" "0.50" "$(echo | python3 "$EFFECT_PY" meters thermal --sysfs="$SYSFS" --levels | sed -n 1p)"
+
+echo ""
+echo "Budget..."
+budget() { printf '\n\n\n\n\n' | python3 "$EFFECT_PY" meters memory --proc="$PROC" "$@" --levels | tail -1; }
+check "within budget: the requested rate" "interval 0.25" "$(budget)"
+check "over budget: backs off to the slowest" "interval 2" "$(budget --budget=0.000000001)"
+
+echo ""
+echo "Errors..."
+meters_error() { python3 "$EFFECT_PY" meters "$@" --proc="$PROC" --sysfs="$WORK/none" --levels < /dev/null > /dev/null 2>&1 || echo $?; }
+check "unknown meter" "1" "$(meters_error gpu)"
+check "missing pressure file" "1" "$(meters_error pressure:cpu)"
+check "no temperature sensor" "1" "$(meters_error thermal)"
+echo "cpu  0 0 0 0 0 0 0 0 0 0" > "$PROC/stat"
+check "no per-core lines" "1" "$(meters_error cpu)"
+check "bad budget" "1" "$(meters_error memory --budget=0)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
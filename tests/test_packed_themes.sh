@@ -0,0 +1,157 @@
+#!/bin/bash
+# Packed theme database tests
+# Writes led_themes.json (and its packed copy, led_themes.bin) with
+# tui.themes_db.update_db, runs the daemon through fw_clip_helper (no
+# hardware) and checks that the frame it shows is the gradient Python
+# computes, with the packed copy, without it, and when it is stale
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+BUILD_DIR="${1:-./build}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+if [ ! -f "$BUILD_DIR/forgeworklights" ] || [ ! -f "$BUILD_DIR/fw_clip_helper" ]; then
+    echo -e "${RED}Error: forgeworklights and fw_clip_helper not found in $BUILD_DIR${NC}"
+    echo "Build them first with: cmake --build build"
+    exit 1
+fi
+BUILD_DIR="$(cd "$BUILD_DIR" && pwd)"
+
+WORK=$(mktemp -d)
+DAEMON=
+trap '[ -n "$DAEMON" ] && kill "$DAEMON" 2>/dev/null; rm -rf "$WORK"' EXIT
+# A home of our own: static on one of our themes, full brightness, no gamma,
+# so the daemon's frame is the theme's gradient byte for byte
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+export PYTHONPATH="$SCRIPT_DIR/../scripts${PYTHONPATH:+:$PYTHONPATH}"
+CONFIG="$HOME/.config/forgeworklights"
+DB="$CONFIG/led_themes.json"
+mkdir -p "$CONFIG" "$XDG_RUNTIME_DIR"
+printf 'led_count = 22\ngamma_exponent = 1.0\n' > "$CONFIG/config.toml"
+echo static > "$CONFIG/animation"
+echo 1.0 > "$CONFIG/brightness"
+echo dusk > "$CONFIG/led-theme"
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+# Run the daemon until it has published a frame; leaves the frame (hex) in
+# FRAME and "packed" or "json" in SOURCE, from its log
+run_daemon() {
+    rm -f "$XDG_RUNTIME_DIR/forgeworklights/frame.bin"
+    FORGEWORKLIGHTS_ROOT_HELPER="$BUILD_DIR/fw_clip_helper" "$BUILD_DIR/forgeworklights" daemon \
+        > "$WORK/daemon.log" 2>&1 &
+    DAEMON=$!
+    for _ in $(seq 50); do
+        [ -s "$XDG_RUNTIME_DIR/forgeworklights/frame.bin" ] && break
+        sleep 0.1
+    done
+    sleep 0.5
+    kill "$DAEMON"
+    wait "$DAEMON" || true
+    DAEMON=
+    FRAME=$(python3 -c 'import sys; print(open(sys.argv[1], "rb").read()[32:].hex())' \
+        "$XDG_RUNTIME_DIR/forgeworklights/frame.bin" 2>/dev/null || true)
+    SOURCE=$(grep -q 'themes from database (packed)' "$WORK/daemon.log" && echo packed || echo json)
+}
+
+# The gradient Python computes for theme KEY of the JSON, over LEDS LEDs
+expected() {
+    python3 -c '
+import json, sys
+from tui import themes_db
+from tui.utils.colors import hex_to_rgb
+themes = themes_db.load(json.load(open(sys.argv[1])))
+print(b"".join(bytes(hex_to_rgb(c)) for c in themes_db.gradient(themes[sys.argv[2]], int(sys.argv[3]))).hex())' \
+        "$DB" "$1" "$2"
+}
+
+# Replace the themes of led_themes.json through update_db (rewrites led_themes.bin)
+update_db() {
+    python3 -c '
+import json, sys
+from tui import themes_db
+themes = json.loads(sys.argv[1])
+themes_db.update_db(lambda data: data.update(themes=themes))' "$1"
+}
+
+echo "========================================"
+echo "  Packed Theme Database Tests"
+echo "========================================"
+echo ""
+
+echo "Packed copy..."
+update_db '{"aurora": {"name": "Aurora", "colors": ["#00ff80", "#0040ff"]},
+            "dusk": {"name": "Dusk", "colors": ["#ff0000", "#ffd000", "#2000ff"]},
+            "ember": {"name": "Ember", "colors": ["#401000", "#ff6000", "#ffffff", "#ff2000"]}}'
+check "update_db writes the packed copy" "yes" "$([ -s "$CONFIG/led_themes.bin" ] && echo yes)"
+check "current for the JSON in Python" "$(expected dusk 22)" \
+    "$(python3 -c 'from tui import themes_db; p = themes_db.open_packed(); print(bytes(p.rgb("dusk")).hex())')"
+run_daemon
+check "daemon maps it" "packed" "$SOURCE"
+check "daemon frame is Python's gradient" "$(expected dusk 22)" "$FRAME"
+packed_frame=$FRAME
+
+echo ""
+echo "JSON only..."
+rm "$CONFIG/led_themes.bin"
+run_daemon
+check "daemon reads the JSON" "json" "$SOURCE"
+check "same frame as from the packed copy" "$packed_frame" "$FRAME"
+
+echo ""
+echo "Stale packed copy..."
+update_db "$(python3 -c 'import json, sys; print(json.dumps(json.load(open(sys.argv[1]))["themes"]))' "$DB")"
+check "packed copy written again" "packed" "$(run_daemon; echo "$SOURCE")"
+touch "$DB"
+check "touched JSON: ignored in Python" "None" "$(python3 -c 'from tui import themes_db; print(themes_db.open_packed())')"
+run_daemon
+check "touched JSON: ignored by the daemon" "json" "$SOURCE"
+check "touched JSON: same frame" "$packed_frame" "$FRAME"
+# Edited behind update_db's back: the packed copy still holds the old colors
+python3 -c '
+import json, sys
+data = json.load(open(sys.argv[1]))
+data["themes"]["dusk"]["colors"] = ["#0000ff", "#00ff00", "#ff00ff"]
+json.dump(data, open(sys.argv[1], "w"))' "$DB"
+run_daemon
+check "edited JSON: ignored by the daemon" "json" "$SOURCE"
+check "edited JSON: the new colors" "$(expected dusk 22)" "$FRAME"
+
+echo ""
+echo "LED count..."
+update_db "$(python3 -c 'import json, sys; print(json.dumps(json.load(open(sys.argv[1]))["themes"]))' "$DB")"
+printf 'led_count = 30\ngamma_exponent = 1.0\n' > "$CONFIG/config.toml"
+check "other led_count: ignored in Python" "None" "$(python3 -c 'from tui import themes_db; print(themes_db.open_packed())')"
+run_daemon
+check "other led_count: ignored by the daemon" "json" "$SOURCE"
+check "other led_count: a frame of 30 LEDs" "180" "${#FRAME}"
+stale_frame=$FRAME
+rm "$CONFIG/led_themes.bin"
+run_daemon
+check "other led_count: same frame as from the JSON alone" "$FRAME" "$stale_frame"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -0,0 +1,86 @@
+#!/bin/bash
+# Golden-frame comparison of the daemon's animations and the Python reference renderer
+# Renders seeded frames with `forgeworklights render` and scripts/render-frames.py
+# and requires them to be byte-identical (needs python3 with NumPy)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+BINARY="${1:-./build/forgeworklights}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+RENDER_PY="$SCRIPT_DIR/../scripts/render-frames.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+# Compare both renderers for one argument set
+test_case() {
+    local name="$1"
+    shift
+    local args=("$@")
+
+    echo -n "Testing: $name ... "
+
+    local expected actual
+    expected=$("$BINARY" render "${args[@]}")
+    actual=$(python3 "$RENDER_PY" "${args[@]}")
+    if [ -n "$expected" ] && [ "$expected" = "$actual" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        local line
+        line=$(diff <(echo "$expected") <(echo "$actual") | head -1)
+        echo -e "${RED}FAIL${NC} (first difference: $line)"
+        ((++TESTS_FAILED))
+    fi
+}
+
+echo "========================================"
+echo "  Animation Golden-Frame Tests"
+echo "========================================"
+echo ""
+
+if [ ! -f "$BINARY" ]; then
+    echo -e "${RED}Error: forgeworklights binary not found at $BINARY${NC}"
+    echo "Build it first with: cmake --build build"
+    exit 1
+fi
+
+THEME=("#470766" "#7aa2f7" "#c0caf5")
+FRAMES="--frames=600"
+
+echo "Default parameters, fallback gradient..."
+for anim in static breathe wave ripple runner bounce sparkle gradient-shift drift; do
+    for seed in 0 7; do
+        test_case "$anim (seed $seed)" "$anim" --seed=$seed $FRAMES
+    done
+done
+
+echo ""
+echo "Custom parameters, three-stop theme..."
+test_case "breathe fast" breathe period=1.0 $FRAMES "${THEME[@]}"
+test_case "wave fast" wave speed=2.0 $FRAMES "${THEME[@]}"
+test_case "ripple wide" ripple period=0.5 ripple_width=1.0 $FRAMES "${THEME[@]}"
+test_case "runner crowded" runner speed=50 trail_length=15 num_runners=5 --seed=3 $FRAMES "${THEME[@]}"
+test_case "bounce large" bounce period=0.5 segment_size=10 $FRAMES "${THEME[@]}"
+test_case "sparkle busy" sparkle sparkle_rate=0.5 sparkle_duration=5 --seed=3 $FRAMES "${THEME[@]}"
+test_case "gradient-shift" gradient-shift period=2.0 shift_amount=2.0 $FRAMES "${THEME[@]}"
+test_case "drift twinkle" drift min_speed=0.1 max_speed=20 twinkle=1.0 --seed=3 $FRAMES "${THEME[@]}"
+
+echo ""
+echo "Other strip lengths and frame rates..."
+test_case "runner 1 LED" runner --leds=1 --seed=5 $FRAMES "${THEME[@]}"
+test_case "bounce 60 LEDs" bounce --leds=60 --fps=60 $FRAMES "${THEME[@]}"
+test_case "drift 60 LEDs" drift --leds=60 --fps=24 --seed=5 twinkle=0.5 $FRAMES "${THEME[@]}"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
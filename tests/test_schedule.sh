@@ -0,0 +1,111 @@
+#!/bin/bash
+# Time-of-day scheduler against a fixed clock
+# Checks when `forgeworklights-schedule` rules are due (clock times and
+# sunrise/sunset in a fixed time zone) and which settings hold at a given
+# moment, with `list` and `scene` (no daemon, no waiting)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+SCHEDULE_PY="$SCRIPT_DIR/../scripts/led-schedule.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+export TZ=Europe/Berlin
+mkdir -p "$HOME" "$XDG_RUNTIME_DIR"
+
+cat > "$WORK/schedule.toml" <<'TOML'
+fade = 30
+latitude = 52.52
+longitude = 13.40
+
+[[rules]]
+at = "07:30"
+brightness = 1.0
+temperature = 6500
+
+[[rules]]
+at = "sunset-30m"
+temperature = 3400
+
+[[rules]]
+at = "sunset"
+theme = "nord"
+fade = 600
+
+[[rules]]
+at = "23:00"
+brightness = "20%"
+
+[[rules]]
+at = "sunrise+1h"
+theme = "match"
+
+[[rules]]
+at = "25:00"
+brightness = 0.5
+TOML
+
+schedule() {
+    python3 "$SCHEDULE_PY" "$1" --schedule="$WORK/schedule.toml" "${@:2}" 2>/dev/null
+}
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+echo "========================================"
+echo "  Scheduler Tests (Berlin, fixed dates)"
+echo "========================================"
+echo ""
+
+echo "Event times..."
+summer=$(schedule list --date=2026-06-21)
+winter=$(schedule list --date=2026-12-21)
+check "events in time order" "sunrise+1h 07:30 sunset-30m sunset 23:00" "$(echo "$summer" | awk '{print $3}' | xargs)"
+check "summer sunset" "21:34" "$(echo "$summer" | awk '$3 == "sunset" {print $2}')"
+check "winter sunset" "15:54" "$(echo "$winter" | awk '$3 == "sunset" {print $2}')"
+check "sunrise offset" "05:44" "$(echo "$summer" | awk '$3 == "sunrise+1h" {print $2}')"
+check "rule fade" "(fade 600s)" "$(echo "$summer" | awk '$3 == "sunset" {print $5, $6}')"
+check "two days" "10" "$(schedule list --date=2026-06-21 --days=2 | wc -l)"
+check "invalid rule reported" "1" "$(python3 "$SCHEDULE_PY" list --schedule="$WORK/schedule.toml" 2>&1 >/dev/null | grep -c '25:00')"
+
+echo ""
+echo "Settings in effect..."
+check "late evening" "led_theme=nord brightness=0.2 temperature=3400" "$(schedule scene --at='2026-06-21 23:30')"
+check "past midnight" "led_theme=nord brightness=0.2 temperature=3400" "$(schedule scene --at='2026-06-22 03:00')"
+check "after sunrise" "led_theme=match brightness=0.2 temperature=3400" "$(schedule scene --at='2026-06-22 07:00')"
+check "daytime" "led_theme=match brightness=1 temperature=6500" "$(schedule scene --at='2026-06-22 12:00')"
+check "winter afternoon" "led_theme=nord brightness=1 temperature=3400" "$(schedule scene --at='2026-12-21 16:00')"
+
+echo ""
+echo "Errors..."
+check "sun rule without a location" "1" \
+    "$(printf '[[rules]]\nat = "sunset"\ntheme = "nord"\n' > "$WORK/nowhere.toml"
+       python3 "$SCHEDULE_PY" list --schedule="$WORK/nowhere.toml" 2>&1 | grep -c 'latitude and longitude')"
+check "bad date" "1" "$(schedule list --date=yesterday >/dev/null; echo $?)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -0,0 +1,108 @@
+#!/bin/bash
+# Thermal effect against a fake sysfs tree
+# Builds hwmon / thermal_zone files in a temporary directory and checks the
+# sensors `forgeworklights-effect thermal` picks and the frames it renders
+# (printed with --frames, so no daemon or ring is involved)
+
+set -e
+
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+EFFECT_PY="$SCRIPT_DIR/../scripts/effect-host.py"
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+SYSFS="$WORK/sys"
+# An empty home: 22 LEDs and the fallback gradient, whatever the real config says
+export HOME="$WORK/home"
+export XDG_RUNTIME_DIR="$WORK/run"
+mkdir -p "$HOME" "$XDG_RUNTIME_DIR"
+
+hwmon() {  # hwmon DIR NAME
+    mkdir -p "$SYSFS/class/hwmon/$1"
+    echo "$2" > "$SYSFS/class/hwmon/$1/name"
+}
+
+temp() {  # temp FILE MILLIDEGREES
+    echo "$2" > "$SYSFS/class/$1"
+}
+
+thermal() {
+    python3 "$EFFECT_PY" thermal --sysfs="$SYSFS" "$@"
+}
+
+check() {  # check NAME EXPECTED ACTUAL
+    echo -n "Testing: $1 ... "
+    if [ -n "$2" ] && [ "$2" = "$3" ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((++TESTS_PASSED))
+    else
+        echo -e "${RED}FAIL${NC} (expected '$2', got '$3')"
+        ((++TESTS_FAILED))
+    fi
+}
+
+echo "========================================"
+echo "  Thermal Effect Tests (fake sysfs)"
+echo "========================================"
+echo ""
+
+hwmon hwmon0 nvme
+temp hwmon/hwmon0/temp1_input 30000
+hwmon hwmon2 k10temp
+temp hwmon/hwmon2/temp1_input 65000
+echo Tctl > "$SYSFS/class/hwmon/hwmon2/temp1_label"
+mkdir "$SYSFS/class/hwmon/hwmon2/temp2_input"  # unreadable input (EISDIR)
+mkdir -p "$SYSFS/class/thermal/thermal_zone0"
+echo acpitz > "$SYSFS/class/thermal/thermal_zone0/type"
+temp thermal/thermal_zone0/temp 99000
+
+echo "Sensor discovery..."
+listing=$(python3 "$EFFECT_PY" sensors --sysfs="$SYSFS")
+check "k10temp preferred" "k10temp/Tctl" "$(echo "$listing" | awk '$1 == "*" {print $2}' | head -1)"
+check "other inputs listed" "nvme/temp1 acpitz/thermal_zone0" "$(echo "$listing" | awk '$1 != "*" {print $1}' | xargs)"
+check "unreadable input reported" "unreadable" "$(echo "$listing" | grep temp2 | grep -o unreadable)"
+
+echo ""
+echo "Fill levels (65°C)..."
+empty=$(thermal --low=65 --high=90 --frames=1)
+full=$(thermal --low=0 --high=65 --frames=1)
+half=$(thermal --low=40 --high=90 --frames=1)
+check "frame length" "132" "${#half}"
+check "empty and full differ" "yes" "$([ "$empty" != "$full" ] && echo yes)"
+check "half: 11 LEDs lit" "${full:0:66}" "${half:0:66}"
+check "half: rest dimmed" "${empty:66}" "${half:66}"
+quarter=$(thermal --low=45 --high=125 --frames=1)  # 0.25 * 22 = 5.5 LEDs
+check "quarter: 5 LEDs lit" "${full:0:30}" "${quarter:0:30}"
+check "quarter: sixth LED blended" "yes" \
+    "$([ "${quarter:30:6}" != "${full:30:6}" ] && [ "${quarter:30:6}" != "${empty:30:6}" ] && echo yes)"
+check "quarter: rest dimmed" "${empty:36}" "${quarter:36}"
+
+echo ""
+echo "Sensor selection..."
+check "--sensor family" "$empty" "$(thermal --sensor=nvme --low=30 --high=90 --frames=1)"
+check "--sensor label" "$full" "$(thermal --sensor=acpitz/thermal_zone0 --low=0 --high=99 --frames=1)"
+temp hwmon/hwmon2/temp3_input 90000
+check "hottest input counts" "$full" "$(thermal --low=0 --high=90 --frames=1)"
+check "steady reading, steady frames" "$full$full$full" "$(thermal --low=0 --high=90 --frames=3 | tr -d '\n')"
+
+echo ""
+echo "Errors..."
+check "unknown sensor" "1" "$(thermal --sensor=bogus --frames=1 2>/dev/null; echo $?)"
+check "rate below 2 Hz" "1" "$(thermal --rate=1 --frames=1 2>/dev/null; echo $?)"
+check "empty sysfs" "1" "$(python3 "$EFFECT_PY" sensors --sysfs="$WORK/none" 2>/dev/null; echo $?)"
+
+echo ""
+echo "========================================"
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo -e "${GREEN}All $TESTS_PASSED tests passed!${NC}"
+    exit 0
+else
+    echo -e "${RED}$TESTS_FAILED tests failed, $TESTS_PASSED passed${NC}"
+    exit 1
+fi
@@ -125,6 +125,48 @@ if [ -f /usr/local/bin/forgeworklights-sync-themes ]; then
     pause_step
 fi
 
+if [ -f /usr/local/bin/forgeworklights-quick ]; then
+    sudo rm /usr/local/bin/forgeworklights-quick
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-quick"
+    pause_step
+fi
+
+if [ -f /usr/local/bin/forgeworklights-effect ]; then
+    sudo rm /usr/local/bin/forgeworklights-effect
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-effect"
+    pause_step
+fi
+
+if [ -f /usr/local/bin/forgeworklights-hyprland ]; then
+    sudo rm /usr/local/bin/forgeworklights-hyprland
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-hyprland"
+    pause_step
+fi
+
+if [ -f /usr/local/bin/forgeworklights-schedule ]; then
+    sudo rm /usr/local/bin/forgeworklights-schedule
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-schedule"
+    pause_step
+fi
+
+if [ -f /usr/local/bin/forgeworklights-layout ]; then
+    sudo rm /usr/local/bin/forgeworklights-layout
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-layout"
+    pause_step
+fi
+
+if [ -f /usr/local/bin/forgeworklights-clip ]; then
+    sudo rm /usr/local/bin/forgeworklights-clip
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-clip"
+    pause_step
+fi
+
+if [ -f /usr/local/bin/forgeworklights-waybar ]; then
+    sudo rm /usr/local/bin/forgeworklights-waybar
+    echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-waybar"
+    pause_step
+fi
+
 if [ -f /usr/local/bin/forgeworklights-menu-floating ]; then
     sudo rm /usr/local/bin/forgeworklights-menu-floating
     echo -e "${GREEN}✓${NC} Removed /usr/local/bin/forgeworklights-menu-floating"
@@ -166,6 +208,12 @@ if [ -f /usr/local/libexec/fw_root_helper ]; then
     pause_step
 fi
 
+if [ -f /usr/local/libexec/fw_clip_helper ]; then
+    sudo rm /usr/local/libexec/fw_clip_helper
+    echo -e "${GREEN}✓${NC} Removed /usr/local/libexec/fw_clip_helper"
+    pause_step
+fi
+
 # Remove TUI package module
 if command -v python3 &> /dev/null; then
     TUI_INSTALL_DIR=$(python3 -c "import site; print(site.getsitepackages()[0])" 2>/dev/null)/tui
@@ -374,8 +422,16 @@ echo "Files removed:"
 echo "  - /usr/local/bin/forgeworklights"
 echo "  - /usr/local/bin/forgeworklights-menu"
 echo "  - /usr/local/bin/forgeworklights-sync-themes"
+echo "  - /usr/local/bin/forgeworklights-quick"
+echo "  - /usr/local/bin/forgeworklights-effect"
+echo "  - /usr/local/bin/forgeworklights-hyprland"
+echo "  - /usr/local/bin/forgeworklights-schedule"
+echo "  - /usr/local/bin/forgeworklights-layout"
+echo "  - /usr/local/bin/forgeworklights-clip"
+echo "  - /usr/local/bin/forgeworklights-waybar"
 echo "  - /usr/local/bin/forgeworklights-menu-floating"
 echo "  - /usr/local/libexec/fw_root_helper"
+echo "  - /usr/local/libexec/fw_clip_helper"
 echo "  - ~/.config/systemd/user/forgeworklights.service"
 echo ""
 if [ ${#BACKUP_PATHS[@]} -gt 0 ]; then